@@ -15,7 +15,10 @@ Versión: 4.0-railway-fixed
 """
 
 import os
+import time
+import importlib.util
 import logging
+import click
 from datetime import datetime
 from flask import Flask, jsonify, render_template, send_from_directory
 from flask_login import LoginManager, login_required, current_user
@@ -54,6 +57,38 @@ except Exception as e:
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     logger.warning("⚠️ Usando configuración de emergencia")
 
+def _cargar_motor_db():
+    """
+    Carga services/motor_db_service.py sin ejecutar services/__init__.py, que
+    importa los modelos y todos los servicios: un error en cualquiera de ellos
+    no debe dejar la aplicación con el pool por defecto.
+    """
+    nombre = 'services.motor_db_service'
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services', 'motor_db_service.py')
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    # Registrado con su nombre real: el import posterior del paquete reutiliza este módulo
+    # y PoolInstrumentado sigue reportando al mismo metricas_pool que lee /health/db
+    sys.modules[nombre] = modulo
+    try:
+        spec.loader.exec_module(modulo)
+    except BaseException:
+        del sys.modules[nombre]
+        raise
+    return modulo
+
+
+# Pool de conexiones según el perfil de despliegue (sync, gevent o SQLite)
+try:
+    motor_db = _cargar_motor_db()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = motor_db.opciones_motor(app.config['SQLALCHEMY_DATABASE_URI'])
+    logger.info(f"✅ Pool de base de datos: perfil {motor_db.perfil_db(app.config['SQLALCHEMY_DATABASE_URI'])}")
+except Exception as e:
+    logger.exception(f"❌ Error configurando pool de base de datos: {e}. "
+                     f"Se usan las opciones por defecto de SQLAlchemy, sin perfil ni métricas del pool")
+
 # Inicialización de extensiones
 try:
     from models import db, Usuario
@@ -63,6 +98,14 @@ except Exception as e:
     logger.error(f"❌ Error importando modelos: {e}")
     sys.exit(1)
 
+# Pragmas de SQLite y métricas del pool
+try:
+    from services.motor_db_service import configurar_motor
+    with app.app_context():
+        configurar_motor(db.engine)
+except Exception as e:
+    logger.error(f"❌ Error instrumentando pool de base de datos: {e}")
+
 # Configuración de Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -105,6 +148,105 @@ try:
 except Exception as e:
     logger.error(f"❌ Error registrando blueprints: {e}")
 
+# Blueprints adicionales (registrados por separado para no depender del bloque anterior)
+try:
+    from routes.exportaciones import exportaciones_bp
+    from routes.notificaciones import notificaciones_bp
+    from routes.eventos import eventos_bp
+    from routes.reportes import reportes_bp
+    from routes.despacho import despacho_bp
+    from routes.heartbeats import heartbeats_bp
+    from routes.telemetria import telemetria_bp
+
+    app.register_blueprint(exportaciones_bp)
+    app.register_blueprint(notificaciones_bp)
+    app.register_blueprint(eventos_bp)
+    app.register_blueprint(reportes_bp)
+    app.register_blueprint(despacho_bp)
+    app.register_blueprint(heartbeats_bp)
+    app.register_blueprint(telemetria_bp)
+
+    logger.info("✅ Blueprints adicionales registrados correctamente")
+except Exception as e:
+    logger.error(f"❌ Error registrando blueprints adicionales: {e}")
+
+# Canal de eventos en tiempo real (SSE)
+try:
+    from services.eventos_service import eventos_broker
+    eventos_broker.init_app(app)
+except Exception as e:
+    logger.error(f"❌ Error inicializando canal de eventos: {e}")
+
+# Ingesta de heartbeats por lotes
+try:
+    from services.heartbeat_service import ingestor_heartbeats
+    ingestor_heartbeats.init_app(app)
+except Exception as e:
+    logger.error(f"❌ Error inicializando ingesta de heartbeats: {e}")
+
+# Rollups de fallas para reportes
+try:
+    from services.falla_rollup_service import registrar_listeners as registrar_listeners_rollup
+    registrar_listeners_rollup()
+except Exception as e:
+    logger.error(f"❌ Error registrando rollups de fallas: {e}")
+
+# Totales de confiabilidad (MTTR/MTBF) por equipo
+try:
+    from services.confiabilidad_service import registrar_listeners as registrar_listeners_confiabilidad
+    registrar_listeners_confiabilidad()
+except Exception as e:
+    logger.error(f"❌ Error registrando totales de confiabilidad: {e}")
+
+# Caché de disponibilidad diaria por equipo
+try:
+    from services.disponibilidad_service import registrar_listeners as registrar_listeners_disponibilidad
+    registrar_listeners_disponibilidad()
+except Exception as e:
+    logger.error(f"❌ Error registrando caché de disponibilidad: {e}")
+
+# Contadores de carga de trabajo por técnico
+try:
+    from services.carga_tecnico_service import registrar_listeners as registrar_listeners_carga
+    registrar_listeners_carga()
+except Exception as e:
+    logger.error(f"❌ Error registrando contadores de carga de técnicos: {e}")
+
+# Caché de nombres de equipos (se invalida al renombrar, mover o eliminar)
+try:
+    from services.nombres_equipo_service import registrar_listeners as registrar_listeners_nombres
+    registrar_listeners_nombres()
+except Exception as e:
+    logger.error(f"❌ Error registrando caché de nombres de equipos: {e}")
+
+# Índice de presupuesto PoE por switch
+try:
+    from services.presupuesto_poe_service import registrar_listeners as registrar_listeners_poe
+    registrar_listeners_poe()
+except Exception as e:
+    logger.error(f"❌ Error registrando índice de presupuesto PoE: {e}")
+
+# Índice de ocupación de unidades de rack por gabinete
+try:
+    from services.ocupacion_gabinete_service import registrar_listeners as registrar_listeners_gabinetes
+    registrar_listeners_gabinetes()
+except Exception as e:
+    logger.error(f"❌ Error registrando índice de ocupación de gabinetes: {e}")
+
+# Puntajes de salud de la flota (se recalculan al cambiar equipos, cámaras o puertos)
+try:
+    from services.salud_flota_service import registrar_listeners as registrar_listeners_salud
+    registrar_listeners_salud()
+except Exception as e:
+    logger.error(f"❌ Error registrando salud de la flota: {e}")
+
+# Árbol de alimentación para planificación de UPS (se reconstruye al cambiar equipos o conexiones)
+try:
+    from services.cadena_energia_service import registrar_listeners as registrar_listeners_energia
+    registrar_listeners_energia()
+except Exception as e:
+    logger.error(f"❌ Error registrando cadena de energía: {e}")
+
 # Context processors
 @app.context_processor
 def inject_user():
@@ -121,6 +263,14 @@ def inject_constants():
         ESTADOS_EQUIPO=["OPERATIVO", "FALLA_MENOR", "FUERA_DE_SERVICIO"]
     )
 
+@app.context_processor
+def inject_notificaciones():
+    """Injectar cantidad de notificaciones no leídas (badge del navbar)."""
+    if not current_user.is_authenticated:
+        return dict(notificaciones_no_leidas=0)
+    from services.notificacion_service import NotificacionService
+    return dict(notificaciones_no_leidas=NotificacionService(db.session).get_unread_count(current_user.id))
+
 # Routes principales
 @app.route('/')
 def index():
@@ -155,6 +305,16 @@ def health_check():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/health/db')
+@login_required
+def health_db():
+    """Métricas del pool de conexiones de este worker (solo administradores)."""
+    from models.usuario_roles import UserRole
+    if not current_user.has_role(UserRole.ADMINISTRADOR):
+        return jsonify({'error': 'No tiene permisos para ver el pool de conexiones'}), 403
+    from services.motor_db_service import metricas_pool
+    return jsonify(metricas_pool.resumen(db.engine))
+
 @app.route('/static/<path:filename>')
 def static_files(filename):
     """Servir archivos estáticos."""
@@ -176,6 +336,8 @@ def init_db():
     """Inicializar base de datos."""
     try:
         db.create_all()
+        from models.fotografia import migrar_columnas_documento
+        migrar_columnas_documento(db.engine)
         logger.info("✅ Base de datos inicializada")
         from scripts.datos_iniciales import crear_usuario_admin
         crear_usuario_admin()
@@ -183,6 +345,13 @@ def init_db():
     except Exception as e:
         logger.error(f"❌ Error inicializando BD: {e}")
 
+@app.cli.command('migrate-fotografias')
+def migrate_fotografias():
+    """Agregar falla_id y mantenimiento_id a una tabla fotografias existente."""
+    from models.fotografia import migrar_columnas_documento
+    agregadas = migrar_columnas_documento(db.engine)
+    print(f"✅ Columnas agregadas a fotografias: {', '.join(agregadas) or 'ninguna (ya existían)'}")
+
 @app.cli.command('create-admin')
 def create_admin():
     """Crear usuario administrador."""
@@ -193,6 +362,205 @@ def create_admin():
     except Exception as e:
         logger.error(f"❌ Error creando admin: {e}")
 
+@app.cli.command('notifications-worker')
+def notifications_worker():
+    """Procesar la cola de notificaciones (emails) en segundo plano."""
+    from services.cola_notificaciones import NotificacionWorker
+    intervalo = float(os.environ.get('NOTIFICATIONS_WORKER_INTERVAL', 5))
+    worker = NotificacionWorker(app, intervalo=intervalo)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+@app.cli.command('rebuild-fallas-rollup')
+def rebuild_fallas_rollup():
+    """Recalcular los rollups de fallas desde la tabla de fallas."""
+    from services.falla_rollup_service import FallaRollupService
+    filas = FallaRollupService(db.session).reconstruir()
+    print(f"✅ Rollups de fallas reconstruidos: {filas} filas")
+
+@app.cli.command('rebuild-confiabilidad')
+def rebuild_confiabilidad():
+    """Recalcular los totales de MTTR/MTBF desde el historial de fallas y estados."""
+    from services.confiabilidad_service import ConfiabilidadService
+    equipos = ConfiabilidadService(db.session).reconstruir()
+    print(f"✅ Totales de confiabilidad reconstruidos: {equipos} equipos")
+
+@app.cli.command('rebuild-disponibilidad')
+@click.option('--dias', default=365, help='Días cerrados a precalcular.')
+def rebuild_disponibilidad(dias):
+    """Recalcular la caché de disponibilidad diaria desde el historial de estados."""
+    from services.disponibilidad_service import DisponibilidadService
+    filas = DisponibilidadService(db.session).reconstruir(dias=dias)
+    print(f"✅ Caché de disponibilidad reconstruida: {filas} días-equipo")
+
+@app.cli.command('rebuild-carga-tecnicos')
+def rebuild_carga_tecnicos():
+    """Recalcular los contadores de carga de técnicos desde fallas y mantenimientos."""
+    from services.carga_tecnico_service import CargaTecnicoService
+    tecnicos = CargaTecnicoService(db.session).reconstruir()
+    print(f"✅ Contadores de carga reconstruidos: {tecnicos} técnicos")
+
+@app.cli.command('rebuild-presupuesto-poe')
+def rebuild_presupuesto_poe():
+    """Recalcular el índice de presupuesto PoE desde switches y puertos."""
+    from services.presupuesto_poe_service import PresupuestoPoeService
+    switches = PresupuestoPoeService(db.session).reconstruir()
+    print(f"✅ Índice de presupuesto PoE reconstruido: {switches} switches")
+
+@app.cli.command('rebuild-ocupacion-gabinetes')
+def rebuild_ocupacion_gabinetes():
+    """Recalcular el índice de ocupación de gabinetes desde el equipamiento instalado."""
+    from services.ocupacion_gabinete_service import OcupacionGabineteService
+    gabinetes = OcupacionGabineteService(db.session).reconstruir()
+    print(f"✅ Índice de ocupación de gabinetes reconstruido: {gabinetes} gabinetes")
+
+@app.cli.command('despachar-fallas')
+@click.option('--metodo', type=click.Choice(['hungaro', 'voraz']), default='hungaro')
+@click.option('--max-asignaciones', default=5, help='Asignaciones activas máximas por técnico.')
+@click.option('--simular', is_flag=True, help='Mostrar el plan sin asignar.')
+def despachar_fallas(metodo, max_asignaciones, simular):
+    """Asignar automáticamente las fallas pendientes sin técnico."""
+    from services.despacho_service import DespachoService
+    servicio = DespachoService(db.session)
+    accion = servicio.planificar if simular else servicio.despachar
+    plan = accion(metodo=metodo, max_asignaciones=max_asignaciones)
+    for asignacion in plan['asignaciones']:
+        print(f"  falla {asignacion['falla_id']} → {asignacion['tecnico']} (costo {asignacion['costo']})")
+    print(f"✅ Fallas {'planificadas' if simular else 'asignadas'}: {len(plan['asignaciones'])}, "
+          f"sin asignar: {len(plan['sin_asignar'])}")
+
+@app.cli.command('sondear-equipos')
+@click.option('--tipo', type=click.Choice(['camara', 'nvr', 'switch', 'ups', 'fuente_poder', 'gabinete']),
+              default=None, help='Sondear solo este tipo de equipo (por defecto todos).')
+@click.option('--simular', is_flag=True, help='Mostrar los cambios de estado sin aplicarlos.')
+@click.option('--continuo', is_flag=True, help='Repetir el sondeo cada --intervalo segundos.')
+@click.option('--intervalo', default=60.0, help='Segundos entre sondeos con --continuo.')
+def sondear_equipos(tipo, simular, continuo, intervalo):
+    """Probar la conexión de los equipos del inventario y actualizar su estado."""
+    from services.sondeo_service import SondeoService, SondeoWorker
+    if continuo:
+        worker = SondeoWorker(app, intervalo=intervalo, equipo_tipo=tipo)
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            worker.stop()
+        return
+    resumen = SondeoService(db.session).sondear(tipo, simular=simular)
+    for cambio in resumen['cambios']:
+        print(f"  {cambio['equipo_tipo']} {cambio['equipo_id']}: {cambio['estado_anterior']} → {cambio['estado_nuevo']}")
+    print(f"✅ Equipos sondeados: {resumen['total']} ({resumen['alcanzables']} alcanzables) "
+          f"en {resumen['duracion_s']} s, cambios de estado: {len(resumen['cambios'])}")
+
+@app.cli.command('compactar-telemetria')
+@click.option('--purgar', is_flag=True, help='Aplicar además la retención de cada resolución.')
+def compactar_telemetria(purgar):
+    """Compactar las muestras de telemetría pendientes en bloques de 1m, 1h y 1d."""
+    from services.telemetria_service import TelemetriaService
+    servicio = TelemetriaService(db.session)
+    muestras = servicio.compactar_todo()
+    print(f"✅ Muestras de telemetría compactadas: {muestras}")
+    if purgar:
+        eliminadas = servicio.purgar()
+        print(f"✅ Retención aplicada: {eliminadas}")
+
+@app.cli.command('telemetria-worker')
+def telemetria_worker():
+    """Compactar la telemetría y aplicar la retención en segundo plano."""
+    from services.telemetria_service import CompactadorTelemetria
+    intervalo = float(os.environ.get('TELEMETRIA_COMPACTADOR_INTERVALO', 60))
+    compactador = CompactadorTelemetria(app, intervalo=intervalo)
+    try:
+        compactador.run()
+    except KeyboardInterrupt:
+        compactador.stop()
+
+@app.cli.command('generar-reportes')
+@click.option('--periodicidad', type=click.Choice(['diario', 'semanal', 'mensual']), default=None,
+              help='Generar solo esta periodicidad (por defecto todas).')
+@click.option('--forzar', is_flag=True, help='Reemplazar snapshots ya generados.')
+def generar_reportes(periodicidad, forzar):
+    """Precalcular los snapshots de reportes del último período cerrado (para cron)."""
+    from models.reporte_snapshot import PeriodicidadReporte
+    from services.reporte_programado_service import ReporteProgramadoService, TIPOS_REPORTE
+
+    servicio = ReporteProgramadoService(db.session)
+    periodicidades = (periodicidad,) if periodicidad else PeriodicidadReporte.TODAS
+    if forzar:
+        generados = sum(
+            1 for p in periodicidades for tipo in TIPOS_REPORTE
+            if servicio.generar(tipo, p, forzar=True) is not None
+        )
+    else:
+        generados = servicio.generar_pendientes(periodicidades=periodicidades)
+    print(f"✅ Snapshots de reportes generados: {generados}")
+
+@app.cli.command('reportes-worker')
+def reportes_worker():
+    """Generar los snapshots de reportes al cerrar cada período (proceso continuo)."""
+    from services.reporte_programado_service import ProgramadorReportes
+    intervalo = float(os.environ.get('REPORTES_PROGRAMADOR_INTERVALO', 300))
+    programador = ProgramadorReportes(app, intervalo=intervalo)
+    try:
+        programador.run()
+    except KeyboardInterrupt:
+        programador.stop()
+
+@app.cli.command('benchmark-reportes')
+@click.option('--repeticiones', default=5, help='Ejecuciones por sección.')
+@click.option('--dias', default=365, help='Días del período del análisis de fallas.')
+def benchmark_reportes(repeticiones, dias):
+    """Medir el tiempo de cada sección de los reportes en la base configurada."""
+    from datetime import timedelta
+    from services.reporte_service import ReporteService
+
+    servicio = ReporteService(db.session)
+    fin = datetime.now().date()
+    inicio = (fin - timedelta(days=dias)).isoformat()
+    fin = fin.isoformat()
+
+    secciones = {
+        'resumen_ejecutivo': servicio._get_ejecutive_summary,
+        'estadisticas_generales': servicio._get_general_statistics,
+        'estado_equipos': servicio._get_equipment_status,
+        'fallas_recientes': servicio._get_recent_failures,
+        'mantenimientos_pendientes': servicio._get_pending_maintenance,
+        'tendencias': servicio._get_trends,
+        'alertas': servicio._get_alerts,
+        'fallas_periodo': lambda: servicio._analyze_failures_period(inicio, fin),
+        'fallas_por_camara': lambda: servicio._analyze_failures_by_camera(inicio, fin),
+        'fallas_temporal': lambda: servicio._analyze_failures_temporal(inicio, fin),
+        'metricas_fallas': lambda: servicio._calculate_failure_metrics(inicio, fin)
+    }
+
+    print(f"Motor: {db.engine.dialect.name} | repeticiones: {repeticiones}")
+    for nombre, seccion in secciones.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio_seccion = time.perf_counter()
+            seccion()
+            tiempos.append((time.perf_counter() - inicio_seccion) * 1000)
+        print(f"{nombre:<28} min {min(tiempos):8.1f} ms   prom {sum(tiempos) / len(tiempos):8.1f} ms")
+
+@app.cli.command('benchmark-pool')
+@click.option('--tamanos', default='2,5,10,20', help='Tamaños de pool a comparar, separados por coma.')
+@click.option('--concurrencia', default=50, help='Requests simultáneos (hilos).')
+@click.option('--consultas', default=2000, help='Consultas por tamaño de pool.')
+@click.option('--retencion-ms', default=5.0, help='Tiempo que cada request retiene la conexión.')
+def benchmark_pool(tamanos, concurrencia, consultas, retencion_ms):
+    """Medir el throughput de la base configurada con distintos tamaños de pool."""
+    from services.motor_db_service import medir_pool, perfil_db
+
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    print(f"Motor: {db.engine.dialect.name} | perfil: {perfil_db(url)} | concurrencia: {concurrencia} "
+          f"| consultas: {consultas} | retención: {retencion_ms} ms")
+    for tamano in [int(t) for t in tamanos.split(',') if t.strip()]:
+        r = medir_pool(url, tamano, concurrencia, consultas, retencion_ms)
+        print(f"pool {r['tamano']:>3}   {r['consultas_por_segundo']:8.1f} consultas/s   "
+              f"espera prom {r['espera_promedio_ms']:8.2f} ms   p95 {r['espera_p95_ms']:8.2f} ms   "
+              f"p99 {r['espera_p99_ms']:8.2f} ms   máx {r['espera_maxima_ms']:8.2f} ms")
+
 # Main
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
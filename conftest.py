@@ -0,0 +1,59 @@
+# conftest.py
+"""
+Fixtures compartidas de las pruebas de servicios y rutas: aplicación Flask
+mínima con SQLite en memoria y las tablas de todos los modelos creadas
+"""
+
+import pytest
+from flask import Flask
+
+from models import db
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY='pruebas',
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def sesion(app):
+    return db.session
+
+
+@pytest.fixture
+def cliente(app):
+    """
+    Cliente de pruebas con Flask-Login; cliente.entrar(rol) crea un usuario con
+    ese rol y deja su sesión abierta
+    """
+    from flask_login import LoginManager
+    from models import Usuario
+
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: db.session.get(Usuario, int(user_id)))
+    cliente = app.test_client()
+
+    def entrar(rol):
+        usuario = Usuario(username=rol, email=f'{rol}@ufro.cl', password_hash='-', full_name=rol, role=rol)
+        db.session.add(usuario)
+        db.session.commit()
+        with cliente.session_transaction() as sesion_http:
+            sesion_http['_user_id'] = str(usuario.id)
+            sesion_http['_fresh'] = True
+        return usuario
+
+    cliente.entrar = entrar
+    return cliente
@@ -45,6 +45,9 @@ if os.environ.get('RAILWAY_ENVIRONMENT'):
     worker_class = "sync"
     timeout = 60
     max_requests = 500
+    # Con workers sync cada stream SSE ocuparía un worker: el navegador consulta
+    # /eventos/recientes en su lugar
+    os.environ.setdefault('EVENTOS_MODO', 'polling')
 
 elif os.environ.get('HEROKU'):
     # Heroku - Entorno de producción
@@ -52,6 +55,7 @@ elif os.environ.get('HEROKU'):
     worker_class = "sync"
     timeout = 30
     max_requests = 200
+    os.environ.setdefault('EVENTOS_MODO', 'polling')
 
 # Variables de entorno
 raw_env = [
@@ -75,6 +79,24 @@ def pre_fork(server, worker):
     server.log.info(f"📋 Worker {worker.pid} iniciado")
 
 def post_fork(server, worker):
+    # psycopg2 cooperativo: sin esto cada consulta bloquea todos los greenlets del worker
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            worker.log.warning("⚠️ psycogreen no instalado: las consultas bloquean el worker gevent")
+
+    # Con preload_app el pool se creó en el maestro: cada worker abre sus propias conexiones
+    try:
+        from app import app as aplicacion
+        from models import db
+        from services.motor_db_service import reiniciar_pool_en_fork
+        with aplicacion.app_context():
+            reiniciar_pool_en_fork(db.engine)
+    except Exception as e:
+        worker.log.warning(f"⚠️ No se pudo reiniciar el pool de base de datos: {e}")
+
     worker.log.info(f"✅ Worker {worker.pid} listo para recibir conexiones")
 
 def pre_exec(server):
@@ -1,22 +1,26 @@
 # models/__init__.py
-from flask_sqlalchemy import SQLAlchemy
-
-# Instancia única de db
-db = SQLAlchemy()
+# Instancia única de db (definida en database.py para que base.py y usuario.py usen la misma)
+from .database import db
+from .enums import EquipmentStatus, EquipmentType
 
 # Importar modelos desde base.py (donde están definidos)
 from .base import (
-    Rol, Ubicacion, EventoCamara, Ticket, 
+    Rol, EventoCamara, Ticket,
     TrazabilidadMantenimiento, Inventario
 )
 
 # Importar modelos desde archivos individuales
 from .usuario import Usuario  # ✅ Clase de autenticación Flask-Login
 from .camara import Camara
+from .carga_tecnico import CargaTecnico
 from .catalogo_tipo_falla import CatalogoTipoFalla
+from .confiabilidad_equipo import ConfiabilidadEquipo
+from .disponibilidad_diaria import DisponibilidadDiaria
 from .equipo_tecnico import EquipoTecnico
 from .falla import Falla
 from .falla_comentario import FallaComentario
+from .falla_rollup import FallaRollup
+from .evento_sistema import EventoSistema
 from .fotografia import Fotografia
 from .fuente import Fuente
 from .fuente_poder import FuentePoder
@@ -24,17 +28,26 @@ from .gabinete import Gabinete
 from .historial_estado_equipo import HistorialEstadoEquipo
 from .mantenimiento import Mantenimiento
 from .network_connections import NetworkConnection
+from .notificacion import Notificacion, NotificacionContador, NotificacionLog
+from .notificacion_cola import NotificacionCola
 from .nvr import NVR
+from .ocupacion_gabinete import OcupacionGabinete
+from .presupuesto_poe import PresupuestoPoeSwitch
 from .puertos_switch import PuertoSwitch
+from .reporte_snapshot import ReporteSnapshot
 from .switch import Switch
+from .telemetria import TelemetriaMuestra, TelemetriaBloque
 from .ups import UPS
+from .ubicacion import Ubicacion
 from .usuario_logs import UsuarioLog
 
 __all__ = [
-    'db',
+    'db', 'EquipmentStatus', 'EquipmentType',
     'Usuario',  # ✅ Clase de autenticación Flask-Login
     'Rol', 'Ubicacion', 'EventoCamara', 'Ticket', 'TrazabilidadMantenimiento', 'Inventario',
-    'Camara', 'CatalogoTipoFalla', 'EquipoTecnico', 'Falla', 'FallaComentario', 'Fotografia',
-    'Fuente', 'FuentePoder', 'Gabinete', 'HistorialEstadoEquipo', 'Mantenimiento',
-    'NetworkConnection', 'NVR', 'PuertoSwitch', 'Switch', 'UPS', 'UsuarioLog'
+    'Camara', 'CargaTecnico', 'CatalogoTipoFalla', 'ConfiabilidadEquipo', 'DisponibilidadDiaria', 'EquipoTecnico', 'EventoSistema', 'Falla', 'FallaComentario',
+    'FallaRollup', 'Fotografia', 'Fuente', 'FuentePoder', 'Gabinete', 'HistorialEstadoEquipo',
+    'Mantenimiento', 'NetworkConnection', 'Notificacion', 'NotificacionContador', 'NotificacionLog', 'NotificacionCola',
+    'NVR', 'OcupacionGabinete', 'PresupuestoPoeSwitch', 'PuertoSwitch', 'ReporteSnapshot', 'Switch', 'TelemetriaMuestra', 'TelemetriaBloque',
+    'UPS', 'UsuarioLog'
 ]
\ No newline at end of file
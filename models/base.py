@@ -14,11 +14,10 @@ Características:
 from datetime import datetime, date
 from enum import Enum
 from typing import Optional, List, Dict, Any
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import UserMixin
+from sqlalchemy import Column, Integer, DateTime, Boolean
 import logging
 
-db = SQLAlchemy()
+from .database import db
 
 # ======================
 # Enums de la aplicación
@@ -117,6 +116,44 @@ class TimestampedModel(ModelMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+class BaseModelMixin:
+    """Mixin base con id, timestamps y borrado lógico"""
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted = Column(Boolean, default=False)
+
+    @property
+    def is_active(self):
+        """Property para compatibilidad"""
+        return not self.deleted
+
+    @is_active.setter
+    def is_active(self, value):
+        """Setter para compatibilidad"""
+        self.deleted = not value
+
+    def save(self, session=None):
+        """Guardar instancia en base de datos"""
+        session = session or db.session
+        session.add(self)
+        session.commit()
+        return self
+
+    def delete(self, session=None):
+        """Soft delete"""
+        session = session or db.session
+        self.deleted = True
+        session.commit()
+        return self
+
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+# Nombre usado por la mayoría de los modelos
+BaseModel = BaseModelMixin
+
 # ======================
 # Modelos del Sistema
 # ======================
@@ -132,100 +169,7 @@ class Rol(db.Model, TimestampedModel):
     activo = db.Column(db.Boolean, default=True, nullable=False)
     
     # Relación con usuarios
-    usuarios = db.relationship('Usuario', backref='rol_obj', lazy='dynamic')
-
-class Usuario(db.Model, UserMixin, TimestampedModel):
-    """Modelo de usuarios del sistema"""
-    __tablename__ = 'usuarios'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=True)
-    nombre_completo = db.Column(db.String(120), nullable=True)  # ✅ CAMBIO APLICADO
-    telefono = db.Column(db.String(20), nullable=True)
-    
-    # Relaciones normalizadas
-    rol_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False)
-    
-    # Campos de autenticación y estado
-    password_hash = db.Column(db.String(256), nullable=False)
-    activo = db.Column(db.Boolean, default=True, nullable=False)
-    ultimo_acceso = db.Column(db.DateTime, nullable=True)
-    
-    # Campos adicionales
-    ultima_ip = db.Column(db.String(45), nullable=True)  # IPv4/IPv6
-    intentos_login = db.Column(db.Integer, default=0, nullable=False)
-    bloqueado_hasta = db.Column(db.DateTime, nullable=True)
-    
-    def __repr__(self):
-        return f'<Usuario {self.username}>'
-    
-    @property
-    def rol(self) -> Optional[Rol]:
-        """Obtiene el rol del usuario"""
-        return self.rol_obj
-
-class Ubicacion(db.Model, TimestampedModel):
-    """Modelo de ubicaciones del campus UFRO"""
-    __tablename__ = 'ubicaciones'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String(100), nullable=False)
-    tipo = db.Column(db.Enum(TipoUbicacion), nullable=False)
-    edificio = db.Column(db.String(50), nullable=True)
-    piso = db.Column(db.Integer, nullable=True)
-    numero_aula = db.Column(db.String(10), nullable=True)
-    descripcion = db.Column(db.Text, nullable=True)
-    capacidad = db.Column(db.Integer, nullable=True)
-    
-    # Coordenadas para mapas
-    latitud = db.Column(db.Float, nullable=True)
-    longitud = db.Column(db.Float, nullable=True)
-    
-    # Relación con cámaras
-    camaras = db.relationship('Camara', backref='ubicacion', lazy='dynamic')
-
-class Camara(db.Model, TimestampedModel):
-    """Modelo de cámaras de seguridad"""
-    __tablename__ = 'camaras'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    codigo_interno = db.Column(db.String(50), unique=True, nullable=False)
-    marca = db.Column(db.String(50), nullable=True)
-    modelo = db.Column(db.String(50), nullable=True)
-    numero_serie = db.Column(db.String(100), nullable=True)
-    
-    # Estado y tipo
-    estado = db.Column(db.Enum(EstadoCamara), nullable=False, default=EstadoCamara.INSTALACION)
-    
-    # Ubicación
-    ubicacion_id = db.Column(db.Integer, db.ForeignKey('ubicaciones.id'), nullable=False)
-    
-    # Configuración técnica
-    ip_address = db.Column(db.String(45), nullable=True)  # IPv4/IPv6
-    puerto = db.Column(db.Integer, nullable=True)
-    protocolo = db.Column(db.String(20), default='HTTP')
-    username_camara = db.Column(db.String(50), nullable=True)
-    password_camara = db.Column(db.String(100), nullable=True)
-    
-    # Configuración de video
-    resolucion = db.Column(db.String(20), nullable=True)  # "1080p", "720p", etc
-    fps = db.Column(db.Integer, nullable=True)
-    codec = db.Column(db.String(20), nullable=True)
-    
-    # Fechas importantes
-    fecha_instalacion = db.Column(db.Date, nullable=True)
-    fecha_garantia_hasta = db.Column(db.Date, nullable=True)
-    
-    # Observaciones y mantenimiento
-    observaciones = db.Column(db.Text, nullable=True)
-    ultimo_mantenimiento = db.Column(db.Date, nullable=True)
-    proximo_mantenimiento = db.Column(db.Date, nullable=True)
-    
-    # Relaciones
-    eventos = db.relationship('EventoCamara', backref='camara', lazy='dynamic')
-    tickets = db.relationship('Ticket', backref='camara', lazy='dynamic')
-    trazabilidades = db.relationship('TrazabilidadMantenimiento', backref='camara', lazy='dynamic')
+    usuarios = db.relationship('Usuario', back_populates='rol')
 
 class EventoCamara(db.Model, TimestampedModel):
     """Registro de eventos de las cámaras"""
@@ -250,6 +194,8 @@ class EventoCamara(db.Model, TimestampedModel):
     # Resuelto por
     resuelto_por = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
 
+    camara = db.relationship('Camara')
+
 class Ticket(db.Model, TimestampedModel):
     """Tickets de soporte y mantenimiento"""
     __tablename__ = 'tickets'
@@ -277,6 +223,7 @@ class Ticket(db.Model, TimestampedModel):
     comentarios_internos = db.Column(db.Text, nullable=True)
     
     # Relaciones adicionales
+    camara = db.relationship('Camara')
     usuario_asignado = db.relationship('Usuario', foreign_keys=[asignado_a], backref='tickets_asignados')
     usuario_reportante = db.relationship('Usuario', foreign_keys=[reportado_por], backref='tickets_reportados')
 
@@ -310,6 +257,7 @@ class TrazabilidadMantenimiento(db.Model, TimestampedModel):
     recomendaciones = db.Column(db.Text, nullable=True)
     
     # Técnico responsable
+    camara = db.relationship('Camara')
     tecnico = db.relationship('Usuario', foreign_keys=[tecnico_responsable])
 
 class Inventario(db.Model, TimestampedModel):
@@ -384,6 +332,8 @@ def create_roles():
 
 def create_default_admin():
     """Crea el usuario administrador por defecto"""
+    from .usuario import Usuario
+
     # Verificar si ya existe
     admin = Usuario.query.filter_by(username='admin').first()
     if admin:
@@ -434,6 +384,8 @@ def init_database():
 
 def get_user_stats() -> Dict[str, Any]:
     """Obtiene estadísticas generales del sistema"""
+    from .usuario import Usuario
+
     stats = {
         'total_usuarios': Usuario.query.count(),
         'usuarios_activos': Usuario.query.filter_by(activo=True).count(),
@@ -452,6 +404,8 @@ def get_user_stats() -> Dict[str, Any]:
 
 def get_camera_stats() -> Dict[str, Any]:
     """Obtiene estadísticas de cámaras"""
+    from .camara import Camara
+
     stats = {
         'total_camaras': Camara.query.count(),
         'camaras_por_estado': {},
@@ -0,0 +1,74 @@
+# models/carga_tecnico.py
+"""
+Modelo de contadores de carga de trabajo y desempeño por técnico.
+Cada fila guarda, para un técnico del equipo técnico, cuántas fallas y
+mantenimientos tiene asignados, cuántos siguen activos y cuántos terminó, de
+modo que la carga y el desempeño se consulten sin recorrer sus asignaciones.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+
+from models import db
+
+
+class CargaTecnico(db.Model):
+    """
+    Contadores de asignaciones de un técnico, mantenidos al asignar y al
+    cambiar el estado de fallas y mantenimientos.
+
+    Attributes:
+        tecnico_id (int): ID del técnico (equipo_tecnico)
+        fallas_total (int): Fallas asignadas
+        fallas_activas (int): Fallas abiertas o en proceso
+        fallas_resueltas (int): Fallas resueltas
+        mantenimientos_total (int): Mantenimientos asignados
+        mantenimientos_activos (int): Mantenimientos programados o en proceso
+        mantenimientos_completados (int): Mantenimientos completados
+        asignaciones_activas (int): fallas_activas + mantenimientos_activos
+        horas_resolucion_total (float): Suma de tiempos de resolución registrados
+        resoluciones_medidas (int): Fallas con tiempo de resolución registrado
+    """
+
+    __tablename__ = 'carga_tecnicos'
+
+    id = Column(Integer, primary_key=True)
+
+    tecnico_id = Column(Integer, ForeignKey('equipo_tecnico.id'), nullable=False, unique=True,
+                        comment="ID del técnico")
+
+    fallas_total = Column(Integer, nullable=False, default=0,
+                          comment="Fallas asignadas")
+    fallas_activas = Column(Integer, nullable=False, default=0,
+                            comment="Fallas abiertas o en proceso")
+    fallas_resueltas = Column(Integer, nullable=False, default=0,
+                              comment="Fallas resueltas")
+    mantenimientos_total = Column(Integer, nullable=False, default=0,
+                                  comment="Mantenimientos asignados")
+    mantenimientos_activos = Column(Integer, nullable=False, default=0,
+                                    comment="Mantenimientos programados o en proceso")
+    mantenimientos_completados = Column(Integer, nullable=False, default=0,
+                                        comment="Mantenimientos completados")
+    asignaciones_activas = Column(Integer, nullable=False, default=0, index=True,
+                                  comment="Fallas y mantenimientos activos")
+    horas_resolucion_total = Column(Float, nullable=False, default=0.0,
+                                    comment="Suma de tiempos de resolución")
+    resoluciones_medidas = Column(Integer, nullable=False, default=0,
+                                  comment="Fallas con tiempo de resolución")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Última actualización")
+
+    def tasa_resolucion_fallas(self):
+        """Porcentaje de fallas asignadas que están resueltas"""
+        return self.fallas_resueltas / self.fallas_total * 100 if self.fallas_total else 0
+
+    def tasa_completado_mantenimientos(self):
+        """Porcentaje de mantenimientos asignados que están completados"""
+        return self.mantenimientos_completados / self.mantenimientos_total * 100 if self.mantenimientos_total else 0
+
+    def promedio_tiempo_resolucion(self):
+        """Promedio de tiempo de resolución (None si no hay tiempos registrados)"""
+        return self.horas_resolucion_total / self.resoluciones_medidas if self.resoluciones_medidas else None
+
+    def __repr__(self):
+        return (f"<CargaTecnico(tecnico={self.tecnico_id}, activas={self.asignaciones_activas}, "
+                f"fallas={self.fallas_total}, mantenimientos={self.mantenimientos_total})>")
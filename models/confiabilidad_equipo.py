@@ -0,0 +1,69 @@
+# models/confiabilidad_equipo.py
+"""
+Modelo de sumas acumuladas de confiabilidad por equipo.
+Cada fila guarda, para un equipo, los totales necesarios para calcular MTTR
+(tiempo medio de reparación) y MTBF (tiempo medio entre fallas) sin recorrer el
+historial: se actualizan al crear y cerrar fallas y al registrar cambios de
+estado del equipo.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
+
+from models import db
+
+
+class ConfiabilidadEquipo(db.Model):
+    """
+    Totales de fallas, reparación y tiempo fuera de servicio de un equipo.
+
+    Attributes:
+        equipo_tipo (str): camara, switch, nvr, ups, ...
+        equipo_id (int): ID del equipo
+        marca (str): Marca o fabricante (para agrupar por modelo)
+        modelo (str): Modelo del equipo
+        fallas_total (int): Fallas reportadas
+        fallas_resueltas (int): Fallas con fecha de resolución
+        horas_reparacion_total (float): Suma de horas desde el reporte hasta la resolución
+        horas_fuera_servicio (float): Horas en estado de falla ya cerradas (historial de estados)
+        fuera_servicio_desde (datetime): Inicio de la caída en curso, si el equipo está fallando
+        inicio_observacion (datetime): Primer registro conocido del equipo (falla o cambio de estado)
+        ultima_falla (datetime): Fecha de la falla más reciente
+    """
+
+    __tablename__ = 'confiabilidad_equipos'
+    __table_args__ = (
+        UniqueConstraint('equipo_tipo', 'equipo_id', name='uq_confiabilidad_equipo'),
+        Index('ix_confiabilidad_equipos_modelo', 'equipo_tipo', 'marca', 'modelo'),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    equipo_tipo = Column(String(50), nullable=False,
+                         comment="Tipo de equipo")
+    equipo_id = Column(Integer, nullable=False,
+                       comment="ID del equipo")
+    marca = Column(String(100), nullable=False, default='',
+                   comment="Marca o fabricante")
+    modelo = Column(String(100), nullable=False, default='',
+                    comment="Modelo del equipo")
+
+    fallas_total = Column(Integer, nullable=False, default=0,
+                          comment="Fallas reportadas")
+    fallas_resueltas = Column(Integer, nullable=False, default=0,
+                              comment="Fallas resueltas")
+    horas_reparacion_total = Column(Float, nullable=False, default=0.0,
+                                    comment="Suma de horas de reparación")
+    horas_fuera_servicio = Column(Float, nullable=False, default=0.0,
+                                  comment="Horas fuera de servicio cerradas")
+    fuera_servicio_desde = Column(DateTime, nullable=True,
+                                  comment="Inicio de la caída en curso")
+    inicio_observacion = Column(DateTime, nullable=True,
+                                comment="Primer registro del equipo")
+    ultima_falla = Column(DateTime, nullable=True,
+                          comment="Falla más reciente")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Última actualización")
+
+    def __repr__(self):
+        return (f"<ConfiabilidadEquipo({self.equipo_tipo}:{self.equipo_id}, "
+                f"fallas={self.fallas_total}, resueltas={self.fallas_resueltas})>")
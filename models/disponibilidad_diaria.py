@@ -0,0 +1,53 @@
+# models/disponibilidad_diaria.py
+"""
+Modelo de caché de disponibilidad diaria por equipo.
+Cada fila guarda, para un equipo y un día ya cerrado, los segundos observados y
+los segundos fuera de servicio derivados del historial de estados, de modo que
+los reportes de SLA sumen filas en lugar de recorrer el historial completo.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index, UniqueConstraint
+
+from models import db
+
+
+class DisponibilidadDiaria(db.Model):
+    """
+    Segundos observados y fuera de servicio de un equipo en un día.
+
+    Solo se guardan días cerrados (anteriores a hoy, UTC). Las filas de un
+    equipo se eliminan desde el día de un cambio de estado retroactivo y se
+    recalculan en la siguiente consulta.
+
+    Attributes:
+        equipo_tipo (str): camara, switch, nvr, ups, ...
+        equipo_id (int): ID del equipo
+        dia (date): Día (UTC)
+        segundos_observados (int): Segundos del día en que el equipo existía
+        segundos_fuera (int): Segundos del día en estado de falla
+    """
+
+    __tablename__ = 'disponibilidad_diaria'
+    __table_args__ = (
+        UniqueConstraint('equipo_tipo', 'equipo_id', 'dia', name='uq_disponibilidad_diaria'),
+        Index('ix_disponibilidad_diaria_dia', 'dia'),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    equipo_tipo = Column(String(50), nullable=False,
+                         comment="Tipo de equipo")
+    equipo_id = Column(Integer, nullable=False,
+                       comment="ID del equipo")
+    dia = Column(Date, nullable=False,
+                 comment="Día (UTC)")
+    segundos_observados = Column(Integer, nullable=False, default=0,
+                                 comment="Segundos observados del día")
+    segundos_fuera = Column(Integer, nullable=False, default=0,
+                            comment="Segundos fuera de servicio del día")
+    calculado_en = Column(DateTime, nullable=False, default=datetime.utcnow,
+                          comment="Fecha del cálculo")
+
+    def __repr__(self):
+        return (f"<DisponibilidadDiaria({self.equipo_tipo}:{self.equipo_id}, {self.dia}, "
+                f"fuera={self.segundos_fuera}/{self.segundos_observados})>")
@@ -1,6 +1,2 @@
-<<<<<<< HEAD
-# models/enums/__init__.py — vacío
-=======
 from .equipment_status import EquipmentStatus
 from .equipment_type import EquipmentType
->>>>>>> 490f0beca4eaa0ced06723ea308d2616d581f5a4
@@ -1,6 +1,9 @@
-class EquipmentStatus:
+import enum
+
+
+class EquipmentStatus(str, enum.Enum):
     ACTIVO = 'activo'
     INACTIVO = 'inactivo'
     FALLANDO = 'fallando'
     MANTENIMIENTO = 'mantenimiento'
-    DADO_BAJA = 'dado_baja'
\ No newline at end of file
+    DADO_BAJA = 'dado_baja'
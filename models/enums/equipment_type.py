@@ -0,0 +1,10 @@
+import enum
+
+
+class EquipmentType(str, enum.Enum):
+    CAMARA = 'camara'
+    NVR = 'nvr'
+    SWITCH = 'switch'
+    UPS = 'ups'
+    FUENTE_PODER = 'fuente_poder'
+    GABINETE = 'gabinete'
@@ -1,30 +1,3 @@
-<<<<<<< HEAD
-# models/equipo.py
-from datetime import datetime
-
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Float
-from sqlalchemy.orm import relationship
-from models.base import BaseModel
-from models import db
-
-class NetworkConnection(BaseModel, db.Model):
-__tablename__ = 'network_connections'
-source_equipment_id = Column(Integer, nullable=False)
-source_equipment_type = Column(String(30), nullable=False)
-target_equipment_id = Column(Integer, nullable=False)
-target_equipment_type = Column(String(30), nullable=False)
-connection_type = Column(String(0), nullable=False)
-cable_type = Column(String(50), nullable=True)
-cable_length = Column(Float, nullable=True)
-port_source = Column(String(0), nullable=True)
-port_target = Column(String(0), nullable=True)
-is_active = Column(Boolean, default=True, nullable=False)
-vlan_id = Column(Integer, nullable=True)
-bandwidth_limit = Column(Integer, nullable=True)
-latency_ms = Column(Float, nullable=True)
-packet_loss = Column(Float, default=0.0, nullable=False)
-notes = Column(Text, nullable=True)
-=======
 """
 Modelo base para equipos de red y hardware.
 Proporciona funcionalidades comunes para todos los tipos de equipos.
@@ -32,6 +5,7 @@ Proporciona funcionalidades comunes para todos los tipos de equipos.
 from datetime import datetime, timezone
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Enum, or_
 from sqlalchemy.orm import relationship, declared_attr
+from sqlalchemy.orm.attributes import set_committed_value
 from models.base import BaseModelMixin  # Correcto: Hereda metadatos base
 from models import db, EquipmentStatus
 import enum
@@ -46,158 +20,6 @@ class ConnectionType(enum.Enum):
     INALAMBRICO = "inalambrico"
 
 
-class NetworkConnection(BaseModelMixin, db.Model):
-    """
-    Modelo de conexiones de red entre equipos. Utiliza polimorfismo implícito
-    basado en tipo (source_equipment_type/target_equipment_type).
-    """
-    __tablename__ = 'network_connections'
-    
-    # id, created_at, updated_at, deleted heredados de BaseModelMixin
-
-    # Equipos conectados
-    source_equipment_id = Column(Integer, nullable=False,
-                                 comment="ID del equipo origen de la conexión")
-    source_equipment_type = Column(String(30), nullable=False,
-                                  comment="Tipo del equipo origen (nvr, switch, camara, etc.)")
-    target_equipment_id = Column(Integer, nullable=False,
-                                 comment="ID del equipo destino de la conexión")
-    target_equipment_type = Column(String(30), nullable=False,
-                                  comment="Tipo del equipo destino (nvr, switch, camara, etc.)")
-
-    # Detalles de la conexión
-    connection_type = Column(Enum(ConnectionType), nullable=False,
-                             comment="Tipo de conexión física")
-    cable_type = Column(String(50), nullable=True,
-                        comment="Tipo de cable utilizado (Cat6, fibra, etc.)")
-    cable_length = Column(Float, nullable=True,
-                          comment="Longitud del cable en metros")
-    port_source = Column(String(20), nullable=True,
-                         comment="Puerto o interfaz de origen")
-    port_target = Column(String(20), nullable=True,
-                         comment="Puerto o interfaz de destino")
-
-    # Estado y configuración
-    is_active = Column(Boolean, default=True, nullable=False,
-                      comment="Si la conexión está activa")
-    vlan_id = Column(Integer, nullable=True,
-                    comment="ID de la VLAN asignada")
-
-    # Métricas de rendimiento
-    bandwidth_limit = Column(Integer, nullable=True,
-                             comment="Límite de ancho de banda en Mbps")
-    latency_ms = Column(Float, nullable=True,
-                       comment="Latencia promedio en milisegundos")
-    packet_loss = Column(Float, default=0.0, nullable=False,
-                         comment="Pérdida de paquetes en porcentaje")
-
-    # Metadatos
-    notes = Column(Text, nullable=True,
-                  comment="Notas adicionales")
-
-    def __repr__(self):
-        return f"<NetworkConnection(from_{self.source_equipment_type}_{self.source_equipment_id}_to_{self.target_equipment_type}_{self.target_equipment_id})>"
-
-    def _get_equipment_class(self, type_name):
-        """Helper para obtener la clase del modelo basado en el nombre del tipo."""
-        # Se requiere importación local para evitar importaciones circulares
-        from models import NVR, Switch, UPS, FuentePoder, Gabinete, Camara
-        equipment_map = {
-            'nvr': NVR,
-            'switch': Switch,
-            'ups': UPS,
-            'fuente_poder': FuentePoder,
-            'gabinete': Gabinete,
-            'camara': Camara
-        }
-        return equipment_map.get(type_name)
-
-    def get_source_equipment(self):
-        """Obtiene el equipo origen según su tipo."""
-        equipment_class = self._get_equipment_class(self.source_equipment_type)
-        if equipment_class:
-            return equipment_class.query.get(self.source_equipment_id)
-        return None
-
-    def get_target_equipment(self):
-        """Obtiene el equipo destino según su tipo."""
-        equipment_class = self._get_equipment_class(self.target_equipment_type)
-        if equipment_class:
-            return equipment_class.query.get(self.target_equipment_id)
-        return None
-
-    @classmethod
-    def get_by_equipment(cls, equipment_id, equipment_type):
-        """Obtiene todas las conexiones de un equipo (sea origen o destino)."""
-        return cls.query.filter(
-            cls.deleted == False,
-            or_(
-                # Es el origen Y coincide el tipo
-                (cls.source_equipment_id == equipment_id) & (cls.source_equipment_type == equipment_type),
-                # O es el destino Y coincide el tipo
-                (cls.target_equipment_id == equipment_id) & (cls.target_equipment_type == equipment_type)
-            )
-        ).all()
->>>>>>> 490f0beca4eaa0ced06723ea308d2616d581f5a4
-
-class Switch(BaseModel, db.Model):
-__tablename__ = 'switches'
-name = Column(String(100), nullable=False)
-ip_address = Column(String(45), nullable=True)
-created_by = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
-created_by_user = relationship("Usuario", foreign_keys=[created_by])
-
-<<<<<<< HEAD
-# CORREGIDO: relación con Ubicacion
-ubicacion_id = Column(Integer, ForeignKey('ubicaciones.id'), nullable=True)
-ubicacion = relationship("Ubicacion", back_populates="switches")
-
-fotografias = relationship("Fotografia", back_populates="switch")
-
-def __repr__(self):
-return f"<Switch(name='{self.name}')>"
-
-class UPS(BaseModel, db.Model):
-__tablename__ = 'ups'
-name = Column(String(100), nullable=False)
-created_by = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
-created_by_user = relationship("Usuario", foreign_keys=[created_by])
-fotografias = relationship("Fotografia", back_populates="ups")
-
-def __repr__(self):
-return f"<UPS(name='{self.name}')>"
-
-class NVR(BaseModel, db.Model):
-__tablename__ = 'nvr_dvr' # nombre real
-name = Column(String(100), nullable=False)
-created_by = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
-created_by_user = relationship("Usuario", foreign_keys=[created_by])
-camaras = relationship("Camara", back_populates="nvr")
-fotografias = relationship("Fotografia", back_populates="nvr")
-
-def __repr__(self):
-return f"<NVR(name='{self.name}')>"
-
-class Gabinete(BaseModel, db.Model):
-__tablename__ = 'gabinetes'
-name = Column(String(100), nullable=False)
-created_by = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
-created_by_user = relationship("Usuario", foreign_keys=[created_by])
-fotografias = relationship("Fotografia", back_populates="gabinete")
-
-def __repr__(self):
-return f"<Gabinete(name='{self.name}')>"
-
-class FuentePoder(BaseModel, db.Model):
-__tablename__ = 'fuente_poder' # singular, como en tu DB
-name = Column(String(100), nullable=False)
-created_by = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
-created_by_user = relationship("Usuario", foreign_keys=[created_by])
-fotografias = relationship("Fotografia", back_populates="fuente_poder")
-
-def __repr__(self):
-return f"<FuentePoder(name='{self.name}')>"
-=======
 class EquipmentBase(BaseModelMixin, db.Model):
     """
     Clase base abstracta para todos los equipos.
@@ -231,7 +53,8 @@ class EquipmentBase(BaseModelMixin, db.Model):
     ubicacion_id = Column(Integer, ForeignKey('ubicaciones.id'), nullable=True,
                           comment="ID de la ubicación donde está instalado")
     # ✅ Corregido a .value, asegurando que se guarda el string/valor en la DB
-    status = Column(Enum(EquipmentStatus), nullable=False, default=EquipmentStatus.ACTIVO.value,
+    status = Column(Enum(EquipmentStatus, values_callable=lambda estados: [e.value for e in estados]),
+                    nullable=False, default=EquipmentStatus.ACTIVO.value,
                     comment="Estado actual del equipo")
 
     # Configuración
@@ -271,8 +94,8 @@ class EquipmentBase(BaseModelMixin, db.Model):
     # Relaciones
     @declared_attr
     def ubicacion(cls):
-        # Asume que el modelo Ubicacion tiene un back_populates llamado 'equipos'
-        return relationship("Ubicacion", back_populates="equipos")
+        # Cada tipo de equipo redefine la relación con su back_populates en Ubicacion
+        return relationship("Ubicacion")
     
     # Método para serializar la configuración de respaldo si existe
     def get_configuration_backup_dict(self):
@@ -286,18 +109,20 @@ class EquipmentBase(BaseModelMixin, db.Model):
     # Métodos de monitoreo
     def is_online(self):
         """Verifica si el equipo está online basado en el último heartbeat (dentro de 5 minutos)."""
-        if not self.last_heartbeat:
-            return False
-        # Asume que last_heartbeat fue guardado con timezone=True
-        time_diff = datetime.now(timezone.utc) - self.last_heartbeat
-        return time_diff.total_seconds() < 300  # 5 minutos
+        # Consulta el mapa en memoria del ingestor, sin ir a la base de datos
+        from services.heartbeat_service import ingestor_heartbeats
+        return ingestor_heartbeats.en_linea_equipo(self)
 
     def update_heartbeat(self, session=None):
-        """Actualiza el timestamp del último heartbeat."""
-        session = session or db.session
-        self.last_heartbeat = datetime.now(timezone.utc)
-        session.add(self)
-        session.commit()
+        """
+        Registra un heartbeat del equipo. Se escribe en la base en el próximo
+        lote del ingestor, sin un commit por heartbeat (`session` se mantiene
+        por compatibilidad).
+        """
+        from services.heartbeat_service import ingestor_heartbeats
+        momento = ingestor_heartbeats.registrar_equipo(self)
+        # Actualiza la instancia sin marcarla como modificada en la sesión
+        set_committed_value(self, 'last_heartbeat', momento)
 
     def get_age_in_years(self):
         """Calcula la edad del equipo en años."""
@@ -305,4 +130,3 @@ class EquipmentBase(BaseModelMixin, db.Model):
             return None
         age = datetime.now(timezone.utc) - self.installation_date
         return round(age.days / 365.25, 2)
->>>>>>> 490f0beca4eaa0ced06723ea308d2616d581f5a4
@@ -8,7 +8,7 @@ Incluye relaciones con fallas y mantenimientos.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, ForeignKey, Enum, case, func
 from sqlalchemy.orm import relationship
 from models.base import BaseModel
 from models import db
@@ -154,7 +154,7 @@ class EquipoTecnico(BaseModel, db.Model):
 
     # Relaciones con fotografías
     fotografias_subidas = relationship("Fotografia", back_populates="tecnico_responsable",
-                                       foreign_keys="Fotografia.tecnico_responsable",
+                                       foreign_keys="Fotografia.tecnico_responsable_id",
                                        cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -172,10 +172,16 @@ class EquipoTecnico(BaseModel, db.Model):
         """Verifica si el técnico está disponible para asignaciones."""
         return self.estado in [TecnicoStatus.ACTIVO.value, TecnicoStatus.DISPONIBLE.value]
 
+    def _carga(self):
+        """Contadores de carga del técnico (None si nunca tuvo asignaciones)."""
+        from models.carga_tecnico import CargaTecnico
+        return CargaTecnico.query.filter_by(tecnico_id=self.id).first()
+
     def get_workload(self):
         """Obtiene la carga de trabajo actual del técnico."""
-        fallas_activas = len([f for f in self.fallas_asignadas if f.estado in ['abierta', 'en_proceso']])
-        mantenimientos_activos = len([m for m in self.mantenimientos_asignados if m.estado in ['programado', 'en_proceso']])
+        carga = self._carga()
+        fallas_activas = carga.fallas_activas if carga else 0
+        mantenimientos_activos = carga.mantenimientos_activos if carga else 0
 
         return {
             'fallas_activas': fallas_activas,
@@ -185,22 +191,25 @@ class EquipoTecnico(BaseModel, db.Model):
 
     def get_performance_metrics(self):
         """Obtiene métricas de desempeño del técnico."""
-        total_fallas = len(self.fallas_asignadas)
-        fallas_resueltas = len([f for f in self.fallas_asignadas if f.estado == 'resuelta'])
-
-        total_mantenimientos = len(self.mantenimientos_asignados)
-        mantenimientos_completados = len([m for m in self.mantenimientos_asignados if m.estado == 'completado'])
-
-        tasa_resolucion_fallas = (fallas_resueltas / total_fallas * 100) if total_fallas > 0 else 0
-        tasa_completado_mantenimientos = (mantenimientos_completados / total_mantenimientos * 100) if total_mantenimientos > 0 else 0
+        carga = self._carga()
+        if carga is None:
+            return {
+                'total_fallas': 0,
+                'fallas_resueltas': 0,
+                'tasa_resolucion_fallas': 0,
+                'total_mantenimientos': 0,
+                'mantenimientos_completados': 0,
+                'tasa_completado_mantenimientos': 0,
+                'promedio_tiempo_resolucion': self.promedio_tiempo_resolucion
+            }
 
         return {
-            'total_fallas': total_fallas,
-            'fallas_resueltas': fallas_resueltas,
-            'tasa_resolucion_fallas': round(tasa_resolucion_fallas, ),
-            'total_mantenimientos': total_mantenimientos,
-            'mantenimientos_completados': mantenimientos_completados,
-            'tasa_completado_mantenimientos': round(tasa_completado_mantenimientos, ),
+            'total_fallas': carga.fallas_total,
+            'fallas_resueltas': carga.fallas_resueltas,
+            'tasa_resolucion_fallas': round(carga.tasa_resolucion_fallas(), 2),
+            'total_mantenimientos': carga.mantenimientos_total,
+            'mantenimientos_completados': carga.mantenimientos_completados,
+            'tasa_completado_mantenimientos': round(carga.tasa_completado_mantenimientos(), 2),
             'promedio_tiempo_resolucion': self.promedio_tiempo_resolucion
         }
 
@@ -294,26 +303,15 @@ class EquipoTecnico(BaseModel, db.Model):
         return self.habilidades.get(skill, 0)
 
     def update_performance_metrics(self):
-        """Actualiza las métricas de desempeño."""
-        # Calcular métricas actuales
-        fallas_activas = [f for f in self.fallas_asignadas if f.estado in ['abierta', 'en_proceso']]
-        total_fallas_asignadas = len(self.fallas_asignadas)
-
-        mantenimientos_activos = [m for m in self.mantenimientos_asignados if m.estado in ['programado', 'en_proceso']]
-        total_mantenimientos_asignados = len(self.mantenimientos_asignados)
-
-        # Actualizar campos
-        self.total_fallas_asignadas = total_fallas_asignadas
-        self.total_mantenimientos_asignados = total_mantenimientos_asignados
-
-        # Calcular promedio de tiempo de resolución si hay datos
-        if self.fallas_asignadas:
-            tiempos_resolucion = []
-            for falla in self.fallas_asignadas:
-                if falla.actual_resolution_time:
-                    tiempos_resolucion.append(falla.actual_resolution_time)
-            if tiempos_resolucion:
-                self.promedio_tiempo_resolucion = sum(tiempos_resolucion) / len(tiempos_resolucion)
+        """Actualiza las métricas de desempeño desde los contadores de carga."""
+        carga = self._carga()
+
+        self.total_fallas_asignadas = carga.fallas_total if carga else 0
+        self.total_mantenimientos_asignados = carga.mantenimientos_total if carga else 0
+
+        # Promedio de tiempo de resolución si hay datos
+        if carga is not None and carga.promedio_tiempo_resolucion() is not None:
+            self.promedio_tiempo_resolucion = carga.promedio_tiempo_resolucion()
 
         self.save()
 
@@ -342,30 +340,33 @@ class EquipoTecnico(BaseModel, db.Model):
         ).all()
 
     @classmethod
-    def get_by_workload(cls, max_assignments=5):
-        """Obtiene técnicos con carga de trabajo baja."""
-        technicians = cls.get_active_technicians()
-        available_technicians = []
-
-        for tech in technicians:
-            workload = tech.get_workload()
-            if workload['total_asignaciones'] < max_assignments:
-                available_technicians.append(tech)
+    def _query_activos_con_carga(cls):
+        """Técnicos activos unidos a sus contadores de carga."""
+        from models.carga_tecnico import CargaTecnico
+        return cls.query.outerjoin(CargaTecnico, CargaTecnico.tecnico_id == cls.id).filter(
+            cls.estado.in_([TecnicoStatus.ACTIVO.value, TecnicoStatus.DISPONIBLE.value]),
+            cls.deleted == False
+        )
 
-        return available_technicians
+    @classmethod
+    def get_by_workload(cls, max_assignments=5):
+        """Obtiene técnicos con carga de trabajo baja (los menos cargados primero)."""
+        from models.carga_tecnico import CargaTecnico
+        asignaciones = func.coalesce(CargaTecnico.asignaciones_activas, 0)
+        return cls._query_activos_con_carga().filter(
+            asignaciones < max_assignments
+        ).order_by(asignaciones.asc(), cls.id).all()
 
     @classmethod
     def get_with_low_performance(cls, min_completion_rate=70.0):
         """Obtiene técnicos con bajo rendimiento."""
-        technicians = cls.get_active_technicians()
-        low_performance = []
-
-        for tech in technicians:
-            metrics = tech.get_performance_metrics()
-            if metrics['tasa_resolucion_fallas'] < min_completion_rate:
-                low_performance.append(tech)
-
-        return low_performance
+        from models.carga_tecnico import CargaTecnico
+        tasa = case(
+            (CargaTecnico.fallas_total > 0,
+             CargaTecnico.fallas_resueltas * 100.0 / CargaTecnico.fallas_total),
+            else_=0.0
+        )
+        return cls._query_activos_con_carga().filter(tasa < min_completion_rate).all()
 
     @classmethod
     def search(cls, query, specialty=None):
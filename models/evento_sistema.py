@@ -0,0 +1,46 @@
+# models/evento_sistema.py
+"""
+Modelo del registro de eventos del sistema para el canal en tiempo real (SSE).
+Cada cambio relevante (falla nueva, cambio de estado de equipo) se inserta en la
+misma transacción que lo origina; cada proceso web lee los eventos nuevos una sola
+vez y los reparte a todos sus clientes conectados.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+
+from models import db
+
+
+class EventoSistema(db.Model):
+    """
+    Evento publicado para los clientes conectados al stream.
+
+    Attributes:
+        tipo (str): falla_creada, falla_actualizada, estado_equipo, ...
+        datos (dict): Delta serializable que aplica el cliente
+        created_at (datetime): Fecha de publicación
+    """
+
+    __tablename__ = 'eventos_sistema'
+    __table_args__ = (
+        Index('ix_eventos_sistema_created_at', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String(50), nullable=False,
+                  comment="Tipo de evento")
+    datos = Column(JSON, nullable=True,
+                   comment="Delta del evento")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        comment="Fecha de publicación")
+
+    def __repr__(self):
+        return f"<EventoSistema(id={self.id}, tipo='{self.tipo}')>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'datos': self.datos or {},
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
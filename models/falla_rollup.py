@@ -0,0 +1,73 @@
+# models/falla_rollup.py
+"""
+Modelo de agregados (rollups) de fallas por intervalo de tiempo.
+Cada fila acumula las fallas reportadas en un bucket horario, diario o mensual
+para una combinación de tipo de equipo, severidad, estado y ubicación. Se
+mantienen al crear y actualizar fallas, de modo que los reportes leen unos
+cientos de filas en lugar de recorrer toda la tabla de fallas.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
+
+from models import db
+
+
+class GranularidadRollup:
+    """Tamaños de bucket disponibles."""
+    HORA = "hora"
+    DIA = "dia"
+    MES = "mes"
+
+    TODAS = (HORA, DIA, MES)
+
+
+class FallaRollup(db.Model):
+    """
+    Conteos de fallas por bucket de tiempo y dimensiones.
+
+    Attributes:
+        granularidad (str): hora, dia o mes
+        bucket (datetime): Inicio del bucket (fecha de reporte truncada)
+        equipo_tipo (str): Tipo de equipo de la falla
+        severidad (str): Severidad/prioridad de la falla
+        estado (str): Estado actual de la falla
+        ubicacion_id (int): Ubicación del equipo (0 = sin ubicación)
+        cantidad (int): Fallas reportadas en el bucket
+        resueltas (int): Fallas del bucket con fecha de resolución
+        horas_resolucion_total (float): Suma de horas hasta la resolución
+        horas_resolucion_max (float): Mayor tiempo de resolución observado
+    """
+
+    __tablename__ = 'fallas_rollup'
+    __table_args__ = (
+        UniqueConstraint('granularidad', 'bucket', 'equipo_tipo', 'severidad', 'estado', 'ubicacion_id',
+                         name='uq_fallas_rollup_dimensiones'),
+        Index('ix_fallas_rollup_granularidad_bucket', 'granularidad', 'bucket'),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    granularidad = Column(String(5), nullable=False,
+                          comment="Tamaño del bucket: hora, dia o mes")
+    bucket = Column(DateTime, nullable=False,
+                    comment="Inicio del bucket")
+    equipo_tipo = Column(String(50), nullable=False, default='',
+                         comment="Tipo de equipo")
+    severidad = Column(String(20), nullable=False, default='',
+                       comment="Severidad de la falla")
+    estado = Column(String(20), nullable=False, default='',
+                    comment="Estado de la falla")
+    ubicacion_id = Column(Integer, nullable=False, default=0,
+                          comment="Ubicación del equipo (0 = sin ubicación)")
+
+    cantidad = Column(Integer, nullable=False, default=0,
+                      comment="Fallas reportadas")
+    resueltas = Column(Integer, nullable=False, default=0,
+                       comment="Fallas con fecha de resolución")
+    horas_resolucion_total = Column(Float, nullable=False, default=0.0,
+                                    comment="Suma de horas de resolución")
+    horas_resolucion_max = Column(Float, nullable=False, default=0.0,
+                                  comment="Máximo de horas de resolución")
+
+    def __repr__(self):
+        return (f"<FallaRollup({self.granularidad} {self.bucket}, {self.equipo_tipo}/"
+                f"{self.severidad}/{self.estado}, cantidad={self.cantidad})>")
@@ -63,9 +63,10 @@ class Fuente(BaseModel, db.Model):
     # Relaciones (comentadas hasta implementar Usuario.back_populates)
     # created_by_user = relationship("Usuario", back_populates="created_equipos")
     
-    # Relaciones con otros modelos
-    mantenimientos = relationship("Mantenimiento", back_populate="fuente_poder", cascade="all, delete-orphan")
-    fotografias = relationship("Fotografia", back_populate="fuente_poder", cascade="all, delete-orphan")
+    # Relaciones con otros modelos (comentadas: mantenimientos y fotografias no tienen FK a fuentes;
+    # se enlazan por tipo_equipo/equipo_id)
+    # mantenimientos = relationship("Mantenimiento", back_populates="fuente_poder")
+    # fotografias = relationship("Fotografia", back_populates="fuente_poder")
 
     def __repr__(self):
         return f"<Fuente(nombre='{self.nombre}', potencia='{self.potencia}W', estado='{self.estado}')>"
@@ -75,8 +75,9 @@ class NetworkConnection(BaseModel, db.Model):
     )
 
     # === IDENTIFICACIÓN DE EQUIPOS ===
-    equipo_origen_id = Column(Integer, ForeignKey('equipos.id'), nullable=False)
-    equipo_destino_id = Column(Integer, ForeignKey('equipos.id'), nullable=False)
+    # Sin FK: cada id apunta a la tabla de su tipo (equipo_*_tipo)
+    equipo_origen_id = Column(Integer, nullable=False)
+    equipo_destino_id = Column(Integer, nullable=False)
 
     # Tipo de cada equipo para validación
     equipo_origen_tipo = Column(String(50), nullable=False)
@@ -113,21 +114,6 @@ class NetworkConnection(BaseModel, db.Model):
     descripcion = Column(Text, nullable=True)
     notas_tecnicas = Column(Text, nullable=True)
 
-    # === RELACIONES ===
-    equipo_origen = relationship(
-        "Equipo",
-        foreign_keys=[equipo_origen_id],
-        back_populates="conexiones_origen",
-        lazy="joined"
-    )
-
-    equipo_destino = relationship(
-        "Equipo",
-        foreign_keys=[equipo_destino_id],
-        back_populates="conexiones_destino",
-        lazy="joined"
-    )
-
     # === ÍNDICES PARA RENDIMIENTO ===
     __table_args__ = (
         # Índices para búsquedas frecuentes
@@ -0,0 +1,104 @@
+# models/notificacion.py
+"""
+Modelos de notificaciones internas del sistema.
+Incluye el contador de no leídas por usuario, mantenido al insertar y al
+marcar como leídas, para que el badge del navbar sea una lectura por clave primaria,
+y el registro de envíos por email y SMS.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, JSON
+
+from models.base import BaseModel
+from models import db
+
+
+class Notificacion(BaseModel, db.Model):
+    """
+    Notificación dentro del sistema para un usuario.
+
+    Attributes:
+        user_id (int): Usuario destinatario
+        titulo (str): Título corto
+        mensaje (str): Texto de la notificación
+        tipo (str): info, failure, maintenance, ...
+        data (str): Datos adicionales en JSON
+        read_at (datetime): Fecha de lectura (None = no leída)
+    """
+
+    __tablename__ = 'notificaciones'
+    __table_args__ = (
+        # Bandeja de no leídas más recientes por usuario
+        Index('ix_notificaciones_user_read_created', 'user_id', 'read_at', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('usuarios.id'), nullable=False,
+                     comment="Usuario destinatario")
+    titulo = Column(String(200), nullable=False,
+                    comment="Título de la notificación")
+    mensaje = Column(Text, nullable=True,
+                     comment="Texto de la notificación")
+    tipo = Column(String(50), nullable=False, default='info',
+                  comment="Tipo de notificación")
+    data = Column(Text, nullable=True,
+                  comment="Datos adicionales en JSON")
+    read_at = Column(DateTime, nullable=True,
+                     comment="Fecha de lectura")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        comment="Fecha de creación")
+
+    def __repr__(self):
+        return f"<Notificacion(id={self.id}, user_id={self.user_id}, titulo='{self.titulo}')>"
+
+    @property
+    def leida(self):
+        """Indica si la notificación ya fue leída."""
+        return self.read_at is not None
+
+
+class NotificacionContador(db.Model):
+    """
+    Contador de notificaciones no leídas por usuario (una fila por usuario).
+    """
+
+    __tablename__ = 'notificaciones_contador'
+
+    user_id = Column(Integer, ForeignKey('usuarios.id'), primary_key=True,
+                     comment="Usuario dueño del contador")
+    no_leidas = Column(Integer, nullable=False, default=0,
+                       comment="Notificaciones no leídas")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Última actualización del contador")
+
+    def __repr__(self):
+        return f"<NotificacionContador(user_id={self.user_id}, no_leidas={self.no_leidas})>"
+
+
+class NotificacionLog(db.Model):
+    """
+    Registro de envíos por email y SMS (exitosos y fallidos).
+    """
+
+    __tablename__ = 'notificaciones_log'
+    __table_args__ = (
+        Index('ix_notificaciones_log_created', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String(20), nullable=False,
+                  comment="Canal: email o sms")
+    destinatarios = Column(JSON, nullable=False,
+                           comment="Lista de destinatarios")
+    asunto = Column(String(255), nullable=True,
+                    comment="Asunto del mensaje")
+    contenido = Column(Text, nullable=True,
+                       comment="Contenido enviado")
+    estado = Column(String(20), nullable=False,
+                    comment="enviado o error")
+    error = Column(Text, nullable=True,
+                   comment="Detalle del error de envío")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        comment="Fecha del envío")
+
+    def __repr__(self):
+        return f"<NotificacionLog(id={self.id}, tipo='{self.tipo}', estado='{self.estado}')>"
@@ -0,0 +1,112 @@
+# models/notificacion_cola.py
+"""
+Modelo de la cola persistente de notificaciones salientes.
+Los emails se encolan en la misma transacción que los origina y un worker
+los envía por lotes reutilizando la sesión SMTP. Los mensajes con clave de
+agrupación acumulan varios eventos en un solo resumen (digest).
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, text
+
+from models.base import BaseModel
+from models import db
+
+
+class EstadoNotificacionCola:
+    """Estados posibles de un mensaje en cola."""
+    PENDIENTE = "pendiente"
+    ENVIANDO = "enviando"
+    ENVIADO = "enviado"
+    ERROR = "error"
+
+
+class NotificacionCola(BaseModel, db.Model):
+    """
+    Mensaje de email pendiente de envío.
+
+    Attributes:
+        destinatarios (list): Direcciones de destino
+        asunto (str): Asunto del mensaje
+        cuerpo_texto (str): Versión en texto plano
+        cuerpo_html (str): Versión HTML (opcional)
+        estado (str): pendiente, enviando, enviado o error
+        intentos (int): Intentos de envío realizados
+        proximo_intento (datetime): Momento a partir del cual puede reintentarse
+        clave_agrupacion (str): Clave del resumen (destinatario + causa raíz)
+        items (list): Eventos acumulados en el resumen
+    """
+
+    __tablename__ = 'notificaciones_cola'
+    __table_args__ = (
+        Index('ix_notificaciones_cola_estado_proximo', 'estado', 'proximo_intento'),
+        Index('ix_notificaciones_cola_clave_estado', 'clave_agrupacion', 'estado'),
+        # Un solo resumen abierto (pendiente y sin intentos) por clave de agrupación
+        Index('uq_notificaciones_cola_resumen_abierto', 'clave_agrupacion', unique=True,
+              postgresql_where=text("estado = 'pendiente' AND intentos = 0"),
+              sqlite_where=text("estado = 'pendiente' AND intentos = 0")),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    destinatarios = Column(JSON, nullable=False,
+                           comment="Lista de direcciones de destino")
+    asunto = Column(String(255), nullable=False,
+                    comment="Asunto del mensaje")
+    cuerpo_texto = Column(Text, nullable=False,
+                          comment="Cuerpo en texto plano")
+    cuerpo_html = Column(Text, nullable=True,
+                         comment="Cuerpo HTML opcional")
+    tipo = Column(String(50), nullable=True,
+                  comment="Origen de la notificación (failure, maintenance, ...)")
+
+    estado = Column(String(20), nullable=False, default=EstadoNotificacionCola.PENDIENTE,
+                    comment="Estado del envío")
+    intentos = Column(Integer, nullable=False, default=0,
+                      comment="Intentos de envío realizados")
+    max_intentos = Column(Integer, nullable=False, default=5,
+                          comment="Intentos antes de marcar como error definitivo")
+    proximo_intento = Column(DateTime, nullable=False, default=datetime.utcnow,
+                             comment="No enviar antes de esta fecha (backoff)")
+    ultimo_error = Column(Text, nullable=True,
+                          comment="Último error de envío")
+    enviado_at = Column(DateTime, nullable=True,
+                        comment="Fecha de envío exitoso")
+
+    # Agrupación de eventos (digest)
+    clave_agrupacion = Column(String(255), nullable=True,
+                              comment="Clave de agrupación: destinatario y causa raíz")
+    items = Column(JSON, nullable=True,
+                   comment="Eventos acumulados en el resumen")
+
+    def __repr__(self):
+        return f"<NotificacionCola(id={self.id}, asunto='{self.asunto}', estado='{self.estado}')>"
+
+    def es_resumen(self):
+        """Indica si el mensaje agrupa más de un evento."""
+        return bool(self.items) and len(self.items) > 1
+
+    def marcar_enviado(self):
+        """Marca el mensaje como enviado."""
+        self.estado = EstadoNotificacionCola.ENVIADO
+        self.enviado_at = datetime.utcnow()
+        self.ultimo_error = None
+
+    def marcar_fallido(self, error, backoff_base=30, backoff_max=3600):
+        """
+        Registra un intento fallido y programa el reintento con backoff exponencial.
+
+        Args:
+            error (str): Descripción del error
+            backoff_base (int): Segundos de espera tras el primer fallo
+            backoff_max (int): Tope de espera entre reintentos
+        """
+        self.intentos = (self.intentos or 0) + 1
+        self.ultimo_error = str(error)[:2000]
+
+        if self.intentos >= self.max_intentos:
+            self.estado = EstadoNotificacionCola.ERROR
+            return
+
+        espera = min(backoff_base * (2 ** (self.intentos - 1)), backoff_max)
+        self.estado = EstadoNotificacionCola.PENDIENTE
+        self.proximo_intento = datetime.utcnow() + timedelta(seconds=espera)
@@ -0,0 +1,62 @@
+# models/ocupacion_gabinete.py
+"""
+Modelo del índice de ocupación de unidades de rack por gabinete.
+Cada fila resume, para un gabinete, cuántas unidades (U) tiene, cuántas
+ocupan los equipos instalados y qué tramos contiguos siguen libres, de modo
+que buscar dónde instalar equipos sea una sola consulta en lugar de recorrer
+el equipamiento de cada gabinete.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime
+
+from models import db
+
+
+class OcupacionGabinete(db.Model):
+    """
+    Ocupación de un gabinete, mantenida al instalar, mover o retirar equipos y
+    al cambiar las unidades del gabinete.
+
+    Attributes:
+        gabinete_id (int): ID del gabinete
+        ubicacion_id (int): Ubicación del gabinete
+        activo (bool): Si el gabinete está activo y no eliminado
+        unidades_totales (int): Unidades utilizables (usable_rack_units o rack_units)
+        unidades_ocupadas (int): Unidades ocupadas por equipos instalados
+        unidades_libres (int): unidades_totales - unidades_ocupadas
+        mayor_tramo_libre (int): Largo del mayor tramo de unidades contiguas libres
+        tramos_libres (list): Tramos libres como [unidad_inicial, largo]
+        peso_maximo_kg (float): Peso máximo soportado
+    """
+
+    __tablename__ = 'ocupacion_gabinetes'
+
+    id = Column(Integer, primary_key=True)
+
+    # Sin clave foránea: la fila se elimina en el mismo flush que borra el gabinete
+    gabinete_id = Column(Integer, nullable=False, unique=True,
+                         comment="ID del gabinete")
+    ubicacion_id = Column(Integer, nullable=True, index=True,
+                          comment="Ubicación del gabinete")
+    activo = Column(Boolean, nullable=False, default=True,
+                    comment="Gabinete activo y no eliminado")
+
+    unidades_totales = Column(Integer, nullable=False, default=0,
+                              comment="Unidades de rack utilizables")
+    unidades_ocupadas = Column(Integer, nullable=False, default=0,
+                               comment="Unidades ocupadas")
+    unidades_libres = Column(Integer, nullable=False, default=0,
+                             comment="Unidades libres")
+    mayor_tramo_libre = Column(Integer, nullable=False, default=0, index=True,
+                               comment="Mayor tramo de unidades contiguas libres")
+    tramos_libres = Column(db.JSON, nullable=False, default=list,
+                           comment="Tramos libres [unidad inicial, largo]")
+    peso_maximo_kg = Column(Float, nullable=True,
+                            comment="Peso máximo soportado")
+
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Última actualización")
+
+    def __repr__(self):
+        return (f"<OcupacionGabinete(gabinete={self.gabinete_id}, libres={self.unidades_libres}U, "
+                f"mayor_tramo={self.mayor_tramo_libre}U)>")
@@ -0,0 +1,61 @@
+# models/presupuesto_poe.py
+"""
+Modelo del índice de presupuesto PoE por switch.
+Cada fila resume, para un switch, cuánta potencia PoE tiene, cuánta entrega
+y qué puertos PoE siguen libres, de modo que buscar dónde conectar cámaras
+nuevas sea una sola consulta en lugar de recorrer los puertos de cada switch.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime
+
+from models import db
+
+
+class PresupuestoPoeSwitch(db.Model):
+    """
+    Presupuesto PoE de un switch, mantenido al cambiar sus puertos o su
+    configuración.
+
+    Attributes:
+        switch_id (int): ID del switch
+        ubicacion_id (int): Ubicación del switch
+        activo (bool): Si el switch está activo y no eliminado
+        presupuesto_watts (float): Potencia PoE máxima (max_poe_power)
+        consumo_watts (float): Potencia PoE entregada por los puertos
+        disponible_watts (float): presupuesto_watts - consumo_watts
+        watts_maximo_puerto (float): Potencia máxima por puerto (PoE o PoE+)
+        puertos_poe_libres (int): Puertos PoE sin equipo conectado
+        puertos_libres (list): Números de esos puertos
+    """
+
+    __tablename__ = 'presupuesto_poe_switches'
+
+    id = Column(Integer, primary_key=True)
+
+    # Sin clave foránea: la fila se elimina en el mismo flush que borra el switch
+    switch_id = Column(Integer, nullable=False, unique=True,
+                       comment="ID del switch")
+    ubicacion_id = Column(Integer, nullable=True, index=True,
+                          comment="Ubicación del switch")
+    activo = Column(Boolean, nullable=False, default=True,
+                    comment="Switch activo y no eliminado")
+
+    presupuesto_watts = Column(Float, nullable=False, default=0.0,
+                               comment="Potencia PoE máxima")
+    consumo_watts = Column(Float, nullable=False, default=0.0,
+                           comment="Potencia PoE entregada")
+    disponible_watts = Column(Float, nullable=False, default=0.0, index=True,
+                              comment="Potencia PoE restante")
+    watts_maximo_puerto = Column(Float, nullable=False, default=15.4,
+                                 comment="Potencia máxima por puerto")
+    puertos_poe_libres = Column(Integer, nullable=False, default=0, index=True,
+                                comment="Puertos PoE libres")
+    puertos_libres = Column(db.JSON, nullable=False, default=list,
+                            comment="Números de los puertos PoE libres")
+
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Última actualización")
+
+    def __repr__(self):
+        return (f"<PresupuestoPoeSwitch(switch={self.switch_id}, disponible={self.disponible_watts}W, "
+                f"puertos_libres={self.puertos_poe_libres})>")
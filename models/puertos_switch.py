@@ -88,7 +88,7 @@ class PuertoSwitch(BaseModel, db.Model):
                            comment="Observaciones adicionales")
 
     # Relaciones bidireccionales
-    switch = relationship("Switch", back_populates="puertos")
+    switch = relationship("Switch")  # Switch.puertos es SwitchPort
 
     def __repr__(self):
         return f"<PuertoSwitch(switch_id={self.switch_id}, numero_puerto={self.numero_puerto}, tipo_puerto='{self.tipo_puerto}')>"
@@ -0,0 +1,96 @@
+# models/reporte_snapshot.py
+"""
+Modelo de snapshots de reportes precalculados.
+El programador de reportes genera los reportes estándar (diario, semanal,
+mensual) por adelantado y guarda el resultado como JSON comprimido, de modo que
+consultar el último reporte o comparar dos períodos no recalcula nada.
+"""
+import json
+import zlib
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, LargeBinary, Index, UniqueConstraint
+
+from models import db
+
+
+class PeriodicidadReporte:
+    """Periodicidades de los reportes programados."""
+    DIARIO = "diario"
+    SEMANAL = "semanal"
+    MENSUAL = "mensual"
+
+    TODAS = (DIARIO, SEMANAL, MENSUAL)
+
+
+class ReporteSnapshot(db.Model):
+    """
+    Resultado de un reporte programado para un período cerrado.
+
+    Attributes:
+        tipo (str): Reporte generado (fallas)
+        periodicidad (str): diario, semanal o mensual
+        periodo_inicio (datetime): Inicio del período cubierto
+        periodo_fin (datetime): Fin (exclusivo) del período cubierto
+        contenido (bytes): JSON del reporte comprimido con zlib
+        tamano_json (int): Bytes del JSON sin comprimir
+        duracion_ms (float): Tiempo que tomó generar el reporte
+        generado_en (datetime): Fecha de generación
+    """
+
+    __tablename__ = 'reportes_snapshots'
+    __table_args__ = (
+        UniqueConstraint('tipo', 'periodicidad', 'periodo_inicio',
+                         name='uq_reportes_snapshots_periodo'),
+        Index('ix_reportes_snapshots_tipo_periodo', 'tipo', 'periodicidad', 'periodo_inicio'),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    tipo = Column(String(30), nullable=False,
+                  comment="Reporte generado")
+    periodicidad = Column(String(10), nullable=False,
+                          comment="diario, semanal o mensual")
+    periodo_inicio = Column(DateTime, nullable=False,
+                            comment="Inicio del período")
+    periodo_fin = Column(DateTime, nullable=False,
+                         comment="Fin (exclusivo) del período")
+
+    contenido = Column(LargeBinary, nullable=False,
+                       comment="JSON del reporte comprimido (zlib)")
+    tamano_json = Column(Integer, nullable=False, default=0,
+                         comment="Bytes del JSON sin comprimir")
+    duracion_ms = Column(Float, nullable=True,
+                         comment="Tiempo de generación en ms")
+    generado_en = Column(DateTime, nullable=False, default=datetime.utcnow,
+                         comment="Fecha de generación")
+
+    def __repr__(self):
+        return (f"<ReporteSnapshot({self.tipo}/{self.periodicidad} "
+                f"{self.periodo_inicio:%Y-%m-%d}, {len(self.contenido or b'')} bytes)>")
+
+    @property
+    def datos(self):
+        """Reporte descomprimido"""
+        return json.loads(zlib.decompress(self.contenido).decode('utf-8'))
+
+    @datos.setter
+    def datos(self, valor):
+        serializado = json.dumps(valor, default=str, ensure_ascii=False).encode('utf-8')
+        self.contenido = zlib.compress(serializado, 6)
+        self.tamano_json = len(serializado)
+
+    def to_dict(self, incluir_datos: bool = True):
+        resultado = {
+            'id': self.id,
+            'tipo': self.tipo,
+            'periodicidad': self.periodicidad,
+            'periodo_inicio': self.periodo_inicio.isoformat() if self.periodo_inicio else None,
+            'periodo_fin': self.periodo_fin.isoformat() if self.periodo_fin else None,
+            'generado_en': self.generado_en.isoformat() if self.generado_en else None,
+            'tamano_json': self.tamano_json,
+            'tamano_comprimido': len(self.contenido or b''),
+            'duracion_ms': self.duracion_ms
+        }
+        if incluir_datos:
+            resultado['datos'] = self.datos
+        return resultado
@@ -110,9 +110,10 @@ class Switch(db.Model, TimestampedModel):
     ubicacion_id = Column(Integer, ForeignKey('ubicaciones.id'), nullable=True)
     ubicacion = relationship("Ubicacion", back_populates="switches")
     created_by_user_id = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
-    created_by_user = relationship("Usuario", back_populates="created_equipos")
+    created_by_user = relationship("Usuario", foreign_keys=[created_by_user_id])
+    camaras = relationship("Camara", back_populates="switch")
 
-    mantenimientos = relationship("Mantenimiento", back_populates="switch", cascade="all, delete-orphan")
+    # mantenimientos: Mantenimiento enlaza por tipo_equipo/equipo_id, sin FK a esta tabla
     fotografias = relationship("Fotografia", back_populates="switch", cascade="all, delete-orphan")
     puertos = relationship("SwitchPort", back_populates="switch", cascade="all, delete-orphan")
     vlans = relationship("SwitchVLAN", back_populates="switch", cascade="all, delete-orphan")
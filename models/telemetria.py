@@ -0,0 +1,128 @@
+# models/telemetria.py
+"""
+Modelos de series de tiempo de telemetría de equipos.
+Las muestras crudas (temperatura, carga, voltaje, salud de batería...) se
+agregan por inserción; un compactador las resume en bloques columnares
+por serie a resolución de 1 minuto, 1 hora y 1 día, de modo que los gráficos
+leen unos pocos bloques en lugar de recorrer las muestras.
+"""
+from datetime import datetime
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Float, Boolean, DateTime, LargeBinary, Index, UniqueConstraint, text
+)
+
+from models import db
+
+
+class ResolucionTelemetria:
+    """Resoluciones de los bloques agregados (segundos por punto)."""
+    MINUTO = "1m"
+    HORA = "1h"
+    DIA = "1d"
+
+    TODAS = (MINUTO, HORA, DIA)
+    SEGUNDOS = {MINUTO: 60, HORA: 3600, DIA: 86400}
+    # Puntos por bloque: 6 horas de minutos, 15 días de horas, 360 días de días
+    PUNTOS_POR_BLOQUE = {MINUTO: 360, HORA: 360, DIA: 360}
+
+
+class TelemetriaMuestra(db.Model):
+    """
+    Muestra cruda de una métrica de un equipo. Solo se modifica para marcarla
+    como compactada.
+
+    Attributes:
+        equipo_tipo (str): Tipo de equipo (ups, fuente, ...)
+        equipo_id (int): ID del equipo
+        metrica (str): Nombre de la métrica (temperatura_actual, porcentaje_carga, ...)
+        momento (datetime): Fecha de la medición (UTC)
+        valor (float): Valor medido
+        compactada (bool): Ya está sumada en los bloques
+    """
+
+    __tablename__ = 'telemetria_muestras'
+    __table_args__ = (
+        Index('ix_telemetria_muestras_serie_momento', 'equipo_tipo', 'equipo_id', 'metrica', 'momento'),
+        # Solo las pendientes de compactar, en orden de id
+        Index('ix_telemetria_muestras_pendientes', 'id',
+              postgresql_where=text('compactada = false'),
+              sqlite_where=text('compactada = 0')),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True)
+
+    equipo_tipo = Column(String(50), nullable=False,
+                         comment="Tipo de equipo")
+    equipo_id = Column(Integer, nullable=False,
+                       comment="ID del equipo")
+    metrica = Column(String(50), nullable=False,
+                     comment="Nombre de la métrica")
+    momento = Column(DateTime, nullable=False, index=True,
+                     comment="Fecha de la medición (UTC)")
+    valor = Column(Float, nullable=False,
+                   comment="Valor medido")
+    compactada = Column(Boolean, nullable=False, default=False,
+                        comment="Ya está sumada en los bloques")
+
+    def __repr__(self):
+        return f"<TelemetriaMuestra({self.equipo_tipo} {self.equipo_id} {self.metrica}={self.valor} @ {self.momento})>"
+
+
+class TelemetriaBloque(db.Model):
+    """
+    Bloque columnar de una serie a una resolución.
+
+    Cada arreglo (NumPy serializado) tiene un elemento por punto: desplazamiento
+    en segundos desde `inicio`, cantidad de muestras, suma, mínimo y máximo.
+    Guardar suma y cantidad permite fusionar muestras atrasadas sin perder el
+    promedio exacto.
+
+    Attributes:
+        resolucion (str): 1m, 1h o 1d
+        inicio (datetime): Inicio del bloque
+        fin (datetime): Fin del bloque (exclusivo)
+        puntos (int): Puntos con datos en el bloque
+    """
+
+    __tablename__ = 'telemetria_bloques'
+    __table_args__ = (
+        UniqueConstraint('equipo_tipo', 'equipo_id', 'metrica', 'resolucion', 'inicio',
+                         name='uq_telemetria_bloques_serie'),
+        Index('ix_telemetria_bloques_resolucion_fin', 'resolucion', 'fin'),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    equipo_tipo = Column(String(50), nullable=False,
+                         comment="Tipo de equipo")
+    equipo_id = Column(Integer, nullable=False,
+                       comment="ID del equipo")
+    metrica = Column(String(50), nullable=False,
+                     comment="Nombre de la métrica")
+    resolucion = Column(String(5), nullable=False,
+                        comment="Resolución: 1m, 1h o 1d")
+    inicio = Column(DateTime, nullable=False,
+                    comment="Inicio del bloque")
+    fin = Column(DateTime, nullable=False,
+                 comment="Fin del bloque (exclusivo)")
+    puntos = Column(Integer, nullable=False, default=0,
+                    comment="Puntos con datos")
+
+    desplazamientos = Column(LargeBinary, nullable=False,
+                             comment="Segundos desde el inicio (uint32)")
+    conteos = Column(LargeBinary, nullable=False,
+                     comment="Muestras por punto (uint32)")
+    sumas = Column(LargeBinary, nullable=False,
+                   comment="Suma de valores por punto (float64)")
+    minimos = Column(LargeBinary, nullable=False,
+                     comment="Mínimo por punto (float64)")
+    maximos = Column(LargeBinary, nullable=False,
+                     comment="Máximo por punto (float64)")
+
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Última compactación")
+
+    def __repr__(self):
+        return (f"<TelemetriaBloque({self.equipo_tipo} {self.equipo_id} {self.metrica} "
+                f"{self.resolucion} {self.inicio}, puntos={self.puntos})>")
+
@@ -45,6 +45,9 @@ class Usuario(db.Model, UserMixin, TimestampedModel):
     # Relación con logs de usuario
     logs = relationship("UsuarioLog", back_populates="usuario", cascade="all, delete-orphan")
 
+    # Relación con historial de cambios de estado de equipos
+    historial_cambios_estado = relationship("HistorialEstadoEquipo", back_populates="usuario")
+
     def set_password(self, password):
         """Establecer contraseña usando werkzeug (compatible con Flask)"""
         try:
@@ -24,5 +24,12 @@ def get_blueprint_info():
         'ups': 'Blueprint de gestión de UPS',
         'fuentes': 'Blueprint de gestión de fuentes de poder',
         'gabinetes': 'Blueprint de gestión de gabinetes',
-        'mantenimientos': 'Blueprint de gestión de mantenimientos'
+        'mantenimientos': 'Blueprint de gestión de mantenimientos',
+        'exportaciones': 'Blueprint de exportaciones masivas (ZIP de fotografías)',
+        'notificaciones': 'Blueprint de bandeja de notificaciones internas',
+        'eventos': 'Blueprint de eventos en tiempo real (SSE)',
+        'reportes': 'Blueprint de reportes precalculados (snapshots), confiabilidad y disponibilidad de equipos',
+        'despacho': 'Blueprint de despacho automático de fallas a técnicos',
+        'heartbeats': 'Blueprint de ingesta de heartbeats por lotes y estado en línea de equipos',
+        'telemetria': 'Blueprint de series de tiempo de telemetría (temperatura, carga, voltaje, batería)'
     }
\ No newline at end of file
@@ -140,6 +140,13 @@ def dashboard_stats():
         
         # Health score
         stats['health_score'] = calcular_health_score(stats['general'])
+
+        # Salud de equipos (UPS, NVR, switches, fuentes y gabinetes)
+        try:
+            from services.salud_flota_service import motor_salud_flota
+            stats['salud_flota'] = motor_salud_flota.resumen()
+        except Exception as e:
+            logger.error(f"Error calculando salud de la flota: {e}")
         
         return jsonify(stats)
         
@@ -147,6 +154,29 @@ def dashboard_stats():
         logger.error(f"Error obteniendo stats: {e}")
         return jsonify({'error': 'Error obteniendo estadísticas'}), 500
 
+@dashboard_bp.route('/salud-flota')
+@login_required
+def salud_flota():
+    """API con la salud de la flota: resumen por tipo, peores equipos y agregados por ubicación"""
+    try:
+        from services.salud_flota_service import motor_salud_flota, TIPOS_SALUD
+
+        tipo = request.args.get('tipo') or None
+        if tipo and tipo not in TIPOS_SALUD:
+            return jsonify({'error': f"Tipo inválido, usar uno de: {', '.join(TIPOS_SALUD)}"}), 400
+        limite = min(max(request.args.get('limite', 10, type=int), 1), 100)
+        ubicacion_id = request.args.get('ubicacion_id', type=int)
+
+        return jsonify({
+            **motor_salud_flota.resumen(),
+            'peores': motor_salud_flota.peores(limite, tipo=tipo, ubicacion_id=ubicacion_id),
+            'por_ubicacion': motor_salud_flota.por_ubicacion(tipo=tipo)
+        })
+
+    except Exception as e:
+        logger.error(f"Error obteniendo salud de la flota: {e}")
+        return jsonify({'error': 'Error obteniendo salud de la flota'}), 500
+
 @dashboard_bp.route('/alerts')
 @login_required
 def get_alerts():
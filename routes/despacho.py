@@ -0,0 +1,67 @@
+"""
+Blueprint de Despacho para Sistema de Cámaras UFRO
+Asignación automática de lotes de fallas a técnicos
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+import logging
+
+from models.usuario_roles import UserRole
+
+despacho_bp = Blueprint('despacho_bp', __name__, url_prefix='/despacho')
+logger = logging.getLogger(__name__)
+
+
+def _servicio():
+    from models import db
+    from services.despacho_service import DespachoService
+    return DespachoService(db.session)
+
+
+def _parametros(datos):
+    falla_ids = datos.get('falla_ids') or None
+    if falla_ids is not None and not all(isinstance(i, int) for i in falla_ids):
+        raise ValueError('falla_ids debe ser una lista de enteros')
+    return {
+        'falla_ids': falla_ids,
+        'metodo': datos.get('metodo', 'hungaro'),
+        'max_asignaciones': int(datos.get('max_asignaciones', 5)),
+        'limite': min(int(datos.get('limite', 500)), 2000)
+    }
+
+
+@despacho_bp.route('/fallas/plan', methods=['POST'])
+@login_required
+def plan_despacho():
+    """
+    Plan de asignación sin modificar las fallas.
+
+    Body JSON opcional: falla_ids (restringe el lote; solo cuentan las pendientes sin técnico),
+    metodo (hungaro, voraz), max_asignaciones, limite (máx. 2000)
+    """
+    try:
+        return jsonify(_servicio().planificar(**_parametros(request.get_json(silent=True) or {})))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@despacho_bp.route('/fallas', methods=['POST'])
+@login_required
+def despachar_fallas():
+    """Calcula el plan y asigna las fallas (solo administradores). Mismo body que /fallas/plan"""
+    if not current_user.has_role(UserRole.ADMINISTRADOR):
+        return jsonify({'error': 'No tiene permisos para despachar fallas'}), 403
+
+    try:
+        parametros = _parametros(request.get_json(silent=True) or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        return jsonify(_servicio().despachar(**parametros))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error en despacho automático de fallas: {e}")
+        return jsonify({'error': 'Error despachando fallas'}), 500
@@ -0,0 +1,70 @@
+"""
+Blueprint de Eventos para Sistema de Cámaras UFRO
+Canal Server-Sent Events con los cambios de estado del sistema
+"""
+
+from flask import Blueprint, Response, request, stream_with_context, jsonify
+from flask_login import login_required
+import logging
+
+eventos_bp = Blueprint('eventos_bp', __name__, url_prefix='/eventos')
+logger = logging.getLogger(__name__)
+
+
+@eventos_bp.route('/stream')
+@login_required
+def stream_eventos():
+    """
+    Stream SSE de eventos: falla_creada, falla_actualizada, estado_equipo,
+    mantenimiento_vencido y resync (el cliente debe recargar sus datos).
+
+    Al reconectar, el navegador envía Last-Event-ID y se reenvían los eventos
+    perdidos si siguen en memoria.
+
+    Con workers sync responde 204: el navegador deja de reconectar y el
+    cliente usa /eventos/recientes.
+    """
+    from services.eventos_service import eventos_broker, modo_eventos, cursor_desde_id_sse
+
+    if modo_eventos(request.environ) == 'polling':
+        return Response(status=204)
+
+    cursor = cursor_desde_id_sse(request.headers.get('Last-Event-ID'))
+    if cursor is None:
+        cursor = request.args.get('last_id', type=int)
+
+    return Response(
+        stream_with_context(eventos_broker.stream(cursor)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@eventos_bp.route('/recientes')
+@login_required
+def eventos_recientes():
+    """
+    Alternativa al stream por polling: eventos con id mayor a `cursor` y el
+    cursor para la próxima consulta. Sin `cursor` retorna solo el cursor actual.
+
+    Un evento puede repetirse en consultas sucesivas mientras haya ids
+    anteriores sin confirmar; el cliente descarta los ids ya aplicados.
+    """
+    from sqlalchemy import func
+    from models import db
+    from models.evento_sistema import EventoSistema
+    from services.eventos_service import leer_eventos
+
+    cursor = request.args.get('cursor', type=int)
+    if cursor is None:
+        cursor = db.session.query(func.max(EventoSistema.id)).scalar() or 0
+        return jsonify({'eventos': [], 'cursor': cursor})
+
+    eventos, nuevo_cursor = leer_eventos(db.session, cursor, limite=200)
+    return jsonify({
+        'eventos': [evento.to_dict() for evento in eventos],
+        'cursor': nuevo_cursor
+    })
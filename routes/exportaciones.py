@@ -0,0 +1,122 @@
+"""
+Blueprint de Exportaciones para Sistema de Cámaras UFRO
+Descargas masivas para auditorías (fotografías en ZIP)
+"""
+
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_login import login_required
+from datetime import datetime
+import logging
+
+exportaciones_bp = Blueprint('exportaciones_bp', __name__, url_prefix='/exportaciones')
+logger = logging.getLogger(__name__)
+
+
+def _parse_fecha(valor):
+    """Convierte una fecha ISO del query string, o None si viene vacía"""
+    if not valor:
+        return None
+    return datetime.fromisoformat(valor.replace('Z', '+00:00'))
+
+
+def _parse_equipos(valores):
+    """Convierte parámetros equipo=tipo:id en pares (tipo, id)"""
+    equipos = []
+    for valor in valores:
+        tipo, _, equipo_id = valor.partition(':')
+        if not tipo or not equipo_id.isdigit():
+            raise ValueError(f'Equipo inválido: {valor} (formato tipo:id)')
+        equipos.append((tipo, int(equipo_id)))
+    return equipos
+
+
+@exportaciones_bp.route('/fotografias.zip')
+@login_required
+def exportar_fotografias_zip():
+    """
+    Descarga en ZIP las fotografías filtradas por equipo, falla, mantenimiento y fecha.
+
+    Parámetros (repetibles): equipo=camara:12, equipo_tipo=nvr, falla_id=5, mantenimiento_id=7
+    Parámetros opcionales: fecha_desde, fecha_hasta (ISO 8601)
+    """
+    try:
+        from models import db
+        from services.foto_export_service import FotoExportService
+
+        equipos = _parse_equipos(request.args.getlist('equipo'))
+        tipos = [t for t in request.args.getlist('equipo_tipo') if t]
+        falla_ids = request.args.getlist('falla_id', type=int)
+        mantenimiento_ids = request.args.getlist('mantenimiento_id', type=int)
+        fecha_desde = _parse_fecha(request.args.get('fecha_desde', ''))
+        fecha_hasta = _parse_fecha(request.args.get('fecha_hasta', ''))
+    except ValueError as e:
+        return jsonify({'error': f'Parámetros inválidos: {str(e)}'}), 400
+
+    if not (equipos or tipos or falla_ids or mantenimiento_ids or fecha_desde or fecha_hasta):
+        return jsonify({'error': 'Debe indicar al menos un filtro (equipo, falla, mantenimiento o fecha)'}), 400
+
+    try:
+        service = FotoExportService(
+            db_session=db.session,
+            upload_folder=current_app.config.get('UPLOAD_FOLDER', 'static/uploads')
+        )
+        contenido = service.exportar(
+            equipos=equipos,
+            tipos=tipos,
+            falla_ids=falla_ids,
+            mantenimiento_ids=mantenimiento_ids,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta
+        )
+
+        nombre = f"fotografias_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(
+            stream_with_context(contenido),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': f'attachment; filename={nombre}',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Error exportando fotografías: {e}")
+        return jsonify({'error': f'Error al exportar fotografías: {str(e)}'}), 500
+
+
+@exportaciones_bp.route('/reportes/fallas.<formato>')
+@login_required
+def exportar_analisis_fallas(formato):
+    """
+    Descarga el análisis de fallas del período en XLSX o PDF, generado en streaming.
+
+    Parámetros: fecha_desde, fecha_hasta (YYYY-MM-DD, la fecha final se incluye completa)
+    """
+    from models import db
+    from services.reporte_exportacion import ReporteExportService
+
+    fecha_desde = request.args.get('fecha_desde', '')
+    fecha_hasta = request.args.get('fecha_hasta', '')
+    try:
+        _parse_fecha(fecha_desde)
+        _parse_fecha(fecha_hasta)
+    except ValueError as e:
+        return jsonify({'error': f'Parámetros inválidos: {str(e)}'}), 400
+    if not fecha_desde or not fecha_hasta:
+        return jsonify({'error': 'Debe indicar fecha_desde y fecha_hasta'}), 400
+
+    try:
+        mimetype, nombre, contenido = ReporteExportService(db.session).exportar_analisis_fallas(
+            fecha_desde, fecha_hasta, formato
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return Response(
+        stream_with_context(contenido),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={nombre}',
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -9,6 +9,7 @@ from .auth import token_required
 from models import Mantenimiento, Usuario, Camara, Nvr, Switch, Ups, Fuente, Gabinete, db
 from utils.validators import validate_json, validate_required_fields, validate_pagination
 from utils.decorators import require_permission
+from services.nombres_equipo_service import resolutor_equipos
 
 # Mapeo de tipos de equipo a modelos
 EQUIPOS_MAP = {
@@ -20,6 +21,16 @@ EQUIPOS_MAP = {
     'gabinete': Gabinete
 }
 
+
+def _equipos_de(mantenimientos):
+    """Datos de los equipos de una lista de mantenimientos (consultas IN por tipo, con caché)"""
+    return resolutor_equipos.resolver(((m.tipo_equipo, m.equipo_id) for m in mantenimientos), modelos=EQUIPOS_MAP)
+
+
+def _equipo_info(equipos, m, campos=('id', 'nombre', 'ubicacion', 'tipo')):
+    equipo = equipos.get((m.tipo_equipo, m.equipo_id)) if m.equipo_id else None
+    return {campo: equipo[campo] for campo in campos} if equipo else None
+
 @mantenimientos_bp.route('', methods=['GET'])
 @token_required
 def get_mantenimientos(current_user):
@@ -107,18 +118,10 @@ def get_mantenimientos(current_user):
         )
 
         mantenimientos = []
+        equipos = _equipos_de(pagination.items)
         for m in pagination.items:
             # Obtener información del equipo
-            equipo_info = None
-            if m.equipo_id and m.tipo_equipo in EQUIPOS_MAP:
-                equipo = EQUIPOS_MAP[m.tipo_equipo].query.filter_by(id=m.equipo_id, activo=True).first()
-                if equipo:
-                    equipo_info = {
-                        'id': equipo.id,
-                        'nombre': equipo.nombre,
-                        'ubicacion': getattr(equipo, 'ubicacion', ''),
-                        'tipo': m.tipo_equipo
-                    }
+            equipo_info = _equipo_info(equipos, m)
 
             mantenimientos.append({
                 'id': m.id,
@@ -187,18 +190,10 @@ def get_mantenimiento(current_user, mantenimiento_id):
         mantenimiento = Mantenimiento.query.get_or_404(mantenimiento_id)
 
         # Información del equipo
-        equipo_info = None
-        if mantenimiento.equipo_id and mantenimiento.tipo_equipo in EQUIPOS_MAP:
-            equipo = EQUIPOS_MAP[mantenimiento.tipo_equipo].query.filter_by(id=mantenimiento.equipo_id, activo=True).first()
-            if equipo:
-                equipo_info = {
-                    'id': equipo.id,
-                    'nombre': equipo.nombre,
-                    'ubicacion': getattr(equipo, 'ubicacion', ''),
-                    'marca': getattr(equipo, 'marca', ''),
-                    'modelo': getattr(equipo, 'modelo', ''),
-                    'tipo': mantenimiento.tipo_equipo
-                }
+        equipo_info = _equipo_info(
+            _equipos_de([mantenimiento]), mantenimiento,
+            campos=('id', 'nombre', 'ubicacion', 'marca', 'modelo', 'tipo')
+        )
 
         return jsonify({
             'id': mantenimiento.id,
@@ -501,17 +496,9 @@ def get_mantenimientos_proximos(current_user):
         ).order_by(Mantenimiento.fecha_programada.asc()).all()
 
         resultados = []
+        equipos = _equipos_de(mantenimientos)
         for m in mantenimientos:
-            equipo_info = None
-            if m.equipo_id and m.tipo_equipo in EQUIPOS_MAP:
-                equipo = EQUIPOS_MAP[m.tipo_equipo].query.filter_by(id=m.equipo_id, activo=True).first()
-                if equipo:
-                    equipo_info = {
-                        'id': equipo.id,
-                        'nombre': equipo.nombre,
-                        'ubicacion': getattr(equipo, 'ubicacion', ''),
-                        'tipo': m.tipo_equipo
-                    }
+            equipo_info = _equipo_info(equipos, m)
 
             dias_hasta_programada = (m.fecha_programada.date() - datetime.utcnow().date()).days
 
@@ -564,12 +551,10 @@ def get_mantenimientos_calendario(current_user):
         ).order_by(Mantenimiento.fecha_programada.asc()).all()
 
         eventos = []
+        equipos = _equipos_de(mantenimientos)
         for m in mantenimientos:
-            equipo_nombre = ''
-            if m.equipo_id and m.tipo_equipo in EQUIPOS_MAP:
-                equipo = EQUIPOS_MAP[m.tipo_equipo].query.filter_by(id=m.equipo_id, activo=True).first()
-                if equipo:
-                    equipo_nombre = equipo.nombre
+            equipo = _equipo_info(equipos, m)
+            equipo_nombre = equipo['nombre'] if equipo else ''
 
             eventos.append({
                 'id': m.id,
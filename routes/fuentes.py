@@ -10,6 +10,8 @@ from models import Fuente, Falla, Usuario, Ubicacion, Mantenimiento, Fotografia,
 from models.fuente import EstadoFuente
 from utils.validators import validate_json, validate_required_fields, validate_pagination
 from utils.decorators import token_required, require_permission
+from services.sondeo_service import SondeoService
+from services.telemetria_service import TelemetriaService
 
 @fuentes_bp.route('', methods=['GET'])
 @token_required
@@ -457,6 +459,13 @@ def update_monitor(current_user, fuente_id):
             voltaje_salida=data.get('voltaje_salida_actual')
         )
 
+        # Conservar las mediciones en la serie de tiempo (en el mismo commit)
+        TelemetriaService(db.session).registrar_valores('fuente', fuente_id, {
+            metrica: data.get(metrica)
+            for metrica in ('temperatura_actual', 'carga_actual', 'voltaje_salida_actual')
+        }, commit=False)
+        db.session.commit()
+
         return jsonify({
             'message': 'Métricas de monitoreo actualizadas',
             'estado': fuente.estado,
@@ -477,13 +486,17 @@ def test_fuente(current_user, fuente_id):
     try:
         fuente = Fuente.query.get_or_404(fuente_id)
 
-        # Realizar prueba básica (simulada)
-        resultado_exitoso = True
-        
-        # Actualizar estado si la prueba es exitosa
-        if resultado_exitoso:
-            fuente.estado = EstadoFuente.OPERATIVA.value
-        
+        # Prueba de conexión si la fuente tiene IP de monitoreo. Solo se informa:
+        # un sondeo aislado no cambia el estado (eso lo decide el sondeo periódico
+        # con histéresis e historial)
+        sondeo = None
+        if getattr(fuente, 'ip_address', None):
+            sondeo = SondeoService(db.session).probar(fuente.ip_address, getattr(fuente, 'puerto', None))
+
+        # Estado según temperatura y carga medidas
+        fuente.update_status_based_on_conditions()
+        resultado_exitoso = fuente.estado == EstadoFuente.OPERATIVA.value and (sondeo is None or sondeo['alcanzable'])
+
         fuente.fecha_actualizacion = datetime.utcnow()
         db.session.commit()
 
@@ -493,7 +506,8 @@ def test_fuente(current_user, fuente_id):
             'timestamp': datetime.utcnow().isoformat(),
             'resultado': 'exito' if resultado_exitoso else 'error',
             'estado': fuente.estado,
-            'consumo_porcentaje': fuente.get_consumption_percentage()
+            'consumo_porcentaje': fuente.get_consumption_percentage(),
+            'conexion': sondeo
         })
 
     except Exception as e:
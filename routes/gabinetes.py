@@ -9,6 +9,7 @@ from models import Cabinet, Usuario, Ubicacion, db
 from models.gabinete import CabinetType, CabinetMaterial, VentilationType
 from utils.validators import validate_json, validate_required_fields, validate_pagination
 from utils.decorators import token_required, require_permission
+from services.salud_flota_service import motor_salud_flota
 
 @gabinetes_bp.route('', methods=['GET'])
 @token_required
@@ -128,7 +129,7 @@ def get_gabinetes(current_user):
                 'equipment_summary': g.get_equipment_summary(),
                 'environmental_status': g.get_environmental_status(),
                 'security_status': g.get_security_status(),
-                'system_health_score': g.get_system_health_score(),
+                'system_health_score': motor_salud_flota.puntaje('gabinete', g.id),
                 'inspection_due': g.is_inspection_due(),
                 'responsible_person': {
                     'id': g.responsible_person if g.responsible_person else None,
@@ -962,11 +963,8 @@ def get_gabinetes_estadisticas(current_user):
         ).scalar()
 
         # Puntaje de salud promedio
-        salud_promedio = 0
         total_gabinetes = Cabinet.query.filter_by(deleted=False).count()
-        if total_gabinetes > 0:
-            total_salud = sum([g.get_system_health_score() for g in Cabinet.query.filter_by(deleted=False).all()])
-            salud_promedio = total_salud / total_gabinetes
+        salud_promedio = motor_salud_flota.resumen()['por_tipo']['gabinete']['promedio'] or 0
 
         return jsonify({
             'por_tipo': {tipo.value if tipo else 'sin_tipo': cantidad for tipo, cantidad in por_tipo},
@@ -991,26 +989,31 @@ def get_gabinetes_estadisticas(current_user):
 def get_available_gabinetes(current_user, required_units):
     """
     Obtener gabinetes con capacidad disponible para instalación
+    (unidades contiguas libres según el índice de ocupación)
     """
     try:
-        # Obtener gabinetes con capacidad suficiente
-        disponibles = Cabinet.get_by_capacity_requirement(required_units)
+        from services.ocupacion_gabinete_service import OcupacionGabineteService
+
+        limite = request.args.get('limite', type=int)
+        disponibles = OcupacionGabineteService(db.session).disponibles(required_units, limite=limite)
 
         gabinetes_disponibles = []
-        for gabinete in disponibles:
+        for gabinete, ocupacion, ubicacion_nombre in disponibles:
             gabinetes_disponibles.append({
                 'id': gabinete.id,
                 'name': gabinete.name,
                 'ubicacion': {
-                    'id': gabinete.ubicacion.id if gabinete.ubicacion else None,
-                    'nombre': gabinete.ubicacion.nombre if gabinete.ubicacion else None
-                } if gabinete.ubicacion else None,
+                    'id': gabinete.ubicacion_id,
+                    'nombre': ubicacion_nombre
+                } if gabinete.ubicacion_id else None,
                 'rack_units': gabinete.rack_units,
                 'usable_rack_units': gabinete.usable_rack_units,
-                'available_units': gabinete.get_available_units(),
+                'available_units': ocupacion.unidades_libres,
+                'mayor_tramo_libre': ocupacion.mayor_tramo_libre,
+                'tramos_libres': ocupacion.tramos_libres,
                 'max_weight_kg': gabinete.max_weight_kg,
                 'capacity_utilization': gabinete.capacity_utilization,
-                'system_health_score': gabinete.get_system_health_score()
+                'system_health_score': motor_salud_flota.puntaje('gabinete', gabinete.id)
             })
 
         return jsonify({
@@ -1020,4 +1023,39 @@ def get_available_gabinetes(current_user, required_units):
         })
 
     except Exception as e:
-        return jsonify({'error': f'Error al buscar gabinetes disponibles: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Error al buscar gabinetes disponibles: {str(e)}'}), 500
+
+
+@gabinetes_bp.route('/planificar', methods=['POST'])
+@token_required
+@validate_json
+def planificar_equipos_gabinetes(current_user):
+    """
+    Repartir un lote de equipos nuevos entre gabinetes con unidades libres (sin guardar).
+
+    Body JSON: {"equipos": [{"unidades": 2, "etiqueta": "..."}],
+    "ubicacion_id": 3, "gabinete_ids": [1, 2]}
+    """
+    data = request.get_json()
+    equipos = data.get('equipos')
+    if not (isinstance(equipos, list) and 0 < len(equipos) <= 1000
+            and all(isinstance(e, dict) for e in equipos)):
+        return jsonify({'error': 'Se requiere la lista de equipos (máximo 1000)'}), 400
+
+    gabinete_ids = data.get('gabinete_ids')
+    if gabinete_ids is not None and not isinstance(gabinete_ids, list):
+        return jsonify({'error': 'gabinete_ids debe ser una lista'}), 400
+
+    try:
+        from services.ocupacion_gabinete_service import OcupacionGabineteService
+        plan = OcupacionGabineteService(db.session).planificar(
+            equipos,
+            ubicacion_id=data.get('ubicacion_id'),
+            gabinete_ids=gabinete_ids
+        )
+        return jsonify(plan)
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al planificar equipos en gabinetes: {str(e)}'}), 500
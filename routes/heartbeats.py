@@ -0,0 +1,73 @@
+"""
+Blueprint de Heartbeats para Sistema de Cámaras UFRO
+Recepción de heartbeats por lotes y estado en línea de los equipos
+"""
+
+import hmac
+import os
+
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
+import logging
+
+heartbeats_bp = Blueprint('heartbeats_bp', __name__, url_prefix='/heartbeats')
+logger = logging.getLogger(__name__)
+
+MAX_LOTE = 5000
+
+
+def _autorizado():
+    """Usuario con sesión, o el token compartido de los colectores (HEARTBEAT_TOKEN)"""
+    if getattr(current_user, 'is_authenticated', False):
+        return True
+    token = os.environ.get('HEARTBEAT_TOKEN')
+    enviado = request.headers.get('X-Heartbeat-Token', '')
+    return bool(token) and hmac.compare_digest(enviado, token)
+
+
+@heartbeats_bp.route('', methods=['POST'])
+def recibir_heartbeats():
+    """
+    Recibe un lote de heartbeats; se escriben en la base en el próximo ciclo.
+
+    Body JSON: {"heartbeats": [{"tipo": "camara", "id": 1, "timestamp": "ISO 8601 opcional"}]}
+    (también se acepta la lista directamente)
+    """
+    from services.heartbeat_service import ingestor_heartbeats
+
+    if not _autorizado():
+        return jsonify({'error': 'No autorizado'}), 401
+
+    datos = request.get_json(silent=True)
+    heartbeats = datos.get('heartbeats') if isinstance(datos, dict) else datos
+    if not isinstance(heartbeats, list) or not all(isinstance(h, dict) for h in heartbeats):
+        return jsonify({'error': 'Se requiere una lista de heartbeats'}), 400
+    if len(heartbeats) > MAX_LOTE:
+        return jsonify({'error': f'Máximo {MAX_LOTE} heartbeats por lote'}), 400
+
+    return jsonify(ingestor_heartbeats.registrar_lote(heartbeats)), 202
+
+
+@heartbeats_bp.route('/estado', methods=['GET'])
+def estado_equipos():
+    """
+    Último heartbeat y estado en línea (desde memoria).
+
+    Query: tipo (camara, nvr, switch, ups, fuente, gabinete), ids (lista separada por comas)
+    """
+    from services.heartbeat_service import ingestor_heartbeats
+
+    if not _autorizado():
+        return jsonify({'error': 'No autorizado'}), 401
+
+    tipo = request.args.get('tipo', '').lower()
+    try:
+        ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({'error': 'ids debe ser una lista de enteros separados por comas'}), 400
+    if not tipo or not ids:
+        return jsonify({'error': 'Se requieren tipo e ids'}), 400
+    if len(ids) > MAX_LOTE:
+        return jsonify({'error': f'Máximo {MAX_LOTE} ids por consulta'}), 400
+
+    return jsonify({'tipo': tipo, 'equipos': ingestor_heartbeats.estados(tipo, ids)})
@@ -0,0 +1,81 @@
+"""
+Blueprint de Notificaciones para Sistema de Cámaras UFRO
+Bandeja de notificaciones internas del usuario actual
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+import logging
+
+notificaciones_bp = Blueprint('notificaciones_bp', __name__, url_prefix='/notificaciones')
+logger = logging.getLogger(__name__)
+
+
+def _servicio():
+    from models import db
+    from services.notificacion_service import NotificacionService
+    return NotificacionService(db.session)
+
+
+@notificaciones_bp.route('/')
+@login_required
+def listar_notificaciones():
+    """
+    Lista las notificaciones del usuario actual, más recientes primero.
+
+    Parámetros opcionales: limit (máx. 200), no_leidas=1
+    """
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    solo_no_leidas = request.args.get('no_leidas') in ('1', 'true')
+
+    servicio = _servicio()
+    return jsonify({
+        'notificaciones': servicio.get_user_notifications(current_user.id, limit, solo_no_leidas),
+        'no_leidas': servicio.get_unread_count(current_user.id)
+    })
+
+
+@notificaciones_bp.route('/no-leidas')
+@login_required
+def contar_no_leidas():
+    """Cantidad de notificaciones no leídas (badge del navbar)"""
+    return jsonify({'no_leidas': _servicio().get_unread_count(current_user.id)})
+
+
+@notificaciones_bp.route('/<int:notificacion_id>/leida', methods=['POST'])
+@login_required
+def marcar_leida(notificacion_id):
+    """Marca como leída una notificación sin leer del usuario actual"""
+    servicio = _servicio()
+    if not servicio.mark_notification_read(notificacion_id, current_user.id):
+        return jsonify({'error': 'Notificación no encontrada o ya leída'}), 404
+
+    return jsonify({'no_leidas': servicio.get_unread_count(current_user.id)})
+
+
+@notificaciones_bp.route('/marcar-leidas', methods=['POST'])
+@login_required
+def marcar_leidas():
+    """
+    Marca notificaciones como leídas.
+
+    Body JSON: {"ids": [1, 2, 3]} o {"todas": true}
+    """
+    data = request.get_json(silent=True) or {}
+
+    if data.get('todas'):
+        ids = None
+    else:
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({'error': 'Debe indicar "ids" (lista de enteros) o "todas": true'}), 400
+
+    servicio = _servicio()
+    marcadas = servicio.mark_notifications_read(current_user.id, ids)
+    if marcadas < 0:
+        return jsonify({'error': 'No se pudieron marcar las notificaciones'}), 500
+
+    return jsonify({
+        'marcadas': marcadas,
+        'no_leidas': servicio.get_unread_count(current_user.id)
+    })
@@ -9,6 +9,7 @@ from .auth import token_required
 from models import Nvr, Falla, Camara, db
 from utils.validators import validate_json, validate_required_fields
 from utils.decorators import require_permission
+from services.sondeo_service import SondeoService
 
 @nvr_bp.route('', methods=['GET'])
 @token_required
@@ -457,31 +458,28 @@ def test_conexion_nvr(current_user, nvr_id):
     Probar conexión con el NVR
     """
     try:
-        nvr = Nvr.query.get_or_404(nvr_id)
+        Nvr.query.get_or_404(nvr_id)
+
+        # Conexión TCP al puerto del NVR (o eco ICMP si no tiene puerto);
+        # el estado y su historial solo cambian si el resultado lo modifica
+        resultado = SondeoService(db.session).sondear_equipo('nvr', nvr_id)
+        if resultado is None:
+            return jsonify({'error': 'El NVR no está activo o no tiene dirección IP'}), 400
 
-        # Simular test de conexión (en producción sería una verificación real)
-        resultado = {
+        return jsonify({
             'nvr_id': nvr_id,
-            'ip_address': nvr.ip_address,
-            'puerto': nvr.puerto,
-            'timestamp': datetime.utcnow().isoformat(),
-            'resultado': 'exito',  # 'exito', 'error', 'timeout'
-            'mensaje': 'Conexión exitosa',
-            'tiempo_respuesta_ms': 45,  # Simulado
-            'version_firmware': 'v.1.5',
-            'espacio_libre_gb': 850,  # Simulado
-            'canales_activos': 4
-        }
-
-        # En una implementación real, aquí se haría:
-        # - Ping a la IP
-        # - Verificar puerto específico
-        # - Test de credenciales
-        # - Obtener información del sistema
-
-        return jsonify(resultado)
+            'ip_address': resultado['ip'],
+            'puerto': resultado['puerto'],
+            'timestamp': resultado['timestamp'],
+            'resultado': resultado['resultado'],  # 'exito', 'rechazado', 'timeout', 'error'
+            'mensaje': 'Conexión exitosa' if resultado['alcanzable'] else resultado['error'],
+            'tiempo_respuesta_ms': resultado['latencia_ms'],
+            'metodo': resultado['metodo'],
+            'estado': resultado['estado']
+        })
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'error': f'Error al probar conexión: {str(e)}'
         }), 500
@@ -590,6 +588,51 @@ def get_nvrs_estadisticas(current_user):
     except Exception as e:
         return jsonify({'error': f'Error al obtener estadísticas: {str(e)}'}), 500
 
+@nvr_bp.route('/capacidad', methods=['GET'])
+@token_required
+def get_capacidad_nvrs(current_user):
+    """
+    Canales libres, consumo diario de almacenamiento, retención y días hasta
+    llenar el disco de todos los NVRs activos
+    """
+    try:
+        from services.capacidad_nvr_service import CapacidadNvrService
+        return jsonify(CapacidadNvrService(db.session).resumen())
+
+    except Exception as e:
+        return jsonify({'error': f'Error al calcular la capacidad de NVRs: {str(e)}'}), 500
+
+@nvr_bp.route('/capacidad/recomendar', methods=['POST'])
+@token_required
+@validate_json
+def recomendar_nvr_camaras(current_user):
+    """
+    Recomendar en qué NVR y canal conectar un lote de cámaras nuevas (sin guardar).
+
+    Body JSON: {"camaras": 8 | [{"resolucion": "4MP", "fps": 15, "codec": "h265", "etiqueta": "..."}],
+    "ubicacion_id": 3, "retencion_minima_dias": 30}
+    """
+    data = request.get_json()
+    camaras = data.get('camaras')
+    if isinstance(camaras, bool) or not (isinstance(camaras, int) and 0 < camaras <= 1000
+                                         or isinstance(camaras, list) and 0 < len(camaras) <= 1000
+                                         and all(isinstance(c, dict) for c in camaras)):
+        return jsonify({'error': 'Se requiere la cantidad de cámaras o su lista (máximo 1000)'}), 400
+
+    try:
+        from services.capacidad_nvr_service import CapacidadNvrService, RETENCION_MINIMA_DIAS
+        recomendacion = CapacidadNvrService(db.session).recomendar(
+            camaras,
+            ubicacion_id=data.get('ubicacion_id'),
+            retencion_minima_dias=float(data.get('retencion_minima_dias', RETENCION_MINIMA_DIAS))
+        )
+        return jsonify(recomendacion)
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al recomendar NVRs: {str(e)}'}), 500
+
 @nvr_bp.route('/buscar-ip/<ip_address>', methods=['GET'])
 @token_required
 def buscar_nvr_por_ip(current_user, ip_address):
@@ -0,0 +1,212 @@
+"""
+Blueprint de Reportes para Sistema de Cámaras UFRO
+Consulta de reportes precalculados (snapshots diarios, semanales y mensuales),
+confiabilidad y disponibilidad de equipos
+"""
+
+from datetime import date
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+import logging
+
+from models.usuario_roles import UserRole
+
+reportes_bp = Blueprint('reportes_bp', __name__, url_prefix='/reportes')
+logger = logging.getLogger(__name__)
+
+
+def _servicio():
+    from models import db
+    from services.reporte_programado_service import ReporteProgramadoService
+    return ReporteProgramadoService(db.session)
+
+
+def _validar(tipo, periodicidad):
+    """Retorna una respuesta de error si el tipo o la periodicidad no existen"""
+    from models.reporte_snapshot import PeriodicidadReporte
+    from services.reporte_programado_service import TIPOS_REPORTE
+
+    if tipo not in TIPOS_REPORTE:
+        return jsonify({'error': f'Tipo de reporte inválido. Opciones: {", ".join(TIPOS_REPORTE)}'}), 400
+    if periodicidad not in PeriodicidadReporte.TODAS:
+        return jsonify({'error': f'Periodicidad inválida. Opciones: {", ".join(PeriodicidadReporte.TODAS)}'}), 400
+    return None
+
+
+@reportes_bp.route('/snapshots')
+@login_required
+def listar_snapshots():
+    """
+    Lista los snapshots disponibles (sin contenido).
+
+    Parámetros opcionales: tipo, periodicidad, limit (máx. 200)
+    """
+    limit = min(request.args.get('limit', 30, type=int), 200)
+    return jsonify({'snapshots': _servicio().listar(
+        request.args.get('tipo'), request.args.get('periodicidad'), limit
+    )})
+
+
+@reportes_bp.route('/snapshots/<tipo>/<periodicidad>/ultimo')
+@login_required
+def ultimo_snapshot(tipo, periodicidad):
+    """Último reporte precalculado, sin recalcular nada"""
+    error = _validar(tipo, periodicidad)
+    if error:
+        return error
+
+    snapshot = _servicio().ultimo(tipo, periodicidad)
+    if snapshot is None:
+        return jsonify({'error': 'Aún no hay snapshots para este reporte'}), 404
+    return jsonify(snapshot.to_dict())
+
+
+@reportes_bp.route('/snapshots/<tipo>/<periodicidad>/diferencias')
+@login_required
+def diferencias_snapshots(tipo, periodicidad):
+    """Cambios entre los dos últimos períodos ("qué cambió esta semana")"""
+    error = _validar(tipo, periodicidad)
+    if error:
+        return error
+
+    diferencias = _servicio().diferencias(tipo, periodicidad)
+    if diferencias is None:
+        return jsonify({'error': 'Se necesitan al menos dos snapshots para comparar'}), 404
+    return jsonify(diferencias)
+
+
+@reportes_bp.route('/snapshots/<tipo>/<periodicidad>/generar', methods=['POST'])
+@login_required
+def generar_snapshot(tipo, periodicidad):
+    """
+    Regenera el snapshot del último período cerrado (solo administradores).
+
+    Body JSON opcional: {"forzar": true} para reemplazar uno existente
+    """
+    if not current_user.has_role(UserRole.ADMINISTRADOR):
+        return jsonify({'error': 'No tiene permisos para generar reportes'}), 403
+
+    error = _validar(tipo, periodicidad)
+    if error:
+        return error
+
+    forzar = bool((request.get_json(silent=True) or {}).get('forzar'))
+    try:
+        snapshot = _servicio().generar(tipo, periodicidad, forzar=forzar)
+    except Exception as e:
+        logger.error(f"Error generando snapshot {tipo}/{periodicidad}: {e}")
+        return jsonify({'error': 'Error generando el reporte'}), 500
+
+    if snapshot is None:
+        return jsonify({'mensaje': 'El snapshot del período ya existe'}), 200
+    return jsonify(snapshot.to_dict(incluir_datos=False)), 201
+
+
+def _servicio_confiabilidad():
+    from models import db
+    from services.confiabilidad_service import ConfiabilidadService
+    return ConfiabilidadService(db.session)
+
+
+def _parametros_ranking():
+    return {
+        'equipo_tipo': request.args.get('tipo') or None,
+        'orden': request.args.get('orden', 'mtbf'),
+        'limit': min(request.args.get('limit', 20, type=int), 200),
+        'min_fallas': request.args.get('min_fallas', type=int)
+    }
+
+
+@reportes_bp.route('/confiabilidad/equipos/<tipo>/<int:equipo_id>')
+@login_required
+def confiabilidad_equipo(tipo, equipo_id):
+    """MTTR, MTBF y disponibilidad de un equipo"""
+    metricas = _servicio_confiabilidad().equipo(tipo, equipo_id)
+    if metricas is None:
+        return jsonify({'error': 'El equipo no tiene fallas ni cambios de estado registrados'}), 404
+    return jsonify(metricas)
+
+
+@reportes_bp.route('/confiabilidad/equipos')
+@login_required
+def ranking_confiabilidad_equipos():
+    """
+    Equipos menos confiables.
+
+    Parámetros opcionales: tipo, orden (mtbf, mttr, fallas), limit (máx. 200), min_fallas
+    """
+    parametros = _parametros_ranking()
+    parametros['min_fallas'] = parametros['min_fallas'] or 1
+    try:
+        return jsonify({'equipos': _servicio_confiabilidad().ranking_equipos(**parametros)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@reportes_bp.route('/confiabilidad/modelos')
+@login_required
+def ranking_confiabilidad_modelos():
+    """
+    Modelos (marca/modelo) menos confiables.
+
+    Parámetros opcionales: tipo, orden (mtbf, mttr, fallas), limit (máx. 200), min_fallas (por defecto 3)
+    """
+    parametros = _parametros_ranking()
+    parametros['min_fallas'] = parametros['min_fallas'] or 3
+    try:
+        return jsonify({'modelos': _servicio_confiabilidad().ranking_modelos(**parametros)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _servicio_disponibilidad():
+    from models import db
+    from services.disponibilidad_service import DisponibilidadService
+    return DisponibilidadService(db.session)
+
+
+def _parse_dia(nombre):
+    valor = request.args.get(nombre)
+    return date.fromisoformat(valor) if valor else None
+
+
+@reportes_bp.route('/disponibilidad')
+@login_required
+def disponibilidad():
+    """
+    Disponibilidad (uptime) agregada desde el historial de estados.
+
+    Parámetros opcionales: nivel (equipo, tipo, ubicacion, edificio, nvr, campus),
+    desde, hasta (YYYY-MM-DD, ambos incluidos; por defecto los últimos 30 días),
+    tipo, ubicacion_id, nvr_id, edificio, objetivo (% de SLA), limit (máx. 500)
+    """
+    try:
+        desde, hasta = _parse_dia('desde'), _parse_dia('hasta')
+        resultado = _servicio_disponibilidad().disponibilidad(
+            nivel=request.args.get('nivel', 'campus'),
+            desde=desde,
+            hasta=hasta,
+            equipo_tipo=request.args.get('tipo') or None,
+            ubicacion_id=request.args.get('ubicacion_id', type=int),
+            nvr_id=request.args.get('nvr_id', type=int),
+            edificio=request.args.get('edificio') or None,
+            objetivo=request.args.get('objetivo', type=float),
+            limit=min(request.args.get('limit', 500, type=int), 500)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(resultado)
+
+
+@reportes_bp.route('/disponibilidad/equipos/<tipo>/<int:equipo_id>')
+@login_required
+def disponibilidad_equipo(tipo, equipo_id):
+    """Disponibilidad de un equipo con su serie diaria (parámetros: desde, hasta)"""
+    try:
+        resultado = _servicio_disponibilidad().equipo(tipo, equipo_id, _parse_dia('desde'), _parse_dia('hasta'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if resultado is None:
+        return jsonify({'error': 'Equipo no encontrado'}), 404
+    return jsonify(resultado)
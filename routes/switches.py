@@ -8,6 +8,7 @@ from .. import switches_bp
 from models import Switch, Falla, Ubicacion, Usuario, db
 from utils.validators import validate_json, validate_required_fields, validate_pagination
 from utils.decorators import token_required, require_permission
+from services.salud_flota_service import motor_salud_flota
 import ipaddress
 import re
 
@@ -157,7 +158,7 @@ def get_switches(current_user):
                 'installation_date': switch.installation_date.isoformat() if switch.installation_date else None,
                 'last_maintenance': switch.last_maintenance.isoformat() if switch.last_maintenance else None,
                 'firmware_version': switch.firmware_version,
-                'health_score': switch.get_system_health_score() if hasattr(switch, 'get_system_health_score') else 100,
+                'health_score': motor_salud_flota.puntaje('switch', switch.id),
                 'ports_summary': ports_summary,
                 'vlans_summary': vlans_summary,
                 'fallas_abiertas': fallas_abiertas,
@@ -857,6 +858,58 @@ def actualizar_mantenimiento_switch(current_user, switch_id):
         return jsonify({'error': f'Error al actualizar mantenimiento: {str(e)}'}), 500
 
 
+@switches_bp.route('/poe/disponibles', methods=['GET'])
+@token_required
+def get_switches_poe_disponibles(current_user):
+    """
+    Switches activos con puertos PoE libres y presupuesto suficiente,
+    ordenados por cercanía a una ubicación (query: watts, ubicacion_id, limite)
+    """
+    try:
+        from services.presupuesto_poe_service import PresupuestoPoeService
+        candidatos = PresupuestoPoeService(db.session).candidatos(
+            watts=request.args.get('watts', 15.0, type=float),
+            ubicacion_id=request.args.get('ubicacion_id', type=int),
+            limite=min(request.args.get('limite', 50, type=int), 500)
+        )
+        return jsonify({'switches': candidatos, 'total': len(candidatos)})
+
+    except Exception as e:
+        return jsonify({'error': f'Error al consultar presupuesto PoE: {str(e)}'}), 500
+
+
+@switches_bp.route('/poe/planificar', methods=['POST'])
+@token_required
+@validate_json
+def planificar_camaras_poe(current_user):
+    """
+    Repartir un lote de cámaras nuevas entre puertos PoE libres (sin guardar).
+
+    Body JSON: {"camaras": 12 | [{"watts": 12.95, "etiqueta": "..."}],
+    "ubicacion_id": 3, "reserva_porcentaje": 10}
+    """
+    data = request.get_json()
+    camaras = data.get('camaras')
+    if isinstance(camaras, bool) or not (isinstance(camaras, int) and 0 < camaras <= 1000
+                                         or isinstance(camaras, list) and 0 < len(camaras) <= 1000
+                                         and all(isinstance(c, dict) for c in camaras)):
+        return jsonify({'error': 'Se requiere la cantidad de cámaras o su lista (máximo 1000)'}), 400
+
+    try:
+        from services.presupuesto_poe_service import PresupuestoPoeService
+        plan = PresupuestoPoeService(db.session).planificar(
+            camaras,
+            ubicacion_id=data.get('ubicacion_id'),
+            reserva_porcentaje=float(data.get('reserva_porcentaje', 10))
+        )
+        return jsonify(plan)
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al planificar cámaras PoE: {str(e)}'}), 500
+
+
 @switches_bp.route('/estadisticas', methods=['GET'])
 @token_required
 def get_switches_estadisticas(current_user):
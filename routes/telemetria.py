@@ -0,0 +1,84 @@
+"""
+Blueprint de Telemetría para Sistema de Cámaras UFRO
+Registro de muestras por lotes y series de tiempo para gráficos
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+import logging
+
+from utils.decorators import token_required
+
+telemetria_bp = Blueprint('telemetria_bp', __name__, url_prefix='/telemetria')
+logger = logging.getLogger(__name__)
+
+MAX_LOTE = 5000
+
+
+def _servicio():
+    from models import db
+    from services.telemetria_service import TelemetriaService
+    return TelemetriaService(db.session)
+
+
+def _fecha(nombre):
+    valor = request.args.get(nombre)
+    if not valor:
+        return None
+    fecha = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    return (fecha - fecha.utcoffset()).replace(tzinfo=None) if fecha.tzinfo else fecha
+
+
+@telemetria_bp.route('', methods=['POST'])
+@token_required
+def registrar_muestras(current_user):
+    """
+    Registra un lote de muestras.
+
+    Body JSON: {"muestras": [{"tipo": "ups", "id": 1, "metrica": "porcentaje_carga",
+    "valor": 42.5, "timestamp": "ISO 8601 opcional"}]} (también se acepta la lista)
+    """
+    datos = request.get_json(silent=True)
+    muestras = datos.get('muestras') if isinstance(datos, dict) else datos
+    if not isinstance(muestras, list) or not all(isinstance(m, dict) for m in muestras):
+        return jsonify({'error': 'Se requiere una lista de muestras'}), 400
+    if len(muestras) > MAX_LOTE:
+        return jsonify({'error': f'Máximo {MAX_LOTE} muestras por lote'}), 400
+
+    try:
+        return jsonify(_servicio().registrar(muestras)), 201
+    except Exception as e:
+        logger.error(f"Error registrando telemetría: {e}")
+        return jsonify({'error': 'Error registrando muestras'}), 500
+
+
+@telemetria_bp.route('/<tipo>/<int:equipo_id>', methods=['GET'])
+@login_required
+def metricas_equipo(tipo, equipo_id):
+    """Métricas con datos del equipo"""
+    return jsonify({'equipo_tipo': tipo, 'equipo_id': equipo_id,
+                    'metricas': _servicio().metricas(tipo, equipo_id)})
+
+
+@telemetria_bp.route('/<tipo>/<int:equipo_id>/<metrica>', methods=['GET'])
+@login_required
+def serie_metrica(tipo, equipo_id, metrica):
+    """
+    Serie de una métrica para gráficos (ChartUtils.createTelemetryChart).
+
+    Query: desde, hasta (ISO 8601, por defecto las últimas 24 h), max_puntos
+    (por defecto 500, máx. 5000), resolucion (1m, 1h, 1d; por defecto la más
+    fina que no supera max_puntos)
+    """
+    try:
+        return jsonify(_servicio().serie(
+            tipo, equipo_id, metrica,
+            desde=_fecha('desde'),
+            hasta=_fecha('hasta'),
+            max_puntos=min(request.args.get('max_puntos', 500, type=int), 5000),
+            resolucion=request.args.get('resolucion') or None
+        ))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,40 @@
+"""
+Pruebas del despacho de fallas por HTTP.
+"""
+
+import pytest
+
+from models import EquipoTecnico, Falla
+from models.usuario_roles import UserRole
+from routes.despacho import despacho_bp
+
+
+@pytest.fixture
+def despacho(app, cliente, sesion):
+    app.register_blueprint(despacho_bp)
+    sesion.add_all([
+        EquipoTecnico(id=10, nombre='Ana', apellido='Soto', estado='activo', especialidad='camara',
+                      habilidades={'camara': 5}),
+        Falla(titulo='Sin imagen', descripcion='Prueba', tipo='camara', creado_por_id=1,
+              equipo_type='camara', equipo_id=1, estado='abierta'),
+    ])
+    sesion.commit()
+    return cliente
+
+
+@pytest.mark.parametrize('rol', [UserRole.ADMINISTRADOR, UserRole.SUPERADMIN])
+def test_administrador_despacha_fallas(sesion, despacho, rol):
+    despacho.entrar(rol)
+
+    respuesta = despacho.post('/despacho/fallas', json={'metodo': 'voraz'})
+    assert respuesta.status_code == 200
+    assert [a['tecnico_id'] for a in respuesta.get_json()['asignaciones']] == [10]
+    sesion.expire_all()
+    assert sesion.query(Falla).one().assigned_to == 10
+
+
+def test_otros_roles_no_despachan(sesion, despacho):
+    despacho.entrar(UserRole.OPERADOR)
+
+    assert despacho.post('/despacho/fallas', json={}).status_code == 403
+    assert sesion.query(Falla).one().assigned_to is None
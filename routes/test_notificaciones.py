@@ -0,0 +1,39 @@
+"""
+Pruebas de la bandeja de notificaciones por HTTP.
+"""
+
+import pytest
+
+from models import Usuario
+from models.usuario_roles import UserRole
+from routes.notificaciones import notificaciones_bp
+from services.notificacion_service import NotificacionService
+
+
+@pytest.fixture
+def notificaciones(app, cliente):
+    app.register_blueprint(notificaciones_bp)
+    return cliente
+
+
+def test_marcar_leida_responde_404_si_no_actualiza_ninguna_fila(sesion, notificaciones):
+    usuario = notificaciones.entrar(UserRole.TECNICO)
+    service = NotificacionService(sesion, use_queue=True)
+    assert service.send_system_notification(usuario.id, 'Aviso', 'mensaje')
+    [notificacion] = service.get_user_notifications(usuario.id)
+
+    respuesta = notificaciones.post(f"/notificaciones/{notificacion['id']}/leida")
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == {'no_leidas': 0}
+
+    # Ya leída, inexistente o de otro usuario: el UPDATE no toca filas
+    assert notificaciones.post(f"/notificaciones/{notificacion['id']}/leida").status_code == 404
+    assert notificaciones.post('/notificaciones/999/leida').status_code == 404
+
+    otro = Usuario(username='otro', email='otro@ufro.cl', password_hash='-', full_name='Otro', role='tecnico')
+    sesion.add(otro)
+    sesion.commit()
+    service.send_system_notification(otro.id, 'Ajena', 'mensaje')
+    [ajena] = service.get_user_notifications(otro.id)
+    assert notificaciones.post(f"/notificaciones/{ajena['id']}/leida").status_code == 404
+    assert service.get_unread_count(otro.id) == 1
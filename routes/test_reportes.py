@@ -0,0 +1,39 @@
+"""
+Pruebas de la regeneración de snapshots de reportes por HTTP.
+"""
+
+import pytest
+
+from models.reporte_snapshot import ReporteSnapshot
+from models.usuario_roles import UserRole
+from routes.reportes import reportes_bp
+from services.reporte_service import ReporteService
+
+
+@pytest.fixture
+def reportes(app, cliente, monkeypatch):
+    app.register_blueprint(reportes_bp)
+    monkeypatch.setattr(ReporteService, 'generate_failure_analysis_report',
+                        lambda self, start_date, end_date: {'success': True, 'report': {'total_fallas': 3}})
+    return cliente
+
+
+@pytest.mark.parametrize('rol', [UserRole.ADMINISTRADOR, UserRole.SUPERADMIN])
+def test_administrador_genera_snapshot(sesion, reportes, rol):
+    reportes.entrar(rol)
+
+    respuesta = reportes.post('/reportes/snapshots/fallas/semanal/generar')
+    assert respuesta.status_code == 201
+    assert respuesta.get_json()['tipo'] == 'fallas'
+    assert sesion.query(ReporteSnapshot).count() == 1
+
+    respuesta = reportes.post('/reportes/snapshots/fallas/semanal/generar')
+    assert respuesta.status_code == 200
+
+
+def test_otros_roles_no_generan_snapshot(sesion, reportes):
+    reportes.entrar(UserRole.TECNICO)
+
+    respuesta = reportes.post('/reportes/snapshots/fallas/semanal/generar')
+    assert respuesta.status_code == 403
+    assert sesion.query(ReporteSnapshot).count() == 0
@@ -8,6 +8,14 @@ from .. import ups_bp
 from models import Ups, Falla, db, Usuario
 from utils.validators import validate_json, validate_required_fields, validate_pagination
 from utils.decorators import token_required, require_permission
+from services.telemetria_service import TelemetriaService
+from services.salud_flota_service import motor_salud_flota
+
+# Campos de medición que además se guardan como series de tiempo
+METRICAS_TELEMETRIA = (
+    'porcentaje_carga', 'salud_bateria_porcentaje', 'temperatura_bateria', 'voltaje_bateria',
+    'corriente_bateria', 'autonomia_minutos', 'carga_actual_watts'
+)
 
 @ups_bp.route('', methods=['GET'])
 @token_required
@@ -154,7 +162,7 @@ def get_ups(current_user):
                 'software_apagado': ups.shutdown_software_installed,
                 'tiempo_funcionamiento': ups.get_current_runtime_estimate(),
                 'salud_bateria': ups.get_battery_status(),
-                'salud_sistema': ups.get_system_health_score(),
+                'salud_sistema': motor_salud_flota.puntaje('ups', ups.id),
                 'fallas_abiertas': fallas_abiertas,
                 'created_at': ups.created_at.isoformat(),
                 'updated_at': ups.updated_at.isoformat() if ups.updated_at else None
@@ -503,6 +511,11 @@ def update_ups(current_user, ups_id):
         if 'porcentaje_carga' in data:
             ups.update_load_status()
 
+        # Conservar las mediciones en la serie de tiempo (en el mismo commit)
+        TelemetriaService(db.session).registrar_valores('ups', ups_id, {
+            metrica: data.get(metrica) for metrica in METRICAS_TELEMETRIA
+        }, commit=False)
+
         ups.updated_at = datetime.utcnow()
         db.session.commit()
 
@@ -613,6 +626,43 @@ def agregar_carga_conectada(current_user, ups_id):
         db.session.rollback()
         return jsonify({'error': f'Error al agregar carga conectada: {str(e)}'}), 500
 
+@ups_bp.route('/planificacion', methods=['GET'])
+@token_required
+def get_planificacion_energia(current_user):
+    """
+    Carga y autonomía estimada de todas las UPS según el árbol de alimentación
+    (UPS → fuente de poder → switch → cámara PoE)
+    """
+    try:
+        from services.cadena_energia_service import planificador_energia
+        return jsonify(planificador_energia.resumen(db.session))
+
+    except Exception as e:
+        return jsonify({'error': f'Error al calcular la cadena de energía: {str(e)}'}), 500
+
+@ups_bp.route('/planificacion/simular', methods=['POST'])
+@token_required
+@validate_json
+def simular_planificacion_energia(current_user):
+    """
+    Simular cargas nuevas sin guardarlas.
+
+    Body JSON: {"cambios": [{"gabinete_id": 3, "camaras": 12},
+    {"tipo": "switch", "id": 7, "watts": 60}]}
+    """
+    cambios = request.get_json().get('cambios')
+    if not isinstance(cambios, list) or not cambios or not all(isinstance(c, dict) for c in cambios):
+        return jsonify({'error': 'Se requiere una lista de cambios'}), 400
+
+    try:
+        from services.cadena_energia_service import planificador_energia
+        return jsonify(planificador_energia.simular(cambios, db.session))
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al simular la cadena de energía: {str(e)}'}), 500
+
 @ups_bp.route('/criticos', methods=['GET'])
 @token_required
 def get_ups_criticos(current_user):
@@ -649,7 +699,7 @@ def get_ups_criticos(current_user):
                     'salud_bateria': ups.battery_health_percentage,
                     'porcentaje_carga': ups.load_percentage,
                     'razon': ', '.join(razon),
-                    'salud_sistema': ups.get_system_health_score()
+                    'salud_sistema': motor_salud_flota.puntaje('ups', ups.id)
                 })
 
         return jsonify({
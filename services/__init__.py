@@ -4,20 +4,100 @@ Módulo de servicios del sistema de cámaras UFRO
 Contiene todas las clases de servicios para lógica de negocio
 """
 
-from .auth_service import AuthService
-from .foto_service import FotoService
-from .mapa_service import MapaService
-from .topologia_service import TopologiaService
-from .excel_service import ExcelService
-from .notificacion_service import NotificacionService
-from .reporte_service import ReporteService
+import importlib
+
+# Importación diferida: cada nombre se carga desde su módulo la primera vez que
+# se pide, de modo que importar services.<modulo> no arrastra todos los demás.
+_EXPORTACIONES = {
+    'AuthService': 'auth_service',
+    'FotoService': 'foto_service',
+    'FotoExportService': 'foto_export_service',
+    'MapaService': 'mapa_service',
+    'TopologiaService': 'topologia_service',
+    'ExcelService': 'excel_service',
+    'NotificacionService': 'notificacion_service',
+    'ColaNotificaciones': 'cola_notificaciones',
+    'NotificacionWorker': 'cola_notificaciones',
+    'EventBroker': 'eventos_service',
+    'eventos_broker': 'eventos_service',
+    'IngestorHeartbeats': 'heartbeat_service',
+    'ingestor_heartbeats': 'heartbeat_service',
+    'FallaRollupService': 'falla_rollup_service',
+    'ConfiabilidadService': 'confiabilidad_service',
+    'CargaTecnicoService': 'carga_tecnico_service',
+    'DespachoService': 'despacho_service',
+    'Sondeador': 'sondeo_service',
+    'SondeoService': 'sondeo_service',
+    'SondeoWorker': 'sondeo_service',
+    'DetectorTransiciones': 'transiciones_service',
+    'detector_transiciones': 'transiciones_service',
+    'ResolutorEquipos': 'nombres_equipo_service',
+    'resolutor_equipos': 'nombres_equipo_service',
+    'PlanificadorEnergia': 'cadena_energia_service',
+    'planificador_energia': 'cadena_energia_service',
+    'PresupuestoPoeService': 'presupuesto_poe_service',
+    'OcupacionGabineteService': 'ocupacion_gabinete_service',
+    'CapacidadNvrService': 'capacidad_nvr_service',
+    'MotorSaludFlota': 'salud_flota_service',
+    'motor_salud_flota': 'salud_flota_service',
+    'MetricasPool': 'motor_db_service',
+    'metricas_pool': 'motor_db_service',
+    'DisponibilidadService': 'disponibilidad_service',
+    'TelemetriaService': 'telemetria_service',
+    'CompactadorTelemetria': 'telemetria_service',
+    'ReporteService': 'reporte_service',
+    'ReporteProgramadoService': 'reporte_programado_service',
+    'ProgramadorReportes': 'reporte_programado_service',
+    'ReporteExportService': 'reporte_exportacion',
+}
+
+
+def __getattr__(nombre):
+    modulo = _EXPORTACIONES.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    return getattr(importlib.import_module(f'.{modulo}', __name__), nombre)
+
 
 __all__ = [
     'AuthService',
     'FotoService', 
+    'FotoExportService',
     'MapaService',
     'TopologiaService',
     'ExcelService',
     'NotificacionService',
-    'ReporteService'
+    'ColaNotificaciones',
+    'NotificacionWorker',
+    'EventBroker',
+    'eventos_broker',
+    'IngestorHeartbeats',
+    'ingestor_heartbeats',
+    'FallaRollupService',
+    'ConfiabilidadService',
+    'CargaTecnicoService',
+    'DespachoService',
+    'Sondeador',
+    'SondeoService',
+    'SondeoWorker',
+    'DetectorTransiciones',
+    'detector_transiciones',
+    'ResolutorEquipos',
+    'resolutor_equipos',
+    'PlanificadorEnergia',
+    'planificador_energia',
+    'PresupuestoPoeService',
+    'OcupacionGabineteService',
+    'CapacidadNvrService',
+    'MotorSaludFlota',
+    'motor_salud_flota',
+    'MetricasPool',
+    'metricas_pool',
+    'DisponibilidadService',
+    'TelemetriaService',
+    'CompactadorTelemetria',
+    'ReporteService',
+    'ReporteProgramadoService',
+    'ProgramadorReportes',
+    'ReporteExportService'
 ]
\ No newline at end of file
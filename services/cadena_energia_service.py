@@ -0,0 +1,505 @@
+# services/cadena_energia_service.py
+"""
+Planificación de la cadena de energía
+Construye una sola vez el árbol de alimentación UPS → fuente de poder → switch
+→ cámara PoE (con consultas por tabla, no por equipo), calcula las cargas y la
+autonomía de todas las UPS con NumPy y responde simulaciones del tipo "¿qué le
+pasa a la autonomía si agrego 12 cámaras al gabinete X?" sin volver a la base
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from .falla_rollup_service import _modelos_equipo
+
+logger = logging.getLogger(__name__)
+
+# Mismos supuestos que los modelos: NVR.get_poe_power_usage estima 15 W por
+# cámara PoE y UPS.get_capacity_watts_estimated usa 0.9 W por VA
+WATTS_CAMARA_POE = 15.0
+FACTOR_VA_A_WATTS = 0.9
+
+# Umbrales de UPS.update_load_status
+CARGA_ADVERTENCIA = 70.0
+CARGA_CRITICA = 90.0
+
+ALIAS_TIPO = {'fuente': 'fuente_poder', 'camera': 'camara', 'cámara': 'camara'}
+
+# Profundidad máxima del árbol; lo que siga sin raíz después está en un ciclo
+PROFUNDIDAD_MAXIMA = 64
+
+Clave = Tuple[str, int]
+
+
+def _tipo(tipo) -> str:
+    tipo = (tipo or '').strip().lower()
+    return ALIAS_TIPO.get(tipo, tipo)
+
+
+def _columna(tabla, *nombres):
+    return next((tabla.c[nombre] for nombre in nombres if nombre in tabla.c), None)
+
+
+def _activos(tabla) -> list:
+    condiciones = []
+    if 'deleted' in tabla.c:
+        condiciones.append(tabla.c.deleted == False)  # noqa: E712
+    if 'activo' in tabla.c:
+        condiciones.append(tabla.c.activo == True)  # noqa: E712
+    return condiciones
+
+
+def autonomia_estimada(autonomia_nominal: np.ndarray, porcentaje_carga: np.ndarray) -> np.ndarray:
+    """
+    Versión vectorizada de UPS.get_current_runtime_estimate: la autonomía
+    nominal crece hasta 1.5x a medida que baja la carga. Una UPS sin datos, sin
+    carga o sobrecargada (más de 100 %) queda en 0.
+    """
+    with np.errstate(invalid='ignore'):
+        factor = 1 + 0.5 * (1 - porcentaje_carga / 100)
+        minutos = np.maximum(1, np.floor(autonomia_nominal * factor))
+        validos = (autonomia_nominal > 0) & (porcentaje_carga > 0) & (porcentaje_carga <= 100)
+    return np.where(validos, minutos, 0).astype(int)
+
+
+class GrafoEnergia:
+    """
+    Instantánea del árbol de alimentación en arreglos paralelos por nodo.
+
+    Cada equipo tiene a lo sumo una alimentación (`padre`). `declarado` es la
+    potencia registrada en la conexión que lo alimenta y `propio` su consumo
+    según la ficha del equipo; la carga que impone aguas arriba es el mayor
+    entre lo declarado y su consumo más el de lo que alimenta (dividido por la
+    eficiencia, en las fuentes).
+    """
+
+    def __init__(self, nodos: List[Clave], padre, propio, declarado, eficiencia, por_poe,
+                 capacidad, capacidad_poe, autonomia_nominal, gabinetes: Dict[int, List[Tuple[int, bool]]]):
+        self.nodos = nodos
+        self.indice = {clave: i for i, clave in enumerate(nodos)}
+        self.padre = padre
+        self.propio = propio
+        self.declarado = declarado
+        self.eficiencia = eficiencia
+        self.por_poe = por_poe
+        self.capacidad = capacidad
+        self.capacidad_poe = capacidad_poe
+        self.autonomia_nominal = autonomia_nominal
+        self.gabinetes = gabinetes
+        self.ups = np.array([i for i, (tipo, _) in enumerate(nodos) if tipo == 'ups'], dtype=np.int64)
+        self.niveles = self._niveles()
+        self.creado = time.monotonic()
+
+    def _niveles(self) -> List[np.ndarray]:
+        """Índices agrupados por profundidad, del nivel más profundo a las raíces"""
+        profundidad = np.zeros(len(self.nodos), dtype=np.int64)
+        ancestro = self.padre.copy()
+        for _ in range(PROFUNDIDAD_MAXIMA):
+            pendientes = ancestro >= 0
+            if not pendientes.any():
+                break
+            profundidad[pendientes] += 1
+            ancestro[pendientes] = self.padre[ancestro[pendientes]]
+        else:
+            ciclo = np.flatnonzero(ancestro >= 0)
+            logger.warning(f"Ciclo en la cadena de energía: se cortan {len(ciclo)} alimentaciones")
+            self.padre[ciclo] = -1
+            return self._niveles()
+        return [np.flatnonzero(profundidad == d) for d in range(int(profundidad.max(initial=0)), -1, -1)]
+
+    def cargas(self, extra=None, extra_poe=None) -> Dict[str, np.ndarray]:
+        """
+        Carga de cada nodo con un recorrido por niveles.
+
+        Args:
+            extra: Watts agregados al consumo de cada nodo (simulaciones)
+            extra_poe: Parte de `extra` que se entrega por PoE (switches)
+
+        Returns:
+            Dict: salida (lo que entrega cada nodo), entrada (lo que impone a
+            su alimentación) y poe (lo que entrega por PoE cada switch)
+        """
+        salida = self.propio + (extra if extra is not None else 0)
+        poe = np.zeros(len(self.nodos)) if extra_poe is None else extra_poe.astype(float)
+        entrada = np.zeros(len(self.nodos))
+        for nivel in self.niveles:
+            entrada[nivel] = np.maximum(self.declarado[nivel], salida[nivel] / self.eficiencia[nivel])
+            hijos = nivel[self.padre[nivel] >= 0]
+            np.add.at(salida, self.padre[hijos], entrada[hijos])
+            hijos_poe = hijos[self.por_poe[hijos]]
+            np.add.at(poe, self.padre[hijos_poe], entrada[hijos_poe])
+        return {'salida': salida, 'entrada': entrada, 'poe': poe}
+
+    def estado_ups(self, salida: np.ndarray) -> Dict[str, np.ndarray]:
+        """Carga, porcentaje y autonomía de todas las UPS a la vez"""
+        carga = salida[self.ups]
+        capacidad = self.capacidad[self.ups]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            porcentaje = np.where(capacidad > 0, carga / capacidad * 100, np.nan)
+        return {
+            'carga_watts': carga,
+            'capacidad_watts': capacidad,
+            'porcentaje_carga': porcentaje,
+            'autonomia_minutos': autonomia_estimada(self.autonomia_nominal[self.ups], porcentaje)
+        }
+
+    def ruta(self, indice: int) -> List[int]:
+        """Índices desde un nodo hasta la raíz de su cadena"""
+        ruta = [indice]
+        while self.padre[ruta[-1]] >= 0 and len(ruta) <= PROFUNDIDAD_MAXIMA:
+            ruta.append(int(self.padre[ruta[-1]]))
+        return ruta
+
+
+def construir_grafo(session) -> GrafoEnergia:
+    """Carga equipos y conexiones con una consulta por tabla"""
+    from models.ups import UPSConnectedLoad
+    from models.fuente_poder import FuentePoderConnection
+    from models.switch import SwitchPort
+    from models.gabinete import GabineteEquipment
+
+    modelos = _modelos_equipo()
+    indice: Dict[Clave, int] = {}
+    atributos: List[Dict[str, Any]] = []
+
+    def nodo(tipo, equipo_id) -> int:
+        clave = (_tipo(tipo), int(equipo_id))
+        if clave not in indice:
+            indice[clave] = len(atributos)
+            atributos.append({'padre': -1, 'propio': 0.0, 'declarado': 0.0, 'eficiencia': 1.0,
+                              'por_poe': False, 'capacidad': np.nan, 'capacidad_poe': np.nan,
+                              'autonomia': 0.0})
+        return indice[clave]
+
+    def alimentar(hijo: int, padre: int, watts, por_poe: bool = False):
+        # La primera alimentación encontrada gana (conexión directa antes que PoE inferido)
+        if hijo != padre and atributos[hijo]['padre'] < 0:
+            atributos[hijo].update(padre=padre, declarado=float(watts or 0), por_poe=por_poe)
+
+    # Equipos con sus datos eléctricos
+    especificos = {
+        'ups': {'capacidad': ('capacity_watts',), 'capacidad_va': ('capacity_va',), 'autonomia': ('runtime_minutes',)},
+        'fuente_poder': {'capacidad': ('max_output_watts',), 'eficiencia': ('current_efficiency',)},
+        'switch': {'capacidad_poe': ('max_poe_power',), 'puertos_poe': ('poe_ports',)},
+        'camara': {'switch_id': ('switch_id',), 'gabinete_id': ('gabinete_id',)},
+        'nvr': {}
+    }
+    switches_poe, camaras = set(), []
+    for tipo, campos in especificos.items():
+        tabla = modelos[tipo].__table__
+        columnas = {'id': tabla.c.id}
+        consumo = _columna(tabla, 'power_consumption', 'consumo_watts')
+        if consumo is not None:
+            columnas['propio'] = consumo
+        for campo, nombres in campos.items():
+            columna = _columna(tabla, *nombres)
+            if columna is not None:
+                columnas[campo] = columna
+        consulta = select(*[c.label(nombre) for nombre, c in columnas.items()]).where(*_activos(tabla))
+        for fila in session.execute(consulta).mappings():
+            datos = atributos[nodo(tipo, fila['id'])]
+            datos['propio'] = float(fila.get('propio') or 0)
+            if tipo == 'ups':
+                datos['capacidad'] = float(fila.get('capacidad') or (fila.get('capacidad_va') or 0) * FACTOR_VA_A_WATTS or np.nan)
+                datos['autonomia'] = float(fila.get('autonomia') or 0)
+                # El consumo propio de la UPS no sale de su batería
+                datos['propio'] = 0.0
+            elif tipo == 'fuente_poder':
+                datos['capacidad'] = float(fila.get('capacidad') or np.nan)
+                datos['eficiencia'] = min(1.0, max(0.5, float(fila.get('eficiencia') or 100) / 100))
+            elif tipo == 'switch':
+                datos['capacidad_poe'] = float(fila.get('capacidad_poe') or np.nan)
+                if fila.get('capacidad_poe') or fila.get('puertos_poe'):
+                    switches_poe.add(int(fila['id']))
+            elif tipo == 'camara':
+                camaras.append(fila)
+
+    # Conexiones eléctricas explícitas: fuentes primero, por ser la alimentación más cercana
+    conexiones = (
+        (FuentePoderConnection.__table__, 'fuente_poder', 'fuente_poder_id', ('power_consumption',)),
+        (UPSConnectedLoad.__table__, 'ups', 'ups_id', ('watts_consumption',))
+    )
+    for tabla, tipo_padre, columna_padre, nombres_watts in conexiones:
+        watts = _columna(tabla, *nombres_watts)
+        consulta = select(tabla.c[columna_padre], tabla.c.connected_equipment_type,
+                          tabla.c.connected_equipment_id, watts).where(
+            tabla.c.connected_equipment_id.isnot(None), *_activos(tabla))
+        for padre_id, tipo_hijo, hijo_id, consumo in session.execute(consulta):
+            # Conexiones de equipos dados de baja no cuentan
+            if (tipo_padre, padre_id) in indice:
+                alimentar(nodo(tipo_hijo, hijo_id), indice[(tipo_padre, padre_id)], consumo)
+
+    # Puertos PoE con el equipo conectado
+    puertos = SwitchPort.__table__
+    consulta = select(puertos.c.switch_id, puertos.c.connected_equipment_type, puertos.c.connected_equipment_id,
+                      puertos.c.poe_power_consumption).where(
+        puertos.c.poe_enabled == True, puertos.c.connected_equipment_id.isnot(None))  # noqa: E712
+    for switch_id, tipo_hijo, hijo_id, consumo in session.execute(consulta):
+        if ('switch', switch_id) in indice:
+            alimentar(nodo(tipo_hijo, hijo_id), indice[('switch', switch_id)], consumo or WATTS_CAMARA_POE, por_poe=True)
+
+    # Cámaras sin alimentación registrada en un switch con PoE
+    for camara in camaras:
+        if camara.get('switch_id') in switches_poe:
+            alimentar(nodo('camara', camara['id']), nodo('switch', camara['switch_id']), WATTS_CAMARA_POE, por_poe=True)
+
+    # Alimentación candidata de cada gabinete: switches PoE instalados (o los de
+    # sus cámaras), y si no hay, fuentes o UPS instaladas
+    instalados = defaultdict(list)
+    tabla = GabineteEquipment.__table__
+    consulta = select(tabla.c.gabinete_id, tabla.c.connected_equipment_type, tabla.c.connected_equipment_id).where(
+        tabla.c.connected_equipment_id.isnot(None), *_activos(tabla))
+    for gabinete_id, tipo, equipo_id in session.execute(consulta):
+        instalados[gabinete_id].append((_tipo(tipo), int(equipo_id)))
+    switches_camaras = defaultdict(Counter)
+    for camara in camaras:
+        if camara.get('gabinete_id') and camara.get('switch_id') in switches_poe:
+            switches_camaras[camara['gabinete_id']][camara['switch_id']] += 1
+
+    gabinetes = {}
+    for gabinete_id in set(instalados) | set(switches_camaras):
+        candidatos = [(indice[('switch', i)], True) for tipo, i in instalados[gabinete_id]
+                      if tipo == 'switch' and i in switches_poe]
+        if not candidatos:
+            candidatos = [(indice[('switch', i)], True) for i, _ in switches_camaras[gabinete_id].most_common()]
+        if not candidatos:
+            candidatos = [(nodo(tipo, i), False) for tipo, i in instalados[gabinete_id]
+                          if tipo in ('fuente_poder', 'ups')]
+        if candidatos:
+            gabinetes[gabinete_id] = candidatos
+
+    columna = lambda nombre, dtype=float: np.array([a[nombre] for a in atributos], dtype=dtype)
+    return GrafoEnergia(
+        nodos=sorted(indice, key=indice.get),
+        padre=columna('padre', np.int64),
+        propio=columna('propio'),
+        declarado=columna('declarado'),
+        eficiencia=columna('eficiencia'),
+        por_poe=columna('por_poe', bool),
+        capacidad=columna('capacidad'),
+        capacidad_poe=columna('capacidad_poe'),
+        autonomia_nominal=columna('autonomia'),
+        gabinetes=gabinetes
+    )
+
+
+def _redondear(valor, decimales: int = 1):
+    return None if valor is None or np.isnan(valor) else round(float(valor), decimales)
+
+
+def _nivel_carga(porcentaje) -> Optional[str]:
+    if porcentaje is None or np.isnan(porcentaje):
+        return None
+    if porcentaje > 100:
+        return 'sobrecarga'
+    if porcentaje >= CARGA_CRITICA:
+        return 'critico'
+    return 'advertencia' if porcentaje >= CARGA_ADVERTENCIA else 'normal'
+
+
+class PlanificadorEnergia:
+    """
+    Árbol de alimentación en caché con consultas de planificación.
+
+    El árbol se reconstruye al confirmar cambios en equipos o conexiones de
+    este proceso; `ttl` acota cuánto puede durar si cambian desde otro proceso.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._grafo: Optional[GrafoEnergia] = None
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def grafo(self, session=None) -> GrafoEnergia:
+        # El lock solo protege el intercambio: con gevent es un lock real creado antes del
+        # parche y retenerlo durante las consultas bloquearía el worker completo
+        with self._lock:
+            if self._grafo is not None and time.monotonic() - self._grafo.creado < self.ttl:
+                return self._grafo
+            generacion = self._generacion
+        if session is None:
+            from models import db
+            session = db.session
+        inicio = time.perf_counter()
+        grafo = construir_grafo(session)
+        logger.info(f"Cadena de energía construida: {len(grafo.nodos)} nodos "
+                    f"en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        with self._lock:
+            # Si se invalidó mientras se construía, no se deja en caché un resultado viejo
+            if self._generacion == generacion:
+                self._grafo = grafo
+        return grafo
+
+    def invalidar(self):
+        with self._lock:
+            self._generacion += 1
+            self._grafo = None
+
+    def resumen(self, session=None) -> Dict[str, Any]:
+        """Carga y autonomía estimada de todas las UPS, de menor a mayor autonomía"""
+        from .nombres_equipo_service import resolutor_equipos
+
+        inicio = time.perf_counter()
+        grafo = self.grafo(session)
+        estado = grafo.estado_ups(grafo.cargas()['salida'])
+        nombres = resolutor_equipos.resolver([grafo.nodos[i] for i in grafo.ups])
+        hijos = np.bincount(grafo.padre[grafo.padre >= 0], minlength=len(grafo.nodos))
+
+        ups = []
+        for posicion, i in enumerate(grafo.ups):
+            clave = grafo.nodos[i]
+            porcentaje = estado['porcentaje_carga'][posicion]
+            ups.append({
+                'id': clave[1],
+                'nombre': (nombres.get(clave) or {}).get('nombre', ''),
+                'capacidad_watts': _redondear(estado['capacidad_watts'][posicion]),
+                'carga_watts': _redondear(estado['carga_watts'][posicion]),
+                'porcentaje_carga': _redondear(porcentaje),
+                'nivel_carga': _nivel_carga(porcentaje),
+                'autonomia_minutos': int(estado['autonomia_minutos'][posicion]),
+                'equipos_directos': int(hijos[i])
+            })
+        ups.sort(key=lambda u: (u['autonomia_minutos'] == 0 and u['carga_watts'] == 0, u['autonomia_minutos']))
+        return {'ups': ups, 'total': len(ups), 'nodos': len(grafo.nodos),
+                'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)}
+
+    def _objetivo(self, grafo: GrafoEnergia, cambio: Dict[str, Any], poe: np.ndarray) -> Tuple[int, bool]:
+        """Nodo que alimentaría la carga agregada y si la entrega por PoE"""
+        if cambio.get('gabinete_id') is not None:
+            candidatos = grafo.gabinetes.get(int(cambio['gabinete_id']))
+            if not candidatos:
+                raise ValueError(f"El gabinete {cambio['gabinete_id']} no tiene switch PoE, fuente ni UPS asociada")
+            # Entre varios switches PoE, el que tiene más presupuesto disponible
+            return max(candidatos, key=lambda c: np.nan_to_num(grafo.capacidad_poe[c[0]] - poe[c[0]], nan=-np.inf))
+        clave = (_tipo(cambio.get('tipo')), int(cambio.get('id') or 0))
+        if clave not in grafo.indice:
+            raise ValueError(f"Equipo {clave[0]} {clave[1]} no está en la cadena de energía")
+        return grafo.indice[clave], clave[0] == 'switch'
+
+    def simular(self, cambios: List[Dict[str, Any]], session=None) -> Dict[str, Any]:
+        """
+        Efecto de agregar cargas sobre la cadena de energía, sin guardar nada.
+
+        Args:
+            cambios: Lista de {gabinete_id} o {tipo, id}, con `camaras` (y
+                opcionalmente `watts_por_camara`, 15 por defecto) o `watts`
+
+        Returns:
+            Dict: por cada cambio, la ruta hasta la UPS con carga antes y después;
+            las UPS afectadas con su autonomía antes y después; y advertencias
+        """
+        from .nombres_equipo_service import resolutor_equipos
+
+        inicio = time.perf_counter()
+        grafo = self.grafo(session)
+        antes = grafo.cargas()
+
+        extra = np.zeros(len(grafo.nodos))
+        extra_poe = np.zeros(len(grafo.nodos))
+        objetivos = []
+        for cambio in cambios:
+            indice, por_poe = self._objetivo(grafo, cambio, antes['poe'])
+            if cambio.get('watts') is not None:
+                watts = float(cambio['watts'])
+            else:
+                watts = int(cambio.get('camaras', 1)) * float(cambio.get('watts_por_camara', WATTS_CAMARA_POE))
+            if watts < 0:
+                raise ValueError("La carga agregada no puede ser negativa")
+            extra[indice] += watts
+            if por_poe:
+                extra_poe[indice] += watts
+            objetivos.append((cambio, indice, watts))
+
+        despues = grafo.cargas(extra, extra_poe)
+        ups_antes = grafo.estado_ups(antes['salida'])
+        ups_despues = grafo.estado_ups(despues['salida'])
+
+        nombres = resolutor_equipos.resolver(
+            [grafo.nodos[i] for _, indice, _ in objetivos for i in grafo.ruta(indice)])
+
+        def tramo(i: int) -> Dict[str, Any]:
+            tipo, equipo_id = grafo.nodos[i]
+            poe = tipo == 'switch' and not np.isnan(grafo.capacidad_poe[i])
+            capacidad = grafo.capacidad_poe[i] if poe else grafo.capacidad[i]
+            carga_antes, carga_despues = (antes['poe'][i], despues['poe'][i]) if poe else (antes['salida'][i], despues['salida'][i])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                porcentaje = carga_despues / capacidad * 100 if capacidad > 0 else np.nan
+            return {
+                'tipo': tipo,
+                'id': equipo_id,
+                'nombre': (nombres.get((tipo, equipo_id)) or {}).get('nombre', ''),
+                'capacidad_watts': _redondear(capacidad),
+                'carga_antes_watts': _redondear(carga_antes),
+                'carga_despues_watts': _redondear(carga_despues),
+                'porcentaje_despues': _redondear(porcentaje),
+                'nivel_carga': _nivel_carga(porcentaje)
+            }
+
+        resultado_cambios, advertencias = [], []
+        for cambio, indice, watts in objetivos:
+            ruta = [tramo(i) for i in grafo.ruta(indice)]
+            for paso in ruta:
+                if paso['nivel_carga'] in ('critico', 'sobrecarga'):
+                    advertencias.append(f"{paso['tipo']} {paso['id']} quedaría al {paso['porcentaje_despues']} % de su capacidad")
+            if ruta[-1]['tipo'] != 'ups':
+                advertencias.append(f"La carga agregada en {ruta[0]['tipo']} {ruta[0]['id']} no está respaldada por una UPS")
+            resultado_cambios.append({'cambio': cambio, 'watts': watts, 'ruta': ruta})
+
+        afectadas = np.flatnonzero(~np.isclose(ups_antes['carga_watts'], ups_despues['carga_watts']))
+        ups = [{
+            'id': grafo.nodos[grafo.ups[p]][1],
+            'carga_antes_watts': _redondear(ups_antes['carga_watts'][p]),
+            'carga_despues_watts': _redondear(ups_despues['carga_watts'][p]),
+            'porcentaje_antes': _redondear(ups_antes['porcentaje_carga'][p]),
+            'porcentaje_despues': _redondear(ups_despues['porcentaje_carga'][p]),
+            'autonomia_antes_minutos': int(ups_antes['autonomia_minutos'][p]),
+            'autonomia_despues_minutos': int(ups_despues['autonomia_minutos'][p])
+        } for p in afectadas]
+
+        return {
+            'cambios': resultado_cambios,
+            'ups_afectadas': ups,
+            'advertencias': list(dict.fromkeys(advertencias)),
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        }
+
+
+planificador_energia = PlanificadorEnergia()
+
+
+def _on_cambio(mapper, connection, objeto):
+    object_session(objeto).info['cadena_energia_modificada'] = True
+
+
+def _on_commit(session):
+    if session.info.pop('cadena_energia_modificada', None):
+        planificador_energia.invalidar()
+
+
+def _on_rollback(session):
+    session.info.pop('cadena_energia_modificada', None)
+
+
+def registrar_listeners():
+    """Reconstruye el árbol al crear, modificar o eliminar equipos o conexiones eléctricas"""
+    from models.ups import UPSConnectedLoad
+    from models.fuente_poder import FuentePoderConnection
+    from models.switch import SwitchPort
+    from models.gabinete import GabineteEquipment
+
+    modelos = set(_modelos_equipo().values()) | {UPSConnectedLoad, FuentePoderConnection, SwitchPort, GabineteEquipment}
+    listeners = [(Session, 'after_commit', _on_commit), (Session, 'after_rollback', _on_rollback)]
+    for modelo in modelos:
+        listeners += [(modelo, nombre, _on_cambio) for nombre in ('after_insert', 'after_update', 'after_delete')]
+
+    for objetivo, nombre, funcion in listeners:
+        if not event.contains(objetivo, nombre, funcion):
+            event.listen(objetivo, nombre, funcion)
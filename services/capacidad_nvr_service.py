@@ -0,0 +1,390 @@
+# services/capacidad_nvr_service.py
+"""
+Capacidad de NVRs
+Calcula para todos los NVR a la vez (con consultas agregadas por tabla, no
+cargando las cámaras de cada NVR) los canales libres, el consumo diario de
+almacenamiento según resolución, fps y códec de las cámaras y el horario de
+grabación, los días que faltan para llenar el disco y la retención, y
+recomienda en qué NVR conectar cámaras nuevas
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import and_, func, select
+
+from .cadena_energia_service import _activos, _columna
+from .falla_rollup_service import _modelos_equipo
+from .presupuesto_poe_service import cercania_ubicaciones
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_NVR_ACTIVO = ('activo',)
+ESTADOS_CAMARA_SIN_GRABACION = ('inactiva', 'fuera_servicio')
+
+# Bitrate de referencia en H.264 a 30 fps; el resto escala por megapíxeles,
+# fps y códec. Es una estimación conservadora (grabación de calidad alta).
+KBPS_POR_MEGAPIXEL = 2000
+FPS_REFERENCIA = 30
+MEGAPIXELES_RESOLUCION = {
+    'cif': 0.1, 'd1': 0.4, '720p': 0.92, '960p': 1.23, '1080p': 2.07, '2mp': 2.07,
+    '3mp': 3.0, '4mp': 4.0, '1440p': 3.69, '5mp': 5.0, '6mp': 6.0, '4k': 8.29, '8mp': 8.29, '12mp': 12.0
+}
+# RecordingQuality del NVR o del canal cuando la cámara no informa resolución
+MEGAPIXELES_CALIDAD = {'low': 0.92, 'medium': 2.07, 'high': 4.0, 'ultra': 8.29}
+RESOLUCION_POR_DEFECTO = '1080p'
+FACTOR_CODEC = {
+    'h264': 1.0, 'avc': 1.0, 'h264+': 0.6, 'h265': 0.55, 'hevc': 0.55, 'h265+': 0.35,
+    'mpeg4': 1.5, 'mjpeg': 4.0, 'mjpg': 4.0
+}
+
+# Fracción del tiempo que se graba con modo por evento/movimiento
+FACTOR_GRABACION_EVENTO = 0.3
+MODOS_POR_EVENTO = ('evento', 'movimiento', 'motion', 'event', 'alarma', 'alarm')
+
+DIAS_SEMANA = ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo',
+               'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# NVRs que se llenan antes de estos días aparecen como críticos
+DIAS_ALERTA_LLENO = 7
+RETENCION_MINIMA_DIAS = 30
+
+GB_DIA_POR_KBPS = 86400 / 8 / 1_000_000
+
+
+def _texto(valor) -> str:
+    return str(getattr(valor, 'value', valor) or '').strip().lower()
+
+
+def megapixeles(resolucion) -> Optional[float]:
+    """Megapíxeles de una resolución ('1080p', '4MP', '1920x1080'); None si no se reconoce"""
+    texto = _texto(resolucion).replace(' ', '')
+    if not texto:
+        return None
+    dimensiones = re.fullmatch(r'(\d+)[x*×](\d+)', texto)
+    if dimensiones:
+        return int(dimensiones.group(1)) * int(dimensiones.group(2)) / 1_000_000
+    return MEGAPIXELES_RESOLUCION.get(texto)
+
+
+def bitrate_kbps(resolucion=None, fps=None, codec=None, calidad=None) -> float:
+    """
+    Bitrate estimado de una cámara. Sin resolución usa la calidad de grabación
+    (del canal o del NVR) y, si tampoco hay, 1080p.
+    """
+    mp = megapixeles(resolucion) or MEGAPIXELES_CALIDAD.get(_texto(calidad)) \
+        or MEGAPIXELES_RESOLUCION[RESOLUCION_POR_DEFECTO]
+    fps = min(max(float(fps or FPS_REFERENCIA), 1.0), 60.0)
+    factor = FACTOR_CODEC.get(re.sub(r'[\s.\-]', '', _texto(codec)), 1.0)
+    return mp * KBPS_POR_MEGAPIXEL * fps / FPS_REFERENCIA * factor
+
+
+def _horas(hora: str) -> float:
+    horas, _, minutos = str(hora).partition(':')
+    return int(horas) + int(minutos or 0) / 60
+
+
+def fraccion_grabacion(horario, modo=None) -> float:
+    """
+    Fracción de la semana en que el NVR graba según NVR.recording_schedule y
+    recording_mode. Acepta {"horas_diarias": 12} o {"lunes": [["08:00", "18:00"]], ...};
+    sin horario (o ilegible) graba siempre, como NVR.is_recording_schedule_active.
+    """
+    fraccion = 1.0
+    if isinstance(horario, str):
+        try:
+            horario = json.loads(horario)
+        except (TypeError, ValueError):
+            horario = None
+
+    if isinstance(horario, dict):
+        try:
+            if 'horas_diarias' in horario:
+                fraccion = float(horario['horas_diarias']) / 24
+            elif any(dia in horario for dia in DIAS_SEMANA):
+                horas = 0.0
+                for dia in DIAS_SEMANA:
+                    for inicio, fin in horario.get(dia) or []:
+                        duracion = _horas(fin) - _horas(inicio)
+                        horas += duracion if duracion > 0 else duracion + 24
+                fraccion = horas / (7 * 24)
+        except (TypeError, ValueError):
+            fraccion = 1.0
+
+    if _texto(modo) in MODOS_POR_EVENTO:
+        fraccion *= FACTOR_GRABACION_EVENTO
+    return min(max(fraccion, 0.0), 1.0)
+
+
+def _dias(gb: Optional[float], gb_dia: float) -> Optional[float]:
+    if gb is None or gb_dia <= 0:
+        return None
+    return round(max(gb, 0.0) / gb_dia, 1)
+
+
+class CapacidadNvrService:
+    """Canales, almacenamiento y retención de todos los NVR y ubicación de cámaras nuevas"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    def _nvrs(self) -> Dict[int, Dict[str, Any]]:
+        """Configuración de los NVR activos (una consulta)"""
+        tabla = _modelos_equipo()['nvr'].__table__
+        columnas = {
+            'nombre': _columna(tabla, 'name', 'nombre'),
+            'ubicacion_id': _columna(tabla, 'ubicacion_id'),
+            'estado': _columna(tabla, 'status', 'estado'),
+            'canales_totales': _columna(tabla, 'max_channels', 'canales'),
+            'capacidad_gb': _columna(tabla, 'storage_capacity'),
+            'usado_gb': _columna(tabla, 'storage_used'),
+            'modo': _columna(tabla, 'recording_mode'),
+            'horario': _columna(tabla, 'recording_schedule'),
+            'calidad': _columna(tabla, 'default_recording_quality'),
+            'codec': _columna(tabla, 'video_compression')
+        }
+        consulta = select(tabla.c.id, *[c.label(n) for n, c in columnas.items() if c is not None])
+
+        nvrs = {}
+        for fila in self.db.execute(consulta.where(*_activos(tabla))).mappings():
+            nvr = {nombre: fila.get(nombre) for nombre in columnas}
+            if columnas['estado'] is not None and _texto(nvr['estado']) not in ESTADOS_NVR_ACTIVO:
+                continue
+            nvr.update(
+                nvr_id=fila['id'],
+                estado=_texto(nvr['estado']) or None,
+                canales_totales=nvr['canales_totales'] or 0,
+                calidad=_texto(nvr['calidad']) or None,
+                fraccion_grabacion=fraccion_grabacion(nvr.pop('horario'), nvr.pop('modo')),
+                camaras=0, camaras_grabando=0, canales_configurados=0, bitrate_kbps=0.0
+            )
+            nvrs[fila['id']] = nvr
+        return nvrs
+
+    def _cargar_camaras(self, nvrs: Dict[int, Dict[str, Any]]):
+        """
+        Suma a cada NVR sus cámaras y su bitrate con una consulta agrupada por
+        (nvr, resolución, fps, códec, estado, configuración del canal)
+        """
+        from models.nvr import NVRCameraChannel
+
+        camaras = _modelos_equipo()['camara'].__table__
+        canales = NVRCameraChannel.__table__
+        vigentes = [canales.c.deleted == False] if 'deleted' in canales.c else []  # noqa: E712
+        union = and_(canales.c.camara_id == camaras.c.id, canales.c.nvr_id == camaras.c.nvr_id, *vigentes)
+
+        grupos = {
+            'resolucion': _columna(camaras, 'resolucion', 'resolution'),
+            'fps': _columna(camaras, 'fps', 'frame_rate'),
+            'codec': _columna(camaras, 'codec', 'video_codec'),
+            'estado': _columna(camaras, 'estado', 'status'),
+            'grabando': _columna(canales, 'recording_enabled'),
+            'calidad': _columna(canales, 'recording_quality')
+        }
+        etiquetadas = [c.label(n) for n, c in grupos.items() if c is not None]
+        consulta = (
+            select(camaras.c.nvr_id, *etiquetadas, func.count().label('cantidad'))
+            .select_from(camaras.outerjoin(canales, union))
+            .where(camaras.c.nvr_id.in_(list(nvrs)), *_activos(camaras))
+            .group_by(camaras.c.nvr_id, *[c for c in grupos.values() if c is not None])
+        )
+
+        for fila in self.db.execute(consulta).mappings():
+            nvr = nvrs[fila['nvr_id']]
+            nvr['camaras'] += fila['cantidad']
+            if _texto(fila.get('estado')) in ESTADOS_CAMARA_SIN_GRABACION or fila.get('grabando') is False:
+                continue
+            nvr['camaras_grabando'] += fila['cantidad']
+            nvr['bitrate_kbps'] += fila['cantidad'] * bitrate_kbps(
+                fila.get('resolucion'), fila.get('fps'), fila.get('codec') or nvr['codec'],
+                fila.get('calidad') or nvr['calidad'])
+
+        consulta_canales = (
+            select(canales.c.nvr_id, func.count())
+            .where(canales.c.nvr_id.in_(list(nvrs)), *vigentes)
+            .group_by(canales.c.nvr_id)
+        )
+        for nvr_id, cantidad in self.db.execute(consulta_canales):
+            nvrs[nvr_id]['canales_configurados'] = cantidad
+
+    def _proyectar(self, nvr: Dict[str, Any], ahora: datetime) -> Dict[str, Any]:
+        """Canales libres, consumo diario, retención y días hasta llenar el disco de un NVR"""
+        usados = max(nvr['camaras'], nvr['canales_configurados'])
+        gb_dia = nvr['bitrate_kbps'] * GB_DIA_POR_KBPS * nvr['fraccion_grabacion']
+        capacidad, usado = nvr['capacidad_gb'], nvr['usado_gb'] or 0
+        hasta_lleno = _dias(None if capacidad is None else capacidad - usado, gb_dia)
+        return {
+            'nvr_id': nvr['nvr_id'],
+            'nombre': nvr['nombre'],
+            'ubicacion_id': nvr['ubicacion_id'],
+            'estado': nvr['estado'],
+            'canales_totales': nvr['canales_totales'],
+            'canales_usados': usados,
+            'canales_libres': max(nvr['canales_totales'] - usados, 0),
+            'camaras': nvr['camaras'],
+            'camaras_grabando': nvr['camaras_grabando'],
+            'fraccion_grabacion': round(nvr['fraccion_grabacion'], 3),
+            'bitrate_mbps': round(nvr['bitrate_kbps'] / 1000, 2),
+            'consumo_gb_dia': round(gb_dia, 2),
+            'capacidad_gb': capacidad,
+            'usado_gb': usado,
+            'uso_porcentaje': round(usado / capacidad * 100, 2) if capacidad else 0,
+            'retencion_dias': _dias(capacidad, gb_dia),
+            'dias_hasta_lleno': hasta_lleno,
+            'fecha_lleno': None if hasta_lleno is None else (ahora + timedelta(days=hasta_lleno)).date().isoformat()
+        }
+
+    def _capacidades(self) -> Dict[int, Dict[str, Any]]:
+        nvrs = self._nvrs()
+        if nvrs:
+            self._cargar_camaras(nvrs)
+        return nvrs
+
+    def resumen(self) -> Dict[str, Any]:
+        """
+        Capacidad de todos los NVR activos.
+
+        Returns:
+            Dict: nvrs (canales, consumo, retención y días hasta lleno de cada
+            uno, los que se llenan antes primero), totales y críticos
+        """
+        inicio = time.perf_counter()
+        ahora = datetime.utcnow()
+        nvrs = [self._proyectar(nvr, ahora) for nvr in self._capacidades().values()]
+        nvrs.sort(key=lambda n: (math.inf if n['dias_hasta_lleno'] is None else n['dias_hasta_lleno'], n['nvr_id']))
+
+        return {
+            'nvrs': nvrs,
+            'totales': {
+                'nvrs': len(nvrs),
+                'canales_totales': sum(n['canales_totales'] for n in nvrs),
+                'canales_libres': sum(n['canales_libres'] for n in nvrs),
+                'camaras': sum(n['camaras'] for n in nvrs),
+                'consumo_gb_dia': round(sum(n['consumo_gb_dia'] for n in nvrs), 2),
+                'capacidad_gb': sum(n['capacidad_gb'] or 0 for n in nvrs),
+                'usado_gb': sum(n['usado_gb'] for n in nvrs)
+            },
+            'criticos': [n['nvr_id'] for n in nvrs
+                         if n['dias_hasta_lleno'] is not None and n['dias_hasta_lleno'] < DIAS_ALERTA_LLENO],
+            'generado': ahora.isoformat(),
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        }
+
+    def _canales_libres(self, nvr_ids: List[int], totales: Dict[int, int]) -> Dict[int, List[int]]:
+        """Números de canal sin configurar de los NVR indicados (una consulta)"""
+        from models.nvr import NVRCameraChannel
+
+        canales = NVRCameraChannel.__table__
+        vigentes = [canales.c.deleted == False] if 'deleted' in canales.c else []  # noqa: E712
+        ocupados = defaultdict(set)
+        for nvr_id, numero in self.db.execute(
+            select(canales.c.nvr_id, canales.c.channel_number).where(canales.c.nvr_id.in_(nvr_ids), *vigentes)
+        ):
+            ocupados[nvr_id].add(numero)
+        return {nvr_id: [n for n in range(1, totales[nvr_id] + 1) if n not in ocupados[nvr_id]]
+                for nvr_id in nvr_ids}
+
+    def recomendar(self, camaras, ubicacion_id: Optional[int] = None,
+                   retencion_minima_dias: float = RETENCION_MINIMA_DIAS) -> Dict[str, Any]:
+        """
+        Reparte un lote de cámaras nuevas entre NVRs sin guardar nada.
+
+        Las cámaras se ubican de mayor a menor bitrate, cada una en el NVR más
+        cercano que aún tenga canal libre y cuya retención, sumando la cámara,
+        no baje de `retencion_minima_dias`.
+
+        Args:
+            camaras: Cantidad de cámaras 1080p, o lista de {resolucion, fps, codec, etiqueta}
+            ubicacion_id: Ubicación cerca de la cual se instalarán
+            retencion_minima_dias: Días de grabación que cada NVR debe conservar
+
+        Returns:
+            Dict: asignaciones (cámara → NVR y canal), sin_asignar y la
+            retención de cada NVR usado antes y después
+        """
+        inicio = time.perf_counter()
+        if isinstance(camaras, int):
+            camaras = [{} for _ in range(camaras)]
+        demandas = []
+        for indice, camara in enumerate(camaras):
+            fps = camara.get('fps')
+            if fps is not None and float(fps) <= 0:
+                raise ValueError(f"fps inválido en la cámara {indice}")
+            demandas.append({'indice': indice, 'etiqueta': camara.get('etiqueta'),
+                             'resolucion': camara.get('resolucion'), 'fps': fps, 'codec': camara.get('codec')})
+        if not demandas:
+            raise ValueError("Se requiere al menos una cámara")
+        if retencion_minima_dias < 0:
+            raise ValueError("La retención mínima no puede ser negativa")
+
+        ahora = datetime.utcnow()
+        cercania = cercania_ubicaciones(self.db, ubicacion_id)
+        candidatos = []
+        for nvr in self._capacidades().values():
+            proyeccion = self._proyectar(nvr, ahora)
+            if proyeccion['canales_libres'] <= 0 or not nvr['capacidad_gb']:
+                continue
+            saltos, km = cercania(nvr['ubicacion_id'])
+            proyeccion.update(saltos_ubicacion=saltos, distancia_km=None if km is None else round(km, 2),
+                              _nvr=nvr, asignados=[],
+                              _gb_dia=nvr['bitrate_kbps'] * GB_DIA_POR_KBPS * nvr['fraccion_grabacion'])
+            candidatos.append(proyeccion)
+        candidatos.sort(key=lambda c: (c['saltos_ubicacion'],
+                                       math.inf if c['distancia_km'] is None else c['distancia_km'],
+                                       -(c['retencion_dias'] or math.inf), c['nvr_id']))
+        libres = self._canales_libres([c['nvr_id'] for c in candidatos],
+                                      {c['nvr_id']: c['canales_totales'] for c in candidatos}) if candidatos else {}
+        for candidato in candidatos:
+            # Canales sin fila en nvr_camera_channels pero ya ocupados por cámaras sin configurar
+            candidato['canales'] = libres[candidato['nvr_id']][-candidato['canales_libres']:]
+
+        def gb_dia(demanda, nvr):
+            return bitrate_kbps(demanda['resolucion'], demanda['fps'], demanda['codec'] or nvr['codec'],
+                                nvr['calidad']) * GB_DIA_POR_KBPS * nvr['fraccion_grabacion']
+
+        asignaciones, sin_asignar = [], []
+        for demanda in sorted(demandas, key=lambda d: -bitrate_kbps(d['resolucion'], d['fps'], d['codec'])):
+            destino = None
+            for candidato in candidatos:
+                if not candidato['canales']:
+                    continue
+                consumo = candidato['_gb_dia'] + gb_dia(demanda, candidato['_nvr'])
+                if consumo <= 0 or candidato['capacidad_gb'] / consumo >= retencion_minima_dias:
+                    destino = candidato
+                    break
+            if destino is None:
+                sin_asignar.append({**demanda, 'motivo': 'Sin NVR con canal libre y retención suficiente'})
+                continue
+            canal = destino['canales'].pop(0)
+            destino['_gb_dia'] = consumo
+            destino['asignados'].append(canal)
+            asignaciones.append({**demanda, 'nvr_id': destino['nvr_id'], 'canal': canal,
+                                 'consumo_gb_dia': round(gb_dia(demanda, destino['_nvr']), 2)})
+
+        usados = [{
+            'nvr_id': c['nvr_id'],
+            'nombre': c['nombre'],
+            'ubicacion_id': c['ubicacion_id'],
+            'saltos_ubicacion': c['saltos_ubicacion'],
+            'distancia_km': c['distancia_km'],
+            'capacidad_gb': c['capacidad_gb'],
+            'consumo_gb_dia_antes': c['consumo_gb_dia'],
+            'consumo_gb_dia_despues': round(c['_gb_dia'], 2),
+            'retencion_dias_antes': c['retencion_dias'],
+            'retencion_dias_despues': _dias(c['capacidad_gb'], c['_gb_dia']),
+            'dias_hasta_lleno_despues': _dias(c['capacidad_gb'] - c['usado_gb'], c['_gb_dia']),
+            'canales': c['asignados']
+        } for c in candidatos if c['asignados']]
+
+        return {
+            'asignaciones': sorted(asignaciones, key=lambda a: a['indice']),
+            'sin_asignar': sorted(sin_asignar, key=lambda a: a['indice']),
+            'nvrs': usados,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        }
@@ -0,0 +1,245 @@
+# services/carga_tecnico_service.py
+"""
+Servicio de carga de trabajo de técnicos
+Mantiene los contadores de carga_tecnicos en la misma transacción en que se
+asigna una falla o un mantenimiento o cambia su estado, y los reconstruye desde
+las tablas de fallas y mantenimientos
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.exc import IntegrityError
+
+from models.carga_tecnico import CargaTecnico
+from .falla_rollup_service import _valor, activar_historial
+
+logger = logging.getLogger(__name__)
+
+# Columnas que asignan el técnico (las de las relaciones de EquipoTecnico)
+ATRIBUTOS_TECNICO_FALLA = ('assigned_to',)
+ATRIBUTOS_TECNICO_MANTENIMIENTO = ('technician_id',)
+ATRIBUTOS_TIEMPO_RESOLUCION = ('actual_resolution_time',)
+
+ESTADOS_FALLA_ACTIVA = ('abierta', 'en_proceso')
+ESTADOS_FALLA_RESUELTA = ('resuelta',)
+# MaintenanceStatus.EN_PROGRESO se guarda como 'en_progreso'; assign_mantenimiento usa 'en_proceso'
+ESTADOS_MANTENIMIENTO_ACTIVO = ('programado', 'en_proceso', 'en_progreso')
+ESTADOS_MANTENIMIENTO_COMPLETADO = ('completado',)
+
+CONTADORES = (
+    'fallas_total', 'fallas_activas', 'fallas_resueltas',
+    'mantenimientos_total', 'mantenimientos_activos', 'mantenimientos_completados',
+    'asignaciones_activas', 'horas_resolucion_total', 'resoluciones_medidas'
+)
+
+
+def _estado(valor) -> Optional[str]:
+    """Estado como texto (los mantenimientos lo guardan como Enum)"""
+    return getattr(valor, 'value', valor)
+
+
+def contribucion_falla(falla, anterior: bool = False) -> Optional[Dict[str, Any]]:
+    """Técnico y contadores con que una falla aporta a la carga"""
+    tecnico_id = _valor(falla, ATRIBUTOS_TECNICO_FALLA, anterior)
+    if not tecnico_id:
+        return None
+
+    estado = _estado(_valor(falla, ('estado',), anterior))
+    horas = _valor(falla, ATRIBUTOS_TIEMPO_RESOLUCION, anterior)
+    activa = int(estado in ESTADOS_FALLA_ACTIVA)
+    return {
+        'tecnico_id': tecnico_id,
+        'fallas_total': 1,
+        'fallas_activas': activa,
+        'fallas_resueltas': int(estado in ESTADOS_FALLA_RESUELTA),
+        'asignaciones_activas': activa,
+        'horas_resolucion_total': float(horas or 0.0),
+        'resoluciones_medidas': int(bool(horas))
+    }
+
+
+def contribucion_mantenimiento(mantenimiento, anterior: bool = False) -> Optional[Dict[str, Any]]:
+    """Técnico y contadores con que un mantenimiento aporta a la carga"""
+    tecnico_id = _valor(mantenimiento, ATRIBUTOS_TECNICO_MANTENIMIENTO, anterior)
+    if not tecnico_id:
+        return None
+
+    estado = _estado(_valor(mantenimiento, ('estado',), anterior))
+    activo = int(estado in ESTADOS_MANTENIMIENTO_ACTIVO)
+    return {
+        'tecnico_id': tecnico_id,
+        'mantenimientos_total': 1,
+        'mantenimientos_activos': activo,
+        'mantenimientos_completados': int(estado in ESTADOS_MANTENIMIENTO_COMPLETADO),
+        'asignaciones_activas': activo
+    }
+
+
+def aplicar_contribucion(connection, contribucion: Optional[Dict[str, Any]], signo: int):
+    """
+    Suma (signo=1) o resta (signo=-1) una asignación de los contadores de su
+    técnico, creando la fila si no existe, en la transacción en curso
+    """
+    if contribucion is None:
+        return
+
+    tabla = CargaTecnico.__table__
+    condicion = tabla.c.tecnico_id == contribucion['tecnico_id']
+    valores = {
+        nombre: tabla.c[nombre] + signo * valor
+        for nombre, valor in contribucion.items() if nombre in CONTADORES and valor
+    }
+    valores['updated_at'] = datetime.utcnow()
+
+    if connection.execute(tabla.update().where(condicion).values(**valores)).rowcount:
+        return
+
+    try:
+        with connection.begin_nested():
+            connection.execute(tabla.insert().values(
+                tecnico_id=contribucion['tecnico_id'], **{nombre: 0 for nombre in CONTADORES}
+            ))
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        pass
+    connection.execute(tabla.update().where(condicion).values(**valores))
+
+
+def _listeners_de(contribucion, atributos):
+    """Listeners de insert/update/delete para un modelo con asignación de técnico"""
+
+    def _on_insert(mapper, connection, objeto):
+        aplicar_contribucion(connection, contribucion(objeto), 1)
+
+    def _on_update(mapper, connection, objeto):
+        estado = inspect(objeto)
+        if not any(
+            atributo in estado.mapper.attrs and estado.attrs[atributo].history.has_changes()
+            for atributo in atributos
+        ):
+            return
+        aplicar_contribucion(connection, contribucion(objeto, anterior=True), -1)
+        aplicar_contribucion(connection, contribucion(objeto), 1)
+
+    def _on_delete(mapper, connection, objeto):
+        aplicar_contribucion(connection, contribucion(objeto, anterior=True), -1)
+
+    return (('after_insert', _on_insert), ('after_update', _on_update), ('after_delete', _on_delete))
+
+
+ATRIBUTOS_FALLA = ATRIBUTOS_TECNICO_FALLA + ('estado',) + ATRIBUTOS_TIEMPO_RESOLUCION
+ATRIBUTOS_MANTENIMIENTO = ATRIBUTOS_TECNICO_MANTENIMIENTO + ('estado',)
+
+LISTENERS_FALLA = _listeners_de(contribucion_falla, ATRIBUTOS_FALLA)
+LISTENERS_MANTENIMIENTO = _listeners_de(contribucion_mantenimiento, ATRIBUTOS_MANTENIMIENTO)
+
+
+def registrar_listeners():
+    """
+    Mantiene los contadores en la misma transacción que asigna la falla o el
+    mantenimiento o cambia su estado. Las actualizaciones masivas no pasan por
+    estos eventos: después de ellas se debe ejecutar CargaTecnicoService.reconstruir().
+    """
+    from models import Falla, Mantenimiento
+
+    for modelo, listeners, atributos in (
+        (Falla, LISTENERS_FALLA, ATRIBUTOS_FALLA),
+        (Mantenimiento, LISTENERS_MANTENIMIENTO, ATRIBUTOS_MANTENIMIENTO),
+    ):
+        for nombre, funcion in listeners:
+            if not event.contains(modelo, nombre, funcion):
+                event.listen(modelo, nombre, funcion)
+        activar_historial(modelo, atributos)
+
+
+class CargaTecnicoService:
+    """Reconstrucción de los contadores de carga por técnico"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    @staticmethod
+    def _columna(modelo, atributos):
+        return next((getattr(modelo, a) for a in atributos if a in inspect(modelo).attrs), None)
+
+    def _totales_fallas(self) -> Dict[int, Dict[str, Any]]:
+        from models import Falla
+
+        tecnico = self._columna(Falla, ATRIBUTOS_TECNICO_FALLA)
+        if tecnico is None:
+            return {}
+        horas = self._columna(Falla, ATRIBUTOS_TIEMPO_RESOLUCION)
+        activa = func.sum(case((Falla.estado.in_(ESTADOS_FALLA_ACTIVA), 1), else_=0))
+        columnas = [
+            tecnico, func.count(), activa,
+            func.sum(case((Falla.estado.in_(ESTADOS_FALLA_RESUELTA), 1), else_=0))
+        ]
+        if horas is not None:
+            columnas += [func.sum(func.coalesce(horas, 0)), func.count(case((horas > 0, 1)))]
+
+        totales = {}
+        for fila in self.db.execute(select(*columnas).where(tecnico.isnot(None)).group_by(tecnico)):
+            totales[fila[0]] = {
+                'fallas_total': fila[1],
+                'fallas_activas': fila[2] or 0,
+                'fallas_resueltas': fila[3] or 0,
+                'horas_resolucion_total': float(fila[4] or 0.0) if horas is not None else 0.0,
+                'resoluciones_medidas': fila[5] if horas is not None else 0
+            }
+        return totales
+
+    def _totales_mantenimientos(self) -> Dict[int, Dict[str, Any]]:
+        from models import Mantenimiento
+
+        tecnico = self._columna(Mantenimiento, ATRIBUTOS_TECNICO_MANTENIMIENTO)
+        if tecnico is None:
+            return {}
+
+        # Se agrupa también por estado para normalizar los valores Enum en Python
+        totales = {}
+        for tecnico_id, estado, cantidad in self.db.execute(
+            select(tecnico, Mantenimiento.estado, func.count())
+            .where(tecnico.isnot(None)).group_by(tecnico, Mantenimiento.estado)
+        ):
+            estado = _estado(estado)
+            fila = totales.setdefault(tecnico_id, {
+                'mantenimientos_total': 0, 'mantenimientos_activos': 0, 'mantenimientos_completados': 0
+            })
+            fila['mantenimientos_total'] += cantidad
+            if estado in ESTADOS_MANTENIMIENTO_ACTIVO:
+                fila['mantenimientos_activos'] += cantidad
+            if estado in ESTADOS_MANTENIMIENTO_COMPLETADO:
+                fila['mantenimientos_completados'] += cantidad
+        return totales
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula los contadores de todos los técnicos con consultas agrupadas
+        sobre fallas y mantenimientos.
+
+        Returns:
+            int: Técnicos con contadores
+        """
+        fallas = self._totales_fallas()
+        mantenimientos = self._totales_mantenimientos()
+        ahora = datetime.utcnow()
+
+        filas = []
+        for tecnico_id in set(fallas) | set(mantenimientos):
+            fila = {nombre: 0 for nombre in CONTADORES}
+            fila.update(fallas.get(tecnico_id, {}))
+            fila.update(mantenimientos.get(tecnico_id, {}))
+            fila['asignaciones_activas'] = fila['fallas_activas'] + fila['mantenimientos_activos']
+            fila.update(tecnico_id=tecnico_id, updated_at=ahora)
+            filas.append(fila)
+
+        self.db.query(CargaTecnico).delete(synchronize_session=False)
+        for inicio in range(0, len(filas), 1000):
+            self.db.execute(CargaTecnico.__table__.insert(), filas[inicio:inicio + 1000])
+        self.db.commit()
+
+        logger.info(f"Contadores de carga de técnicos reconstruidos: {len(filas)} técnicos")
+        return len(filas)
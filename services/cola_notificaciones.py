@@ -0,0 +1,357 @@
+# services/cola_notificaciones.py
+"""
+Cola de notificaciones salientes
+Encola emails en base de datos y los envía en segundo plano por lotes,
+reutilizando una sesión SMTP y reintentando con backoff exponencial
+"""
+
+import os
+import ssl
+import smtplib
+import logging
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from datetime import datetime
+from typing import Dict, List, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Vueltas de lectura/INSERT de encolar_agrupado ante carreras con otros procesos
+INTENTOS_RESUMEN = 5
+
+
+def construir_mensaje(from_email: str, to_emails: List[str], subject: str,
+                      body: str, html_body: str = None) -> MIMEMultipart:
+    """
+    Construye el mensaje MIME (texto plano y HTML opcional)
+    """
+    msg = MIMEMultipart('alternative')
+    msg['From'] = from_email
+    msg['To'] = ', '.join(to_emails)
+    msg['Subject'] = subject
+    msg['X-Priority'] = '3'  # Normal priority
+
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+
+    return msg
+
+
+class SMTPConnectionPool:
+    """
+    Sesión SMTP reutilizable.
+
+    Conecta, hace STARTTLS y login una sola vez y reutiliza la conexión para
+    los mensajes siguientes. Se reconecta si el servidor la cerró y la renueva
+    cada `max_mensajes_por_sesion` envíos.
+    """
+
+    def __init__(self, host: str, port: int, user: str = '', password: str = '',
+                 use_tls: bool = True, timeout: int = 30, max_mensajes_por_sesion: int = 100,
+                 smtp_factory: Callable = smtplib.SMTP):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_mensajes_por_sesion = max_mensajes_por_sesion
+        self.smtp_factory = smtp_factory
+
+        self._conexion = None
+        self._enviados_sesion = 0
+        self._lock = threading.Lock()
+        self.conexiones_abiertas = 0
+
+    @classmethod
+    def from_env(cls) -> 'SMTPConnectionPool':
+        """Crea la sesión a partir de las mismas variables que NotificacionService"""
+        return cls(
+            host=os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+            port=int(os.environ.get('SMTP_PORT', 587)),
+            user=os.environ.get('SMTP_USER', ''),
+            password=os.environ.get('SMTP_PASSWORD', ''),
+            use_tls=os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
+        )
+
+    def _conectar(self):
+        conexion = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conexion.starttls(context=ssl.create_default_context())
+        if self.user:
+            conexion.login(self.user, self.password)
+        self._conexion = conexion
+        self._enviados_sesion = 0
+        self.conexiones_abiertas += 1
+        return conexion
+
+    def _obtener(self):
+        if self._conexion is None or self._enviados_sesion >= self.max_mensajes_por_sesion:
+            self.close()
+            return self._conectar()
+        return self._conexion
+
+    def sendmail(self, from_email: str, to_emails: List[str], mensaje: str):
+        """
+        Envía un mensaje por la sesión abierta; si el servidor cerró la conexión,
+        reconecta una vez y reintenta.
+        """
+        with self._lock:
+            try:
+                self._obtener().sendmail(from_email, to_emails, mensaje)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.close()
+                self._conectar().sendmail(from_email, to_emails, mensaje)
+            self._enviados_sesion += 1
+
+    def close(self):
+        """Cierra la sesión actual si existe"""
+        if self._conexion is None:
+            return
+        try:
+            self._conexion.quit()
+        except Exception:
+            pass
+        self._conexion = None
+
+
+class ColaNotificaciones:
+    """Encola y despacha emails persistidos en la tabla notificaciones_cola"""
+
+    def __init__(self, db_session=None, smtp_pool: SMTPConnectionPool = None,
+                 from_email: str = None, batch_size: int = 50,
+                 backoff_base: int = 30, backoff_max: int = 3600):
+        self.db = db_session
+        self.smtp_pool = smtp_pool or SMTPConnectionPool.from_env()
+        self.from_email = from_email or os.environ.get('FROM_EMAIL', 'noreply@ufrontera.cl')
+        self.batch_size = batch_size
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def encolar(self, to_emails: List[str], subject: str, body: str,
+                html_body: str = None, tipo: str = None, commit: bool = True):
+        """
+        Agrega un email a la cola y retorna el registro creado.
+        No abre conexiones SMTP: el envío lo hace el worker.
+        """
+        from models import NotificacionCola
+
+        mensaje = NotificacionCola(
+            destinatarios=list(to_emails),
+            asunto=subject,
+            cuerpo_texto=body,
+            cuerpo_html=html_body,
+            tipo=tipo,
+            proximo_intento=datetime.utcnow()
+        )
+        self.db.add(mensaje)
+        if commit:
+            self.db.commit()
+        return mensaje
+
+    def encolar_agrupado(self, to_emails: List[str], clave: str, items: List[Dict[str, Any]],
+                         ventana_segundos: int, renderizar: Callable[[List[Dict]], tuple],
+                         tipo: str = None, commit: bool = True):
+        """
+        Agrega eventos al resumen abierto para `clave` o abre uno nuevo.
+
+        El resumen queda retenido `ventana_segundos` desde el primer evento; los
+        eventos que llegan antes de que el worker lo tome se suman al mismo
+        mensaje. Al cerrar la ventana el worker lo envía como un único email.
+
+        El índice único parcial sobre los resúmenes abiertos impide que dos
+        procesos abran cada uno un resumen para la misma clave: quien pierde la
+        carrera del INSERT vuelve a leer y se suma al resumen del otro (o, si el
+        worker ya lo tomó, vuelve a intentar abrir uno).
+
+        Args:
+            clave: Clave de agrupación (p. ej. destinatario + causa raíz)
+            items: Datos serializables de los eventos
+            renderizar: Función items -> (asunto, cuerpo_texto, cuerpo_html)
+        """
+        from datetime import timedelta
+        from sqlalchemy.exc import IntegrityError
+        from models import NotificacionCola
+        from models.notificacion_cola import EstadoNotificacionCola
+
+        def resumen_abierto():
+            return self.db.query(NotificacionCola).filter(
+                NotificacionCola.clave_agrupacion == clave,
+                NotificacionCola.estado == EstadoNotificacionCola.PENDIENTE,
+                NotificacionCola.intentos == 0
+            ).with_for_update().first()
+
+        def agregar(mensaje):
+            # Reasignar la lista para que SQLAlchemy detecte el cambio en la columna JSON
+            mensaje.items = list(mensaje.items or []) + list(items)
+            mensaje.asunto, mensaje.cuerpo_texto, mensaje.cuerpo_html = renderizar(mensaje.items)
+            return mensaje
+
+        for _ in range(INTENTOS_RESUMEN):
+            resumen = resumen_abierto()
+            if resumen is not None:
+                agregar(resumen)
+                break
+            resumen = agregar(NotificacionCola(
+                destinatarios=list(to_emails),
+                clave_agrupacion=clave,
+                tipo=tipo,
+                proximo_intento=datetime.utcnow() + timedelta(seconds=ventana_segundos)
+            ))
+            try:
+                with self.db.begin_nested():
+                    self.db.add(resumen)
+                break
+            except IntegrityError:
+                # Otro proceso abrió el resumen entre la consulta y el INSERT; si
+                # el worker ya lo tomó al volver a leer, se intenta abrir otro
+                continue
+        else:
+            raise RuntimeError(f"No se pudo abrir ni encontrar un resumen abierto para '{clave}'")
+
+        if commit:
+            self.db.commit()
+        return resumen
+
+    def _reclamar_lote(self) -> list:
+        """
+        Toma un lote de mensajes vencidos y los marca como 'enviando'.
+        En PostgreSQL usa FOR UPDATE SKIP LOCKED para que varios workers no
+        tomen el mismo mensaje; en SQLite la cláusula se ignora.
+        """
+        from models import NotificacionCola
+        from models.notificacion_cola import EstadoNotificacionCola
+
+        lote = self.db.query(NotificacionCola).filter(
+            NotificacionCola.estado == EstadoNotificacionCola.PENDIENTE,
+            NotificacionCola.proximo_intento <= datetime.utcnow()
+        ).order_by(
+            NotificacionCola.proximo_intento
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        for mensaje in lote:
+            mensaje.estado = EstadoNotificacionCola.ENVIANDO
+        self.db.commit()
+        return lote
+
+    def procesar_lote(self) -> Dict[str, int]:
+        """
+        Envía un lote de mensajes pendientes sobre la sesión SMTP compartida
+        """
+        lote = self._reclamar_lote()
+        enviados = 0
+        fallidos = 0
+
+        for mensaje in lote:
+            try:
+                msg = construir_mensaje(
+                    self.from_email, mensaje.destinatarios, mensaje.asunto,
+                    mensaje.cuerpo_texto, mensaje.cuerpo_html
+                )
+                self.smtp_pool.sendmail(self.from_email, mensaje.destinatarios, msg.as_string())
+                mensaje.marcar_enviado()
+                enviados += 1
+            except Exception as e:
+                logger.warning(f"Error enviando notificación {mensaje.id}: {e}")
+                mensaje.marcar_fallido(e, self.backoff_base, self.backoff_max)
+                fallidos += 1
+
+        if lote:
+            self.db.commit()
+
+        return {'procesados': len(lote), 'enviados': enviados, 'fallidos': fallidos}
+
+    def recuperar_huerfanos(self, minutos: int = 10) -> int:
+        """
+        Devuelve a 'pendiente' los mensajes que quedaron en 'enviando' porque
+        el worker se detuvo a mitad de lote
+        """
+        from datetime import timedelta
+        from models import NotificacionCola
+        from models.notificacion_cola import EstadoNotificacionCola
+
+        limite = datetime.utcnow() - timedelta(minutes=minutos)
+        total = self.db.query(NotificacionCola).filter(
+            NotificacionCola.estado == EstadoNotificacionCola.ENVIANDO,
+            NotificacionCola.updated_at <= limite
+        ).update({'estado': EstadoNotificacionCola.PENDIENTE}, synchronize_session=False)
+        self.db.commit()
+        return total
+
+    def get_estadisticas(self) -> Dict[str, Any]:
+        """Cantidad de mensajes por estado"""
+        from sqlalchemy import func
+        from models import NotificacionCola
+
+        filas = self.db.query(
+            NotificacionCola.estado, func.count(NotificacionCola.id)
+        ).group_by(NotificacionCola.estado).all()
+        return {estado: cantidad for estado, cantidad in filas}
+
+
+class NotificacionWorker:
+    """
+    Worker que vacía la cola periódicamente.
+    Se ejecuta con `flask notifications-worker` o en un hilo con start().
+    """
+
+    def __init__(self, app, intervalo: float = 5.0, batch_size: int = 50):
+        self.app = app
+        self.intervalo = intervalo
+        self.batch_size = batch_size
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def ejecutar_ciclo(self, cola: ColaNotificaciones) -> Dict[str, int]:
+        """Procesa lotes hasta vaciar los mensajes vencidos"""
+        total = {'procesados': 0, 'enviados': 0, 'fallidos': 0}
+        while not self._detener.is_set():
+            resultado = cola.procesar_lote()
+            for clave in total:
+                total[clave] += resultado[clave]
+            if resultado['procesados'] < cola.batch_size:
+                break
+        return total
+
+    def run(self):
+        """Bucle principal: procesa, cierra la sesión SMTP ociosa y espera"""
+        from models import db
+
+        smtp_pool = SMTPConnectionPool.from_env()
+        logger.info("📬 Worker de notificaciones iniciado")
+
+        with self.app.app_context():
+            cola = ColaNotificaciones(db.session, smtp_pool=smtp_pool, batch_size=self.batch_size)
+            cola.recuperar_huerfanos()
+
+            while not self._detener.is_set():
+                try:
+                    resultado = self.ejecutar_ciclo(cola)
+                    if resultado['procesados']:
+                        logger.info(f"📨 Notificaciones: {resultado}")
+                    else:
+                        smtp_pool.close()
+                except Exception as e:
+                    logger.error(f"Error en worker de notificaciones: {e}")
+                    db.session.rollback()
+                    smtp_pool.close()
+                finally:
+                    db.session.remove()
+                self._detener.wait(self.intervalo)
+
+            smtp_pool.close()
+        logger.info("📪 Worker de notificaciones detenido")
+
+    def start(self) -> threading.Thread:
+        """Inicia el worker en un hilo daemon"""
+        self._hilo = threading.Thread(target=self.run, name='notificacion-worker', daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def stop(self, timeout: float = None):
+        """Detiene el worker al terminar el ciclo en curso"""
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout)
@@ -0,0 +1,510 @@
+# services/confiabilidad_service.py
+"""
+Servicio de confiabilidad de equipos (MTTR / MTBF)
+Mantiene sumas acumuladas por equipo a medida que las fallas se crean y
+cierran y los equipos cambian de estado, y las expone como métricas por equipo
+y rankings de los modelos menos confiables
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from sqlalchemy import and_, case, event, func, inspect, literal, or_, select, DateTime
+from sqlalchemy.exc import IntegrityError
+
+from models.confiabilidad_equipo import ConfiabilidadEquipo
+from .consultas_analiticas import horas_entre
+from .falla_rollup_service import ATRIBUTOS_FECHA, _columna, _modelos_equipo, _valor, activar_historial
+
+logger = logging.getLogger(__name__)
+
+# Estados del historial que cuentan como equipo fuera de servicio por falla
+# (EquipmentStatus.FALLANDO)
+ESTADOS_FUERA_SERVICIO = ('fallando',)
+
+# Columnas de marca y modelo según el esquema de cada tipo de equipo
+ATRIBUTOS_MARCA = ('marca', 'manufacturer')
+ATRIBUTOS_MODELO = ('modelo', 'model')
+
+ATRIBUTOS_RELEVANTES = ATRIBUTOS_FECHA + ('equipo_type', 'equipo_id', 'fecha_resolucion')
+
+# Criterios de ordenamiento de los rankings (peores primero)
+ORDENES = ('mtbf', 'mttr', 'fallas')
+
+
+def _columnas_identificacion(tabla) -> list:
+    """Columnas de marca y modelo de la tabla del equipo ('' si no existen)"""
+    return [
+        next((tabla.c[nombre] for nombre in atributos if nombre in tabla.c), literal(''))
+        for atributos in (ATRIBUTOS_MARCA, ATRIBUTOS_MODELO)
+    ]
+
+
+def _identificacion_equipo(connection, equipo_tipo: str, equipo_id: int) -> Tuple[str, str]:
+    """Marca y modelo del equipo ('' si el tipo no los registra)"""
+    modelo = _modelos_equipo().get((equipo_tipo or '').lower())
+    if modelo is None:
+        return '', ''
+    tabla = modelo.__table__
+    fila = connection.execute(select(*_columnas_identificacion(tabla)).where(tabla.c.id == equipo_id)).first()
+    if fila is None:
+        return '', ''
+    return fila[0] or '', fila[1] or ''
+
+
+def _horas_desde(inicio, hasta: datetime):
+    """Horas entre una columna y un instante, nunca negativas"""
+    horas = horas_entre(literal(hasta, DateTime()), inicio)
+    return case((horas < 0, 0.0), else_=horas)
+
+
+def aplicar_cambio(connection, equipo_tipo: str, equipo_id: int, fecha: Optional[datetime],
+                   valores: Dict[str, Any]):
+    """
+    Aplica `valores` (expresiones sobre las columnas actuales) a la fila del
+    equipo, creándola si no existe, en la transacción en curso
+    """
+    if not equipo_tipo or not equipo_id:
+        return
+
+    tabla = ConfiabilidadEquipo.__table__
+    condicion = and_(tabla.c.equipo_tipo == equipo_tipo, tabla.c.equipo_id == equipo_id)
+    valores = dict(valores, updated_at=datetime.utcnow())
+    if fecha is not None:
+        valores['inicio_observacion'] = case(
+            (or_(tabla.c.inicio_observacion.is_(None), tabla.c.inicio_observacion > fecha), fecha),
+            else_=tabla.c.inicio_observacion
+        )
+
+    if connection.execute(tabla.update().where(condicion).values(**valores)).rowcount:
+        return
+
+    marca, modelo = _identificacion_equipo(connection, equipo_tipo, equipo_id)
+    try:
+        with connection.begin_nested():
+            connection.execute(tabla.insert().values(
+                equipo_tipo=equipo_tipo, equipo_id=equipo_id, marca=marca, modelo=modelo
+            ))
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        pass
+    connection.execute(tabla.update().where(condicion).values(**valores))
+
+
+def contribucion_falla(falla, anterior: bool = False) -> Optional[Dict[str, Any]]:
+    """Equipo, fecha y horas de reparación con que una falla aporta a los totales"""
+    fecha = _valor(falla, ATRIBUTOS_FECHA, anterior)
+    equipo_id = _valor(falla, ('equipo_id',), anterior)
+    if fecha is None or not equipo_id:
+        return None
+
+    fecha_resolucion = _valor(falla, ('fecha_resolucion',), anterior)
+    horas = None
+    if fecha_resolucion is not None:
+        horas = max((fecha_resolucion - fecha).total_seconds() / 3600, 0.0)
+
+    return {
+        'equipo_tipo': _valor(falla, ('equipo_type',), anterior),
+        'equipo_id': equipo_id,
+        'fecha': fecha,
+        'horas_reparacion': horas
+    }
+
+
+def aplicar_falla(connection, contribucion: Optional[Dict[str, Any]], signo: int):
+    """
+    Suma (signo=1) o resta (signo=-1) una falla de los totales de su equipo.
+    Al restar no se retrocede ultima_falla ni inicio_observacion (los corrige
+    la reconstrucción completa).
+    """
+    if contribucion is None:
+        return
+
+    tabla = ConfiabilidadEquipo.__table__
+    horas = contribucion['horas_reparacion']
+    valores = {'fallas_total': tabla.c.fallas_total + signo}
+    if horas is not None:
+        valores['fallas_resueltas'] = tabla.c.fallas_resueltas + signo
+        valores['horas_reparacion_total'] = tabla.c.horas_reparacion_total + signo * horas
+    if signo > 0:
+        valores['ultima_falla'] = case(
+            (or_(tabla.c.ultima_falla.is_(None), tabla.c.ultima_falla < contribucion['fecha']),
+             contribucion['fecha']),
+            else_=tabla.c.ultima_falla
+        )
+
+    aplicar_cambio(connection, contribucion['equipo_tipo'], contribucion['equipo_id'],
+                   contribucion['fecha'] if signo > 0 else None, valores)
+
+
+def _on_falla_insert(mapper, connection, falla):
+    aplicar_falla(connection, contribucion_falla(falla), 1)
+
+
+def _on_falla_update(mapper, connection, falla):
+    estado = inspect(falla)
+    if not any(
+        atributo in estado.mapper.attrs and estado.attrs[atributo].history.has_changes()
+        for atributo in ATRIBUTOS_RELEVANTES
+    ):
+        return
+    aplicar_falla(connection, contribucion_falla(falla, anterior=True), -1)
+    aplicar_falla(connection, contribucion_falla(falla), 1)
+
+
+def _on_falla_delete(mapper, connection, falla):
+    aplicar_falla(connection, contribucion_falla(falla, anterior=True), -1)
+
+
+def _on_historial_insert(mapper, connection, cambio):
+    """
+    Abre una caída cuando el equipo pasa a un estado de falla y suma su
+    duración cuando sale de él. Los cambios deben registrarse en orden.
+    """
+    tabla = ConfiabilidadEquipo.__table__
+    fecha = cambio.fecha_cambio or datetime.utcnow()
+
+    if cambio.estado_nuevo in ESTADOS_FUERA_SERVICIO:
+        valores = {'fuera_servicio_desde': case(
+            (tabla.c.fuera_servicio_desde.is_(None), fecha), else_=tabla.c.fuera_servicio_desde
+        )}
+    else:
+        valores = {
+            'horas_fuera_servicio': tabla.c.horas_fuera_servicio + case(
+                (tabla.c.fuera_servicio_desde.isnot(None), _horas_desde(tabla.c.fuera_servicio_desde, fecha)),
+                else_=0.0
+            ),
+            'fuera_servicio_desde': None
+        }
+
+    aplicar_cambio(connection, cambio.equipo_tipo, cambio.equipo_id, fecha, valores)
+
+
+def registrar_listeners():
+    """
+    Mantiene los totales en la misma transacción que modifica la falla o
+    registra el cambio de estado. Las actualizaciones masivas no pasan por
+    estos eventos: después de ellas se debe ejecutar ConfiabilidadService.reconstruir().
+    """
+    from models import Falla, HistorialEstadoEquipo
+
+    listeners = [
+        (Falla, 'after_insert', _on_falla_insert),
+        (Falla, 'after_update', _on_falla_update),
+        (Falla, 'after_delete', _on_falla_delete),
+        (HistorialEstadoEquipo, 'after_insert', _on_historial_insert),
+    ]
+    for modelo, nombre, funcion in listeners:
+        if not event.contains(modelo, nombre, funcion):
+            event.listen(modelo, nombre, funcion)
+    activar_historial(Falla, ATRIBUTOS_RELEVANTES)
+
+
+def calcular_metricas(fallas_total: int, fallas_resueltas: int, horas_reparacion: float,
+                      horas_fuera_servicio: float, horas_observadas: float) -> Dict[str, Any]:
+    """
+    MTTR = horas de reparación / fallas resueltas.
+    MTBF = horas en operación (observadas - fuera de servicio) / fallas.
+    """
+    horas_observadas = max(horas_observadas or 0.0, 0.0)
+    horas_operacion = max(horas_observadas - (horas_fuera_servicio or 0.0), 0.0)
+    return {
+        'fallas_total': fallas_total,
+        'fallas_resueltas': fallas_resueltas,
+        'mttr_horas': round(horas_reparacion / fallas_resueltas, 2) if fallas_resueltas else None,
+        'mtbf_horas': round(horas_operacion / fallas_total, 2) if fallas_total else None,
+        'disponibilidad': round(horas_operacion / horas_observadas * 100, 2) if horas_observadas else None,
+        'horas_observadas': round(horas_observadas, 2)
+    }
+
+
+class ConfiabilidadService:
+    """Consultas de MTTR/MTBF y reconstrucción de los totales por equipo"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    def _columnas_tiempo(self, ahora: datetime):
+        """Horas observadas y horas de la caída en curso hasta `ahora`"""
+        horas_observadas = case(
+            (ConfiabilidadEquipo.inicio_observacion.isnot(None),
+             _horas_desde(ConfiabilidadEquipo.inicio_observacion, ahora)),
+            else_=0.0
+        )
+        horas_caida_actual = case(
+            (ConfiabilidadEquipo.fuera_servicio_desde.isnot(None),
+             _horas_desde(ConfiabilidadEquipo.fuera_servicio_desde, ahora)),
+            else_=0.0
+        )
+        return horas_observadas, horas_caida_actual
+
+    def _a_dict(self, fila) -> Dict[str, Any]:
+        resultado = {
+            'equipo_tipo': fila.equipo_tipo,
+            'equipo_id': fila.equipo_id,
+            'marca': fila.marca,
+            'modelo': fila.modelo,
+            'fuera_de_servicio': fila.fuera_servicio_desde is not None,
+            'ultima_falla': fila.ultima_falla.isoformat() if fila.ultima_falla else None
+        }
+        resultado.update(calcular_metricas(
+            fila.fallas_total, fila.fallas_resueltas, fila.horas_reparacion_total,
+            fila.horas_fuera_servicio + fila.horas_caida_actual, fila.horas_observadas
+        ))
+        return resultado
+
+    def _query_equipos(self, ahora: datetime):
+        horas_observadas, horas_caida_actual = self._columnas_tiempo(ahora)
+        return self.db.query(
+            ConfiabilidadEquipo.equipo_tipo, ConfiabilidadEquipo.equipo_id,
+            ConfiabilidadEquipo.marca, ConfiabilidadEquipo.modelo,
+            ConfiabilidadEquipo.fallas_total, ConfiabilidadEquipo.fallas_resueltas,
+            ConfiabilidadEquipo.horas_reparacion_total, ConfiabilidadEquipo.horas_fuera_servicio,
+            ConfiabilidadEquipo.fuera_servicio_desde, ConfiabilidadEquipo.ultima_falla,
+            horas_observadas.label('horas_observadas'),
+            horas_caida_actual.label('horas_caida_actual')
+        ), horas_observadas, horas_caida_actual
+
+    def equipo(self, equipo_tipo: str, equipo_id: int) -> Optional[Dict[str, Any]]:
+        """Métricas de confiabilidad de un equipo (None si no tiene registros)"""
+        query, _, _ = self._query_equipos(datetime.utcnow())
+        fila = query.filter(
+            ConfiabilidadEquipo.equipo_tipo == equipo_tipo,
+            ConfiabilidadEquipo.equipo_id == equipo_id
+        ).first()
+        return self._a_dict(fila) if fila else None
+
+    def ranking_equipos(self, equipo_tipo: str = None, orden: str = 'mtbf', limit: int = 20,
+                        min_fallas: int = 1) -> List[Dict[str, Any]]:
+        """
+        Equipos menos confiables: menor MTBF, mayor MTTR o más fallas.
+        El orden se resuelve en la base de datos.
+        """
+        if orden not in ORDENES:
+            raise ValueError(f'Orden no soportado: {orden}')
+
+        query, horas_observadas, horas_caida_actual = self._query_equipos(datetime.utcnow())
+        query = query.filter(ConfiabilidadEquipo.fallas_total >= max(min_fallas, 1))
+        if equipo_tipo:
+            query = query.filter(ConfiabilidadEquipo.equipo_tipo == equipo_tipo)
+
+        if orden == 'mtbf':
+            operacion = horas_observadas - ConfiabilidadEquipo.horas_fuera_servicio - horas_caida_actual
+            query = query.order_by((operacion / ConfiabilidadEquipo.fallas_total).asc())
+        elif orden == 'mttr':
+            query = query.filter(ConfiabilidadEquipo.fallas_resueltas > 0).order_by(
+                (ConfiabilidadEquipo.horas_reparacion_total / ConfiabilidadEquipo.fallas_resueltas).desc()
+            )
+        else:
+            query = query.order_by(ConfiabilidadEquipo.fallas_total.desc())
+
+        return [self._a_dict(fila) for fila in query.limit(limit).all()]
+
+    def ranking_modelos(self, equipo_tipo: str = None, orden: str = 'mtbf', limit: int = 20,
+                        min_fallas: int = 3) -> List[Dict[str, Any]]:
+        """
+        Modelos (tipo, marca, modelo) menos confiables. Los totales de cada
+        modelo son la suma de los de sus equipos, de modo que el MTBF pondera
+        por tiempo en operación y el MTTR por cantidad de reparaciones.
+        """
+        if orden not in ORDENES:
+            raise ValueError(f'Orden no soportado: {orden}')
+
+        horas_observadas, horas_caida_actual = self._columnas_tiempo(datetime.utcnow())
+        fallas_total = func.sum(ConfiabilidadEquipo.fallas_total)
+        query = self.db.query(
+            ConfiabilidadEquipo.equipo_tipo, ConfiabilidadEquipo.marca, ConfiabilidadEquipo.modelo,
+            func.count().label('equipos'),
+            fallas_total.label('fallas_total'),
+            func.sum(ConfiabilidadEquipo.fallas_resueltas).label('fallas_resueltas'),
+            func.sum(ConfiabilidadEquipo.horas_reparacion_total).label('horas_reparacion_total'),
+            func.sum(ConfiabilidadEquipo.horas_fuera_servicio + horas_caida_actual).label('horas_fuera_servicio'),
+            func.sum(horas_observadas).label('horas_observadas')
+        ).group_by(
+            ConfiabilidadEquipo.equipo_tipo, ConfiabilidadEquipo.marca, ConfiabilidadEquipo.modelo
+        ).having(fallas_total >= max(min_fallas, 1))
+        if equipo_tipo:
+            query = query.filter(ConfiabilidadEquipo.equipo_tipo == equipo_tipo)
+
+        modelos = []
+        for fila in query.all():
+            resultado = {
+                'equipo_tipo': fila.equipo_tipo,
+                'marca': fila.marca or None,
+                'modelo': fila.modelo or None,
+                'equipos': fila.equipos
+            }
+            resultado.update(calcular_metricas(
+                fila.fallas_total, fila.fallas_resueltas, fila.horas_reparacion_total or 0.0,
+                fila.horas_fuera_servicio or 0.0, fila.horas_observadas or 0.0
+            ))
+            modelos.append(resultado)
+
+        if orden == 'mtbf':
+            modelos.sort(key=lambda m: m['mtbf_horas'])
+        elif orden == 'mttr':
+            modelos = [m for m in modelos if m['mttr_horas'] is not None]
+            modelos.sort(key=lambda m: m['mttr_horas'], reverse=True)
+        else:
+            modelos.sort(key=lambda m: m['fallas_total'], reverse=True)
+        return modelos[:limit]
+
+    # ------------------------------------------------------------------
+    # Reconstrucción completa
+    # ------------------------------------------------------------------
+
+    def _fallas_por_equipo(self):
+        """Totales de fallas por equipo, agregados con pandas"""
+        import pandas as pd
+        from models import Falla
+
+        columna_fecha = _columna(Falla, ATRIBUTOS_FECHA)
+        filas = self.db.execute(
+            select(Falla.equipo_type, Falla.equipo_id, columna_fecha, Falla.fecha_resolucion)
+            .where(columna_fecha.isnot(None), Falla.equipo_id.isnot(None))
+        ).all()
+        df = pd.DataFrame(filas, columns=['equipo_tipo', 'equipo_id', 'fecha', 'fecha_resolucion'])
+        df['fecha'] = pd.to_datetime(df['fecha'])
+        df['fecha_resolucion'] = pd.to_datetime(df['fecha_resolucion'])
+        df['horas'] = ((df['fecha_resolucion'] - df['fecha']).dt.total_seconds() / 3600).clip(lower=0)
+
+        return df.groupby(['equipo_tipo', 'equipo_id']).agg(
+            fallas_total=('fecha', 'size'),
+            fallas_resueltas=('fecha_resolucion', 'count'),
+            horas_reparacion_total=('horas', 'sum'),
+            primera_falla=('fecha', 'min'),
+            ultima_falla=('fecha', 'max')
+        )
+
+    def _caidas_por_equipo(self):
+        """
+        Tiempo fuera de servicio por equipo desde el historial de estados.
+
+        Cada cambio a un estado de falla aporta el intervalo hasta el cambio
+        siguiente del mismo equipo. Los intervalos de la caída aún abierta (la
+        racha de estados de falla que termina el historial) no se suman: se
+        informan como fuera_servicio_desde, igual que en el cálculo incremental.
+        """
+        import numpy as np
+        import pandas as pd
+        from models import HistorialEstadoEquipo
+
+        query = select(
+            HistorialEstadoEquipo.equipo_tipo, HistorialEstadoEquipo.equipo_id,
+            HistorialEstadoEquipo.estado_nuevo, HistorialEstadoEquipo.fecha_cambio
+        ).where(HistorialEstadoEquipo.fecha_cambio.isnot(None))
+        if 'deleted' in inspect(HistorialEstadoEquipo).attrs:
+            query = query.where(HistorialEstadoEquipo.deleted == False)  # noqa: E712
+
+        filas = self.db.execute(query.order_by(
+            HistorialEstadoEquipo.equipo_tipo, HistorialEstadoEquipo.equipo_id,
+            HistorialEstadoEquipo.fecha_cambio, HistorialEstadoEquipo.id
+        )).all()
+        df = pd.DataFrame(filas, columns=['equipo_tipo', 'equipo_id', 'estado', 'fecha'])
+        if df.empty:
+            return pd.DataFrame(
+                columns=['horas_fuera_servicio', 'fuera_servicio_desde', 'inicio_historial'],
+                index=pd.MultiIndex.from_tuples([], names=['equipo_tipo', 'equipo_id'])
+            )
+        df['fecha'] = pd.to_datetime(df['fecha'])
+
+        tipo = df['equipo_tipo'].to_numpy()
+        equipo = df['equipo_id'].to_numpy()
+        fecha = df['fecha'].to_numpy()
+        caido = df['estado'].isin(ESTADOS_FUERA_SERVICIO).to_numpy()
+
+        # Mismo equipo que la fila siguiente / anterior
+        mismo_siguiente = np.zeros(len(df), dtype=bool)
+        mismo_siguiente[:-1] = (tipo[1:] == tipo[:-1]) & (equipo[1:] == equipo[:-1])
+        mismo_anterior = np.zeros(len(df), dtype=bool)
+        mismo_anterior[1:] = mismo_siguiente[:-1]
+
+        # Rachas de estados iguales (caído / no caído) dentro de cada equipo
+        nueva_racha = ~mismo_anterior
+        nueva_racha[1:] |= caido[1:] != caido[:-1]
+        racha = np.cumsum(nueva_racha)
+
+        ultima_fila = ~mismo_siguiente
+        abierta = np.isin(racha, racha[ultima_fila & caido])
+
+        siguiente = np.empty_like(fecha)
+        siguiente[:-1] = fecha[1:]
+        siguiente[-1] = fecha[-1]
+        horas = (siguiente - fecha) / np.timedelta64(1, 'h')
+        df['horas_caida'] = np.where(caido & mismo_siguiente & ~abierta, horas, 0.0)
+        df['inicio_abierta'] = df['fecha'].where(abierta)
+
+        return df.groupby(['equipo_tipo', 'equipo_id']).agg(
+            horas_fuera_servicio=('horas_caida', 'sum'),
+            fuera_servicio_desde=('inicio_abierta', 'min'),
+            inicio_historial=('fecha', 'min')
+        )
+
+    def _identificaciones(self, equipos) -> Dict[Tuple[str, int], Tuple[str, str]]:
+        """Marca y modelo de cada equipo, una consulta por tipo"""
+        connection = self.db.connection()
+        resultado = {}
+        por_tipo = {}
+        for equipo_tipo, equipo_id in equipos:
+            por_tipo.setdefault(equipo_tipo, []).append(int(equipo_id))
+
+        for equipo_tipo, ids in por_tipo.items():
+            modelo = _modelos_equipo().get((equipo_tipo or '').lower())
+            if modelo is None:
+                continue
+            tabla = modelo.__table__
+            columnas = _columnas_identificacion(tabla)
+            for inicio in range(0, len(ids), 1000):
+                for fila in connection.execute(
+                    select(tabla.c.id, *columnas).where(tabla.c.id.in_(ids[inicio:inicio + 1000]))
+                ):
+                    resultado[(equipo_tipo, fila[0])] = (fila[1] or '', fila[2] or '')
+        return resultado
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula los totales de todos los equipos desde el historial completo
+        de fallas y cambios de estado (agregación vectorizada con pandas/NumPy).
+
+        Returns:
+            int: Equipos con totales
+        """
+        import pandas as pd
+
+        totales = self._fallas_por_equipo().join(self._caidas_por_equipo(), how='outer')
+        totales['inicio_observacion'] = totales[['primera_falla', 'inicio_historial']].min(axis=1)
+
+        identificaciones = self._identificaciones(totales.index)
+        ahora = datetime.utcnow()
+
+        def _fecha(valor):
+            return None if pd.isna(valor) else pd.Timestamp(valor).to_pydatetime()
+
+        filas = []
+        for (equipo_tipo, equipo_id), fila in totales.iterrows():
+            marca, modelo = identificaciones.get((equipo_tipo, equipo_id), ('', ''))
+            filas.append({
+                'equipo_tipo': equipo_tipo,
+                'equipo_id': int(equipo_id),
+                'marca': marca,
+                'modelo': modelo,
+                'fallas_total': int(0 if pd.isna(fila['fallas_total']) else fila['fallas_total']),
+                'fallas_resueltas': int(0 if pd.isna(fila['fallas_resueltas']) else fila['fallas_resueltas']),
+                'horas_reparacion_total': float(0 if pd.isna(fila['horas_reparacion_total'])
+                                                else fila['horas_reparacion_total']),
+                'horas_fuera_servicio': float(0 if pd.isna(fila['horas_fuera_servicio'])
+                                              else fila['horas_fuera_servicio']),
+                'fuera_servicio_desde': _fecha(fila['fuera_servicio_desde']),
+                'inicio_observacion': _fecha(fila['inicio_observacion']),
+                'ultima_falla': _fecha(fila['ultima_falla']),
+                'updated_at': ahora
+            })
+
+        self.db.query(ConfiabilidadEquipo).delete(synchronize_session=False)
+        for inicio in range(0, len(filas), 1000):
+            self.db.execute(ConfiabilidadEquipo.__table__.insert(), filas[inicio:inicio + 1000])
+        self.db.commit()
+
+        logger.info(f"Totales de confiabilidad reconstruidos: {len(filas)} equipos")
+        return len(filas)
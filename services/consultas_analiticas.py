@@ -0,0 +1,173 @@
+# services/consultas_analiticas.py
+"""
+Capa de consultas analíticas portable
+Expresiones de SQLAlchemy Core que se compilan distinto según el motor
+(PostgreSQL en producción, SQLite en desarrollo) para truncar fechas, extraer
+partes de una fecha y calcular intervalos en horas, más las tablas que usan
+los reportes. Así los reportes producen el mismo resultado en ambos motores.
+"""
+
+from sqlalchemy import table, column, literal_column, DateTime, Float, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+# Formatos strftime de SQLite equivalentes a date_trunc de PostgreSQL
+FORMATOS_TRUNCADO_SQLITE = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00',
+    'month': '%Y-%m-01 00:00:00',
+    'year': '%Y-01-01 00:00:00'
+}
+
+# Partes de fecha soportadas (nombres de EXTRACT) y su formato strftime
+FORMATOS_PARTE_SQLITE = {
+    'dow': '%w',    # 0 = domingo, igual que EXTRACT(dow)
+    'hour': '%H',
+    'day': '%d',
+    'month': '%m',
+    'year': '%Y'
+}
+
+
+def _argumentos(element):
+    """Separa el literal de unidad/parte del resto de argumentos"""
+    argumentos = list(element.clauses)
+    return argumentos[0].name.strip("'"), argumentos[1:]
+
+
+class TruncarFecha(FunctionElement):
+    """Inicio del intervalo (hora, día, mes, año) que contiene la fecha"""
+    type = DateTime()
+    name = 'truncar_fecha'
+    inherit_cache = True
+
+
+class ParteFecha(FunctionElement):
+    """Parte numérica de una fecha (día de la semana, hora, ...)"""
+    type = Integer()
+    name = 'parte_fecha'
+    inherit_cache = True
+
+
+class HorasEntre(FunctionElement):
+    """Horas transcurridas entre dos fechas (fin - inicio)"""
+    type = Float()
+    name = 'horas_entre'
+    inherit_cache = True
+
+
+@compiles(TruncarFecha)
+def _truncar_fecha_postgresql(element, compiler, **kw):
+    unidad, (expr,) = _argumentos(element)
+    return f"date_trunc('{unidad}', {compiler.process(expr, **kw)})"
+
+
+@compiles(TruncarFecha, 'sqlite')
+def _truncar_fecha_sqlite(element, compiler, **kw):
+    unidad, (expr,) = _argumentos(element)
+    return f"strftime('{FORMATOS_TRUNCADO_SQLITE[unidad]}', {compiler.process(expr, **kw)})"
+
+
+@compiles(ParteFecha)
+def _parte_fecha_postgresql(element, compiler, **kw):
+    parte, (expr,) = _argumentos(element)
+    return f"CAST(EXTRACT({parte} FROM {compiler.process(expr, **kw)}) AS INTEGER)"
+
+
+@compiles(ParteFecha, 'sqlite')
+def _parte_fecha_sqlite(element, compiler, **kw):
+    parte, (expr,) = _argumentos(element)
+    return f"CAST(strftime('{FORMATOS_PARTE_SQLITE[parte]}', {compiler.process(expr, **kw)}) AS INTEGER)"
+
+
+@compiles(HorasEntre)
+def _horas_entre_postgresql(element, compiler, **kw):
+    fin, inicio = list(element.clauses)
+    return (f"(EXTRACT(EPOCH FROM ({compiler.process(fin, **kw)} - "
+            f"{compiler.process(inicio, **kw)})) / 3600.0)")
+
+
+@compiles(HorasEntre, 'sqlite')
+def _horas_entre_sqlite(element, compiler, **kw):
+    fin, inicio = list(element.clauses)
+    return (f"((julianday({compiler.process(fin, **kw)}) - "
+            f"julianday({compiler.process(inicio, **kw)})) * 24.0)")
+
+
+def truncar_fecha(expr, unidad: str) -> TruncarFecha:
+    """
+    Expresión portable de date_trunc.
+
+    Args:
+        expr: Columna o expresión de fecha
+        unidad: hour, day, month o year
+    """
+    if unidad not in FORMATOS_TRUNCADO_SQLITE:
+        raise ValueError(f'Unidad de truncado no soportada: {unidad}')
+    return TruncarFecha(literal_column(f"'{unidad}'"), expr)
+
+
+def parte_fecha(expr, parte: str) -> ParteFecha:
+    """
+    Expresión portable de EXTRACT(parte FROM expr).
+
+    Args:
+        expr: Columna o expresión de fecha
+        parte: dow (0 = domingo), hour, day, month o year
+    """
+    if parte not in FORMATOS_PARTE_SQLITE:
+        raise ValueError(f'Parte de fecha no soportada: {parte}')
+    return ParteFecha(literal_column(f"'{parte}'"), expr)
+
+
+def horas_entre(fin, inicio) -> HorasEntre:
+    """Expresión portable de EXTRACT(EPOCH FROM (fin - inicio)) / 3600"""
+    return HorasEntre(fin, inicio)
+
+
+# ----------------------------------------------------------------------
+# Tablas usadas por los reportes (solo las columnas que se consultan)
+# ----------------------------------------------------------------------
+
+camaras = table(
+    'camaras',
+    column('id', Integer), column('nombre'), column('tipo'), column('estado'),
+    column('ubicacion_id', Integer), column('observaciones'),
+    column('ultima_actualizacion', DateTime)
+)
+
+ubicaciones = table(
+    'ubicaciones',
+    column('id', Integer), column('nombre')
+)
+
+switches = table(
+    'switches',
+    column('id', Integer), column('nombre'), column('ip'), column('estado'),
+    column('observaciones')
+)
+
+fallas = table(
+    'fallas',
+    column('id', Integer), column('titulo'), column('severidad'), column('estado'),
+    column('fecha_reporte', DateTime), column('fecha_resolucion', DateTime),
+    column('camara_id', Integer), column('usuario_reporta_id', Integer)
+)
+
+usuarios = table(
+    'usuarios',
+    column('id', Integer), column('nombre')
+)
+
+mantenimientos = table(
+    'mantenimientos',
+    column('id', Integer), column('tipo'), column('descripcion'), column('estado'),
+    column('fecha_programada', DateTime), column('camara_id', Integer),
+    column('tecnico_id', Integer)
+)
+
+reportes = table(
+    'reportes',
+    column('id', Integer), column('nombre'), column('tipo'), column('data'),
+    column('created_at', DateTime)
+)
@@ -0,0 +1,425 @@
+# services/despacho_service.py
+"""
+Servicio de despacho automático de fallas
+Asigna un lote de fallas pendientes a los técnicos activos en una sola pasada.
+Cada par (falla, técnico) tiene un costo que combina habilidad del técnico para
+el tipo de falla, distancia entre su ubicación y la del equipo, y la espera que
+tendría la falla según la carga del técnico y los tiempos estimados del
+catálogo de tipos de falla. El lote se resuelve con el método húngaro (o de
+forma voraz) sobre índices en memoria, sin consultas por falla.
+"""
+
+import logging
+import math
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from sqlalchemy import inspect, select
+
+from .falla_rollup_service import ATRIBUTOS_FECHA, ATRIBUTOS_SEVERIDAD, _modelos_equipo, _valor
+
+logger = logging.getLogger(__name__)
+
+# Columnas según el esquema de fallas
+ATRIBUTOS_TECNICO = ('assigned_to',)
+ATRIBUTOS_TIPO_FALLA = ('tipo_falla_id', 'catalogo_tipo_falla_id')
+
+# Fallas pendientes de despacho
+ESTADOS_DESPACHABLES = ('abierta', 'reportada')
+
+# Peso de la espera según severidad (mismo orden que GravedadFalla)
+PESOS_SEVERIDAD = {'critica': 5, 'alta': 4, 'media': 3, 'baja': 2, 'informativa': 1}
+PESO_SEVERIDAD_DEFECTO = 3
+
+METODOS = ('hungaro', 'voraz')
+
+# Ponderación de los componentes del costo
+PESO_HABILIDAD = 4.0
+PESO_DISTANCIA = 2.0
+PESO_ESPERA = 1.0
+NIVEL_HABILIDAD_MAXIMO = 5
+NIVEL_ESPECIALIDAD = 3          # Nivel que se asume si coincide la especialidad declarada
+DISTANCIA_REFERENCIA_KM = 5.0   # Distancias mayores cuentan como la máxima
+HORAS_RESOLUCION_DEFECTO = 2.0  # Si el tipo de falla no tiene tiempo estimado
+HORAS_REFERENCIA = 8.0          # Una jornada de espera equivale a 1 en el costo
+COSTO_SIN_ASIGNAR = 25.0        # Por unidad de severidad; se deja sin asignar si nadie baja de esto
+
+
+def distancia_km(lat1, lon1, lat2, lon2) -> Optional[float]:
+    """Distancia haversine en kilómetros (None si falta alguna coordenada)"""
+    try:
+        lat1, lon1, lat2, lon2 = (math.radians(float(x)) for x in (lat1, lon1, lat2, lon2))
+    except (TypeError, ValueError):
+        return None
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def asignacion_optima(costos) -> List[int]:
+    """
+    Método húngaro (Kuhn-Munkres con potenciales) para una matriz de costos
+    de n filas y m >= n columnas; el recorrido de columnas se vectoriza con NumPy.
+
+    Returns:
+        list: Columna asignada a cada fila
+    """
+    import numpy as np
+
+    n, m = costos.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    fila_de = np.zeros(m + 1, dtype=np.int64)   # fila_de[j]: fila (1..n) asignada a la columna j
+    camino = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        fila_de[0] = i
+        j0 = 0
+        minimo = np.full(m + 1, np.inf)
+        usada = np.zeros(m + 1, dtype=bool)
+        while True:
+            usada[j0] = True
+            i0 = fila_de[j0]
+            libre = ~usada
+            libre[0] = False
+
+            reducido = np.empty(m + 1)
+            reducido[0] = np.inf
+            reducido[1:] = costos[i0 - 1] - u[i0] - v[1:]
+            mejora = libre & (reducido < minimo)
+            minimo[mejora] = reducido[mejora]
+            camino[mejora] = j0
+
+            candidatos = np.where(libre, minimo, np.inf)
+            j1 = int(np.argmin(candidatos))
+            delta = candidatos[j1]
+            u[fila_de[usada]] += delta
+            v[usada] -= delta
+            minimo[libre] -= delta
+            j0 = j1
+            if fila_de[j0] == 0:
+                break
+
+        while j0:
+            j1 = camino[j0]
+            fila_de[j0] = fila_de[j1]
+            j0 = j1
+
+    asignacion = [-1] * n
+    for j in range(1, m + 1):
+        if fila_de[j]:
+            asignacion[fila_de[j] - 1] = j - 1
+    return asignacion
+
+
+def asignacion_voraz(costos, orden) -> List[int]:
+    """
+    Asigna cada fila, en el orden dado, a la columna libre de menor costo.
+
+    Returns:
+        list: Columna asignada a cada fila
+    """
+    import numpy as np
+
+    libre = np.ones(costos.shape[1], dtype=bool)
+    asignacion = [-1] * costos.shape[0]
+    for fila in orden:
+        columna = int(np.argmin(np.where(libre, costos[fila], np.inf)))
+        asignacion[fila] = columna
+        libre[columna] = False
+    return asignacion
+
+
+class DespachoService:
+    """Asignación automática de lotes de fallas a técnicos"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    # ------------------------------------------------------------------
+    # Índices en memoria
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _despachables(query):
+        """Filtra las fallas sin técnico, en estado despachable y no eliminadas"""
+        from models import Falla
+
+        atributos = inspect(Falla).attrs
+        tecnico = next((getattr(Falla, a) for a in ATRIBUTOS_TECNICO if a in atributos), None)
+        if tecnico is None:
+            raise ValueError('El esquema de fallas no tiene columna de técnico asignado')
+
+        query = query.filter(tecnico.is_(None), Falla.estado.in_(ESTADOS_DESPACHABLES))
+        if 'deleted' in atributos:
+            query = query.filter(Falla.deleted == False)  # noqa: E712
+        return query
+
+    def _fallas(self, falla_ids: Optional[List[int]], limite: int):
+        """Fallas a despachar: las pendientes sin técnico (solo las indicadas, si se dan ids)"""
+        from models import Falla
+
+        query = self._despachables(Falla.query)
+        if falla_ids:
+            query = query.filter(Falla.id.in_(falla_ids))
+        fecha = next(getattr(Falla, a) for a in ATRIBUTOS_FECHA if a in inspect(Falla).attrs)
+        return query.order_by(fecha, Falla.id).limit(limite).all()
+
+    def _catalogo(self) -> Tuple[Dict[int, Any], Dict[str, Any]]:
+        """Tipos de falla por id y por nombre"""
+        from models import CatalogoTipoFalla
+
+        por_id, por_nombre = {}, {}
+        for tipo in CatalogoTipoFalla.query.all():
+            por_id[tipo.id] = tipo
+            por_nombre[(tipo.nombre or '').lower()] = tipo
+        return por_id, por_nombre
+
+    def _ubicaciones(self) -> Tuple[Dict[int, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """Coordenadas y edificio de cada ubicación, por id y por nombre/edificio"""
+        from models import Ubicacion
+
+        tabla = Ubicacion.__table__
+        columnas = [tabla.c.id, tabla.c.nombre] + [
+            tabla.c[nombre] for nombre in ('latitud', 'longitud', 'edificio') if nombre in tabla.c
+        ]
+        por_id, por_nombre = {}, {}
+        for fila in self.db.execute(select(*columnas)).mappings():
+            ubicacion = dict(fila)
+            por_id[ubicacion['id']] = ubicacion
+            por_nombre.setdefault((ubicacion['nombre'] or '').lower(), ubicacion)
+            if ubicacion.get('edificio'):
+                por_nombre.setdefault(ubicacion['edificio'].lower(), ubicacion)
+        return por_id, por_nombre
+
+    def _ubicaciones_equipos(self, fallas) -> Dict[Tuple[str, int], int]:
+        """Ubicación de los equipos de las fallas, una consulta IN por tipo"""
+        por_tipo = {}
+        for falla in fallas:
+            if falla.equipo_id:
+                por_tipo.setdefault((falla.equipo_type or '').lower(), set()).add(falla.equipo_id)
+
+        resultado = {}
+        for equipo_tipo, ids in por_tipo.items():
+            modelo = _modelos_equipo().get(equipo_tipo)
+            if modelo is None or 'ubicacion_id' not in modelo.__table__.c:
+                continue
+            tabla = modelo.__table__
+            ids = sorted(ids)
+            for inicio in range(0, len(ids), 1000):
+                for equipo_id, ubicacion_id in self.db.execute(
+                    select(tabla.c.id, tabla.c.ubicacion_id).where(tabla.c.id.in_(ids[inicio:inicio + 1000]))
+                ):
+                    resultado[(equipo_tipo, equipo_id)] = ubicacion_id
+        return resultado
+
+    def _tecnicos(self) -> List[Tuple[Any, int]]:
+        """Técnicos activos con sus asignaciones activas (contadores de carga)"""
+        from models import CargaTecnico, EquipoTecnico
+
+        carga = {
+            tecnico_id: activas for tecnico_id, activas in self.db.execute(
+                select(CargaTecnico.tecnico_id, CargaTecnico.asignaciones_activas)
+            )
+        }
+        return [(tecnico, carga.get(tecnico.id, 0)) for tecnico in EquipoTecnico.get_active_technicians()]
+
+    # ------------------------------------------------------------------
+    # Costos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _habilidades_requeridas(falla, tipo_falla) -> List[str]:
+        """Habilidades que sirven para la falla, de la más a la menos específica"""
+        candidatas = []
+        if tipo_falla is not None:
+            candidatas += [tipo_falla.nombre, tipo_falla.categoria]
+        candidatas += [getattr(falla, 'tipo', None), falla.equipo_type]
+        return [c for c in candidatas if c]
+
+    @staticmethod
+    def _nivel(tecnico, habilidades: List[str]) -> int:
+        """Mejor nivel del técnico en alguna de las habilidades requeridas"""
+        nivel = 0
+        especialidades = [e.lower() for e in tecnico.get_specialties() if isinstance(e, str)]
+        for habilidad in habilidades:
+            if tecnico.has_skill(habilidad):
+                nivel = max(nivel, int(tecnico.get_skill_level(habilidad) or 0))
+            elif habilidad.lower() in especialidades:
+                nivel = max(nivel, NIVEL_ESPECIALIDAD)
+        return min(nivel, NIVEL_HABILIDAD_MAXIMO)
+
+    @staticmethod
+    def _ubicacion_tecnico(tecnico, ubicacion_id, ubicacion_nombre) -> Optional[Dict[str, Any]]:
+        """Ubicación base del técnico (ubicacion_asignada como id, nombre o edificio)"""
+        asignada = (tecnico.ubicacion_asignada or '').strip()
+        if not asignada:
+            return None
+        if asignada.isdigit():
+            return ubicacion_id.get(int(asignada))
+        return ubicacion_nombre.get(asignada.lower())
+
+    @staticmethod
+    def _costo_distancia(origen: Optional[Dict[str, Any]], destino: Optional[Dict[str, Any]]) -> float:
+        """0 en la misma ubicación, 1 a la distancia de referencia o más, 0.5 si no se sabe"""
+        if origen is None or destino is None:
+            return 0.5
+        if origen['id'] == destino['id']:
+            return 0.0
+        km = distancia_km(origen.get('latitud'), origen.get('longitud'),
+                          destino.get('latitud'), destino.get('longitud'))
+        if km is not None:
+            return min(km / DISTANCIA_REFERENCIA_KM, 1.0)
+        if origen.get('edificio') and origen.get('edificio') == destino.get('edificio'):
+            return 0.25
+        return 0.5
+
+    def planificar(self, falla_ids: Optional[List[int]] = None, metodo: str = 'hungaro',
+                   max_asignaciones: int = 5, limite: int = 500) -> Dict[str, Any]:
+        """
+        Calcula el plan de asignación sin modificar las fallas.
+
+        Cada técnico ofrece tantos cupos como le faltan para `max_asignaciones`;
+        el k-ésimo cupo de un técnico implica esperar las horas de su carga
+        actual más k resoluciones, y esa espera pesa más cuanto más severa es
+        la falla. Las fallas para las que ningún cupo baja de COSTO_SIN_ASIGNAR
+        quedan sin asignar.
+
+        Returns:
+            dict: asignaciones (falla, técnico, costo y componentes) y sin_asignar
+        """
+        import numpy as np
+
+        if metodo not in METODOS:
+            raise ValueError(f'Método no soportado: {metodo}')
+
+        fallas = self._fallas(falla_ids, limite)
+        tecnicos = self._tecnicos()
+        if not fallas:
+            return {'metodo': metodo, 'asignaciones': [], 'sin_asignar': []}
+
+        catalogo_id, catalogo_nombre = self._catalogo()
+        ubicacion_id, ubicacion_nombre = self._ubicaciones()
+        ubicacion_equipo = self._ubicaciones_equipos(fallas)
+
+        horas_catalogo = [t.tiempo_estimado_resolucion / 60 for t in catalogo_id.values()
+                          if t.tiempo_estimado_resolucion]
+        horas_promedio = sum(horas_catalogo) / len(horas_catalogo) if horas_catalogo else HORAS_RESOLUCION_DEFECTO
+
+        # Datos por falla
+        tipos_falla, severidades, horas_falla, destinos = [], [], [], []
+        for falla in fallas:
+            tipo_falla = catalogo_id.get(_valor(falla, ATRIBUTOS_TIPO_FALLA)) or \
+                catalogo_nombre.get((getattr(falla, 'tipo', None) or '').lower())
+            tipos_falla.append(tipo_falla)
+            severidades.append(PESOS_SEVERIDAD.get(
+                (_valor(falla, ATRIBUTOS_SEVERIDAD) or '').lower(), PESO_SEVERIDAD_DEFECTO
+            ))
+            minutos = tipo_falla.tiempo_estimado_resolucion if tipo_falla is not None else None
+            horas_falla.append(minutos / 60 if minutos else horas_promedio)
+            destinos.append(ubicacion_id.get(
+                ubicacion_equipo.get(((falla.equipo_type or '').lower(), falla.equipo_id))
+            ))
+        severidades = np.array(severidades, dtype=float)
+
+        # Cupos: (técnico, horas de espera antes de atender)
+        cupos = []
+        for indice, (tecnico, activas) in enumerate(tecnicos):
+            for k in range(max(max_asignaciones - activas, 0)):
+                cupos.append((indice, (activas + k) * horas_promedio))
+
+        n, m = len(fallas), len(cupos)
+        habilidad = np.zeros((n, len(tecnicos)))
+        distancia = np.zeros((n, len(tecnicos)))
+        for j, (tecnico, _) in enumerate(tecnicos):
+            base = self._ubicacion_tecnico(tecnico, ubicacion_id, ubicacion_nombre)
+            for i, falla in enumerate(fallas):
+                nivel = self._nivel(tecnico, self._habilidades_requeridas(falla, tipos_falla[i]))
+                habilidad[i, j] = 1 - nivel / NIVEL_HABILIDAD_MAXIMO
+                distancia[i, j] = self._costo_distancia(base, destinos[i])
+
+        costos = np.full((n, m + n), np.inf)
+        if m:
+            tecnico_cupo = np.array([c[0] for c in cupos])
+            espera_cupo = np.array([c[1] for c in cupos])
+            costos[:, :m] = (
+                PESO_HABILIDAD * habilidad[:, tecnico_cupo]
+                + PESO_DISTANCIA * distancia[:, tecnico_cupo]
+                + PESO_ESPERA * severidades[:, None] * espera_cupo[None, :] / HORAS_REFERENCIA
+            )
+        # Una columna "sin asignar" propia por falla; a igual costo se atienden
+        # primero las más antiguas (las fallas vienen ordenadas por fecha)
+        costos[np.arange(n), m + np.arange(n)] = COSTO_SIN_ASIGNAR * severidades + 1e-3 * (n - np.arange(n))
+
+        if metodo == 'hungaro':
+            asignacion = asignacion_optima(costos)
+        else:
+            orden = sorted(range(n), key=lambda i: -severidades[i])
+            asignacion = asignacion_voraz(costos, orden)
+
+        asignaciones, sin_asignar = [], []
+        for i, columna in enumerate(asignacion):
+            falla = fallas[i]
+            if columna < 0 or columna >= m:
+                sin_asignar.append(falla.id)
+                continue
+            j, espera = cupos[columna]
+            asignaciones.append({
+                'falla_id': falla.id,
+                'tecnico_id': tecnicos[j][0].id,
+                'tecnico': tecnicos[j][0].get_nombre_completo(),
+                'costo': round(float(costos[i, columna]), 3),
+                'nivel_habilidad': round((1 - habilidad[i, j]) * NIVEL_HABILIDAD_MAXIMO),
+                'costo_distancia': round(float(distancia[i, j]), 3),
+                'espera_horas': round(espera, 2),
+                'horas_estimadas': round(horas_falla[i], 2)
+            })
+
+        return {
+            'metodo': metodo,
+            'tecnicos': len(tecnicos),
+            'cupos': m,
+            'costo_total': round(sum(a['costo'] for a in asignaciones), 3),
+            'asignaciones': asignaciones,
+            'sin_asignar': sin_asignar
+        }
+
+    def despachar(self, falla_ids: Optional[List[int]] = None, metodo: str = 'hungaro',
+                  max_asignaciones: int = 5, limite: int = 500) -> Dict[str, Any]:
+        """
+        Calcula el plan y asigna las fallas en una sola transacción (los
+        contadores de carga se actualizan con los listeners de asignación).
+
+        Las fallas del plan se vuelven a leer con bloqueo de fila y el mismo
+        filtro de despachables: las que otro usuario asignó o cerró mientras
+        se calculaba el plan no se tocan y quedan en `omitidas`.
+        """
+        from models import Falla
+
+        plan = self.planificar(falla_ids, metodo, max_asignaciones, limite)
+        plan['omitidas'] = []
+        if not plan['asignaciones']:
+            return plan
+
+        tecnico_de = {a['falla_id']: a['tecnico_id'] for a in plan['asignaciones']}
+        ahora = datetime.utcnow()
+        atributos = inspect(Falla).attrs
+        fallas = self._despachables(Falla.query).filter(
+            Falla.id.in_(list(tecnico_de))
+        ).with_for_update().all()
+        for falla in fallas:
+            setattr(falla, ATRIBUTOS_TECNICO[0], tecnico_de[falla.id])
+            if 'tecnico_asignado' in atributos:
+                falla.tecnico_asignado = str(tecnico_de[falla.id])
+            if 'assigned_date' in atributos:
+                falla.assigned_date = ahora
+        self.db.commit()
+
+        asignadas = {falla.id for falla in fallas}
+        plan['omitidas'] = [falla_id for falla_id in tecnico_de if falla_id not in asignadas]
+        plan['asignaciones'] = [a for a in plan['asignaciones'] if a['falla_id'] in asignadas]
+        plan['costo_total'] = round(sum(a['costo'] for a in plan['asignaciones']), 3)
+
+        logger.info(f"Despacho automático: {len(asignadas)} fallas asignadas, "
+                    f"{len(plan['sin_asignar'])} sin asignar, {len(plan['omitidas'])} omitidas")
+        return plan
@@ -0,0 +1,545 @@
+# services/disponibilidad_service.py
+"""
+Servicio de disponibilidad (uptime) de equipos
+Deriva la disponibilidad real de cada equipo desde los intervalos del historial
+de estados, con aritmética de intervalos vectorizada sobre arreglos de NumPy, y
+la agrega por tipo, ubicación, edificio, NVR y campus en ventanas arbitrarias.
+Los días cerrados se guardan por (equipo, día) en disponibilidad_diaria, de modo
+que un reporte de SLA anual solo recalcula los días que faltan en la caché.
+"""
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy import and_, event, func, inspect, literal, select, DateTime, Integer, String
+from sqlalchemy.exc import IntegrityError
+
+from models.disponibilidad_diaria import DisponibilidadDiaria
+from .confiabilidad_service import ESTADOS_FUERA_SERVICIO
+from .falla_rollup_service import _modelos_equipo, _valor, activar_historial
+
+logger = logging.getLogger(__name__)
+
+# Tipos de equipo con historial de estados (claves de historial_estado_equipo)
+TIPOS_EQUIPO = ('camara', 'nvr', 'switch', 'ups', 'fuente_poder', 'gabinete')
+
+# Niveles de agregación y columnas que identifican cada grupo
+NIVELES = {
+    'equipo': ['equipo_tipo', 'equipo_id'],
+    'tipo': ['equipo_tipo'],
+    'ubicacion': ['ubicacion_id'],
+    'edificio': ['edificio'],
+    'nvr': ['nvr_id'],
+    'campus': []
+}
+
+SEGUNDOS_DIA = 86400
+LOTE = 1000
+
+
+def segundos_por_dia(indice, inicio, fin, origen, n_filas: int, n_dias: int):
+    """
+    Reparte intervalos [inicio, fin) en segundos por (fila, día).
+
+    Args:
+        indice: Fila de la matriz a la que pertenece cada intervalo (int)
+        inicio, fin: Extremos de cada intervalo (datetime64[s])
+        origen: Inicio del primer día (datetime64)
+        n_filas, n_dias: Dimensiones de la matriz resultante
+
+    Returns:
+        numpy.ndarray: Matriz (n_filas, n_dias) de segundos (int64)
+    """
+    import numpy as np
+
+    un_dia = np.timedelta64(1, 'D')
+    limite_inferior = np.datetime64(origen, 's')
+    limite_superior = limite_inferior + n_dias * un_dia
+
+    inicio = np.maximum(inicio, limite_inferior)
+    fin = np.minimum(fin, limite_superior)
+    validos = fin > inicio
+    indice, inicio, fin = indice[validos], inicio[validos], fin[validos]
+    if not len(indice):
+        return np.zeros((n_filas, n_dias), dtype=np.int64)
+
+    # Cada intervalo se expande en una fila por cada día que toca
+    dia_inicio = (inicio - limite_inferior) // un_dia
+    dia_fin = (fin - np.timedelta64(1, 's') - limite_inferior) // un_dia
+    dias = dia_fin - dia_inicio + 1
+    intervalo = np.repeat(np.arange(len(dias)), dias)
+    dia = dia_inicio[intervalo] + np.arange(dias.sum()) - np.repeat(np.cumsum(dias) - dias, dias)
+
+    comienzo_dia = limite_inferior + dia * un_dia
+    segundos = (
+        np.minimum(fin[intervalo], comienzo_dia + un_dia) - np.maximum(inicio[intervalo], comienzo_dia)
+    ) // np.timedelta64(1, 's')
+
+    celdas = np.bincount(indice[intervalo] * n_dias + dia, weights=segundos, minlength=n_filas * n_dias)
+    return celdas.reshape(n_filas, n_dias).astype(np.int64)
+
+
+def intervalos_fuera_servicio(indice, fecha, caido, fin):
+    """
+    Intervalos en estado de falla a partir de cambios de estado ordenados por
+    (indice, fecha): cada cambio rige hasta el siguiente del mismo equipo y el
+    último hasta `fin`.
+
+    Returns:
+        tuple: (indice, inicio, fin) de los intervalos fuera de servicio
+    """
+    import numpy as np
+
+    mismo_siguiente = np.zeros(len(indice), dtype=bool)
+    mismo_siguiente[:-1] = indice[1:] == indice[:-1]
+    fin_intervalo = np.full(len(indice), np.datetime64(fin, 's'))
+    fin_intervalo[:-1] = np.where(mismo_siguiente[:-1], fecha[1:], fin_intervalo[:-1])
+    return indice[caido], fecha[caido], fin_intervalo[caido]
+
+
+def invalidar(connection, equipo_tipo: str, equipo_id: int, fecha: Optional[datetime]):
+    """Elimina de la caché los días del equipo desde `fecha` en adelante"""
+    if not equipo_tipo or not equipo_id or fecha is None:
+        return
+    tabla = DisponibilidadDiaria.__table__
+    connection.execute(tabla.delete().where(
+        tabla.c.equipo_tipo == equipo_tipo,
+        tabla.c.equipo_id == equipo_id,
+        tabla.c.dia >= fecha.date()
+    ))
+
+
+def _on_historial_cambio(mapper, connection, cambio):
+    invalidar(connection, cambio.equipo_tipo, cambio.equipo_id, cambio.fecha_cambio or datetime.utcnow())
+
+
+def _on_historial_update(mapper, connection, cambio):
+    for anterior in (True, False):
+        invalidar(connection,
+                  _valor(cambio, ('equipo_tipo',), anterior),
+                  _valor(cambio, ('equipo_id',), anterior),
+                  _valor(cambio, ('fecha_cambio',), anterior))
+
+
+def registrar_listeners():
+    """
+    Invalida la caché diaria cuando se registra, corrige o elimina un cambio
+    de estado. Las cargas masivas no pasan por estos eventos: después de ellas
+    se debe ejecutar DisponibilidadService.reconstruir().
+    """
+    from models import HistorialEstadoEquipo
+
+    listeners = [
+        (HistorialEstadoEquipo, 'after_insert', _on_historial_cambio),
+        (HistorialEstadoEquipo, 'after_update', _on_historial_update),
+        (HistorialEstadoEquipo, 'after_delete', _on_historial_cambio),
+    ]
+    for modelo, nombre, funcion in listeners:
+        if not event.contains(modelo, nombre, funcion):
+            event.listen(modelo, nombre, funcion)
+    activar_historial(HistorialEstadoEquipo, ('equipo_tipo', 'equipo_id', 'fecha_cambio'))
+
+
+class DisponibilidadService:
+    """Disponibilidad por equipo y por agregado desde el historial de estados"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    # ------------------------------------------------------------------
+    # Equipos y cambios de estado
+    # ------------------------------------------------------------------
+
+    def _equipos(self, equipo_tipo: str = None, ubicacion_id: int = None, nvr_id: int = None,
+                 edificio: str = None):
+        """
+        Equipos vigentes con su fecha de alta, ubicación, edificio y NVR.
+        Un NVR pertenece a su propio grupo de NVR junto con sus cámaras.
+        """
+        import pandas as pd
+        from models import Ubicacion
+
+        ubicaciones = Ubicacion.__table__
+        columnas = ['equipo_tipo', 'equipo_id', 'alta', 'ubicacion_id', 'nvr_id', 'edificio']
+        filas = []
+        for tipo in TIPOS_EQUIPO:
+            if equipo_tipo and tipo != equipo_tipo:
+                continue
+            tabla = _modelos_equipo()[tipo].__table__
+            c = tabla.c
+
+            origen = tabla
+            columna_ubicacion = c.ubicacion_id if 'ubicacion_id' in c else literal(None, Integer())
+            columna_edificio = literal(None, String())
+            if 'ubicacion_id' in c and 'edificio' in ubicaciones.c:
+                origen = tabla.outerjoin(ubicaciones, ubicaciones.c.id == c.ubicacion_id)
+                columna_edificio = ubicaciones.c.edificio
+            if 'nvr_id' in c:
+                columna_nvr = c.nvr_id
+            elif tipo == 'nvr':
+                columna_nvr = c.id
+            else:
+                columna_nvr = literal(None, Integer())
+
+            query = select(
+                literal(tipo), c.id,
+                c.created_at if 'created_at' in c else literal(None, DateTime()),
+                columna_ubicacion, columna_nvr, columna_edificio
+            ).select_from(origen)
+            if 'deleted' in c:
+                query = query.where(c.deleted == False)  # noqa: E712
+            if ubicacion_id is not None:
+                query = query.where(columna_ubicacion == ubicacion_id)
+            if nvr_id is not None:
+                query = query.where(columna_nvr == nvr_id)
+            if edificio is not None:
+                query = query.where(columna_edificio == edificio)
+            filas.extend(self.db.execute(query).all())
+
+        equipos = pd.DataFrame(filas, columns=columnas)
+        equipos['alta'] = pd.to_datetime(equipos['alta'])
+        return equipos
+
+    def _historial(self, equipos, inicio: datetime, fin: datetime):
+        """
+        Cambios de estado de los equipos en [inicio, fin) más el último cambio
+        anterior a `inicio` de cada uno (marcado como previo), que fija el
+        estado con que comienza la ventana
+        """
+        import pandas as pd
+        from models import HistorialEstadoEquipo as H
+
+        columnas = [H.equipo_tipo, H.equipo_id, H.estado_anterior, H.estado_nuevo, H.fecha_cambio, H.id]
+        filas = []
+        for tipo, grupo in equipos.groupby('equipo_tipo'):
+            filtro = [H.equipo_tipo == tipo, H.fecha_cambio.isnot(None)]
+            if 'deleted' in inspect(H).attrs:
+                filtro.append(H.deleted == False)  # noqa: E712
+            ids = [int(i) for i in grupo['equipo_id']]
+            if len(ids) <= LOTE:
+                filtro.append(H.equipo_id.in_(ids))
+
+            ultimo = select(
+                H.equipo_id, func.max(H.fecha_cambio).label('fecha')
+            ).where(*filtro, H.fecha_cambio < inicio).group_by(H.equipo_id).subquery()
+
+            previos = select(*columnas, literal(True)).join(
+                ultimo, and_(H.equipo_id == ultimo.c.equipo_id, H.fecha_cambio == ultimo.c.fecha)
+            ).where(*filtro)
+            en_ventana = select(*columnas, literal(False)).where(
+                *filtro, H.fecha_cambio >= inicio, H.fecha_cambio < fin
+            )
+            filas.extend(self.db.execute(previos).all())
+            filas.extend(self.db.execute(en_ventana).all())
+
+        historial = pd.DataFrame(filas, columns=[
+            'equipo_tipo', 'equipo_id', 'estado_anterior', 'estado_nuevo', 'fecha', 'id', 'previo'
+        ])
+        historial['fecha'] = pd.to_datetime(historial['fecha'])
+        return historial
+
+    # ------------------------------------------------------------------
+    # Cálculo vectorizado
+    # ------------------------------------------------------------------
+
+    def _calcular(self, equipos, inicio: datetime, fin: datetime):
+        """
+        Segundos observados y fuera de servicio por (equipo, día) en
+        [inicio, fin), con `inicio` al comienzo de un día.
+
+        El estado antes del primer cambio de la ventana es el último cambio
+        previo o, si no lo hay, el estado_anterior del primer cambio. Los
+        equipos sin cambios se consideran operativos desde su alta.
+
+        Returns:
+            tuple: (observados, fuera), matrices (len(equipos), días) de segundos
+        """
+        import numpy as np
+        import pandas as pd
+
+        n_dias = -(-int((fin - inicio).total_seconds()) // SEGUNDOS_DIA)
+        n_equipos = len(equipos)
+        inicio64 = np.datetime64(inicio, 's')
+        fin64 = np.datetime64(fin, 's')
+
+        alta = equipos['alta'].fillna(pd.Timestamp(inicio)).to_numpy().astype('datetime64[s]')
+        inicio_observacion = np.maximum(alta, inicio64)
+        filas = np.arange(n_equipos)
+        observados = segundos_por_dia(
+            filas, inicio_observacion, np.full(n_equipos, fin64), inicio64, n_equipos, n_dias
+        )
+
+        historial = self._historial(equipos, inicio, fin)
+        claves = pd.MultiIndex.from_frame(equipos[['equipo_tipo', 'equipo_id']])
+        historial['k'] = claves.get_indexer(
+            pd.MultiIndex.from_frame(historial[['equipo_tipo', 'equipo_id']])
+        ) if len(historial) else []
+        historial = historial[historial['k'] >= 0]
+        if historial.empty:
+            return observados, np.zeros_like(observados)
+
+        # Estado inicial: cambio previo (recortado al inicio) o estado_anterior del primero
+        historial.loc[historial['previo'], 'fecha'] = pd.Timestamp(inicio)
+        historial = historial.assign(estado=historial['estado_nuevo'], orden=historial['previo'].map({True: 0, False: 1}))
+        con_previo = set(historial.loc[historial['previo'], 'k'])
+        primeros = historial[~historial['previo']].sort_values(['k', 'fecha', 'id']).drop_duplicates('k')
+        iniciales = primeros[~primeros['k'].isin(con_previo) & primeros['estado_anterior'].notna()].assign(
+            estado=lambda df: df['estado_anterior'], fecha=pd.Timestamp(inicio), orden=0, id=-1
+        )
+        registros = pd.concat([iniciales, historial], ignore_index=True)
+
+        k = registros['k'].to_numpy(dtype=np.int64)
+        fecha = registros['fecha'].to_numpy().astype('datetime64[s]')
+        orden = np.lexsort((registros['id'].to_numpy(), fecha, registros['orden'].to_numpy(), k))
+        k, fecha = k[orden], fecha[orden]
+        caido = registros['estado'].isin(ESTADOS_FUERA_SERVICIO).to_numpy()[orden]
+
+        indice, desde, hasta = intervalos_fuera_servicio(k, fecha, caido, fin)
+        desde = np.maximum(desde, inicio_observacion[indice])
+        fuera = segundos_por_dia(indice, desde, hasta, inicio64, n_equipos, n_dias)
+        return observados, fuera
+
+    # ------------------------------------------------------------------
+    # Caché por (equipo, día)
+    # ------------------------------------------------------------------
+
+    def _resumen_cache(self, equipos, dia_desde: date, dia_hasta: date):
+        """Días, segundos observados y fuera de servicio en caché por equipo"""
+        import pandas as pd
+
+        tabla = DisponibilidadDiaria.__table__
+        query = select(
+            tabla.c.equipo_tipo, tabla.c.equipo_id, func.count(),
+            func.sum(tabla.c.segundos_observados), func.sum(tabla.c.segundos_fuera)
+        ).where(
+            tabla.c.dia >= dia_desde, tabla.c.dia < dia_hasta,
+            tabla.c.equipo_tipo.in_(equipos['equipo_tipo'].unique().tolist())
+        ).group_by(tabla.c.equipo_tipo, tabla.c.equipo_id)
+        if len(equipos) <= LOTE:
+            query = query.where(tabla.c.equipo_id.in_([int(i) for i in equipos['equipo_id']]))
+
+        resumen = pd.DataFrame(self.db.execute(query).all(), columns=[
+            'equipo_tipo', 'equipo_id', 'dias_cache', 'observados', 'fuera'
+        ])
+        return equipos[['equipo_tipo', 'equipo_id', 'alta']].merge(
+            resumen, on=['equipo_tipo', 'equipo_id'], how='left'
+        ).fillna({'dias_cache': 0, 'observados': 0, 'fuera': 0})
+
+    def _guardar(self, equipos, dia_desde: date, observados, fuera):
+        """Reemplaza en la caché los días calculados de los equipos"""
+        import numpy as np
+
+        tabla = DisponibilidadDiaria.__table__
+        dia_hasta = dia_desde + timedelta(days=observados.shape[1])
+        for tipo, grupo in equipos.groupby('equipo_tipo'):
+            ids = [int(i) for i in grupo['equipo_id']]
+            for inicio in range(0, len(ids), LOTE):
+                self.db.execute(tabla.delete().where(
+                    tabla.c.equipo_tipo == tipo,
+                    tabla.c.equipo_id.in_(ids[inicio:inicio + LOTE]),
+                    tabla.c.dia >= dia_desde, tabla.c.dia < dia_hasta
+                ))
+
+        ahora = datetime.utcnow()
+        tipos = equipos['equipo_tipo'].to_numpy()
+        ids = equipos['equipo_id'].to_numpy()
+        fila, columna = np.nonzero(observados)
+        registros = [
+            {
+                'equipo_tipo': tipos[f], 'equipo_id': int(ids[f]),
+                'dia': dia_desde + timedelta(days=int(d)),
+                'segundos_observados': int(observados[f, d]), 'segundos_fuera': int(fuera[f, d]),
+                'calculado_en': ahora
+            }
+            for f, d in zip(fila, columna)
+        ]
+        try:
+            for inicio in range(0, len(registros), LOTE):
+                self.db.execute(tabla.insert(), registros[inicio:inicio + LOTE])
+            self.db.commit()
+        except IntegrityError:
+            # Otra consulta llenó los mismos días en paralelo; sus valores son iguales
+            self.db.rollback()
+        return len(registros)
+
+    def _totales(self, equipos, desde: date, hasta: date) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Segundos observados y fuera de servicio por equipo entre `desde` y
+        `hasta` (ambos incluidos). Los días cerrados salen de la caché, que se
+        completa para los equipos a los que les faltan días; hoy se calcula en vivo.
+        """
+        import numpy as np
+        import pandas as pd
+
+        ahora = datetime.utcnow()
+        hoy = ahora.date()
+        fin = hasta + timedelta(days=1)
+        fin_cerrado = min(fin, hoy)
+        metadata = {'equipos_recalculados': 0, 'dias_guardados': 0}
+
+        totales = equipos.copy()
+        totales['observados'] = 0
+        totales['fuera'] = 0
+        if equipos.empty:
+            return totales, metadata
+
+        if desde < fin_cerrado:
+            resumen = self._resumen_cache(equipos, desde, fin_cerrado)
+            primer_dia = resumen['alta'].dt.normalize().fillna(pd.Timestamp(desde)).clip(lower=pd.Timestamp(desde))
+            esperados = ((pd.Timestamp(fin_cerrado) - primer_dia).dt.days).clip(lower=0)
+            incompletos = (resumen['dias_cache'] != esperados).to_numpy()
+
+            totales['observados'] = resumen['observados'].to_numpy(dtype=np.int64)
+            totales['fuera'] = resumen['fuera'].to_numpy(dtype=np.int64)
+            if incompletos.any():
+                pendientes = equipos[incompletos].reset_index(drop=True)
+                observados, fuera = self._calcular(
+                    pendientes, datetime.combine(desde, datetime.min.time()),
+                    datetime.combine(fin_cerrado, datetime.min.time())
+                )
+                metadata['equipos_recalculados'] = len(pendientes)
+                metadata['dias_guardados'] = self._guardar(pendientes, desde, observados, fuera)
+                totales.loc[incompletos, 'observados'] = observados.sum(axis=1)
+                totales.loc[incompletos, 'fuera'] = fuera.sum(axis=1)
+
+        totales['observados_hoy'] = 0
+        totales['fuera_hoy'] = 0
+        if fin > hoy and desde <= hoy:
+            observados, fuera = self._calcular(equipos, datetime.combine(hoy, datetime.min.time()), ahora)
+            totales['observados_hoy'] = observados.sum(axis=1)
+            totales['fuera_hoy'] = fuera.sum(axis=1)
+            totales['observados'] += totales['observados_hoy']
+            totales['fuera'] += totales['fuera_hoy']
+
+        return totales, metadata
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _ventana(desde: Optional[date], hasta: Optional[date]) -> Tuple[date, date]:
+        hasta = hasta or datetime.utcnow().date()
+        desde = desde or hasta - timedelta(days=29)
+        if desde > hasta:
+            raise ValueError('La fecha inicial no puede ser posterior a la final')
+        return desde, hasta
+
+    @staticmethod
+    def _metricas(observados: float, fuera: float, objetivo: Optional[float]) -> Dict[str, Any]:
+        disponibilidad = round((1 - fuera / observados) * 100, 3) if observados else None
+        metricas = {
+            'horas_observadas': round(observados / 3600, 2),
+            'horas_fuera_servicio': round(fuera / 3600, 2),
+            'disponibilidad': disponibilidad
+        }
+        if objetivo is not None:
+            metricas['cumple_sla'] = disponibilidad is not None and disponibilidad >= objetivo
+        return metricas
+
+    def disponibilidad(self, nivel: str = 'campus', desde: date = None, hasta: date = None,
+                       equipo_tipo: str = None, ubicacion_id: int = None, nvr_id: int = None,
+                       edificio: str = None, objetivo: float = None, limit: int = None) -> Dict[str, Any]:
+        """
+        Disponibilidad agregada por nivel (equipo, tipo, ubicacion, edificio,
+        nvr o campus) entre `desde` y `hasta`, ambos incluidos (por defecto los
+        últimos 30 días). Los grupos se ordenan de menor a mayor disponibilidad.
+
+        Args:
+            objetivo: Porcentaje de SLA; agrega cumple_sla a cada grupo
+        """
+        import pandas as pd
+
+        if nivel not in NIVELES:
+            raise ValueError(f'Nivel no soportado: {nivel}')
+        if equipo_tipo and equipo_tipo not in TIPOS_EQUIPO:
+            raise ValueError(f'Tipo de equipo no soportado: {equipo_tipo}')
+
+        inicio = time.perf_counter()
+        desde, hasta = self._ventana(desde, hasta)
+        equipos = self._equipos(equipo_tipo, ubicacion_id, nvr_id, edificio)
+        totales, metadata = self._totales(equipos, desde, hasta)
+
+        columnas = NIVELES[nivel]
+        if columnas:
+            totales = totales.dropna(subset=columnas)
+            grupos = totales.groupby(columnas, dropna=True).agg(
+                equipos=('equipo_id', 'size'), observados=('observados', 'sum'), fuera=('fuera', 'sum')
+            ).reset_index()
+        else:
+            grupos = pd.DataFrame([{'equipos': len(totales), 'observados': totales['observados'].sum(),
+                                    'fuera': totales['fuera'].sum()}])
+
+        resultado = []
+        for fila in grupos.itertuples(index=False):
+            grupo = {columna: getattr(fila, columna) for columna in columnas}
+            for columna in ('equipo_id', 'ubicacion_id', 'nvr_id'):
+                if columna in grupo:
+                    grupo[columna] = int(grupo[columna])
+            grupo['equipos'] = int(fila.equipos)
+            grupo.update(self._metricas(float(fila.observados), float(fila.fuera), objetivo))
+            resultado.append(grupo)
+
+        resultado.sort(key=lambda g: (g['disponibilidad'] is None, g['disponibilidad'] or 0.0))
+        metadata.update({
+            'equipos': len(equipos),
+            'tiempo_ms': round((time.perf_counter() - inicio) * 1000, 1)
+        })
+        return {
+            'nivel': nivel,
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'objetivo': objetivo,
+            'grupos': resultado[:limit] if limit else resultado,
+            'metadata': metadata
+        }
+
+    def equipo(self, equipo_tipo: str, equipo_id: int, desde: date = None,
+               hasta: date = None) -> Optional[Dict[str, Any]]:
+        """Disponibilidad de un equipo con su serie diaria (None si no existe)"""
+        desde, hasta = self._ventana(desde, hasta)
+        equipos = self._equipos(equipo_tipo)
+        equipos = equipos[equipos['equipo_id'] == equipo_id].reset_index(drop=True)
+        if equipos.empty:
+            return None
+
+        totales, _ = self._totales(equipos, desde, hasta)
+        fila = totales.iloc[0]
+
+        tabla = DisponibilidadDiaria.__table__
+        serie = [
+            {'dia': dia.isoformat(), **self._metricas(observados, fuera, None)}
+            for dia, observados, fuera in self.db.execute(
+                select(tabla.c.dia, tabla.c.segundos_observados, tabla.c.segundos_fuera).where(
+                    tabla.c.equipo_tipo == equipo_tipo, tabla.c.equipo_id == equipo_id,
+                    tabla.c.dia >= desde, tabla.c.dia <= hasta
+                ).order_by(tabla.c.dia)
+            )
+        ]
+        if fila['observados_hoy']:
+            serie.append({'dia': datetime.utcnow().date().isoformat(),
+                          **self._metricas(float(fila['observados_hoy']), float(fila['fuera_hoy']), None)})
+
+        resultado = {'equipo_tipo': equipo_tipo, 'equipo_id': equipo_id,
+                     'desde': desde.isoformat(), 'hasta': hasta.isoformat()}
+        resultado.update(self._metricas(float(fila['observados']), float(fila['fuera']), None))
+        resultado['serie'] = serie
+        return resultado
+
+    def reconstruir(self, dias: int = 365) -> int:
+        """
+        Vacía la caché y la recalcula para todos los equipos en los últimos
+        `dias` días cerrados.
+
+        Returns:
+            int: Filas (equipo, día) guardadas
+        """
+        self.db.query(DisponibilidadDiaria).delete(synchronize_session=False)
+        self.db.commit()
+
+        ayer = datetime.utcnow().date() - timedelta(days=1)
+        _, metadata = self._totales(self._equipos(), ayer - timedelta(days=dias - 1), ayer)
+        logger.info(f"Caché de disponibilidad reconstruida: {metadata['dias_guardados']} días-equipo")
+        return metadata['dias_guardados']
@@ -0,0 +1,437 @@
+# services/eventos_service.py
+"""
+Canal de eventos en tiempo real (Server-Sent Events)
+Publica deltas de estado (fallas nuevas, cambios de estado de equipos,
+mantenimientos vencidos) una sola vez por cambio y los reparte a todos los
+clientes conectados, en lugar de que cada cliente consulte /stats y /alerts
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Segundos que el cursor espera a que aparezca un id faltante antes de darlo por
+# perdido (transacción revertida). Debe cubrir la transacción más larga que publique eventos.
+ESPERA_HUECOS = int(os.environ.get('EVENTOS_ESPERA_HUECOS', 30))
+
+
+class TipoEvento:
+    """Tipos de evento enviados por el stream."""
+    FALLA_CREADA = "falla_creada"
+    FALLA_ACTUALIZADA = "falla_actualizada"
+    ESTADO_EQUIPO = "estado_equipo"
+    MANTENIMIENTO_VENCIDO = "mantenimiento_vencido"
+    RESYNC = "resync"
+
+
+def _serializable(valor):
+    """Convierte fechas a ISO para guardarlas en la columna JSON"""
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def formatear_sse(evento: Dict[str, Any]) -> str:
+    """
+    Serializa un evento en el formato de texto de Server-Sent Events.
+    El id es "cursor:id": al reconectar interesa el cursor (Last-Event-ID) y el
+    cliente usa el id del evento para descartar repetidos.
+    """
+    lineas = []
+    if evento.get('id') is not None:
+        lineas.append(f"id: {evento.get('cursor', evento['id'])}:{evento['id']}")
+    lineas.append(f"event: {evento['tipo']}")
+    lineas.append(f"data: {json.dumps(evento.get('datos') or {}, ensure_ascii=False)}")
+    return '\n'.join(lineas) + '\n\n'
+
+
+def cursor_desde_id_sse(valor: Optional[str]) -> Optional[int]:
+    """Cursor de una cabecera Last-Event-ID ("cursor:id" o un id antiguo)"""
+    if not valor:
+        return None
+    try:
+        return int(str(valor).split(':')[0])
+    except ValueError:
+        return None
+
+
+def modo_eventos(environ: Dict[str, Any] = None) -> str:
+    """
+    'sse' o 'polling'. EVENTOS_MODO fuerza el modo; si no está definido, el
+    stream solo se usa cuando una conexión abierta no ocupa un worker completo:
+    gunicorn con worker gevent o el servidor de desarrollo (con hilos).
+    """
+    modo = os.environ.get('EVENTOS_MODO', '').strip().lower()
+    if modo in ('sse', 'polling'):
+        return modo
+
+    servidor = (environ or {}).get('SERVER_SOFTWARE', '')
+    if servidor.startswith('gunicorn'):
+        try:
+            from gevent import monkey
+            return 'sse' if monkey.is_module_patched('socket') else 'polling'
+        except ImportError:
+            return 'polling'
+    return 'sse'
+
+
+def leer_eventos(sesion, cursor: int, entregados: Dict[int, datetime] = None,
+                 limite: int = 500, espera_huecos: int = None) -> Tuple[List[Any], int]:
+    """
+    Eventos con id mayor a `cursor` que no estén en `entregados`, y el cursor nuevo.
+
+    Los ids se asignan al insertar pero las transacciones confirman en otro
+    orden: un evento con id menor puede hacerse visible después de uno mayor.
+    Por eso el cursor solo avanza sobre ids contiguos y un hueco se da por
+    perdido cuando el evento siguiente lleva más de `espera_huecos` segundos
+    publicado. Los eventos sobre el cursor se vuelven a leer en la próxima
+    consulta salvo que se indiquen en `entregados` (id -> created_at); quien
+    consulte sin ese registro debe descartar los ids repetidos.
+
+    Returns:
+        (eventos nuevos ordenados por id, cursor)
+    """
+    from models.evento_sistema import EventoSistema
+
+    entregados = entregados or {}
+    if espera_huecos is None:
+        espera_huecos = ESPERA_HUECOS
+
+    query = sesion.query(EventoSistema).filter(EventoSistema.id > cursor)
+    if entregados:
+        query = query.filter(~EventoSistema.id.in_(list(entregados)))
+    nuevos = query.order_by(EventoSistema.id).limit(limite).all()
+
+    conocidos = dict(entregados)
+    conocidos.update({evento.id: evento.created_at for evento in nuevos})
+    limite_hueco = datetime.utcnow() - timedelta(seconds=espera_huecos)
+    for evento_id in sorted(conocidos):
+        if evento_id != cursor + 1 and conocidos[evento_id] > limite_hueco:
+            break
+        cursor = evento_id
+
+    return nuevos, cursor
+
+
+class Suscriptor:
+    """Cliente conectado al stream dentro de este proceso"""
+
+    def __init__(self, max_pendientes: int):
+        self.cola = queue.Queue(maxsize=max_pendientes)
+        # El cliente no consumió a tiempo y perdió eventos: debe resincronizar
+        self.desfasado = False
+
+
+class EventBroker:
+    """
+    Reparte eventos a los clientes SSE conectados.
+
+    Los eventos se insertan en `eventos_sistema` en la misma transacción que el
+    cambio que los origina (listeners de SQLAlchemy), así llegan a todos los
+    procesos de gunicorn. En cada proceso un único hilo (greenlet con el worker
+    gevent) lee los eventos nuevos con un cursor rezagado (ver `leer_eventos`) y
+    los copia a la cola de cada suscriptor: una consulta por intervalo por
+    proceso, sin importar cuántos clientes haya conectados.
+    """
+
+    def __init__(self, intervalo: float = 1.0, tamano_buffer: int = 500,
+                 intervalo_mantenimientos: int = 60, retencion_horas: int = 24,
+                 max_pendientes: int = 1000):
+        self.app = None
+        self.intervalo = intervalo
+        self.intervalo_mantenimientos = intervalo_mantenimientos
+        self.retencion_horas = retencion_horas
+        self.max_pendientes = max_pendientes
+
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=tamano_buffer)
+        # Todo evento con id mayor a este valor está en el buffer (None: relay detenido)
+        self._buffer_desde = None
+        # Todo evento con id <= cursor ya fue repartido; sobre el cursor, los repartidos
+        self._cursor = 0
+        self._entregados = {}
+        self._hilo = None
+
+    def init_app(self, app):
+        """Registra los listeners de modelos y guarda la app para el hilo de relay"""
+        from flask import request
+
+        self.app = app
+        app.extensions['eventos_broker'] = self
+        self._registrar_listeners()
+        # base.html elige entre el stream y el polling de /eventos/recientes
+        app.context_processor(lambda: {'eventos_modo': modo_eventos(request.environ)})
+
+    # ------------------------------------------------------------------
+    # Publicación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def publicar(connection, tipo: str, datos: Dict[str, Any]):
+        """
+        Inserta un evento usando la conexión de la transacción en curso, de modo
+        que solo se publica si el cambio que lo origina se confirma
+        """
+        from models.evento_sistema import EventoSistema
+
+        connection.execute(EventoSistema.__table__.insert().values(
+            tipo=tipo,
+            datos={clave: _serializable(valor) for clave, valor in datos.items()},
+            created_at=datetime.utcnow()
+        ))
+
+    def _registrar_listeners(self):
+        from sqlalchemy import event
+        from models import Falla, HistorialEstadoEquipo
+
+        listeners = [
+            (Falla, 'after_insert', self._on_falla_insert),
+            (Falla, 'after_update', self._on_falla_update),
+            (HistorialEstadoEquipo, 'after_insert', self._on_historial_insert),
+        ]
+        for modelo, nombre, funcion in listeners:
+            if not event.contains(modelo, nombre, funcion):
+                event.listen(modelo, nombre, funcion)
+
+    def _on_falla_insert(self, mapper, connection, falla):
+        self.publicar(connection, TipoEvento.FALLA_CREADA, {
+            'id': falla.id,
+            'titulo': getattr(falla, 'titulo', None),
+            'equipo_type': falla.equipo_type,
+            'equipo_id': falla.equipo_id,
+            'estado': falla.estado,
+            'prioridad': getattr(falla, 'prioridad', None) or getattr(falla, 'severidad', None)
+        })
+
+    def _on_falla_update(self, mapper, connection, falla):
+        from sqlalchemy import inspect
+
+        historial = inspect(falla).attrs.estado.history
+        if not historial.has_changes():
+            return
+        self.publicar(connection, TipoEvento.FALLA_ACTUALIZADA, {
+            'id': falla.id,
+            'equipo_type': falla.equipo_type,
+            'equipo_id': falla.equipo_id,
+            'estado_anterior': historial.deleted[0] if historial.deleted else None,
+            'estado': falla.estado
+        })
+
+    def _on_historial_insert(self, mapper, connection, cambio):
+        self.publicar(connection, TipoEvento.ESTADO_EQUIPO, {
+            'equipo_tipo': cambio.equipo_tipo,
+            'equipo_id': cambio.equipo_id,
+            'estado_anterior': cambio.estado_anterior,
+            'estado_nuevo': cambio.estado_nuevo,
+            'fecha_cambio': cambio.fecha_cambio
+        })
+
+    # ------------------------------------------------------------------
+    # Suscripción
+    # ------------------------------------------------------------------
+
+    def suscribir(self) -> Suscriptor:
+        """Registra un cliente y arranca el relay del proceso si no está corriendo"""
+        suscriptor = Suscriptor(self.max_pendientes)
+        with self._lock:
+            self._suscriptores.add(suscriptor)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._relay, name='eventos-relay', daemon=True)
+                self._hilo.start()
+        return suscriptor
+
+    def desuscribir(self, suscriptor: Suscriptor):
+        with self._lock:
+            self._suscriptores.discard(suscriptor)
+
+    @property
+    def total_suscriptores(self) -> int:
+        return len(self._suscriptores)
+
+    def eventos_desde(self, cursor: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Eventos con id mayor al cursor de un cliente que se reconecta
+        (cabecera Last-Event-ID). Puede incluir eventos que el cliente ya
+        recibió; él descarta los repetidos. Retorna None si ya salieron del buffer.
+        """
+        with self._lock:
+            if self._buffer_desde is None or cursor < self._buffer_desde:
+                return None
+            return [evento for evento in self._buffer if evento['id'] > cursor]
+
+    def _repartir(self, evento: Dict[str, Any]):
+        with self._lock:
+            if evento.get('id') is not None:
+                if len(self._buffer) == self._buffer.maxlen:
+                    # Los ids no llegan en orden: el descartado no es necesariamente el mayor
+                    self._buffer_desde = max(self._buffer_desde, self._buffer[0]['id'])
+                self._buffer.append(evento)
+            suscriptores = list(self._suscriptores)
+
+        for suscriptor in suscriptores:
+            try:
+                suscriptor.cola.put_nowait(evento)
+            except queue.Full:
+                suscriptor.desfasado = True
+
+    # ------------------------------------------------------------------
+    # Relay por proceso
+    # ------------------------------------------------------------------
+
+    def _relay(self):
+        """Lee eventos nuevos mientras haya clientes conectados en este proceso"""
+        from sqlalchemy import func
+        from models import db
+        from models.evento_sistema import EventoSistema
+
+        with self.app.app_context():
+            try:
+                ultimo = db.session.query(func.max(EventoSistema.id)).scalar() or 0
+            finally:
+                db.session.remove()
+
+            with self._lock:
+                # Eventos anteriores al arranque no se pueden reenviar
+                self._buffer.clear()
+                self._cursor = self._buffer_desde = ultimo
+                self._entregados = {}
+
+            revision_mantenimientos = datetime.now()
+            proxima_purga = time.monotonic()
+
+            while True:
+                with self._lock:
+                    if not self._suscriptores:
+                        # Salir bajo el lock para que el próximo suscriptor arranque otro relay
+                        self._hilo = None
+                        self._buffer_desde = None
+                        break
+                try:
+                    self._leer_nuevos()
+
+                    ahora = datetime.now()
+                    if (ahora - revision_mantenimientos).total_seconds() >= self.intervalo_mantenimientos:
+                        self._revisar_mantenimientos(revision_mantenimientos, ahora)
+                        revision_mantenimientos = ahora
+
+                    if time.monotonic() >= proxima_purga:
+                        self._purgar()
+                        proxima_purga = time.monotonic() + 3600
+                except Exception as e:
+                    logger.error(f"Error en relay de eventos: {e}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                time.sleep(self.intervalo)
+
+        logger.info("📡 Relay de eventos detenido (sin clientes conectados)")
+
+    def _leer_nuevos(self):
+        from models import db
+
+        nuevos, cursor = leer_eventos(db.session, self._cursor, self._entregados)
+
+        for evento in nuevos:
+            self._entregados[evento.id] = evento.created_at
+        self._entregados = {
+            evento_id: fecha for evento_id, fecha in self._entregados.items() if evento_id > cursor
+        }
+        self._cursor = cursor
+
+        for evento in nuevos:
+            self._repartir(dict(evento.to_dict(), cursor=cursor))
+
+    def _revisar_mantenimientos(self, desde: datetime, hasta: datetime):
+        """Avisa de los mantenimientos cuya fecha programada se cumplió en el intervalo"""
+        from models import db, Mantenimiento
+
+        vencidos = db.session.query(Mantenimiento).filter(
+            Mantenimiento.fecha_programada > desde,
+            Mantenimiento.fecha_programada <= hasta,
+            Mantenimiento.estado != 'completado'
+        ).all()
+
+        for mantenimiento in vencidos:
+            self._repartir({
+                'tipo': TipoEvento.MANTENIMIENTO_VENCIDO,
+                'datos': {
+                    'id': mantenimiento.id,
+                    'tipo': mantenimiento.tipo,
+                    'tipo_equipo': mantenimiento.tipo_equipo,
+                    'equipo_id': mantenimiento.equipo_id,
+                    'fecha_programada': _serializable(mantenimiento.fecha_programada)
+                }
+            })
+
+    def _purgar(self):
+        """Elimina eventos más antiguos que la retención configurada"""
+        from models import db
+        from models.evento_sistema import EventoSistema
+
+        limite = datetime.utcnow() - timedelta(hours=self.retencion_horas)
+        db.session.query(EventoSistema).filter(
+            EventoSistema.created_at < limite
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    # ------------------------------------------------------------------
+    # Stream HTTP
+    # ------------------------------------------------------------------
+
+    def stream(self, cursor: int = None, duracion_max: int = None, heartbeat: int = 15):
+        """
+        Generador de texto SSE para un cliente.
+
+        Con el worker gevent la espera en la cola cede el control a otros clientes.
+        La conexión se cierra tras `duracion_max` segundos y el navegador se
+        reconecta solo, enviando Last-Event-ID. Con workers sync no se usa el
+        stream (ver `modo_eventos`): cada conexión ocuparía un worker completo.
+        """
+        if duracion_max is None:
+            duracion_max = int(os.environ.get('EVENTOS_SSE_DURACION_MAX', 300))
+
+        suscriptor = self.suscribir()
+        try:
+            yield "retry: 3000\n\n"
+
+            # Reenviados al reconectar: pueden volver a llegar por la cola
+            reenviados = set()
+            if cursor is not None:
+                pendientes = self.eventos_desde(cursor)
+                if pendientes is None:
+                    yield formatear_sse({'tipo': TipoEvento.RESYNC})
+                else:
+                    for evento in pendientes:
+                        yield formatear_sse(evento)
+                        reenviados.add(evento['id'])
+
+            fin = time.monotonic() + duracion_max
+            while time.monotonic() < fin:
+                if suscriptor.desfasado:
+                    suscriptor.desfasado = False
+                    yield formatear_sse({'tipo': TipoEvento.RESYNC})
+
+                try:
+                    evento = suscriptor.cola.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+
+                if evento.get('id') in reenviados:
+                    continue
+                yield formatear_sse(evento)
+        finally:
+            self.desuscribir(suscriptor)
+
+
+# Instancia única por proceso
+eventos_broker = EventBroker()
@@ -0,0 +1,406 @@
+# services/falla_rollup_service.py
+"""
+Servicio de agregados (rollups) de fallas
+Mantiene conteos por bucket horario, diario y mensual a medida que las fallas
+se crean y resuelven, y los expone a los reportes
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable
+
+from sqlalchemy import and_, bindparam, case, event, func, inspect, select
+from sqlalchemy.exc import IntegrityError
+
+from models.falla_rollup import FallaRollup, GranularidadRollup
+
+logger = logging.getLogger(__name__)
+
+# Atributos de Falla que definen las dimensiones de un rollup. El modelo usa
+# fecha_reporte/severidad o fecha_creacion/prioridad según la versión del esquema.
+ATRIBUTOS_FECHA = ('fecha_reporte', 'fecha_creacion')
+ATRIBUTOS_SEVERIDAD = ('severidad', 'prioridad')
+ATRIBUTOS_RELEVANTES = ATRIBUTOS_FECHA + ATRIBUTOS_SEVERIDAD + (
+    'estado', 'equipo_type', 'equipo_id', 'fecha_resolucion'
+)
+
+# Ids por consulta IN al leer las filas existentes de un índice
+LOTE_INDICE = 500
+
+# Unidad de date_trunc correspondiente a cada granularidad
+UNIDADES_SQL = {
+    GranularidadRollup.HORA: 'hour',
+    GranularidadRollup.DIA: 'day',
+    GranularidadRollup.MES: 'month'
+}
+
+
+def truncar_fecha(fecha: datetime, granularidad: str) -> datetime:
+    """Inicio del bucket que contiene `fecha`"""
+    if granularidad == GranularidadRollup.HORA:
+        return fecha.replace(minute=0, second=0, microsecond=0)
+    if granularidad == GranularidadRollup.DIA:
+        return fecha.replace(hour=0, minute=0, second=0, microsecond=0)
+    return fecha.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def granularidad_para(desde: datetime, hasta: datetime) -> str:
+    """
+    Bucket más grueso que cubre exactamente el rango [desde, hasta)
+    """
+    limites = (desde, hasta)
+    if all(f == truncar_fecha(f, GranularidadRollup.MES) for f in limites):
+        return GranularidadRollup.MES
+    if all(f == truncar_fecha(f, GranularidadRollup.DIA) for f in limites):
+        return GranularidadRollup.DIA
+    return GranularidadRollup.HORA
+
+
+def _modelos_equipo() -> Dict[str, Any]:
+    from models import Camara, NVR, Switch, UPS, FuentePoder, Gabinete
+
+    return {
+        'camara': Camara,
+        'nvr': NVR,
+        'switch': Switch,
+        'ups': UPS,
+        'fuente': FuentePoder,
+        'fuente_poder': FuentePoder,
+        'gabinete': Gabinete
+    }
+
+
+def _ubicacion_equipo(connection, equipo_tipo: str, equipo_id: int) -> int:
+    """Ubicación del equipo de la falla (0 si no tiene o no se encuentra)"""
+    modelo = _modelos_equipo().get((equipo_tipo or '').lower())
+    if modelo is None or not equipo_id or 'ubicacion_id' not in modelo.__table__.c:
+        return 0
+    tabla = modelo.__table__
+    valor = connection.execute(
+        select(tabla.c.ubicacion_id).where(tabla.c.id == equipo_id)
+    ).scalar()
+    return valor or 0
+
+
+def _columna(modelo, atributos: Iterable[str]):
+    """Primera columna del modelo que exista entre `atributos`"""
+    for atributo in atributos:
+        if atributo in inspect(modelo).attrs:
+            return getattr(modelo, atributo)
+    raise AttributeError(f'{modelo.__name__} no tiene ninguno de {atributos}')
+
+
+def _valor(falla, atributos: Iterable[str], anterior: bool = False):
+    """
+    Valor del primer atributo presente en el modelo; con `anterior` toma el
+    valor previo al cambio en curso (historial del flush)
+    """
+    estado = inspect(falla)
+    for atributo in atributos:
+        if atributo not in estado.mapper.attrs:
+            continue
+        if anterior:
+            historial = estado.attrs[atributo].history
+            if historial.has_changes():
+                # Sin valor eliminado: el atributo no tenía valor antes del cambio
+                return historial.deleted[0] if historial.deleted else None
+        return getattr(falla, atributo)
+    return None
+
+
+def _sin_efecto(target, value, oldvalue, initiator):
+    return value
+
+
+def activar_historial(modelo, atributos: Iterable[str]):
+    """
+    Hace que asignar los atributos cargue antes su valor anterior (active_history).
+    Sin esto, asignar un atributo expirado tras un commit deja el historial sin
+    valor previo y el listener no puede restar la contribución anterior.
+    """
+    for atributo in atributos:
+        if atributo in inspect(modelo).attrs:
+            columna = getattr(modelo, atributo)
+            if not event.contains(columna, 'set', _sin_efecto):
+                event.listen(columna, 'set', _sin_efecto, active_history=True, retval=True)
+
+
+def guardar_filas_indice(connection, tabla, clave: str, ids: List[int], calcular) -> int:
+    """
+    Actualiza las filas de un índice con una fila por `clave` en la transacción
+    en curso: UPDATE de las existentes, INSERT de las nuevas (si otra
+    transacción la creó entre medio, se aplica el UPDATE) y DELETE de las que
+    `calcular(ids)` ya no devuelve
+
+    Returns:
+        int: Filas calculadas
+    """
+    existentes = set()
+    for inicio in range(0, len(ids), LOTE_INDICE):
+        existentes.update(connection.execute(
+            select(tabla.c[clave]).where(tabla.c[clave].in_(ids[inicio:inicio + LOTE_INDICE]))
+        ).scalars())
+    filas = calcular(ids)
+
+    sentencia = tabla.update().where(tabla.c[clave] == bindparam('b_clave'))
+    actualizadas = [{**fila, 'b_clave': fila[clave]} for fila in filas if fila[clave] in existentes]
+    if actualizadas:
+        connection.execute(sentencia, actualizadas)
+    for fila in filas:
+        if fila[clave] in existentes:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(tabla.insert(), fila)
+        except IntegrityError:
+            # Otra transacción creó la fila entre la consulta y el INSERT
+            connection.execute(sentencia, {**fila, 'b_clave': fila[clave]})
+
+    eliminados = sorted(existentes - {fila[clave] for fila in filas})
+    if eliminados:
+        connection.execute(tabla.delete().where(tabla.c[clave].in_(eliminados)))
+    return len(filas)
+
+
+def snapshot_falla(falla, connection, anterior: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Dimensiones y métricas con que una falla contribuye a los rollups.
+    Retorna None si la falla aún no tiene fecha.
+    """
+    fecha = _valor(falla, ATRIBUTOS_FECHA, anterior)
+    if fecha is None:
+        return None
+
+    equipo_tipo = _valor(falla, ('equipo_type',), anterior)
+    equipo_id = _valor(falla, ('equipo_id',), anterior)
+    fecha_resolucion = _valor(falla, ('fecha_resolucion',), anterior)
+
+    horas = None
+    if fecha_resolucion is not None:
+        horas = max((fecha_resolucion - fecha).total_seconds() / 3600, 0.0)
+
+    return {
+        'fecha': fecha,
+        'equipo_tipo': equipo_tipo or '',
+        'severidad': _valor(falla, ATRIBUTOS_SEVERIDAD, anterior) or '',
+        'estado': _valor(falla, ('estado',), anterior) or '',
+        'ubicacion_id': _ubicacion_equipo(connection, equipo_tipo, equipo_id),
+        'horas_resolucion': horas
+    }
+
+
+def _claves(snapshot: Dict[str, Any], granularidad: str) -> Dict[str, Any]:
+    return {
+        'granularidad': granularidad,
+        'bucket': truncar_fecha(snapshot['fecha'], granularidad),
+        'equipo_tipo': snapshot['equipo_tipo'],
+        'severidad': snapshot['severidad'],
+        'estado': snapshot['estado'],
+        'ubicacion_id': snapshot['ubicacion_id']
+    }
+
+
+def aplicar_snapshot(connection, snapshot: Optional[Dict[str, Any]], signo: int):
+    """
+    Suma (signo=1) o resta (signo=-1) la contribución de una falla a los rollups
+    de cada granularidad, usando la conexión de la transacción en curso.
+
+    El máximo de horas de resolución solo crece; al restar se mantiene el valor
+    (se corrige con la reconstrucción completa).
+    """
+    if snapshot is None:
+        return
+
+    tabla = FallaRollup.__table__
+    horas = snapshot['horas_resolucion']
+    resuelta = 1 if horas is not None else 0
+
+    for granularidad in GranularidadRollup.TODAS:
+        claves = _claves(snapshot, granularidad)
+        condicion = and_(*(tabla.c[columna] == valor for columna, valor in claves.items()))
+
+        valores = {
+            'cantidad': tabla.c.cantidad + signo,
+            'resueltas': tabla.c.resueltas + signo * resuelta,
+            'horas_resolucion_total': tabla.c.horas_resolucion_total + signo * (horas or 0.0)
+        }
+        if signo > 0 and horas is not None:
+            valores['horas_resolucion_max'] = case(
+                (tabla.c.horas_resolucion_max < horas, horas),
+                else_=tabla.c.horas_resolucion_max
+            )
+
+        actualizadas = connection.execute(tabla.update().where(condicion).values(**valores)).rowcount
+        if actualizadas:
+            if signo < 0:
+                connection.execute(tabla.delete().where(and_(condicion, tabla.c.cantidad <= 0)))
+            continue
+        if signo < 0:
+            continue
+
+        try:
+            with connection.begin_nested():
+                connection.execute(tabla.insert().values(
+                    cantidad=1,
+                    resueltas=resuelta,
+                    horas_resolucion_total=horas or 0.0,
+                    horas_resolucion_max=horas or 0.0,
+                    **claves
+                ))
+        except IntegrityError:
+            # Otra transacción creó la fila entre el UPDATE y el INSERT
+            connection.execute(tabla.update().where(condicion).values(**valores))
+
+
+def _on_falla_insert(mapper, connection, falla):
+    aplicar_snapshot(connection, snapshot_falla(falla, connection), 1)
+
+
+def _on_falla_update(mapper, connection, falla):
+    estado = inspect(falla)
+    cambios = [
+        atributo for atributo in ATRIBUTOS_RELEVANTES
+        if atributo in estado.mapper.attrs and estado.attrs[atributo].history.has_changes()
+    ]
+    if not cambios:
+        return
+    aplicar_snapshot(connection, snapshot_falla(falla, connection, anterior=True), -1)
+    aplicar_snapshot(connection, snapshot_falla(falla, connection), 1)
+
+
+def _on_falla_delete(mapper, connection, falla):
+    aplicar_snapshot(connection, snapshot_falla(falla, connection, anterior=True), -1)
+
+
+def registrar_listeners():
+    """
+    Mantiene los rollups en la misma transacción que crea, modifica o elimina
+    la falla. Las actualizaciones masivas (query.update) no pasan por estos
+    eventos: después de ellas se debe ejecutar FallaRollupService.reconstruir().
+    """
+    from models import Falla
+
+    listeners = [
+        ('after_insert', _on_falla_insert),
+        ('after_update', _on_falla_update),
+        ('after_delete', _on_falla_delete),
+    ]
+    for nombre, funcion in listeners:
+        if not event.contains(Falla, nombre, funcion):
+            event.listen(Falla, nombre, funcion)
+    activar_historial(Falla, ATRIBUTOS_RELEVANTES)
+
+
+class FallaRollupService:
+    """Consulta y reconstrucción de los rollups de fallas"""
+
+    DIMENSIONES = ('equipo_tipo', 'severidad', 'estado', 'ubicacion_id')
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    def agregar(self, desde: datetime, hasta: datetime, agrupar_por: Iterable[str] = (),
+                granularidad: str = None, filtros: Dict[str, Any] = None) -> List[Any]:
+        """
+        Suma los rollups del rango [desde, hasta) agrupando por `agrupar_por`
+        (dimensiones o 'bucket').
+
+        Returns:
+            Filas con las columnas de agrupación más cantidad, resueltas,
+            horas_resolucion_total y horas_resolucion_max
+        """
+        granularidad = granularidad or granularidad_para(desde, hasta)
+        columnas = [getattr(FallaRollup, nombre) for nombre in agrupar_por]
+
+        query = self.db.query(
+            *columnas,
+            func.coalesce(func.sum(FallaRollup.cantidad), 0).label('cantidad'),
+            func.coalesce(func.sum(FallaRollup.resueltas), 0).label('resueltas'),
+            func.coalesce(func.sum(FallaRollup.horas_resolucion_total), 0.0).label('horas_resolucion_total'),
+            func.coalesce(func.max(FallaRollup.horas_resolucion_max), 0.0).label('horas_resolucion_max')
+        ).filter(
+            FallaRollup.granularidad == granularidad,
+            FallaRollup.bucket >= truncar_fecha(desde, granularidad),
+            FallaRollup.bucket < hasta
+        )
+
+        for nombre, valor in (filtros or {}).items():
+            columna = getattr(FallaRollup, nombre)
+            if isinstance(valor, (list, tuple, set)):
+                query = query.filter(columna.in_(list(valor)))
+            else:
+                query = query.filter(columna == valor)
+
+        if columnas:
+            query = query.group_by(*columnas).order_by(*columnas)
+        return query.all()
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula todos los rollups desde la tabla de fallas.
+        Solo es necesario tras cargas masivas o para corregir desajustes.
+
+        La agregación por bucket se hace en la base de datos (expresiones
+        portables de consultas_analiticas); en Python solo se resuelve la
+        ubicación de cada equipo y se combinan los grupos.
+
+        Returns:
+            int: Filas de rollup generadas
+        """
+        from models import Falla
+        from .consultas_analiticas import truncar_fecha as truncar_fecha_sql, horas_entre
+
+        columna_fecha = _columna(Falla, ATRIBUTOS_FECHA)
+        columna_severidad = _columna(Falla, ATRIBUTOS_SEVERIDAD)
+        horas = horas_entre(Falla.fecha_resolucion, columna_fecha)
+        horas = case((horas < 0, 0.0), else_=horas)
+
+        connection = self.db.connection()
+        ubicaciones = {}
+        acumulado = defaultdict(lambda: {
+            'cantidad': 0, 'resueltas': 0, 'horas_resolucion_total': 0.0, 'horas_resolucion_max': 0.0
+        })
+
+        for granularidad in GranularidadRollup.TODAS:
+            bucket = truncar_fecha_sql(columna_fecha, UNIDADES_SQL[granularidad])
+            grupos = self.db.query(
+                bucket.label('bucket'),
+                Falla.equipo_type,
+                Falla.equipo_id,
+                columna_severidad.label('severidad'),
+                Falla.estado,
+                func.count().label('cantidad'),
+                func.count(Falla.fecha_resolucion).label('resueltas'),
+                func.coalesce(func.sum(horas), 0.0).label('horas_total'),
+                func.coalesce(func.max(horas), 0.0).label('horas_max')
+            ).filter(
+                columna_fecha.isnot(None)
+            ).group_by(
+                bucket, Falla.equipo_type, Falla.equipo_id, columna_severidad, Falla.estado
+            ).all()
+
+            for grupo in grupos:
+                clave_equipo = (grupo.equipo_type, grupo.equipo_id)
+                if clave_equipo not in ubicaciones:
+                    ubicaciones[clave_equipo] = _ubicacion_equipo(connection, *clave_equipo)
+
+                fila = acumulado[(
+                    granularidad, grupo.bucket, grupo.equipo_type or '', grupo.severidad or '',
+                    grupo.estado or '', ubicaciones[clave_equipo]
+                )]
+                fila['cantidad'] += grupo.cantidad
+                fila['resueltas'] += grupo.resueltas
+                fila['horas_resolucion_total'] += grupo.horas_total
+                fila['horas_resolucion_max'] = max(fila['horas_resolucion_max'], grupo.horas_max)
+
+        columnas = ('granularidad', 'bucket', 'equipo_tipo', 'severidad', 'estado', 'ubicacion_id')
+        filas = [dict(zip(columnas, claves), **metricas) for claves, metricas in acumulado.items()]
+
+        self.db.query(FallaRollup).delete(synchronize_session=False)
+        for inicio in range(0, len(filas), 1000):
+            self.db.execute(FallaRollup.__table__.insert(), filas[inicio:inicio + 1000])
+        self.db.commit()
+
+        logger.info(f"Rollups de fallas reconstruidos: {len(filas)} filas")
+        return len(filas)
@@ -0,0 +1,180 @@
+# services/foto_export_service.py
+"""
+Servicio de exportación masiva de fotografías
+Genera archivos ZIP en streaming, sin archivos temporales y con memoria acotada
+"""
+
+import os
+import csv
+import io
+import zipfile
+import logging
+from datetime import datetime
+from typing import List, Optional, Iterable, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Formatos que ya vienen comprimidos: se guardan tal cual (ZIP_STORED)
+FORMATOS_SIN_RECOMPRESION = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+
+
+class _ZipStreamBuffer:
+    """
+    Destino de escritura no posicionable para zipfile.
+    Acumula los bytes escritos hasta que el generador los entrega a la respuesta.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class FotoExportService:
+    """Servicio para exportar fotografías de equipos, fallas y mantenimientos en ZIP"""
+
+    def __init__(self, db_session=None, upload_folder: str = 'static/uploads',
+                 chunk_size: int = 64 * 1024):
+        self.db = db_session
+        self.upload_folder = upload_folder
+        self.chunk_size = chunk_size
+
+    def query_fotografias(self, equipos: List[Tuple[str, int]] = None, falla_ids: List[int] = None,
+                          mantenimiento_ids: List[int] = None, tipos: List[str] = None,
+                          fecha_desde: datetime = None, fecha_hasta: datetime = None):
+        """
+        Construye la consulta de fotografías según equipos, fallas, mantenimientos,
+        tipos de equipo y rango de fechas.
+
+        Equipos, fallas y mantenimientos se combinan con OR: una foto entra si
+        pertenece a alguno de los equipos o está asociada a alguna de las fallas o
+        mantenimientos. Con una falla se exportan solo sus fotos, no todas las del
+        equipo afectado. Tipos y fechas restringen el resultado.
+        Los resultados se leen por lotes (yield_per) para no cargar todo en memoria.
+        """
+        from sqlalchemy import and_, or_, func
+        from models import Fotografia
+
+        query = self.db.query(Fotografia)
+
+        selectores = [
+            and_(Fotografia.equipo_type == tipo, Fotografia.equipo_id == equipo_id)
+            for tipo, equipo_id in (equipos or [])
+        ]
+        if falla_ids:
+            selectores.append(Fotografia.falla_id.in_(falla_ids))
+        if mantenimiento_ids:
+            selectores.append(Fotografia.mantenimiento_id.in_(mantenimiento_ids))
+        if selectores:
+            query = query.filter(or_(*selectores))
+        if tipos:
+            query = query.filter(Fotografia.equipo_type.in_(tipos))
+
+        fecha_foto = func.coalesce(Fotografia.captured_at, Fotografia.uploaded_at)
+        if fecha_desde:
+            query = query.filter(fecha_foto >= fecha_desde)
+        if fecha_hasta:
+            query = query.filter(fecha_foto <= fecha_hasta)
+
+        return query.order_by(Fotografia.equipo_type, Fotografia.equipo_id,
+                              Fotografia.id).yield_per(200)
+
+    def resolver_ruta(self, foto) -> Optional[str]:
+        """
+        Obtiene la ruta física del archivo de una fotografía
+        """
+        ruta = foto.filepath
+        if not ruta:
+            return None
+        if not os.path.isabs(ruta) and not os.path.exists(ruta):
+            ruta = os.path.join(self.upload_folder, ruta)
+        return ruta if os.path.isfile(ruta) else None
+
+    def _nombre_en_zip(self, foto) -> str:
+        """
+        Nombre del archivo dentro del ZIP: carpeta por equipo y prefijo con el ID
+        """
+        carpeta = f"{foto.equipo_type or 'sin_equipo'}_{foto.equipo_id or 0}"
+        nombre = os.path.basename(foto.filename or foto.filepath or f'foto_{foto.id}')
+        return f"{carpeta}/{foto.id}_{nombre}"
+
+    def iter_zip(self, fotografias: Iterable) -> Iterator[bytes]:
+        """
+        Genera el ZIP por bloques a medida que se leen los archivos.
+
+        Las imágenes ya comprimidas se almacenan sin recomprimir. La memoria usada
+        queda acotada por chunk_size más el directorio central del ZIP, sin importar
+        el tamaño total del archivo.
+        """
+        buffer = _ZipStreamBuffer()
+        manifiesto = [['id', 'equipo_tipo', 'equipo_id', 'fecha', 'archivo', 'estado']]
+
+        with zipfile.ZipFile(buffer, mode='w', allowZip64=True) as zf:
+            for foto in fotografias:
+                ruta = self.resolver_ruta(foto)
+                fecha = foto.captured_at or foto.uploaded_at
+                fila = [foto.id, foto.equipo_type, foto.equipo_id,
+                        fecha.isoformat() if fecha else '']
+
+                if not ruta:
+                    manifiesto.append(fila + [foto.filepath, 'no_encontrado'])
+                    continue
+
+                arcname = self._nombre_en_zip(foto)
+                extension = arcname.rsplit('.', 1)[-1].lower() if '.' in arcname else ''
+
+                zinfo = zipfile.ZipInfo.from_file(ruta, arcname)
+                if extension in FORMATOS_SIN_RECOMPRESION:
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                else:
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+
+                try:
+                    with open(ruta, 'rb') as origen, zf.open(zinfo, 'w', force_zip64=True) as destino:
+                        while True:
+                            bloque = origen.read(self.chunk_size)
+                            if not bloque:
+                                break
+                            destino.write(bloque)
+                            datos = buffer.drain()
+                            if datos:
+                                yield datos
+                except OSError as e:
+                    logger.error(f"Error leyendo fotografía {foto.id}: {e}")
+                    manifiesto.append(fila + [arcname, 'error'])
+                    continue
+
+                manifiesto.append(fila + [arcname, 'incluido'])
+                datos = buffer.drain()
+                if datos:
+                    yield datos
+
+            texto = io.StringIO()
+            csv.writer(texto).writerows(manifiesto)
+            zf.writestr('manifiesto.csv', texto.getvalue().encode('utf-8'),
+                        compress_type=zipfile.ZIP_DEFLATED)
+
+        # Directorio central y registro final del ZIP
+        datos = buffer.drain()
+        if datos:
+            yield datos
+
+    def exportar(self, equipos: List[Tuple[str, int]] = None, tipos: List[str] = None,
+                 falla_ids: List[int] = None, mantenimiento_ids: List[int] = None,
+                 fecha_desde: datetime = None, fecha_hasta: datetime = None) -> Iterator[bytes]:
+        """
+        Punto de entrada: aplica los filtros y devuelve el generador del ZIP
+        """
+        fotografias = self.query_fotografias(equipos, falla_ids, mantenimiento_ids,
+                                             tipos, fecha_desde, fecha_hasta)
+        return self.iter_zip(fotografias)
@@ -0,0 +1,345 @@
+# services/heartbeat_service.py
+"""
+Ingesta de heartbeats de equipos
+Acumula en memoria el último heartbeat de cada equipo y lo escribe cada pocos
+segundos con un UPDATE por lotes por tabla, en lugar de un commit por
+heartbeat. El mismo mapa en memoria responde si un equipo está en línea sin
+consultar la base de datos.
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select
+
+from .falla_rollup_service import _modelos_equipo
+
+logger = logging.getLogger(__name__)
+
+# Columna del último heartbeat según el esquema de cada tipo de equipo
+ATRIBUTOS_HEARTBEAT = ('last_heartbeat', 'ultima_conexion')
+
+# Un equipo está en línea si envió un heartbeat dentro de esta ventana
+VENTANA_EN_LINEA = 300
+
+# Heartbeats con fecha futura más allá de este margen se rechazan (reloj del equipo desfasado)
+MARGEN_RELOJ = timedelta(minutes=5)
+
+LOTE = 1000
+
+Clave = Tuple[str, int]
+
+
+def _utc(momento: datetime) -> datetime:
+    """Fecha con zona horaria UTC (las fechas sin zona se asumen UTC)"""
+    if momento.tzinfo is None:
+        return momento.replace(tzinfo=timezone.utc)
+    return momento.astimezone(timezone.utc)
+
+
+def _tabla_heartbeat(modelo):
+    """(tabla, columna de heartbeat) de un modelo de equipo, o None si no la tiene"""
+    tabla = modelo.__table__
+    columna = next((tabla.c[nombre] for nombre in ATRIBUTOS_HEARTBEAT if nombre in tabla.c), None)
+    return (tabla, columna) if columna is not None else None
+
+
+class IngestorHeartbeats:
+    """
+    Buffer de heartbeats por proceso.
+
+    `registrar_lote` y `registrar_equipo` solo actualizan dos diccionarios en
+    memoria: los pendientes de escribir y el último visto. Un hilo por proceso escribe los pendientes cada
+    `intervalo` segundos (un UPDATE executemany por tabla, que nunca retrocede
+    la fecha guardada) y trae los heartbeats que escribieron otros procesos,
+    de modo que `en_linea` responde desde memoria en todos los workers.
+    """
+
+    def __init__(self, intervalo: float = 5.0, ventana: int = VENTANA_EN_LINEA):
+        self.app = None
+        self.intervalo = intervalo
+        self.ventana = ventana
+
+        self._lock = threading.Lock()
+        self._pendientes: Dict[Clave, datetime] = {}
+        self._ultimo_visto: Dict[Clave, datetime] = {}
+        # Hora del servidor al iniciar la última sincronización
+        self._sincronizado_hasta: Optional[datetime] = None
+        self._cargado = False
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def init_app(self, app):
+        """Guarda la app para el hilo de escritura y escribe lo pendiente al salir"""
+        self.app = app
+        app.extensions['ingestor_heartbeats'] = self
+        atexit.register(self.stop)
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _tablas() -> Dict[str, Any]:
+        """Tipo de equipo -> (tabla, columna de heartbeat)"""
+        tablas = {}
+        for tipo, modelo in _modelos_equipo().items():
+            destino = _tabla_heartbeat(modelo)
+            if destino is not None:
+                tablas[tipo] = destino
+        return tablas
+
+    @staticmethod
+    def _avanzar(mapa: Dict[Clave, datetime], clave: Clave, momento: datetime):
+        actual = mapa.get(clave)
+        if actual is None or momento > actual:
+            mapa[clave] = momento
+
+    def _anotar(self, clave: Clave, momento: datetime):
+        # Llamar con el lock tomado
+        self._avanzar(self._pendientes, clave, momento)
+        self._avanzar(self._ultimo_visto, clave, momento)
+
+    def registrar_lote(self, heartbeats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Registra heartbeats {tipo, id, timestamp opcional (ISO 8601)}.
+
+        Returns:
+            Dict: aceptados, rechazados y el detalle de los rechazos
+        """
+        tablas = self._tablas()
+        ahora = datetime.now(timezone.utc)
+        aceptados, rechazos = [], []
+
+        for indice, heartbeat in enumerate(heartbeats):
+            try:
+                tipo = str(heartbeat.get('tipo', '')).lower()
+                equipo_id = int(heartbeat['id'])
+                if tipo not in tablas:
+                    raise ValueError(f"tipo de equipo no soportado: {tipo}")
+                momento = heartbeat.get('timestamp')
+                momento = _utc(datetime.fromisoformat(momento)) if momento else ahora
+                if momento > ahora + MARGEN_RELOJ:
+                    raise ValueError('timestamp en el futuro')
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                rechazos.append({'indice': indice, 'error': str(e)})
+                continue
+            aceptados.append(((tablas[tipo][0].name, equipo_id), momento))
+
+        with self._lock:
+            for clave, momento in aceptados:
+                self._anotar(clave, momento)
+
+        self._iniciar()
+        return {'aceptados': len(aceptados), 'rechazados': len(rechazos), 'errores': rechazos[:50]}
+
+    def registrar_equipo(self, equipo, momento: datetime = None) -> datetime:
+        """Registra un heartbeat de una instancia de equipo y devuelve su fecha"""
+        momento = _utc(momento) if momento else datetime.now(timezone.utc)
+        with self._lock:
+            self._anotar((equipo.__table__.name, equipo.id), momento)
+        self._iniciar()
+        return momento
+
+    # ------------------------------------------------------------------
+    # Consulta en memoria
+    # ------------------------------------------------------------------
+
+    def ultimo_visto(self, tipo: str, equipo_id: int) -> Optional[datetime]:
+        """Último heartbeat conocido por este proceso (None si no hay)"""
+        destino = self._tablas().get((tipo or '').lower())
+        if destino is None:
+            return None
+        self._asegurar_cargado()
+        return self._ultimo_visto.get((destino[0].name, int(equipo_id)))
+
+    def ultimos_vistos(self, tabla: str) -> Dict[int, datetime]:
+        """Último heartbeat conocido por este proceso de cada equipo de una tabla"""
+        self._asegurar_cargado()
+        with self._lock:
+            return {equipo_id: momento for (nombre, equipo_id), momento in self._ultimo_visto.items()
+                    if nombre == tabla}
+
+    def en_linea(self, tipo: str, equipo_id: int, ahora: datetime = None) -> bool:
+        """Si el equipo envió un heartbeat dentro de la ventana"""
+        momento = self.ultimo_visto(tipo, equipo_id)
+        return self._dentro_de_ventana(momento, ahora)
+
+    def en_linea_equipo(self, equipo, ahora: datetime = None) -> bool:
+        """
+        Como en_linea, para una instancia ya cargada: usa también la columna de
+        heartbeat de la instancia, sin volver a consultarla
+        """
+        self._asegurar_cargado()
+        momento = self._ultimo_visto.get((equipo.__table__.name, equipo.id))
+        destino = _tabla_heartbeat(type(equipo))
+        guardado = getattr(equipo, destino[1].key, None) if destino else None
+        if guardado is not None:
+            guardado = _utc(guardado)
+            momento = max(momento, guardado) if momento else guardado
+        return self._dentro_de_ventana(momento, ahora)
+
+    def estados(self, tipo: str, ids: Iterable[int], ahora: datetime = None) -> Dict[int, Dict[str, Any]]:
+        """Último heartbeat y estado en línea de varios equipos de un tipo"""
+        resultado = {}
+        for equipo_id in ids:
+            momento = self.ultimo_visto(tipo, equipo_id)
+            resultado[equipo_id] = {
+                'ultimo_heartbeat': momento.isoformat() if momento else None,
+                'en_linea': self._dentro_de_ventana(momento, ahora)
+            }
+        return resultado
+
+    def _dentro_de_ventana(self, momento: Optional[datetime], ahora: datetime = None) -> bool:
+        if momento is None:
+            return False
+        ahora = _utc(ahora) if ahora else datetime.now(timezone.utc)
+        return (ahora - momento).total_seconds() < self.ventana
+
+    # ------------------------------------------------------------------
+    # Escritura y sincronización con la base
+    # ------------------------------------------------------------------
+
+    def flush(self, session) -> int:
+        """
+        Escribe los heartbeats pendientes: un UPDATE executemany por tabla, que
+        solo avanza la fecha guardada. Si falla, los pendientes vuelven al buffer.
+
+        Returns:
+            int: Equipos escritos
+        """
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        if not pendientes:
+            return 0
+
+        columnas = {tabla.name: (tabla, columna) for tabla, columna in self._tablas().values()}
+        por_tabla: Dict[str, list] = {}
+        for (nombre_tabla, equipo_id), momento in pendientes.items():
+            columna = columnas[nombre_tabla][1]
+            if not getattr(columna.type, 'timezone', False):
+                momento = momento.replace(tzinfo=None)
+            por_tabla.setdefault(nombre_tabla, []).append({'b_id': equipo_id, 'b_momento': momento})
+
+        try:
+            for nombre_tabla, filas in por_tabla.items():
+                tabla, columna = columnas[nombre_tabla]
+                sentencia = tabla.update().where(
+                    tabla.c.id == bindparam('b_id'),
+                    or_(columna.is_(None), columna < bindparam('b_momento'))
+                ).values({columna.name: bindparam('b_momento')})
+                for inicio in range(0, len(filas), LOTE):
+                    session.execute(sentencia, filas[inicio:inicio + LOTE])
+            session.commit()
+        except Exception:
+            session.rollback()
+            with self._lock:
+                for clave, momento in pendientes.items():
+                    self._anotar(clave, momento)
+            raise
+        return len(pendientes)
+
+    @property
+    def solape(self) -> timedelta:
+        """
+        Cuánto antes de la sincronización anterior se vuelve a leer. Un
+        heartbeat puede confirmarse hasta un par de intervalos después de su
+        fecha (otro worker lo tiene en su buffer o reintenta un flush fallido)
+        y su fecha puede venir atrasada hasta MARGEN_RELOJ desde el equipo.
+        """
+        return timedelta(seconds=2 * self.intervalo) + MARGEN_RELOJ
+
+    def sincronizar(self, session):
+        """
+        Trae al mapa en memoria los heartbeats guardados por otros procesos
+        (la primera vez, los que están dentro de la ventana).
+
+        El corte se toma de la hora del servidor y no de las fechas leídas,
+        que vienen del reloj de cada equipo: un equipo adelantado no oculta
+        los heartbeats de los demás. Las filas releídas por el solape no
+        cambian nada, porque el mapa solo avanza.
+        """
+        ahora = datetime.now(timezone.utc)
+        inicio_ventana = ahora - timedelta(seconds=self.ventana)
+        desde = inicio_ventana
+        if self._sincronizado_hasta is not None:
+            desde = max(desde, self._sincronizado_hasta - self.solape)
+
+        vistos = []
+        for tabla, columna in {destino[0].name: destino for destino in self._tablas().values()}.values():
+            corte = desde if getattr(columna.type, 'timezone', False) else desde.replace(tzinfo=None)
+            for equipo_id, momento in session.execute(
+                select(tabla.c.id, columna).where(columna > corte)
+            ):
+                vistos.append(((tabla.name, equipo_id), _utc(momento)))
+        self._sincronizado_hasta = ahora
+
+        with self._lock:
+            for clave, momento in vistos:
+                self._avanzar(self._ultimo_visto, clave, momento)
+            # Lo que salió de la ventana ya no cambia el resultado de en_linea
+            for clave in [c for c, m in self._ultimo_visto.items() if m < inicio_ventana]:
+                if clave not in self._pendientes:
+                    del self._ultimo_visto[clave]
+        self._cargado = True
+
+    def _asegurar_cargado(self):
+        """Carga inicial del mapa, una sola vez por proceso, en la primera consulta"""
+        if self._cargado:
+            return
+        from models import db
+
+        try:
+            self.sincronizar(db.session)
+        except Exception as e:
+            logger.error(f"Error cargando heartbeats recientes: {e}")
+            self._cargado = True
+        self._iniciar()
+
+    # ------------------------------------------------------------------
+    # Hilo por proceso
+    # ------------------------------------------------------------------
+
+    def _iniciar(self):
+        if self._hilo is not None or self.app is None:
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._detener.clear()
+                self._hilo = threading.Thread(target=self._bucle, name='heartbeats-flush', daemon=True)
+                self._hilo.start()
+
+    def _ciclo(self):
+        from models import db
+
+        try:
+            escritos = self.flush(db.session)
+            if escritos:
+                logger.debug(f"💓 Heartbeats escritos: {escritos}")
+            self.sincronizar(db.session)
+        except Exception as e:
+            logger.error(f"Error escribiendo heartbeats: {e}")
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+    def _bucle(self):
+        logger.info("💓 Escritura de heartbeats por lotes iniciada")
+        with self.app.app_context():
+            while not self._detener.wait(self.intervalo):
+                self._ciclo()
+            # Último lote al detener
+            self._ciclo()
+
+    def stop(self, timeout: float = 10.0):
+        """Detiene el hilo después de escribir los heartbeats pendientes"""
+        self._detener.set()
+        hilo, self._hilo = self._hilo, None
+        if hilo:
+            hilo.join(timeout)
+
+
+ingestor_heartbeats = IngestorHeartbeats()
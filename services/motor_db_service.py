@@ -0,0 +1,305 @@
+# services/motor_db_service.py
+"""
+Motor de base de datos
+Opciones del pool de conexiones de SQLAlchemy según el perfil de despliegue
+(workers sync en Railway, workers gevent de gunicorn.conf.py, SQLite local en
+modo WAL) y métricas del pool de cada proceso: espera para obtener una
+conexión, conexiones en uso y eventos de overflow y timeout
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Conexiones que puede abrir la aplicación entre todos los workers (Postgres
+# de Railway acepta 100; el resto queda para workers de CLI y administración)
+MAX_CONEXIONES = 80
+
+PERFILES = {
+    # Un request por worker a la vez; el pool solo cubre los hilos de fondo
+    # (ingestor de heartbeats, notificaciones) y los streams SSE
+    'sync': {
+        'pool_size': 5,
+        'max_overflow': 5,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True
+    },
+    # Hasta worker_connections greenlets por worker comparten el pool: el
+    # tamaño sale del total de conexiones repartido entre los workers y el
+    # timeout es menor que el de gunicorn (10 s) para responder error en vez
+    # de perder el worker
+    'gevent': {
+        'pool_size': None,
+        'max_overflow': None,
+        'pool_timeout': 5,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'pool_use_lifo': True
+    },
+    # SQLite local: una conexión por hilo, esperando el lock de escritura en
+    # lugar de fallar con "database is locked"
+    'sqlite': {
+        'connect_args': {'timeout': 15}
+    }
+}
+
+VARIABLES_POOL = {
+    'pool_size': ('DB_POOL_SIZE', int),
+    'max_overflow': ('DB_MAX_OVERFLOW', int),
+    'pool_timeout': ('DB_POOL_TIMEOUT', float),
+    'pool_recycle': ('DB_POOL_RECYCLE', int)
+}
+
+PRAGMAS_SQLITE = ('PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL', 'PRAGMA busy_timeout=15000')
+
+# Esperas recientes guardadas para los percentiles
+MUESTRAS_ESPERA = 2000
+
+
+def perfil_db(url: str) -> str:
+    """
+    Perfil del pool: DB_PERFIL si está definido; si no, SQLite según la URL, y
+    sync o gevent según el worker_class que elige gunicorn.conf.py
+    """
+    perfil = os.environ.get('DB_PERFIL', '').strip().lower()
+    if perfil in PERFILES:
+        return perfil
+    if (url or '').startswith('sqlite'):
+        return 'sqlite'
+    if os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('HEROKU'):
+        return 'sync'
+    return 'gevent'
+
+
+def _workers() -> int:
+    try:
+        return max(int(os.environ.get('WEB_CONCURRENCY', 0)), 0) or multiprocessing.cpu_count() * 2 + 1
+    except ValueError:
+        return multiprocessing.cpu_count() * 2 + 1
+
+
+def opciones_motor(url: str, perfil: Optional[str] = None) -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS del perfil, con DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT y DB_POOL_RECYCLE como ajustes explícitos
+    """
+    perfil = perfil or perfil_db(url)
+    opciones = {k: (dict(v) if isinstance(v, dict) else v) for k, v in PERFILES[perfil].items()}
+
+    if perfil == 'gevent':
+        # Mitad fija y mitad overflow del presupuesto de cada worker
+        por_worker = max(int(os.environ.get('DB_MAX_CONEXIONES', MAX_CONEXIONES)) // _workers(), 2)
+        opciones['pool_size'] = max(por_worker // 2, 1)
+        opciones['max_overflow'] = por_worker - opciones['pool_size']
+
+    if perfil != 'sqlite':
+        opciones['poolclass'] = PoolInstrumentado
+        for opcion, (variable, tipo) in VARIABLES_POOL.items():
+            if os.environ.get(variable):
+                opciones[opcion] = tipo(os.environ[variable])
+    return opciones
+
+
+class MetricasPool:
+    """
+    Contadores del pool de un proceso. Las conexiones en uso y el overflow
+    actual se leen del pool al consultar; el resto se acumula en cada checkout.
+    """
+
+    LIMITES_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.espera_total_ms = 0.0
+            self.espera_maxima_ms = 0.0
+            self.histograma = [0] * (len(self.LIMITES_MS) + 1)
+            self.recientes = deque(maxlen=MUESTRAS_ESPERA)
+            self.overflow_eventos = 0
+            self.timeouts = 0
+            self.en_uso_maximo = 0
+            self.conexiones_creadas = 0
+            self.conexiones_invalidadas = 0
+            self.desde = time.time()
+
+    def registrar_checkout(self, espera_ms: float, en_uso: int, overflow: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total_ms += espera_ms
+            self.espera_maxima_ms = max(self.espera_maxima_ms, espera_ms)
+            self.histograma[next((i for i, limite in enumerate(self.LIMITES_MS) if espera_ms <= limite),
+                                 len(self.LIMITES_MS))] += 1
+            self.recientes.append(espera_ms)
+            self.en_uso_maximo = max(self.en_uso_maximo, en_uso)
+            self.overflow_eventos += overflow
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def registrar_conexion(self):
+        with self._lock:
+            self.conexiones_creadas += 1
+
+    def registrar_invalidacion(self):
+        with self._lock:
+            self.conexiones_invalidadas += 1
+
+    def _percentil(self, muestras: List[float], p: float) -> Optional[float]:
+        if not muestras:
+            return None
+        return round(muestras[min(int(len(muestras) * p), len(muestras) - 1)], 2)
+
+    def resumen(self, engine=None) -> Dict[str, Any]:
+        """Métricas acumuladas y, con `engine`, el estado actual de su pool"""
+        with self._lock:
+            recientes = sorted(self.recientes)
+            resultado = {
+                'pid': os.getpid(),
+                'desde': self.desde,
+                'checkouts': self.checkouts,
+                'espera_promedio_ms': round(self.espera_total_ms / self.checkouts, 2) if self.checkouts else None,
+                'espera_p50_ms': self._percentil(recientes, 0.5),
+                'espera_p95_ms': self._percentil(recientes, 0.95),
+                'espera_p99_ms': self._percentil(recientes, 0.99),
+                'espera_maxima_ms': round(self.espera_maxima_ms, 2),
+                'espera_histograma_ms': {
+                    **{f'<={limite}': n for limite, n in zip(self.LIMITES_MS, self.histograma)},
+                    f'>{self.LIMITES_MS[-1]}': self.histograma[-1]
+                },
+                'en_uso_maximo': self.en_uso_maximo,
+                'overflow_eventos': self.overflow_eventos,
+                'timeouts': self.timeouts,
+                'conexiones_creadas': self.conexiones_creadas,
+                'conexiones_invalidadas': self.conexiones_invalidadas
+            }
+
+        if engine is not None:
+            pool = engine.pool
+            resultado['pool'] = {'clase': type(pool).__name__, 'perfil': getattr(engine, 'perfil_pool', None)}
+            if isinstance(pool, QueuePool):
+                resultado['pool'].update(
+                    tamano=pool.size(),
+                    max_overflow=pool._max_overflow,
+                    timeout=pool.timeout(),
+                    en_uso=pool.checkedout(),
+                    libres=pool.checkedin(),
+                    overflow=max(pool.overflow(), 0)
+                )
+        return resultado
+
+
+metricas_pool = MetricasPool()
+
+
+class PoolInstrumentado(QueuePool):
+    """QueuePool que mide la espera de cada checkout y cuenta overflow y timeouts"""
+
+    metricas = metricas_pool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        overflow_antes = self.overflow()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar_timeout()
+            raise
+        self.metricas.registrar_checkout(
+            (time.perf_counter() - inicio) * 1000,
+            self.checkedout(),
+            self.overflow() > max(overflow_antes, 0)
+        )
+        return conexion
+
+
+def _pragmas_sqlite(conexion_dbapi, registro):
+    cursor = conexion_dbapi.cursor()
+    try:
+        for pragma in PRAGMAS_SQLITE:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def configurar_motor(engine, perfil: Optional[str] = None, metricas: MetricasPool = metricas_pool):
+    """Registra los pragmas de SQLite y los contadores de conexiones creadas e invalidadas"""
+    engine.perfil_pool = perfil or perfil_db(str(engine.url))
+    listeners = [
+        ('connect', lambda conexion, registro: metricas.registrar_conexion()),
+        ('invalidate', lambda conexion, registro, error: metricas.registrar_invalidacion())
+    ]
+    if engine.dialect.name == 'sqlite':
+        listeners.insert(0, ('connect', _pragmas_sqlite))
+
+    for nombre, funcion in listeners:
+        event.listen(engine, nombre, funcion)
+
+
+def reiniciar_pool_en_fork(engine):
+    """
+    En el worker recién creado, descarta las conexiones heredadas del proceso
+    maestro (preload_app) sin cerrarlas, porque siguen siendo del maestro
+    """
+    engine.dispose(close=False)
+    metricas_pool.reiniciar()
+
+
+def medir_pool(url: str, tamano: int, concurrencia: int, consultas: int, retencion_ms: float,
+               perfil: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Throughput con un pool de `tamano` conexiones (sin overflow): `concurrencia`
+    hilos ejecutan `consultas` SELECT 1 reteniendo cada conexión `retencion_ms`,
+    como un request que hace su trabajo con la conexión tomada
+    """
+    perfil = perfil or perfil_db(url)
+    metricas = MetricasPool()
+    opciones = {k: v for k, v in opciones_motor(url, perfil).items() if k != 'pool_use_lifo'}
+    opciones.update(pool_size=tamano, max_overflow=0, pool_timeout=max(opciones.get('pool_timeout', 30), 30),
+                    poolclass=type('PoolBenchmark', (PoolInstrumentado,), {'metricas': metricas}))
+    engine = create_engine(url, **opciones)
+    configurar_motor(engine, perfil, metricas)
+
+    def consulta(_):
+        with engine.connect() as conexion:
+            conexion.execute(text('SELECT 1'))
+            if retencion_ms:
+                time.sleep(retencion_ms / 1000)
+
+    try:
+        with ThreadPoolExecutor(max_workers=tamano) as calentamiento:
+            list(calentamiento.map(consulta, range(tamano)))
+        metricas.reiniciar()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+            list(hilos.map(consulta, range(consultas)))
+        duracion = time.perf_counter() - inicio
+    finally:
+        engine.dispose()
+
+    resumen = metricas.resumen()
+    return {
+        'tamano': tamano,
+        'consultas_por_segundo': round(consultas / duracion, 1),
+        'espera_promedio_ms': resumen['espera_promedio_ms'],
+        'espera_p95_ms': resumen['espera_p95_ms'],
+        'espera_p99_ms': resumen['espera_p99_ms'],
+        'espera_maxima_ms': resumen['espera_maxima_ms'],
+        'timeouts': resumen['timeouts']
+    }
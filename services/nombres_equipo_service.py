@@ -0,0 +1,203 @@
+# services/nombres_equipo_service.py
+"""
+Resolución de nombres de equipos polimórficos
+Traduce pares (tipo de equipo, id) a nombre, ubicación, marca y modelo con una
+consulta IN por tipo en lugar de una consulta por fila, y guarda el resultado en
+una caché del proceso que se invalida al renombrar, mover o eliminar el equipo.
+La caché se indexa por tabla, de modo que quien usa otro mapa tipo → modelo
+(p. ej. 'fuente' → Fuente en las rutas de mantenimientos) no mezcla entradas
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Any, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from .falla_rollup_service import _modelos_equipo
+
+logger = logging.getLogger(__name__)
+
+# Columna con el nombre visible según el esquema de cada tipo de equipo
+ATRIBUTOS_NOMBRE = ('nombre', 'name', 'codigo', 'codigo_interno')
+ATRIBUTOS_MARCA = ('marca', 'manufacturer')
+ATRIBUTOS_MODELO = ('modelo', 'model')
+
+LOTE = 500
+
+Clave = Tuple[str, int]
+
+
+def _primera(tabla, atributos):
+    return next((tabla.c[nombre] for nombre in atributos if nombre in tabla.c), None)
+
+
+class ResolutorEquipos:
+    """
+    Caché de datos visibles de equipos por (tipo, id).
+
+    Las entradas se invalidan con los eventos de los modelos de equipo en este
+    proceso; `ttl` acota cuánto puede durar una entrada cambiada desde otro
+    proceso (otro worker de gunicorn).
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._cache: Dict[Clave, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def resolver(self, pares: Iterable[Tuple[str, Optional[int]]], solo_activos: bool = True,
+                 modelos: Mapping[str, Any] = None) -> Dict[Clave, Optional[Dict[str, Any]]]:
+        """
+        Datos de los equipos (id, nombre, ubicacion, marca, modelo, tipo).
+        Los equipos inexistentes o inactivos quedan en None.
+
+        `modelos` reemplaza el mapa tipo → modelo por defecto (_modelos_equipo).
+        """
+        if modelos is None:
+            modelos = _modelos_equipo()
+        else:
+            _escuchar_modelos(modelos.values())
+        claves = {
+            (tipo, int(equipo_id)) for tipo, equipo_id in pares
+            if equipo_id and tipo in modelos
+        }
+
+        ahora = time.monotonic()
+        resultado, faltantes = {}, {}
+        with self._lock:
+            for tipo, equipo_id in claves:
+                entrada = self._cache.get(((modelos[tipo].__tablename__, equipo_id), solo_activos))
+                if entrada is not None and ahora - entrada[0] < self.ttl:
+                    resultado[(tipo, equipo_id)] = entrada[1] and {**entrada[1], 'tipo': tipo}
+                else:
+                    faltantes.setdefault(tipo, []).append(equipo_id)
+
+        cargados = {}
+        for tipo, ids in faltantes.items():
+            cargados.update(self._cargar(tipo, modelos[tipo], sorted(ids), solo_activos))
+
+        with self._lock:
+            for (tipo, equipo_id), datos in cargados.items():
+                self._cache[((modelos[tipo].__tablename__, equipo_id), solo_activos)] = (ahora, datos)
+        resultado.update(cargados)
+        return resultado
+
+    def nombre(self, tipo: str, equipo_id: Optional[int], solo_activos: bool = True,
+               modelos: Mapping[str, Any] = None) -> str:
+        """Nombre de un equipo ('' si no existe)"""
+        datos = self.resolver([(tipo, equipo_id)], solo_activos, modelos).get((tipo, equipo_id))
+        return datos['nombre'] if datos else ''
+
+    def _cargar(self, tipo: str, modelo, ids, solo_activos: bool) -> Dict[Clave, Optional[Dict[str, Any]]]:
+        """Una consulta IN por lote de ids, con el nombre de la ubicación"""
+        from models import db, Ubicacion
+
+        tabla = modelo.__table__
+        ubicaciones = Ubicacion.__table__
+        columnas = [tabla.c.id]
+        for etiqueta, atributos in (('nombre', ATRIBUTOS_NOMBRE), ('marca', ATRIBUTOS_MARCA),
+                                    ('modelo', ATRIBUTOS_MODELO)):
+            columna = _primera(tabla, atributos)
+            if columna is not None:
+                columnas.append(columna.label(etiqueta))
+
+        origen = tabla
+        if 'ubicacion_id' in tabla.c:
+            origen = tabla.outerjoin(ubicaciones, ubicaciones.c.id == tabla.c.ubicacion_id)
+            columnas.append(ubicaciones.c.nombre.label('ubicacion'))
+
+        condiciones = []
+        if solo_activos and 'activo' in tabla.c:
+            condiciones.append(tabla.c.activo == True)  # noqa: E712
+        if solo_activos and 'deleted' in tabla.c:
+            condiciones.append(tabla.c.deleted == False)  # noqa: E712
+
+        resultado = {(tipo, equipo_id): None for equipo_id in ids}
+        for inicio in range(0, len(ids), LOTE):
+            query = select(*columnas).select_from(origen).where(
+                tabla.c.id.in_(ids[inicio:inicio + LOTE]), *condiciones
+            )
+            for fila in db.session.execute(query).mappings():
+                resultado[(tipo, fila['id'])] = {
+                    'id': fila['id'],
+                    'nombre': fila.get('nombre') or '',
+                    'ubicacion': fila.get('ubicacion') or '',
+                    'marca': fila.get('marca') or '',
+                    'modelo': fila.get('modelo') or '',
+                    'tipo': tipo
+                }
+        return resultado
+
+    def invalidar(self, tipo: str = None, equipo_id: int = None):
+        """Elimina un equipo de la caché, todos los de un tipo, o todo"""
+        if tipo is None:
+            with self._lock:
+                self._cache.clear()
+            return
+        modelo = _modelos_equipo().get(tipo)
+        self.invalidar_tabla(modelo.__tablename__ if modelo is not None else tipo, equipo_id)
+
+    def invalidar_tabla(self, tabla: str, equipo_id: int = None):
+        """Elimina de la caché un equipo de la tabla dada, o todos los de esa tabla"""
+        with self._lock:
+            for clave in [c for c in self._cache if c[0][0] == tabla and (equipo_id is None or c[0][1] == equipo_id)]:
+                del self._cache[clave]
+
+
+resolutor_equipos = ResolutorEquipos()
+
+
+def _pendientes(objeto) -> set:
+    return object_session(objeto).info.setdefault('equipos_modificados', set())
+
+
+def _on_equipo_cambio(mapper, connection, equipo):
+    _pendientes(equipo).add((mapper.local_table.name, equipo.id))
+
+
+def _on_ubicacion_cambio(mapper, connection, ubicacion):
+    # Renombrar una ubicación afecta a todos sus equipos
+    _pendientes(ubicacion).add((None, None))
+
+
+def _on_commit(session):
+    """Invalida al confirmar, para no volver a cargar en caché datos aún sin commit"""
+    pendientes = session.info.pop('equipos_modificados', None)
+    if not pendientes:
+        return
+    if (None, None) in pendientes:
+        resolutor_equipos.invalidar()
+        return
+    for tabla, equipo_id in pendientes:
+        resolutor_equipos.invalidar_tabla(tabla, equipo_id)
+
+
+def _on_rollback(session):
+    session.info.pop('equipos_modificados', None)
+
+
+def _escuchar(objetivo, nombres, funcion):
+    for nombre in nombres:
+        if not event.contains(objetivo, nombre, funcion):
+            event.listen(objetivo, nombre, funcion)
+
+
+def _escuchar_modelos(modelos):
+    """Listeners de invalidación para modelos de un mapa propio, si la caché ya se invalida por eventos"""
+    if not event.contains(Session, 'after_commit', _on_commit):
+        return
+    for modelo in set(modelos):
+        _escuchar(modelo, ('after_insert', 'after_update', 'after_delete'), _on_equipo_cambio)
+
+
+def registrar_listeners():
+    """Invalida la caché al crear, modificar o eliminar equipos o ubicaciones"""
+    from models import Ubicacion
+
+    _escuchar(Session, ('after_commit',), _on_commit)
+    _escuchar(Session, ('after_rollback',), _on_rollback)
+    _escuchar_modelos(_modelos_equipo().values())
+    _escuchar(Ubicacion, ('after_update', 'after_delete'), _on_ubicacion_cambio)
@@ -6,485 +6,830 @@ Maneja el envío de notificaciones por email, SMS y dentro del sistema
 
 import smtplib
 import ssl
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
-from email.mime.base import MimeBase
+from email.mime.base import MIMEBase
 from email import encoders
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import json
 import os
 
-class NotificacionService:
-"""Servicio para manejar notificaciones"""
-
-def __init__(self, db_session=None):
-self.db = db_session
-
-# Configuración de email
-self.smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-self.smtp_port = int(os.environ.get('SMTP_PORT', 587))
-self.smtp_user = os.environ.get('SMTP_USER', '')
-self.smtp_password = os.environ.get('SMTP_PASSWORD', '')
-<<<<<<< HEAD
-self.from_email = os.environ.get('FROM_EMAIL', 'noreply@ufro.cl')
-=======
-self.from_email = os.environ.get('FROM_EMAIL', 'noreply@ufrontera.cl')
->>>>>>> e689c66cd1a8e8cd7d3b1f7c326cf31775409856
-
-# Configuración de SMS (ejemplo con servicio externo)
-self.sms_api_key = os.environ.get('SMS_API_KEY', '')
-self.sms_endpoint = os.environ.get('SMS_ENDPOINT', '')
-
-def send_email(self, to_emails: List[str], subject: str, body: str,
-html_body: str = None, attachments: List[Dict] = None) -> Dict[str, Any]:
-"""
-Envía un email con opciones avanzadas
-"""
-if not all([self.smtp_server, self.smtp_user, self.smtp_password]):
-return {
-'success': False,
-'error': 'Configuración de SMTP incompleta'
-}
-
-try:
-# Crear mensaje
-msg = MimeMultipart('alternative')
-msg['From'] = self.from_email
-msg['To'] = ', '.join(to_emails)
-msg['Subject'] = subject
-msg['X-Priority'] = '3' # Normal priority
-
-# Cuerpo del mensaje
-if html_body:
-# HTML version
-html_part = MimeText(html_body, 'html', 'utf-8')
-msg.attach(html_part)
-
-# Text version
-text_part = MimeText(body, 'plain', 'utf-8')
-msg.attach(text_part)
-else:
-text_part = MimeText(body, 'plain', 'utf-8')
-msg.attach(text_part)
-
-# Adjuntos
-if attachments:
-for attachment in attachments:
-with open(attachment['path'], 'rb') as f:
-part = MimeBase('application', 'octet-stream')
-part.set_payload(f.read())
-
-encoders.encode_base64(part)
-part.add_header(
-'Content-Disposition',
-f'attachment; filename= {attachment["filename"]}'
-)
-msg.attach(part)
-
-# Enviar email
-context = ssl.create_default_context()
-with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-server.starttls(context=context)
-server.login(self.smtp_user, self.smtp_password)
-text = msg.as_string()
-server.sendmail(self.from_email, to_emails, text)
-
-# Registrar notificación
-self._register_notification(
-tipo='email',
-destinatarios=to_emails,
-asunto=subject,
-contenido=html_body or body,
-estado='enviado'
-)
-
-return {
-'success': True,
-'message': f'Email enviado a {len(to_emails)} destinatario(s)'
-}
-
-except Exception as e:
-# Registrar error
-self._register_notification(
-tipo='email',
-destinatarios=to_emails,
-asunto=subject,
-contenido=html_body or body,
-estado='error',
-error=str(e)
-)
-
-return {
-'success': False,
-'error': f'Error enviando email: {str(e)}'
-}
-
-def send_sms(self, phone_numbers: List[str], message: str) -> Dict[str, Any]:
-"""
-Envía SMS (requiere configuración de servicio externo)
-"""
-if not self.sms_api_key:
-return {
-'success': False,
-'error': 'API de SMS no configurada'
-}
-
-try:
-sent_count = 0
-errors = []
-
-for phone in phone_numbers:
-try:
-# Aquí iría la implementación específica del servicio de SMS
-# Ejemplo genérico:
-payload = {
-'to': phone,
-'message': message,
-'api_key': self.sms_api_key
-}
-
-# Hacer petición HTTP al servicio de SMS
-# response = requests.post(self.sms_endpoint, json=payload)
-
-sent_count += 1
-
-except Exception as e:
-errors.append(f'Error enviando SMS a {phone}: {str(e)}')
-
-# Registrar notificación
-self._register_notification(
-tipo='sms',
-destinatarios=phone_numbers,
-asunto='SMS',
-contenido=message,
-estado='enviado' if sent_count > 0 else 'error'
-)
-
-return {
-'success': sent_count > 0,
-'sent_count': sent_count,
-'errors': errors
-}
-
-except Exception as e:
-return {
-'success': False,
-'error': f'Error enviando SMS: {str(e)}'
-}
-
-def send_system_notification(self, user_id: int, title: str, message: str,
-type: str = 'info', data: Dict = None) -> bool:
-"""
-Envía notificación dentro del sistema
-"""
-try:
-self.db.execute(
-"""
-INSERT INTO notificaciones (user_id, titulo, mensaje, tipo, data, created_at)
-VALUES (%s, %s, %s, %s, %s, %s)
-""",
-(user_id, title, message, type, json.dumps(data or {}), datetime.now())
-)
-self.db.commit()
-return True
-
-except Exception as e:
-print(f"Error enviando notificación del sistema: {e}")
-self.db.rollback()
-return False
-
-def notify_failure(self, failure_data: Dict) -> Dict[str, Any]:
-"""
-Envía notificaciones específicas para fallas
-"""
-results = []
+from .cola_notificaciones import ColaNotificaciones, construir_mensaje
 
-# Obtener usuarios que deben ser notificados
-notify_users = self.db.execute(
-"""
-SELECT u.* FROM usuarios u
-JOIN user_roles ur ON u.id = ur.user_id
-JOIN roles r ON ur.role_id = r.id
-WHERE r.notifications_failure = true AND u.activo = true
-"""
-).fetchall()
-
-if not notify_users:
-return {
-'success': False,
-'error': 'No hay usuarios configurados para recibir notificaciones de fallas'
-}
-
-# Preparar contenido
-subject = f" Nueva Falla Reportada: {failure_data.get('titulo', 'Sin título')}"
-
-# Email HTML
-html_body = f"""
-<html>
-<body>
-<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-<h style="color: #d3ff;"> Nueva Falla Reportada</h>
-
-<div style="background-color: #f5f5f5; padding: 0px; border-radius: 5px; margin: 0px 0;">
-<h3 style="margin-top: 0; color: #333;">Detalles de la Falla</h3>
-
-<p><strong>Título:</strong> {failure_data.get('titulo', 'N/A')}</p>
-<p><strong>Descripción:</strong> {failure_data.get('descripcion', 'N/A')}</p>
-<p><strong>Severidad:</strong>
-<span style="color: {'#d3ff' if failure_data.get('severidad') == 'alta' else '#ff9800' if failure_data.get('severidad') == 'media' else '#4caf50'}; font-weight: bold;">
-{failure_data.get('severidad', 'N/A').upper()}
-</span>
-</p>
-<p><strong>Cámara:</strong> {failure_data.get('camara', 'N/A')}</p>
-<p><strong>Fecha de reporte:</strong> {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-<p><strong>Reportado por:</strong> {failure_data.get('reportado_por', 'N/A')}</p>
-</div>
-
-<p>Por favor, revise el sistema para más detalles y tomar las acciones necesarias.</p>
-
-<div style="margin-top: 30px; padding-top: 0px; border-top: 1px solid #eee; color: #666; font-size: 1px;">
-<p>Este es un mensaje automático del Sistema de Cámaras UFRO.</p>
-</div>
-</div>
-</body>
-</html>
-"""
-
-# Texto plano
-text_body = f"""
-NUEVA FALLA REPORTADA
-
-Título: {failure_data.get('titulo', 'N/A')}
-Descripción: {failure_data.get('descripcion', 'N/A')}
-Severidad: {failure_data.get('severidad', 'N/A').upper()}
-Cámara: {failure_data.get('camara', 'N/A')}
-Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-Reportado por: {failure_data.get('reportado_por', 'N/A')}
-
-Por favor, revise el sistema para más detalles.
-"""
-
-# Enviar emails
-for user in notify_users:
-try:
-email_result = self.send_email(
-to_emails=[user.email],
-subject=subject,
-body=text_body,
-html_body=html_body
-)
-
-# También enviar notificación interna
-self.send_system_notification(
-user_id=user.id,
-title="Nueva Falla Reportada",
-message=f"Falla: {failure_data.get('titulo', '')} - Severidad: {failure_data.get('severidad', '').upper()}",
-type='failure',
-data=failure_data
-)
-
-results.append({
-'user_id': user.id,
-'email': user.email,
-'success': email_result['success'],
-'error': email_result.get('error')
-})
-
-except Exception as e:
-results.append({
-'user_id': user.id,
-'email': user.email,
-'success': False,
-'error': str(e)
-})
-
-return {
-'success': True,
-'results': results,
-'total_notifications': len(results)
-}
-
-def notify_maintenance(self, maintenance_data: Dict, users_to_notify: List[int] = None) -> Dict[str, Any]:
-"""
-Envía notificaciones de mantenimiento programado
-"""
-if not users_to_notify:
-# Obtener usuarios por defecto
-users_to_notify = [u.id for u in self.db.execute(
-"SELECT id FROM usuarios WHERE activo = true"
-).fetchall()]
-
-results = []
-
-subject = f" Mantenimiento Programado: {maintenance_data.get('tipo', 'General')}"
-
-html_body = f"""
-<html>
-<body>
-<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-<h style="color: #1976d;"> Mantenimiento Programado</h>
-
-<div style="background-color: #e3ffd; padding: 0px; border-radius: 5px; margin: 0px 0;">
-<h3 style="margin-top: 0; color: #333;">Detalles del Mantenimiento</h3>
-
-<p><strong>Tipo:</strong> {maintenance_data.get('tipo', 'N/A')}</p>
-<p><strong>Descripción:</strong> {maintenance_data.get('descripcion', 'N/A')}</p>
-<p><strong>Cámaras afectadas:</strong> {maintenance_data.get('camaras_afectadas', 'N/A')}</p>
-<p><strong>Fecha programada:</strong> {maintenance_data.get('fecha_programada', 'N/A')}</p>
-<p><strong>Duración estimada:</strong> {maintenance_data.get('duracion_estimada', 'N/A')}</p>
-<p><strong>Técnico responsable:</strong> {maintenance_data.get('tecnico', 'N/A')}</p>
-</div>
-
-<p style="color: #d3ff; font-weight: bold;">
-Durante el mantenimiento, los sistemas pueden experimentar interrupciones temporales.
-</p>
-</div>
-</body>
-</html>
-"""
 
-for user_id in users_to_notify:
-user = self.db.execute(
-"SELECT * FROM usuarios WHERE id = %s", (user_id,)
-).fetchone()
-
-if user:
-email_result = self.send_email(
-to_emails=[user.email],
-subject=subject,
-body=html_body,
-html_body=html_body
-)
-
-self.send_system_notification(
-user_id=user_id,
-title="Mantenimiento Programado",
-message=f"{maintenance_data.get('tipo', '')} - {maintenance_data.get('fecha_programada', '')}",
-type='maintenance',
-data=maintenance_data
-)
-
-results.append({
-'user_id': user_id,
-'email': user.email,
-'success': email_result['success']
-})
-
-return {
-'success': True,
-'results': results
-}
-
-def _register_notification(self, tipo: str, destinatarios: List[str],
-asunto: str, contenido: str, estado: str,
-error: str = None) -> bool:
-"""
-Registra una notificación en la base de datos
-"""
-try:
-self.db.execute(
-"""
-INSERT INTO notificaciones_log (
-tipo, destinatarios, asunto, contenido, estado, error, created_at
-) VALUES (%s, %s, %s, %s, %s, %s, %s)
-""",
-(tipo, json.dumps(destinatarios), asunto, contenido, estado, error, datetime.now())
-)
-self.db.commit()
-return True
-
-except Exception as e:
-print(f"Error registrando notificación: {e}")
-self.db.rollback()
-return False
-
-def get_user_notifications(self, user_id: int, limit: int = 50) -> List[Dict[str, Any]]:
-"""
-Obtiene notificaciones de un usuario
-"""
-try:
-results = self.db.execute(
-"""
-SELECT * FROM notificaciones
-WHERE user_id = %s
-ORDER BY created_at DESC
-LIMIT %s
-""",
-(user_id, limit)
-).fetchall()
-
-return [{
-'id': row.id,
-'titulo': row.titulo,
-'mensaje': row.mensaje,
-'tipo': row.tipo,
-'data': json.loads(row.data) if row.data else {},
-'read_at': row.read_at,
-'created_at': row.created_at
-} for row in results]
-
-except Exception as e:
-print(f"Error obteniendo notificaciones: {e}")
-return []
-
-def mark_notification_read(self, notification_id: int, user_id: int) -> bool:
-"""
-Marca una notificación como leída
-"""
-try:
-self.db.execute(
-"""
-UPDATE notificaciones
-SET read_at = %s
-WHERE id = %s AND user_id = %s
-""",
-(datetime.now(), notification_id, user_id)
-)
-self.db.commit()
-return True
-
-except Exception as e:
-print(f"Error marcando notificación como leída: {e}")
-self.db.rollback()
-return False
-
-def get_notification_statistics(self) -> Dict[str, Any]:
-"""
-Obtiene estadísticas de notificaciones
-"""
-try:
-stats = {}
-
-# Total de notificaciones por tipo
-tipos = self.db.execute("""
-SELECT tipo, COUNT(*) as cantidad
-FROM notificaciones_log
-GROUP BY tipo
-""").fetchall()
-
-stats['por_tipo'] = {row.tipo: row.cantidad for row in tipos}
-
-# Total por estado
-estados = self.db.execute("""
-SELECT estado, COUNT(*) as cantidad
-FROM notificaciones_log
-GROUP BY estado
-""").fetchall()
-
-stats['por_estado'] = {row.estado: row.cantidad for row in estados}
-
-# Notificaciones de las últimas 4 horas
-yesterday = datetime.now() - timedelta(days=1)
-recent = self.db.execute(
-"SELECT COUNT(*) FROM notificaciones_log WHERE created_at >= %s",
-(yesterday,)
-).fetchone()[0]
-
-stats['ultimas_4h'] = recent
-
-return stats
-
-except Exception as e:
-print(f"Error obteniendo estadísticas: {e}")
-return {}
\ No newline at end of file
+class NotificacionService:
+    """Servicio para manejar notificaciones"""
+
+    def __init__(self, db_session=None, use_queue: bool = None):
+        self.db = db_session
+
+        # Configuración de email
+        self.smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
+        self.smtp_port = int(os.environ.get('SMTP_PORT', 587))
+        self.smtp_user = os.environ.get('SMTP_USER', '')
+        self.smtp_password = os.environ.get('SMTP_PASSWORD', '')
+        self.from_email = os.environ.get('FROM_EMAIL', 'noreply@ufrontera.cl')
+
+        # Envío diferido: notify_failure/notify_maintenance encolan y retornan de inmediato
+        if use_queue is None:
+            use_queue = os.environ.get('NOTIFICATIONS_ASYNC', 'true').lower() == 'true'
+        self.use_queue = use_queue
+        self._cola = None
+
+        # Ventana (segundos) para agrupar fallas por destinatario en un resumen; 0 desactiva
+        self.digest_window = int(os.environ.get('NOTIFICATIONS_DIGEST_WINDOW', 60))
+
+        # Roles de usuario que reciben las notificaciones de fallas
+        self.failure_roles = [
+            rol.strip() for rol in
+            os.environ.get('NOTIFICATIONS_FAILURE_ROLES', 'superadmin,administrador,tecnico').split(',')
+            if rol.strip()
+        ]
+
+        # Configuración de SMS (ejemplo con servicio externo)
+        self.sms_api_key = os.environ.get('SMS_API_KEY', '')
+        self.sms_endpoint = os.environ.get('SMS_ENDPOINT', '')
+
+    @property
+    def cola(self) -> ColaNotificaciones:
+        """Cola persistente de emails (se crea al primer uso)"""
+        if self._cola is None:
+            self._cola = ColaNotificaciones(self.db, from_email=self.from_email)
+        return self._cola
+
+    def send_email(self, to_emails: List[str], subject: str, body: str,
+                   html_body: str = None, attachments: List[Dict] = None,
+                   commit: bool = True) -> Dict[str, Any]:
+        """
+        Envía un email con opciones avanzadas.
+        Con commit=False el registro del envío queda en la transacción del llamador.
+        """
+        if not all([self.smtp_server, self.smtp_user, self.smtp_password]):
+            return {
+                'success': False,
+                'error': 'Configuración de SMTP incompleta'
+            }
+
+        try:
+            # Crear mensaje
+            msg = construir_mensaje(self.from_email, to_emails, subject, body, html_body)
+
+            # Adjuntos
+            if attachments:
+                for attachment in attachments:
+                    with open(attachment['path'], 'rb') as f:
+                        part = MIMEBase('application', 'octet-stream')
+                        part.set_payload(f.read())
+
+                    encoders.encode_base64(part)
+                    part.add_header(
+                        'Content-Disposition',
+                        f'attachment; filename= {attachment["filename"]}'
+                    )
+                    msg.attach(part)
+
+            # Enviar email
+            context = ssl.create_default_context()
+            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                server.starttls(context=context)
+                server.login(self.smtp_user, self.smtp_password)
+                text = msg.as_string()
+                server.sendmail(self.from_email, to_emails, text)
+
+            # Registrar notificación
+            self._register_notification(
+                tipo='email',
+                destinatarios=to_emails,
+                asunto=subject,
+                contenido=html_body or body,
+                estado='enviado',
+                commit=commit
+            )
+
+            return {
+                'success': True,
+                'message': f'Email enviado a {len(to_emails)} destinatario(s)'
+            }
+
+        except Exception as e:
+            # Registrar error
+            self._register_notification(
+                tipo='email',
+                destinatarios=to_emails,
+                asunto=subject,
+                contenido=html_body or body,
+                estado='error',
+                error=str(e),
+                commit=commit
+            )
+
+            return {
+                'success': False,
+                'error': f'Error enviando email: {str(e)}'
+            }
+
+    def enqueue_email(self, to_emails: List[str], subject: str, body: str,
+                      html_body: str = None, tipo: str = None) -> Dict[str, Any]:
+        """
+        Encola un email para envío en segundo plano (ver `flask notifications-worker`)
+        """
+        try:
+            self.cola.encolar(to_emails, subject, body, html_body, tipo=tipo, commit=False)
+            return {
+                'success': True,
+                'queued': True,
+                'message': f'Email encolado para {len(to_emails)} destinatario(s)'
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error encolando email: {str(e)}'
+            }
+
+    def _deliver_email(self, to_emails: List[str], subject: str, body: str,
+                       html_body: str = None, tipo: str = None) -> Dict[str, Any]:
+        """
+        Encola o envía según la configuración del servicio, sin confirmar la
+        transacción (el llamador hace un solo commit al final)
+        """
+        if self.use_queue:
+            return self.enqueue_email(to_emails, subject, body, html_body, tipo=tipo)
+        return self.send_email(to_emails, subject, body, html_body, commit=False)
+
+    def send_sms(self, phone_numbers: List[str], message: str) -> Dict[str, Any]:
+        """
+        Envía SMS (requiere configuración de servicio externo)
+        """
+        if not self.sms_api_key:
+            return {
+                'success': False,
+                'error': 'API de SMS no configurada'
+            }
+
+        try:
+            sent_count = 0
+            errors = []
+
+            for phone in phone_numbers:
+                try:
+                    # Aquí iría la implementación específica del servicio de SMS
+                    # Ejemplo genérico:
+                    payload = {
+                        'to': phone,
+                        'message': message,
+                        'api_key': self.sms_api_key
+                    }
+
+                    # Hacer petición HTTP al servicio de SMS
+                    # response = requests.post(self.sms_endpoint, json=payload)
+
+                    sent_count += 1
+
+                except Exception as e:
+                    errors.append(f'Error enviando SMS a {phone}: {str(e)}')
+
+            # Registrar notificación
+            self._register_notification(
+                tipo='sms',
+                destinatarios=phone_numbers,
+                asunto='SMS',
+                contenido=message,
+                estado='enviado' if sent_count > 0 else 'error'
+            )
+
+            return {
+                'success': sent_count > 0,
+                'sent_count': sent_count,
+                'errors': errors
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error enviando SMS: {str(e)}'
+            }
+
+    def send_system_notification(self, user_id: int, title: str, message: str,
+                                 type: str = 'info', data: Dict = None, commit: bool = True) -> bool:
+        """
+        Envía notificación dentro del sistema y suma uno al contador de no leídas
+        del usuario en la misma transacción.
+
+        La notificación y el contador van en un savepoint: si fallan, con
+        commit=False solo se descarta esta notificación y no el resto de lo
+        pendiente en la transacción del llamador.
+        """
+        from models import Notificacion
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(Notificacion(
+                    user_id=user_id,
+                    titulo=title,
+                    mensaje=message,
+                    tipo=type,
+                    data=json.dumps(data or {}),
+                    created_at=datetime.now()
+                ))
+                self._ajustar_no_leidas(user_id, 1)
+            if commit:
+                self.db.commit()
+            return True
+
+        except Exception as e:
+            print(f"Error enviando notificación del sistema: {e}")
+            if commit:
+                self.db.rollback()
+            return False
+
+    def _ajustar_no_leidas(self, user_id: int, delta: int):
+        """
+        Suma `delta` al contador de no leídas del usuario (sin bajar de cero).
+        Crea la fila del contador la primera vez que el usuario recibe una notificación.
+        """
+        from sqlalchemy import case
+        from sqlalchemy.exc import IntegrityError
+        from models import NotificacionContador
+
+        if not delta:
+            return
+
+        nuevo_valor = NotificacionContador.no_leidas + delta
+
+        def actualizar() -> int:
+            return self.db.query(NotificacionContador).filter(
+                NotificacionContador.user_id == user_id
+            ).update({
+                NotificacionContador.no_leidas: case((nuevo_valor < 0, 0), else_=nuevo_valor),
+                NotificacionContador.updated_at: datetime.now()
+            }, synchronize_session=False)
+
+        if actualizar() or delta < 0:
+            return
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(NotificacionContador(user_id=user_id, no_leidas=0))
+        except IntegrityError:
+            # Otra transacción creó el contador entre el UPDATE y el INSERT
+            pass
+        actualizar()
+
+    def _build_failure_email(self, failure_data: Dict) -> tuple:
+        """
+        Arma asunto, texto plano y HTML del email de una falla
+        """
+        # Preparar contenido
+        subject = f" Nueva Falla Reportada: {failure_data.get('titulo', 'Sin título')}"
+        fecha = failure_data.get('fecha') or datetime.now().strftime('%d/%m/%Y %H:%M')
+
+        # Email HTML
+        html_body = f"""
+        <html>
+        <body>
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <h style="color: #d3ff;"> Nueva Falla Reportada</h>
+
+        <div style="background-color: #f5f5f5; padding: 0px; border-radius: 5px; margin: 0px 0;">
+        <h3 style="margin-top: 0; color: #333;">Detalles de la Falla</h3>
+
+        <p><strong>Título:</strong> {failure_data.get('titulo', 'N/A')}</p>
+        <p><strong>Descripción:</strong> {failure_data.get('descripcion', 'N/A')}</p>
+        <p><strong>Severidad:</strong>
+        <span style="color: {'#d3ff' if failure_data.get('severidad') == 'alta' else '#ff9800' if failure_data.get('severidad') == 'media' else '#4caf50'}; font-weight: bold;">
+        {failure_data.get('severidad', 'N/A').upper()}
+        </span>
+        </p>
+        <p><strong>Cámara:</strong> {failure_data.get('camara', 'N/A')}</p>
+        <p><strong>Fecha de reporte:</strong> {fecha}</p>
+        <p><strong>Reportado por:</strong> {failure_data.get('reportado_por', 'N/A')}</p>
+        </div>
+
+        <p>Por favor, revise el sistema para más detalles y tomar las acciones necesarias.</p>
+
+        <div style="margin-top: 30px; padding-top: 0px; border-top: 1px solid #eee; color: #666; font-size: 1px;">
+        <p>Este es un mensaje automático del Sistema de Cámaras UFRO.</p>
+        </div>
+        </div>
+        </body>
+        </html>
+        """
+
+        # Texto plano
+        text_body = f"""
+        NUEVA FALLA REPORTADA
+
+        Título: {failure_data.get('titulo', 'N/A')}
+        Descripción: {failure_data.get('descripcion', 'N/A')}
+        Severidad: {failure_data.get('severidad', 'N/A').upper()}
+        Cámara: {failure_data.get('camara', 'N/A')}
+        Fecha: {fecha}
+        Reportado por: {failure_data.get('reportado_por', 'N/A')}
+
+        Por favor, revise el sistema para más detalles.
+        """
+
+        return subject, text_body, html_body
+
+    def _render_failure_digest(self, items: List[Dict]) -> tuple:
+        """
+        Arma el email de resumen para varias fallas agrupadas.
+        Con un solo evento se usa el formato normal de falla.
+        """
+        if len(items) == 1:
+            return self._build_failure_email(items[0])
+
+        causa_raiz = items[0].get('causa_raiz')
+        subject = f" Resumen: {len(items)} Fallas Reportadas"
+        if causa_raiz:
+            subject += f" (origen {causa_raiz})"
+
+        severidades = {}
+        for item in items:
+            severidad = (item.get('severidad') or 'N/A').upper()
+            severidades[severidad] = severidades.get(severidad, 0) + 1
+        resumen_severidad = ', '.join(f"{k}: {v}" for k, v in sorted(severidades.items()))
+
+        filas_html = ''.join(
+            f"<tr><td>{item.get('fecha', '')}</td><td>{item.get('titulo', 'N/A')}</td>"
+            f"<td>{(item.get('severidad') or 'N/A').upper()}</td><td>{item.get('camara', 'N/A')}</td></tr>"
+            for item in items
+        )
+        filas_texto = '\n'.join(
+            f"        - [{(item.get('severidad') or 'N/A').upper()}] {item.get('titulo', 'N/A')} "
+            f"({item.get('camara', 'N/A')}) {item.get('fecha', '')}"
+            for item in items
+        )
+        origen_html = f"<p><strong>Causa raíz probable:</strong> {causa_raiz}</p>" if causa_raiz else ''
+        origen_texto = f"Causa raíz probable: {causa_raiz}" if causa_raiz else ''
+
+        html_body = f"""
+        <html>
+        <body>
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <h style="color: #d3ff;"> {len(items)} Fallas Reportadas</h>
+        {origen_html}
+        <p><strong>Por severidad:</strong> {resumen_severidad}</p>
+        <table style="width: 100%; border-collapse: collapse;">
+        <tr><th>Fecha</th><th>Título</th><th>Severidad</th><th>Cámara</th></tr>
+        {filas_html}
+        </table>
+
+        <p>Por favor, revise el sistema para más detalles y tomar las acciones necesarias.</p>
+
+        <div style="margin-top: 30px; padding-top: 0px; border-top: 1px solid #eee; color: #666; font-size: 1px;">
+        <p>Este es un mensaje automático del Sistema de Cámaras UFRO.</p>
+        </div>
+        </div>
+        </body>
+        </html>
+        """
+
+        text_body = f"""
+        RESUMEN DE FALLAS ({len(items)})
+
+        {origen_texto}
+        Por severidad: {resumen_severidad}
+
+{filas_texto}
+
+        Por favor, revise el sistema para más detalles.
+        """
+
+        return subject, text_body, html_body
+
+    def _get_root_cause(self, failure_data: Dict) -> Optional[str]:
+        """
+        Obtiene el equipo causa raíz ("tipo:id") de una falla.
+
+        Usa failure_data['causa_raiz'] ({'tipo', 'id'}) si viene informado, o el
+        resultado de FIA en failure_data['impacto_fia'] (lista de analizar_impacto,
+        cuyo origen tiene motivo "Falla Inicial").
+        """
+        causa = failure_data.get('causa_raiz')
+        if isinstance(causa, dict) and causa.get('tipo') and causa.get('id'):
+            return f"{causa['tipo']}:{causa['id']}"
+        if isinstance(causa, str) and causa:
+            return causa
+
+        for afectado in failure_data.get('impacto_fia') or []:
+            if afectado.get('motivo_impacto') == 'Falla Inicial':
+                return f"{afectado.get('tipo')}:{afectado.get('id')}"
+
+        return None
+
+    def _failure_digest_item(self, failure_data: Dict, causa_raiz: Optional[str]) -> Dict[str, Any]:
+        """Datos mínimos de una falla para guardar en el resumen"""
+        return {
+            'titulo': failure_data.get('titulo', 'N/A'),
+            'descripcion': failure_data.get('descripcion', 'N/A'),
+            'severidad': failure_data.get('severidad', 'N/A'),
+            'camara': failure_data.get('camara', 'N/A'),
+            'reportado_por': failure_data.get('reportado_por', 'N/A'),
+            'fecha': datetime.now().strftime('%d/%m/%Y %H:%M'),
+            'causa_raiz': causa_raiz
+        }
+
+    def _failure_recipients(self) -> list:
+        """Usuarios activos cuyo rol recibe notificaciones de fallas (una sola consulta)"""
+        from models import Usuario
+
+        return self.db.query(Usuario).filter(
+            Usuario.is_active.is_(True),
+            Usuario.role.in_(self.failure_roles)
+        ).order_by(Usuario.id).all()
+
+    def _notify_failure_items(self, items: List[Dict], causa_raiz: Optional[str], title: str,
+                              message: str, data: Dict) -> Dict[str, Any]:
+        """
+        Notifica a cada destinatario de fallas un email con todos los `items` y
+        una sola notificación interna, y confirma todo en un commit.
+        Con ventana de agrupación los items se suman al resumen abierto del
+        destinatario para la misma causa raíz.
+        """
+        results = []
+
+        notify_users = self._failure_recipients()
+
+        if not notify_users:
+            return {
+                'success': False,
+                'error': 'No hay usuarios configurados para recibir notificaciones de fallas'
+            }
+
+        agrupar = self.use_queue and self.digest_window > 0
+        if not agrupar:
+            subject, text_body, html_body = self._render_failure_digest(items)
+
+        # Enviar emails
+        for user in notify_users:
+            try:
+                if agrupar:
+                    self.cola.encolar_agrupado(
+                        to_emails=[user.email],
+                        clave=f"failure:{user.email}:{causa_raiz or 'general'}",
+                        items=items,
+                        ventana_segundos=self.digest_window,
+                        renderizar=self._render_failure_digest,
+                        tipo='failure',
+                        commit=False
+                    )
+                    email_result = {'success': True, 'queued': True}
+                else:
+                    email_result = self._deliver_email(
+                        to_emails=[user.email],
+                        subject=subject,
+                        body=text_body,
+                        html_body=html_body,
+                        tipo='failure'
+                    )
+
+                # También enviar notificación interna
+                notificada = self.send_system_notification(
+                    user_id=user.id,
+                    title=title,
+                    message=message,
+                    type='failure',
+                    data=data,
+                    commit=False
+                )
+
+                results.append({
+                    'user_id': user.id,
+                    'email': user.email,
+                    'success': email_result['success'] and notificada,
+                    'queued': email_result.get('queued', False),
+                    'notificacion_interna': notificada,
+                    'error': email_result.get('error')
+                })
+
+            except Exception as e:
+                results.append({
+                    'user_id': user.id,
+                    'email': user.email,
+                    'success': False,
+                    'error': str(e)
+                })
+
+        # Un solo commit para emails encolados y notificaciones internas
+        self.db.commit()
+
+        return {
+            'success': True,
+            'results': results,
+            'total_notifications': len(results),
+            'causa_raiz': causa_raiz
+        }
+
+    def notify_failure(self, failure_data: Dict) -> Dict[str, Any]:
+        """
+        Envía notificaciones específicas para fallas.
+        Con la cola activa los emails se encolan y el método retorna de inmediato.
+        Si hay ventana de agrupación, las fallas de un mismo destinatario (y de la
+        misma causa raíz, cuando se conoce) se envían juntas en un solo resumen.
+        """
+        causa_raiz = self._get_root_cause(failure_data)
+        return self._notify_failure_items(
+            items=[self._failure_digest_item(failure_data, causa_raiz)],
+            causa_raiz=causa_raiz,
+            title="Nueva Falla Reportada",
+            message=f"Falla: {failure_data.get('titulo', '')} - Severidad: {failure_data.get('severidad', '').upper()}",
+            data=failure_data
+        )
+
+    def notify_impact(self, impacto: List[Dict], failure_data: Dict) -> Dict[str, Any]:
+        """
+        Notifica una falla con impacto propagado (resultado de fia_logic.analizar_impacto).
+
+        Cada destinatario recibe un solo email con todos los equipos afectados,
+        agrupados bajo el equipo de origen, y una sola notificación interna.
+        """
+        datos = dict(failure_data)
+        datos['impacto_fia'] = impacto
+        causa_raiz = self._get_root_cause(datos)
+
+        items = []
+        for afectado in impacto:
+            item = dict(failure_data)
+            if afectado.get('motivo_impacto') != 'Falla Inicial':
+                item['titulo'] = f"{afectado.get('tipo', '').capitalize()} {afectado.get('id')}: {afectado.get('motivo_impacto')}"
+                item['camara'] = f"{afectado.get('tipo')} {afectado.get('id')}"
+            items.append(self._failure_digest_item(item, causa_raiz))
+
+        resultado = self._notify_failure_items(
+            items=items or [self._failure_digest_item(failure_data, causa_raiz)],
+            causa_raiz=causa_raiz,
+            title="Falla con Impacto",
+            message=f"Falla: {failure_data.get('titulo', '')} - {len(impacto)} equipo(s) afectado(s)",
+            data=datos
+        )
+        resultado['equipos_afectados'] = len(impacto)
+        return resultado
+
+    def notify_maintenance(self, maintenance_data: Dict, users_to_notify: List[int] = None) -> Dict[str, Any]:
+        """
+        Envía notificaciones de mantenimiento programado.
+        Con la cola activa los emails se encolan y el método retorna de inmediato.
+        Sin `users_to_notify` se notifica a todos los usuarios activos.
+        """
+        from models import Usuario
+
+        query = self.db.query(Usuario)
+        if users_to_notify:
+            query = query.filter(Usuario.id.in_(users_to_notify))
+        else:
+            query = query.filter(Usuario.is_active.is_(True))
+        users = query.order_by(Usuario.id).all()
+
+        results = []
+
+        subject = f" Mantenimiento Programado: {maintenance_data.get('tipo', 'General')}"
+
+        html_body = f"""
+        <html>
+        <body>
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <h style="color: #1976d;"> Mantenimiento Programado</h>
+
+        <div style="background-color: #e3ffd; padding: 0px; border-radius: 5px; margin: 0px 0;">
+        <h3 style="margin-top: 0; color: #333;">Detalles del Mantenimiento</h3>
+
+        <p><strong>Tipo:</strong> {maintenance_data.get('tipo', 'N/A')}</p>
+        <p><strong>Descripción:</strong> {maintenance_data.get('descripcion', 'N/A')}</p>
+        <p><strong>Cámaras afectadas:</strong> {maintenance_data.get('camaras_afectadas', 'N/A')}</p>
+        <p><strong>Fecha programada:</strong> {maintenance_data.get('fecha_programada', 'N/A')}</p>
+        <p><strong>Duración estimada:</strong> {maintenance_data.get('duracion_estimada', 'N/A')}</p>
+        <p><strong>Técnico responsable:</strong> {maintenance_data.get('tecnico', 'N/A')}</p>
+        </div>
+
+        <p style="color: #d3ff; font-weight: bold;">
+        Durante el mantenimiento, los sistemas pueden experimentar interrupciones temporales.
+        </p>
+        </div>
+        </body>
+        </html>
+        """
+
+        for user in users:
+            email_result = self._deliver_email(
+                to_emails=[user.email],
+                subject=subject,
+                body=html_body,
+                html_body=html_body,
+                tipo='maintenance'
+            )
+
+            notificada = self.send_system_notification(
+                user_id=user.id,
+                title="Mantenimiento Programado",
+                message=f"{maintenance_data.get('tipo', '')} - {maintenance_data.get('fecha_programada', '')}",
+                type='maintenance',
+                data=maintenance_data,
+                commit=False
+            )
+
+            results.append({
+                'user_id': user.id,
+                'email': user.email,
+                'success': email_result['success'] and notificada,
+                'queued': email_result.get('queued', False),
+                'notificacion_interna': notificada
+            })
+
+        self.db.commit()
+
+        return {
+            'success': True,
+            'results': results
+        }
+
+    def _register_notification(self, tipo: str, destinatarios: List[str],
+                               asunto: str, contenido: str, estado: str,
+                               error: str = None, commit: bool = True) -> bool:
+        """
+        Registra un envío en notificaciones_log (en un savepoint, para que un
+        error al registrar no descarte el resto de la transacción)
+        """
+        from models import NotificacionLog
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(NotificacionLog(
+                    tipo=tipo,
+                    destinatarios=list(destinatarios),
+                    asunto=asunto,
+                    contenido=contenido,
+                    estado=estado,
+                    error=error,
+                    created_at=datetime.now()
+                ))
+            if commit:
+                self.db.commit()
+            return True
+
+        except Exception as e:
+            print(f"Error registrando notificación: {e}")
+            if commit:
+                self.db.rollback()
+            return False
+
+    def get_user_notifications(self, user_id: int, limit: int = 50,
+                               solo_no_leidas: bool = False) -> List[Dict[str, Any]]:
+        """
+        Obtiene notificaciones de un usuario (usa el índice user_id, read_at, created_at)
+        """
+        from models import Notificacion
+
+        try:
+            query = self.db.query(Notificacion).filter(Notificacion.user_id == user_id)
+            if solo_no_leidas:
+                query = query.filter(Notificacion.read_at.is_(None))
+            results = query.order_by(Notificacion.created_at.desc()).limit(limit).all()
+
+            return [{
+                'id': row.id,
+                'titulo': row.titulo,
+                'mensaje': row.mensaje,
+                'tipo': row.tipo,
+                'data': json.loads(row.data) if row.data else {},
+                'read_at': row.read_at,
+                'created_at': row.created_at
+            } for row in results]
+
+        except Exception as e:
+            print(f"Error obteniendo notificaciones: {e}")
+            return []
+
+    def get_unread_count(self, user_id: int) -> int:
+        """
+        Cantidad de notificaciones no leídas del usuario (lectura por clave primaria,
+        pensada para el badge del navbar)
+        """
+        from models import NotificacionContador
+
+        try:
+            contador = self.db.get(NotificacionContador, user_id)
+            return contador.no_leidas if contador else 0
+
+        except Exception as e:
+            print(f"Error obteniendo contador de notificaciones: {e}")
+            return 0
+
+    def mark_notification_read(self, notification_id: int, user_id: int) -> bool:
+        """
+        Marca una notificación como leída
+
+        Returns:
+            bool: True si el UPDATE la marcó; False si no existe, es de otro
+            usuario, ya estaba leída o hubo error
+        """
+        return self.mark_notifications_read(user_id, [notification_id]) > 0
+
+    def mark_notifications_read(self, user_id: int, notification_ids: List[int] = None) -> int:
+        """
+        Marca como leídas varias notificaciones del usuario en un solo UPDATE.
+        Sin `notification_ids` marca todas. Solo descuenta del contador las que
+        realmente estaban sin leer.
+
+        Returns:
+            int: Notificaciones marcadas (-1 si hubo error)
+        """
+        from models import Notificacion
+
+        try:
+            query = self.db.query(Notificacion).filter(
+                Notificacion.user_id == user_id,
+                Notificacion.read_at.is_(None)
+            )
+            if notification_ids is not None:
+                if not notification_ids:
+                    return 0
+                query = query.filter(Notificacion.id.in_(notification_ids))
+
+            marcadas = query.update({Notificacion.read_at: datetime.now()}, synchronize_session=False)
+            self._ajustar_no_leidas(user_id, -marcadas)
+            self.db.commit()
+            return marcadas
+
+        except Exception as e:
+            print(f"Error marcando notificaciones como leídas: {e}")
+            self.db.rollback()
+            return -1
+
+    def rebuild_unread_counters(self) -> int:
+        """
+        Recalcula los contadores de no leídas desde la tabla de notificaciones.
+        Solo para reparar desajustes; el uso normal los mantiene al insertar y leer.
+
+        Returns:
+            int: Usuarios con contador recalculado
+        """
+        from sqlalchemy import func
+        from models import Notificacion, NotificacionContador
+
+        try:
+            conteos = dict(self.db.query(
+                Notificacion.user_id, func.count(Notificacion.id)
+            ).filter(
+                Notificacion.read_at.is_(None)
+            ).group_by(Notificacion.user_id).all())
+
+            self.db.query(NotificacionContador).delete(synchronize_session=False)
+            ahora = datetime.now()
+            self.db.add_all([
+                NotificacionContador(user_id=user_id, no_leidas=cantidad, updated_at=ahora)
+                for user_id, cantidad in conteos.items()
+            ])
+            self.db.commit()
+            return len(conteos)
+
+        except Exception as e:
+            print(f"Error recalculando contadores de notificaciones: {e}")
+            self.db.rollback()
+            return 0
+
+    def get_notification_statistics(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de notificaciones
+        """
+        from sqlalchemy import func
+        from models import NotificacionContador, NotificacionLog
+
+        try:
+            stats = {}
+
+            # Total de notificaciones por tipo
+            tipos = self.db.query(
+                NotificacionLog.tipo, func.count(NotificacionLog.id)
+            ).group_by(NotificacionLog.tipo).all()
+
+            stats['por_tipo'] = {tipo: cantidad for tipo, cantidad in tipos}
+
+            # Total por estado
+            estados = self.db.query(
+                NotificacionLog.estado, func.count(NotificacionLog.id)
+            ).group_by(NotificacionLog.estado).all()
+
+            stats['por_estado'] = {estado: cantidad for estado, cantidad in estados}
+
+            # Notificaciones de las últimas 24 horas
+            yesterday = datetime.now() - timedelta(days=1)
+            recent = self.db.query(func.count(NotificacionLog.id)).filter(
+                NotificacionLog.created_at >= yesterday
+            ).scalar()
+
+            stats['ultimas_4h'] = recent
+
+            # No leídas en bandeja (suma de contadores, sin recorrer notificaciones)
+            stats['no_leidas'] = self.db.query(
+                func.coalesce(func.sum(NotificacionContador.no_leidas), 0)
+            ).scalar()
+
+            # Mensajes en la cola de envío
+            stats['cola'] = self.cola.get_estadisticas()
+
+            return stats
+
+        except Exception as e:
+            print(f"Error obteniendo estadísticas: {e}")
+            return {}
@@ -0,0 +1,271 @@
+# services/ocupacion_gabinete_service.py
+"""
+Servicio de ocupación de gabinetes
+Mantiene ocupacion_gabinetes (unidades libres y tramos contiguos libres por
+gabinete) en la misma transacción en que se instala, mueve o retira equipo, y
+reparte lotes de equipos entre gabinetes con first-fit decreasing
+"""
+
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models.ocupacion_gabinete import OcupacionGabinete
+from .falla_rollup_service import _modelos_equipo, _valor, activar_historial, guardar_filas_indice
+from .presupuesto_poe_service import _cambiaron, cercania_ubicaciones
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_GABINETE_ACTIVO = ('activo',)
+
+# Atributos que cambian el índice de un gabinete
+ATRIBUTOS_GABINETE = ('rack_units', 'usable_rack_units', 'max_weight_kg', 'ubicacion_id', 'status', 'deleted')
+ATRIBUTOS_INSTALACION = ('gabinete_id', 'start_unit', 'rack_units_used', 'deleted')
+
+LOTE = 500
+
+
+def tramos_libres(unidades_totales: int, instalaciones: Iterable[tuple]) -> List[List[int]]:
+    """
+    Tramos de unidades contiguas libres [unidad inicial, largo] de un gabinete
+    de `unidades_totales` U con equipos en (start_unit, rack_units_used)
+    """
+    ocupada = [False] * (unidades_totales + 2)
+    for inicio, largo in instalaciones:
+        if not inicio or not largo:
+            continue
+        for unidad in range(max(1, inicio), min(unidades_totales, inicio + largo - 1) + 1):
+            ocupada[unidad] = True
+
+    tramos, inicio = [], None
+    for unidad in range(1, unidades_totales + 2):
+        if unidad <= unidades_totales and not ocupada[unidad]:
+            inicio = unidad if inicio is None else inicio
+        elif inicio is not None:
+            tramos.append([inicio, unidad - inicio])
+            inicio = None
+    return tramos
+
+
+def _filas_indice(connection, gabinete_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Calcula las filas del índice de los gabinetes indicados (todos con None)
+    con una consulta de gabinetes y una de equipamiento por lote
+    """
+    from models.gabinete import GabineteEquipment
+
+    gabinetes, instalaciones = _modelos_equipo()['gabinete'].__table__, GabineteEquipment.__table__
+    columnas = [gabinetes.c[nombre] for nombre in ('id',) + ATRIBUTOS_GABINETE if nombre in gabinetes.c]
+    vigentes = [instalaciones.c.deleted == False] if 'deleted' in instalaciones.c else []  # noqa: E712
+    lotes = [None] if gabinete_ids is None else [gabinete_ids[i:i + LOTE] for i in range(0, len(gabinete_ids), LOTE)]
+    ahora = datetime.utcnow()
+
+    filas = []
+    for lote in lotes:
+        consulta_gabinetes = select(*columnas)
+        consulta_instalaciones = select(instalaciones.c.gabinete_id, instalaciones.c.start_unit,
+                                        instalaciones.c.rack_units_used).where(*vigentes)
+        if lote is not None:
+            consulta_gabinetes = consulta_gabinetes.where(gabinetes.c.id.in_(lote))
+            consulta_instalaciones = consulta_instalaciones.where(instalaciones.c.gabinete_id.in_(lote))
+
+        por_gabinete = defaultdict(list)
+        for gabinete_id, inicio, largo in connection.execute(consulta_instalaciones):
+            por_gabinete[gabinete_id].append((inicio, largo))
+
+        for gabinete in connection.execute(consulta_gabinetes).mappings():
+            totales = gabinete.get('usable_rack_units') or gabinete.get('rack_units') or 0
+            tramos = tramos_libres(totales, por_gabinete[gabinete['id']])
+            libres = sum(largo for _, largo in tramos)
+            estado = getattr(gabinete.get('status'), 'value', gabinete.get('status'))
+            filas.append({
+                'gabinete_id': gabinete['id'],
+                'ubicacion_id': gabinete.get('ubicacion_id'),
+                'activo': estado in ESTADOS_GABINETE_ACTIVO and not gabinete.get('deleted'),
+                'unidades_totales': totales,
+                'unidades_ocupadas': totales - libres,
+                'unidades_libres': libres,
+                'mayor_tramo_libre': max((largo for _, largo in tramos), default=0),
+                'tramos_libres': tramos,
+                'peso_maximo_kg': gabinete.get('max_weight_kg'),
+                'updated_at': ahora
+            })
+    return filas
+
+
+def actualizar_indice(connection, gabinete_ids: Iterable[int]) -> int:
+    """Actualiza las filas del índice de los gabinetes indicados en la transacción en curso"""
+    gabinete_ids = sorted({i for i in gabinete_ids if i})
+    if not gabinete_ids:
+        return 0
+    return guardar_filas_indice(connection, OcupacionGabinete.__table__, 'gabinete_id', gabinete_ids,
+                                lambda ids: _filas_indice(connection, ids))
+
+
+def _listeners_de(gabinetes_afectados, atributos):
+    """Listeners de insert/update/delete que marcan los gabinetes a recalcular en el flush"""
+
+    def _marcar(mapper, connection, objeto):
+        inspect(objeto).session.info.setdefault('gabinetes_modificados', set()).update(
+            gabinetes_afectados(objeto))
+
+    def _on_update(mapper, connection, objeto):
+        if _cambiaron(objeto, atributos):
+            _marcar(mapper, connection, objeto)
+
+    return (('after_insert', _marcar), ('after_update', _on_update), ('after_delete', _marcar))
+
+
+LISTENERS_INSTALACION = _listeners_de(
+    # Un equipo movido de gabinete también libera unidades en el anterior
+    lambda instalacion: {instalacion.gabinete_id, _valor(instalacion, ('gabinete_id',), anterior=True)},
+    ATRIBUTOS_INSTALACION
+)
+LISTENERS_GABINETE = _listeners_de(lambda gabinete: {gabinete.id}, ATRIBUTOS_GABINETE)
+
+
+def _on_flush(session, contexto):
+    """Recalcula una sola vez por flush los gabinetes con equipamiento o unidades modificados"""
+    pendientes = session.info.pop('gabinetes_modificados', None)
+    if pendientes:
+        actualizar_indice(session.connection(), pendientes)
+
+
+def registrar_listeners():
+    """
+    Mantiene el índice en la misma transacción que instala, mueve o retira
+    equipos. Las actualizaciones masivas no pasan por estos eventos: después de
+    ellas se debe ejecutar OcupacionGabineteService.reconstruir().
+    """
+    from models.gabinete import GabineteEquipment
+
+    listeners = [(Session, 'after_flush', _on_flush)]
+    for modelo, funciones in ((GabineteEquipment, LISTENERS_INSTALACION),
+                              (_modelos_equipo()['gabinete'], LISTENERS_GABINETE)):
+        listeners += [(modelo, nombre, funcion) for nombre, funcion in funciones]
+
+    for objetivo, nombre, funcion in listeners:
+        if not event.contains(objetivo, nombre, funcion):
+            event.listen(objetivo, nombre, funcion)
+    activar_historial(GabineteEquipment, ('gabinete_id',))
+
+
+class OcupacionGabineteService:
+    """Reconstrucción del índice de ocupación y ubicación de equipos en gabinetes"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula el índice de todos los gabinetes.
+
+        Returns:
+            int: Gabinetes en el índice
+        """
+        tabla = OcupacionGabinete.__table__
+        filas = _filas_indice(self.db.connection())
+        self.db.execute(tabla.delete())
+        for inicio in range(0, len(filas), 1000):
+            self.db.execute(tabla.insert(), filas[inicio:inicio + 1000])
+        self.db.commit()
+
+        logger.info(f"Índice de ocupación de gabinetes reconstruido: {len(filas)} gabinetes")
+        return len(filas)
+
+    def disponibles(self, unidades: int, limite: Optional[int] = None) -> List[tuple]:
+        """
+        Gabinetes activos con al menos `unidades` U contiguas libres, con su
+        ocupación y el nombre de su ubicación, en una sola consulta
+        """
+        from models import Ubicacion
+
+        Gabinete = _modelos_equipo()['gabinete']
+        consulta = (
+            self.db.query(Gabinete, OcupacionGabinete, Ubicacion.nombre)
+            .join(OcupacionGabinete, OcupacionGabinete.gabinete_id == Gabinete.id)
+            .outerjoin(Ubicacion, Ubicacion.id == Gabinete.ubicacion_id)
+            .filter(OcupacionGabinete.activo == True,  # noqa: E712
+                    OcupacionGabinete.mayor_tramo_libre >= unidades)
+            .order_by(OcupacionGabinete.mayor_tramo_libre, Gabinete.id)
+        )
+        return consulta.limit(limite).all() if limite else consulta.all()
+
+    def planificar(self, equipos: List[Dict[str, Any]], ubicacion_id: Optional[int] = None,
+                   gabinete_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Ubica un lote de equipos en gabinetes sin guardar nada (first-fit
+        decreasing): de mayor a menor altura, cada equipo va al primer tramo
+        libre que lo contiene del primer gabinete, con los gabinetes ordenados
+        por cercanía a la ubicación.
+
+        Args:
+            equipos: Lista de {unidades, etiqueta opcional}
+            ubicacion_id: Ubicación cerca de la cual se instalarán
+            gabinete_ids: Restringir a estos gabinetes
+
+        Returns:
+            Dict: ubicaciones (equipo → gabinete y unidad inicial), sin_ubicar y
+            las unidades libres de cada gabinete usado antes y después
+        """
+        inicio = time.perf_counter()
+        demandas = []
+        for indice, equipo in enumerate(equipos):
+            unidades = int(equipo.get('unidades') or 0)
+            if unidades < 1:
+                raise ValueError(f"Unidades de rack inválidas en el equipo {indice}")
+            demandas.append({'indice': indice, 'etiqueta': equipo.get('etiqueta'), 'unidades': unidades})
+        if not demandas:
+            raise ValueError("Se requiere al menos un equipo")
+
+        T = OcupacionGabinete
+        condiciones = [T.activo == True, T.mayor_tramo_libre >= min(d['unidades'] for d in demandas)]  # noqa: E712
+        if gabinete_ids:
+            condiciones.append(T.gabinete_id.in_(gabinete_ids))
+        gabinetes = [dict(fila) for fila in self.db.execute(
+            select(T.gabinete_id, T.ubicacion_id, T.unidades_libres, T.tramos_libres).where(*condiciones)
+        ).mappings()]
+
+        cercania = cercania_ubicaciones(self.db, ubicacion_id)
+        for gabinete in gabinetes:
+            saltos, km = cercania(gabinete['ubicacion_id'])
+            gabinete.update(saltos_ubicacion=saltos, distancia_km=None if km is None else round(km, 2),
+                            tramos=[list(t) for t in gabinete['tramos_libres'] or []], ubicados=[])
+        gabinetes.sort(key=lambda g: (g['saltos_ubicacion'],
+                                      math.inf if g['distancia_km'] is None else g['distancia_km'],
+                                      g['gabinete_id']))
+
+        ubicaciones, sin_ubicar = [], []
+        for demanda in sorted(demandas, key=lambda d: -d['unidades']):
+            destino = next(((g, t) for g in gabinetes for t in g['tramos'] if t[1] >= demanda['unidades']), None)
+            if destino is None:
+                sin_ubicar.append({**demanda, 'motivo': 'Sin tramo libre de unidades contiguas suficiente'})
+                continue
+            gabinete, tramo = destino
+            ubicaciones.append({**demanda, 'gabinete_id': gabinete['gabinete_id'], 'start_unit': tramo[0]})
+            gabinete['ubicados'].append(demanda['indice'])
+            tramo[0] += demanda['unidades']
+            tramo[1] -= demanda['unidades']
+
+        usados = [{
+            'gabinete_id': g['gabinete_id'],
+            'ubicacion_id': g['ubicacion_id'],
+            'saltos_ubicacion': g['saltos_ubicacion'],
+            'distancia_km': g['distancia_km'],
+            'unidades_libres_antes': g['unidades_libres'],
+            'unidades_libres_despues': sum(t[1] for t in g['tramos']),
+            'equipos': len(g['ubicados'])
+        } for g in gabinetes if g['ubicados']]
+
+        return {
+            'ubicaciones': sorted(ubicaciones, key=lambda u: u['indice']),
+            'sin_ubicar': sorted(sin_ubicar, key=lambda u: u['indice']),
+            'gabinetes': usados,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        }
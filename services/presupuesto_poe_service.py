@@ -0,0 +1,337 @@
+# services/presupuesto_poe_service.py
+"""
+Servicio de presupuesto PoE de switches
+Mantiene presupuesto_poe_switches en la misma transacción en que cambian los
+puertos o la configuración PoE de un switch, y reparte lotes de cámaras nuevas
+entre puertos libres de los switches con presupuesto, priorizando los más
+cercanos a una ubicación
+"""
+
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models.presupuesto_poe import PresupuestoPoeSwitch
+from .cadena_energia_service import WATTS_CAMARA_POE
+from .falla_rollup_service import _valor, activar_historial, guardar_filas_indice
+
+logger = logging.getLogger(__name__)
+
+# Potencia máxima por puerto: 802.3af (PoE) y 802.3at (PoE+)
+WATTS_PUERTO_POE = 15.4
+WATTS_PUERTO_POE_PLUS = 30.0
+
+ESTADOS_SWITCH_ACTIVO = ('activo',)
+
+# Atributos que cambian el índice de un switch
+ATRIBUTOS_SWITCH = ('max_poe_power', 'poe_ports', 'total_ports', 'poe_plus_support',
+                    'ubicacion_id', 'status', 'deleted')
+ATRIBUTOS_PUERTO = ('switch_id', 'port_number', 'port_type', 'status', 'connected_equipment_id',
+                    'poe_enabled', 'poe_power_consumption')
+
+# Saltos en el árbol de ubicaciones para switches sin ancestro común con la buscada
+DISTANCIA_SIN_RELACION = 99
+
+LOTE = 500
+
+
+def _filas_indice(connection, switch_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Calcula las filas del índice de los switches indicados (todos con None)
+    con una consulta de switches y una de puertos por lote
+    """
+    from models.switch import Switch, SwitchPort, PortStatus, PortType
+
+    switches, puertos = Switch.__table__, SwitchPort.__table__
+    columnas = [switches.c[nombre] for nombre in ('id',) + ATRIBUTOS_SWITCH if nombre in switches.c]
+    lotes = [None] if switch_ids is None else [switch_ids[i:i + LOTE] for i in range(0, len(switch_ids), LOTE)]
+    cobre = (PortType.ETHERNET, PortType.GIGABIT)
+    ahora = datetime.utcnow()
+
+    filas = []
+    for lote in lotes:
+        consulta_switches = select(*columnas)
+        consulta_puertos = select(puertos.c.switch_id, puertos.c.port_number, puertos.c.port_type,
+                                  puertos.c.status, puertos.c.connected_equipment_id,
+                                  puertos.c.poe_enabled, puertos.c.poe_power_consumption)
+        if lote is not None:
+            consulta_switches = consulta_switches.where(switches.c.id.in_(lote))
+            consulta_puertos = consulta_puertos.where(puertos.c.switch_id.in_(lote))
+
+        puertos_por_switch = defaultdict(list)
+        for puerto in connection.execute(consulta_puertos).mappings():
+            puertos_por_switch[puerto['switch_id']].append(puerto)
+
+        for switch in connection.execute(consulta_switches).mappings():
+            poe_ports = switch.get('poe_ports') or 0
+            modelados = puertos_por_switch[switch['id']]
+            consumo = sum(p['poe_power_consumption'] or 0 for p in modelados)
+            # Libre como en SwitchPort.is_available, y con PoE
+            libres = [
+                p['port_number'] for p in modelados
+                if p['status'] == PortStatus.DOWN and not p['connected_equipment_id']
+                and p['port_type'] in cobre and (p['poe_enabled'] or p['port_number'] <= poe_ports)
+            ]
+            # Puertos PoE aún sin registro en switch_ports (los primeros poe_ports)
+            numeros = {p['port_number'] for p in modelados}
+            libres += [n for n in range(1, min(poe_ports, switch.get('total_ports') or poe_ports) + 1)
+                       if n not in numeros]
+
+            presupuesto = float(switch.get('max_poe_power') or 0)
+            filas.append({
+                'switch_id': switch['id'],
+                'ubicacion_id': switch.get('ubicacion_id'),
+                'activo': switch.get('status') in ESTADOS_SWITCH_ACTIVO and not switch.get('deleted'),
+                'presupuesto_watts': presupuesto,
+                'consumo_watts': round(consumo, 2),
+                'disponible_watts': round(presupuesto - consumo, 2),
+                'watts_maximo_puerto': WATTS_PUERTO_POE_PLUS if switch.get('poe_plus_support') else WATTS_PUERTO_POE,
+                'puertos_poe_libres': len(libres),
+                'puertos_libres': sorted(libres),
+                'updated_at': ahora
+            })
+    return filas
+
+
+def actualizar_indice(connection, switch_ids: Iterable[int]) -> int:
+    """Actualiza las filas del índice de los switches indicados en la transacción en curso"""
+    switch_ids = sorted({i for i in switch_ids if i})
+    if not switch_ids:
+        return 0
+    return guardar_filas_indice(connection, PresupuestoPoeSwitch.__table__, 'switch_id', switch_ids,
+                                lambda ids: _filas_indice(connection, ids))
+
+
+def _cambiaron(objeto, atributos) -> bool:
+    estado = inspect(objeto)
+    return any(
+        atributo in estado.mapper.attrs and estado.attrs[atributo].history.has_changes()
+        for atributo in atributos
+    )
+
+
+def _switches_puerto(puerto) -> set:
+    # Un puerto movido de switch también cambia el índice del switch anterior
+    return {puerto.switch_id, _valor(puerto, ('switch_id',), anterior=True)}
+
+
+def _switches_switch(switch) -> set:
+    return {switch.id}
+
+
+def _listeners_de(switches_afectados, atributos):
+    """Listeners de insert/update/delete que marcan los switches a recalcular en el flush"""
+
+    def _marcar(mapper, connection, objeto):
+        inspect(objeto).session.info.setdefault('switches_poe_modificados', set()).update(
+            switches_afectados(objeto))
+
+    def _on_update(mapper, connection, objeto):
+        if _cambiaron(objeto, atributos):
+            _marcar(mapper, connection, objeto)
+
+    return (('after_insert', _marcar), ('after_update', _on_update), ('after_delete', _marcar))
+
+
+LISTENERS_PUERTO = _listeners_de(_switches_puerto, ATRIBUTOS_PUERTO)
+LISTENERS_SWITCH = _listeners_de(_switches_switch, ATRIBUTOS_SWITCH)
+
+
+def _on_flush(session, contexto):
+    """Recalcula una sola vez por flush los switches con puertos o configuración modificados"""
+    pendientes = session.info.pop('switches_poe_modificados', None)
+    if pendientes:
+        actualizar_indice(session.connection(), pendientes)
+
+
+def registrar_listeners():
+    """
+    Mantiene el índice en la misma transacción que cambia los puertos o el
+    switch. Las actualizaciones masivas no pasan por estos eventos: después de
+    ellas se debe ejecutar PresupuestoPoeService.reconstruir().
+    """
+    from models.switch import Switch, SwitchPort
+
+    listeners = [(Session, 'after_flush', _on_flush)]
+    for modelo, funciones in ((SwitchPort, LISTENERS_PUERTO), (Switch, LISTENERS_SWITCH)):
+        listeners += [(modelo, nombre, funcion) for nombre, funcion in funciones]
+
+    for objetivo, nombre, funcion in listeners:
+        if not event.contains(objetivo, nombre, funcion):
+            event.listen(objetivo, nombre, funcion)
+    activar_historial(SwitchPort, ('switch_id',))
+
+
+def _coordenadas(ubicacion) -> Optional[tuple]:
+    try:
+        return float(ubicacion['latitud']), float(ubicacion['longitud'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _km(origen: Optional[tuple], destino: Optional[tuple]) -> Optional[float]:
+    """Distancia haversine en km"""
+    if origen is None or destino is None:
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, origen + destino)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def cercania_ubicaciones(session, ubicacion_id: Optional[int]):
+    """
+    Función (ubicacion_id) → (saltos en el árbol de ubicaciones, km) respecto
+    de la ubicación indicada, con una sola consulta de ubicaciones
+    """
+    if not ubicacion_id:
+        return lambda _: (0, None)
+
+    from models import Ubicacion
+
+    tabla = Ubicacion.__table__
+    columnas = [tabla.c[n] for n in ('id', 'parent_id', 'latitud', 'longitud') if n in tabla.c]
+    ubicaciones = {fila['id']: fila for fila in session.execute(select(*columnas)).mappings()}
+
+    # Ancestros de la ubicación buscada con su distancia
+    ancestros, actual, saltos = {}, ubicacion_id, 0
+    while actual in ubicaciones and actual not in ancestros:
+        ancestros[actual] = saltos
+        actual, saltos = ubicaciones[actual].get('parent_id'), saltos + 1
+    origen = _coordenadas(ubicaciones.get(ubicacion_id) or {})
+
+    memo = {}
+
+    def cercania(destino_id):
+        if destino_id not in memo:
+            actual, saltos, vistos = destino_id, 0, set()
+            while actual in ubicaciones and actual not in ancestros and actual not in vistos:
+                vistos.add(actual)
+                actual, saltos = ubicaciones[actual].get('parent_id'), saltos + 1
+            distancia = saltos + ancestros[actual] if actual in ancestros else DISTANCIA_SIN_RELACION
+            memo[destino_id] = (distancia, _km(origen, _coordenadas(ubicaciones.get(destino_id) or {})))
+        return memo[destino_id]
+
+    return cercania
+
+
+class PresupuestoPoeService:
+    """Reconstrucción del índice PoE y asignación de cámaras a puertos"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula el índice de todos los switches.
+
+        Returns:
+            int: Switches en el índice
+        """
+        tabla = PresupuestoPoeSwitch.__table__
+        filas = _filas_indice(self.db.connection())
+        self.db.execute(tabla.delete())
+        for inicio in range(0, len(filas), 1000):
+            self.db.execute(tabla.insert(), filas[inicio:inicio + 1000])
+        self.db.commit()
+
+        logger.info(f"Índice de presupuesto PoE reconstruido: {len(filas)} switches")
+        return len(filas)
+
+    def candidatos(self, watts: float = WATTS_CAMARA_POE, ubicacion_id: Optional[int] = None,
+                   limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Switches activos con al menos un puerto PoE libre y `watts` disponibles,
+        ordenados por cercanía a la ubicación y luego por presupuesto restante
+        """
+        T = PresupuestoPoeSwitch
+        filas = self.db.execute(
+            select(T.switch_id, T.ubicacion_id, T.presupuesto_watts, T.consumo_watts, T.disponible_watts,
+                   T.watts_maximo_puerto, T.puertos_poe_libres, T.puertos_libres)
+            .where(T.activo == True, T.puertos_poe_libres > 0,  # noqa: E712
+                   T.disponible_watts >= watts, T.watts_maximo_puerto >= watts)
+        ).mappings().all()
+
+        cercania = cercania_ubicaciones(self.db, ubicacion_id)
+        resultado = []
+        for fila in filas:
+            saltos, km = cercania(fila['ubicacion_id'])
+            resultado.append({**fila, 'puertos_libres': list(fila['puertos_libres'] or []),
+                              'saltos_ubicacion': saltos, 'distancia_km': None if km is None else round(km, 2)})
+        resultado.sort(key=lambda c: (c['saltos_ubicacion'],
+                                      math.inf if c['distancia_km'] is None else c['distancia_km'],
+                                      -c['disponible_watts']))
+        return resultado[:limite] if limite else resultado
+
+    def planificar(self, camaras, ubicacion_id: Optional[int] = None,
+                   reserva_porcentaje: float = 10.0) -> Dict[str, Any]:
+        """
+        Reparte un lote de cámaras nuevas entre puertos PoE libres sin guardar nada.
+
+        Las cámaras se ubican de mayor a menor consumo, cada una en el switch
+        más cercano que aún tenga puerto libre, potencia por puerto suficiente y
+        presupuesto sin tocar la reserva.
+
+        Args:
+            camaras: Cantidad de cámaras de 15 W, o lista de {watts, etiqueta}
+            ubicacion_id: Ubicación cerca de la cual se instalarán
+            reserva_porcentaje: Porcentaje del presupuesto de cada switch que no se asigna
+
+        Returns:
+            Dict: asignaciones (cámara → switch y puerto), sin_asignar y el
+            presupuesto de cada switch usado antes y después
+        """
+        inicio = time.perf_counter()
+        if isinstance(camaras, int):
+            camaras = [{} for _ in range(camaras)]
+        demandas = []
+        for indice, camara in enumerate(camaras):
+            watts = float(camara.get('watts') or WATTS_CAMARA_POE)
+            if watts <= 0:
+                raise ValueError(f"Consumo inválido en la cámara {indice}")
+            demandas.append({'indice': indice, 'etiqueta': camara.get('etiqueta'), 'watts': watts})
+        if not demandas:
+            raise ValueError("Se requiere al menos una cámara")
+        if not 0 <= reserva_porcentaje < 100:
+            raise ValueError("La reserva debe estar entre 0 y 100")
+
+        switches = self.candidatos(min(d['watts'] for d in demandas), ubicacion_id)
+        for switch in switches:
+            switch['restante'] = switch['disponible_watts'] - switch['presupuesto_watts'] * reserva_porcentaje / 100
+            switch['asignados'] = []
+
+        asignaciones, sin_asignar = [], []
+        for demanda in sorted(demandas, key=lambda d: -d['watts']):
+            switch = next((s for s in switches if s['puertos_libres'] and demanda['watts'] <= s['watts_maximo_puerto']
+                           and demanda['watts'] <= s['restante']), None)
+            if switch is None:
+                sin_asignar.append({**demanda, 'motivo': 'Sin puerto PoE libre con presupuesto suficiente'})
+                continue
+            puerto = switch['puertos_libres'].pop(0)
+            switch['restante'] -= demanda['watts']
+            switch['asignados'].append(puerto)
+            asignaciones.append({**demanda, 'switch_id': switch['switch_id'], 'puerto': puerto})
+
+        usados = [{
+            'switch_id': s['switch_id'],
+            'ubicacion_id': s['ubicacion_id'],
+            'saltos_ubicacion': s['saltos_ubicacion'],
+            'distancia_km': s['distancia_km'],
+            'presupuesto_watts': s['presupuesto_watts'],
+            'disponible_antes_watts': s['disponible_watts'],
+            'disponible_despues_watts': round(s['disponible_watts'] - sum(
+                a['watts'] for a in asignaciones if a['switch_id'] == s['switch_id']), 2),
+            'puertos': s['asignados']
+        } for s in switches if s['asignados']]
+
+        return {
+            'asignaciones': sorted(asignaciones, key=lambda a: a['indice']),
+            'sin_asignar': sorted(sin_asignar, key=lambda a: a['indice']),
+            'switches': usados,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        }
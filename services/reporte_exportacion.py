@@ -0,0 +1,475 @@
+# services/reporte_exportacion.py
+"""
+Exportación de reportes en streaming (XLSX y PDF)
+Cada reporte se describe como una secuencia de secciones cuyas filas vienen de
+generadores; los renderizadores escriben fila por fila y entregan bytes a la
+respuesta a medida que se producen. La memoria queda acotada por una página
+(PDF) o un bloque comprimido (XLSX), y la descarga comienza antes de que se
+calculen las últimas secciones.
+"""
+
+import re
+import zipfile
+import logging
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Sequence
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+from .foto_export_service import _ZipStreamBuffer
+
+logger = logging.getLogger(__name__)
+
+# Filas escritas entre cada entrega de bytes al cliente
+FILAS_POR_BLOQUE = 500
+
+# Caracteres de control no permitidos en XML
+_CARACTERES_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Origen de las fechas seriales de Excel
+_EPOCH_EXCEL = datetime(1899, 12, 30)
+
+
+class SeccionReporte:
+    """
+    Sección de un reporte exportable: una hoja en XLSX, una tabla en PDF.
+
+    Attributes:
+        titulo (str): Nombre de la sección
+        columnas (list): Encabezados de la tabla
+        filas (iterable): Filas (secuencias de valores); puede ser un generador
+    """
+
+    def __init__(self, titulo: str, columnas: Sequence[str], filas: Iterable[Sequence[Any]]):
+        self.titulo = titulo
+        self.columnas = list(columnas)
+        self.filas = filas
+
+
+def _texto(valor) -> str:
+    """Representación de texto de un valor de celda"""
+    if valor is None:
+        return ''
+    if isinstance(valor, Decimal):
+        valor = float(valor)
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M')
+    if isinstance(valor, float):
+        return f'{valor:.2f}'
+    return str(valor)
+
+
+# ----------------------------------------------------------------------
+# XLSX
+# ----------------------------------------------------------------------
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{hojas}</Types>'
+)
+
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+
+# Estilos: 0 normal, 1 encabezado (negrita con fondo), 2 fecha y hora
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font></fonts>'
+    '<fills count="3"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF366092"/></patternFill></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_XLSX_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+    '<sheetData>'
+)
+
+
+def _nombre_hoja(titulo: str, usados: set) -> str:
+    """Nombre de hoja válido (máx. 31 caracteres, sin []:*?/\\) y único"""
+    base = re.sub(r'[\[\]:*?/\\]', ' ', titulo).strip()[:31] or 'Hoja'
+    nombre, n = base, 2
+    while nombre.lower() in usados:
+        sufijo = f' ({n})'
+        nombre, n = base[:31 - len(sufijo)] + sufijo, n + 1
+    usados.add(nombre.lower())
+    return nombre
+
+
+def _celda_xlsx(referencia: str, valor, estilo: int = 0) -> str:
+    atributo_estilo = f' s="{estilo}"' if estilo else ''
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, Decimal):
+        valor = float(valor)
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"{atributo_estilo}><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c r="{referencia}"{atributo_estilo}><v>{valor!r}</v></c>'
+    if isinstance(valor, datetime):
+        serial = (valor.replace(tzinfo=None) - _EPOCH_EXCEL) / timedelta(days=1)
+        return f'<c r="{referencia}" s="2"><v>{serial!r}</v></c>'
+    if isinstance(valor, date):
+        return _celda_xlsx(referencia, datetime(valor.year, valor.month, valor.day), estilo)
+
+    texto = escape(_CARACTERES_INVALIDOS_XML.sub('', str(valor)))
+    return f'<c r="{referencia}" t="inlineStr"{atributo_estilo}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila_xlsx(numero: int, valores: Sequence[Any], estilo: int = 0) -> str:
+    celdas = ''.join(
+        _celda_xlsx(f'{get_column_letter(columna)}{numero}', valor, estilo)
+        for columna, valor in enumerate(valores, start=1)
+    )
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+def iter_xlsx(secciones: Iterable[SeccionReporte]) -> Iterator[bytes]:
+    """
+    Genera un libro XLSX con una hoja por sección, por bloques.
+
+    Las hojas se escriben directamente como SpreadsheetML dentro de un ZIP en
+    streaming (celdas con texto en línea, sin tabla de strings compartidos), de
+    modo que los bytes de cada hoja salen mientras se recorren sus filas. El
+    libro y sus relaciones, que solo listan las hojas, van al final del ZIP.
+    """
+    buffer = _ZipStreamBuffer()
+    hojas = []
+    usados = set()
+
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for indice, seccion in enumerate(secciones, start=1):
+            hojas.append(_nombre_hoja(seccion.titulo, usados))
+
+            with zf.open(f'xl/worksheets/sheet{indice}.xml', 'w', force_zip64=True) as destino:
+                destino.write(_XLSX_HOJA_INICIO.encode('utf-8'))
+                destino.write(_fila_xlsx(1, seccion.columnas, estilo=1).encode('utf-8'))
+
+                for numero, fila in enumerate(seccion.filas, start=2):
+                    destino.write(_fila_xlsx(numero, fila).encode('utf-8'))
+                    if numero % FILAS_POR_BLOQUE == 0:
+                        datos = buffer.drain()
+                        if datos:
+                            yield datos
+
+                destino.write(b'</sheetData></worksheet>')
+
+            datos = buffer.drain()
+            if datos:
+                yield datos
+
+        if not hojas:
+            # Un libro necesita al menos una hoja
+            hojas.append('Reporte')
+            zf.writestr('xl/worksheets/sheet1.xml', _XLSX_HOJA_INICIO + '</sheetData></worksheet>')
+
+        zf.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES.format(hojas=''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(hojas) + 1)
+        )))
+        zf.writestr('_rels/.rels', _XLSX_RELS)
+        zf.writestr('xl/styles.xml', _XLSX_STYLES)
+        zf.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + ''.join(f'<sheet name="{escape(nombre, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i, nombre in enumerate(hojas, start=1))
+            + '</sheets></workbook>'
+        ))
+        zf.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join('<Relationship Id="rId{0}" '
+                      'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                      'Target="worksheets/sheet{0}.xml"/>'.format(i) for i in range(1, len(hojas) + 1))
+            + f'<Relationship Id="rId{len(hojas) + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>'
+        ))
+
+    # Directorio central del ZIP
+    datos = buffer.drain()
+    if datos:
+        yield datos
+
+
+# ----------------------------------------------------------------------
+# PDF
+# ----------------------------------------------------------------------
+
+class _PDFStream:
+    """
+    Escritor PDF mínimo en streaming (texto con fuentes estándar Helvetica).
+
+    Cada página se escribe al completarse; al final se agregan el árbol de
+    páginas, la tabla xref y el trailer. Solo se conservan los offsets de los
+    objetos, no su contenido.
+    """
+
+    # A4 horizontal, en puntos
+    ANCHO, ALTO = 842, 595
+    MARGEN = 36
+
+    # Objetos reservados: 1 catálogo, 2 árbol de páginas, 3-4 fuentes
+    _CATALOGO, _PAGINAS, _FUENTE, _FUENTE_NEGRITA = 1, 2, 3, 4
+
+    def __init__(self):
+        self._pendiente: List[bytes] = []
+        self._posicion = 0
+        self._offsets = {}
+        self._siguiente_id = 5
+        self._paginas: List[int] = []
+
+    def _escribir(self, datos: bytes):
+        self._pendiente.append(datos)
+        self._posicion += len(datos)
+
+    def _objeto(self, numero: int, cuerpo: bytes):
+        self._offsets[numero] = self._posicion
+        self._escribir(f'{numero} 0 obj\n'.encode('ascii') + cuerpo + b'\nendobj\n')
+
+    def _nuevo_id(self) -> int:
+        numero = self._siguiente_id
+        self._siguiente_id += 1
+        return numero
+
+    def drain(self) -> bytes:
+        datos = b''.join(self._pendiente)
+        self._pendiente.clear()
+        return datos
+
+    def iniciar(self):
+        self._escribir(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        for numero, fuente in ((self._FUENTE, 'Helvetica'), (self._FUENTE_NEGRITA, 'Helvetica-Bold')):
+            self._objeto(numero, (f'<< /Type /Font /Subtype /Type1 /BaseFont /{fuente} '
+                                  '/Encoding /WinAnsiEncoding >>').encode('ascii'))
+
+    def agregar_pagina(self, contenido: bytes):
+        contenido_id, pagina_id = self._nuevo_id(), self._nuevo_id()
+        self._objeto(contenido_id, f'<< /Length {len(contenido)} >>\nstream\n'.encode('ascii')
+                     + contenido + b'\nendstream')
+        self._objeto(pagina_id, (
+            f'<< /Type /Page /Parent {self._PAGINAS} 0 R /MediaBox [0 0 {self.ANCHO} {self.ALTO}] '
+            f'/Resources << /Font << /F1 {self._FUENTE} 0 R /F2 {self._FUENTE_NEGRITA} 0 R >> >> '
+            f'/Contents {contenido_id} 0 R >>'
+        ).encode('ascii'))
+        self._paginas.append(pagina_id)
+
+    def finalizar(self):
+        kids = ' '.join(f'{pagina} 0 R' for pagina in self._paginas)
+        self._objeto(self._PAGINAS, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._paginas)} >>'
+                     .encode('ascii'))
+        self._objeto(self._CATALOGO, f'<< /Type /Catalog /Pages {self._PAGINAS} 0 R >>'.encode('ascii'))
+
+        inicio_xref = self._posicion
+        total = self._siguiente_id
+        lineas = [f'xref\n0 {total}\n', '0000000000 65535 f \n']
+        lineas.extend(f'{self._offsets[numero]:010d} 00000 n \n' for numero in range(1, total))
+        lineas.append(f'trailer\n<< /Size {total} /Root {self._CATALOGO} 0 R >>\n'
+                      f'startxref\n{inicio_xref}\n%%EOF\n')
+        self._escribir(''.join(lineas).encode('ascii'))
+
+
+def _texto_pdf(texto: str) -> bytes:
+    """Cadena literal PDF en WinAnsi (cp1252) con paréntesis y barras escapados"""
+    codificado = texto.encode('cp1252', errors='replace')
+    return b'(' + codificado.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class _PaginadorPDF:
+    """Reparte líneas de texto en páginas y las entrega al escritor PDF"""
+
+    TAMANO = 8
+    INTERLINEA = 11
+
+    def __init__(self, pdf: _PDFStream, titulo: str):
+        self.pdf = pdf
+        self.titulo = titulo
+        self.numero = 0
+        self._lineas: List[bytes] = []
+        self._y = 0
+
+    def _nueva_pagina(self):
+        self.cerrar_pagina()
+        self.numero += 1
+        self._y = self.pdf.ALTO - self.pdf.MARGEN
+        self._texto(self.pdf.MARGEN, self._y, f'{self.titulo}  —  Página {self.numero}', negrita=True, tamano=9)
+        self._y -= self.INTERLINEA * 2
+
+    def _texto(self, x: float, y: float, texto: str, negrita: bool = False, tamano: int = None):
+        fuente = 'F2' if negrita else 'F1'
+        self._lineas.append(f'BT /{fuente} {tamano or self.TAMANO} Tf {x:.1f} {y:.1f} Td '.encode('ascii')
+                            + _texto_pdf(texto) + b' Tj ET')
+
+    def espacio(self, lineas: int = 1) -> bool:
+        """True si caben `lineas` más en la página actual"""
+        return bool(self.numero) and self._y - self.INTERLINEA * lineas >= self.pdf.MARGEN
+
+    def linea(self, celdas: Sequence[str], anchos: Sequence[float], negrita: bool = False,
+              encabezado: Sequence[str] = None):
+        """Escribe una fila; al cambiar de página repite el encabezado de la tabla"""
+        if not self.espacio():
+            self._nueva_pagina()
+            if encabezado is not None:
+                self.linea(encabezado, anchos, negrita=True)
+
+        x = self.pdf.MARGEN
+        for celda, ancho in zip(celdas, anchos):
+            # Ancho promedio de Helvetica ≈ 0,5 em
+            maximo = max(int(ancho / (self.TAMANO * 0.5)) - 1, 1)
+            texto = celda if len(celda) <= maximo else celda[:maximo - 1] + '…'
+            self._texto(x, self._y, texto, negrita=negrita)
+            x += ancho
+        self._y -= self.INTERLINEA
+
+    def titulo_seccion(self, titulo: str):
+        if not self.espacio(4):
+            self._nueva_pagina()
+        self._y -= self.INTERLINEA / 2
+        self._texto(self.pdf.MARGEN, self._y, titulo, negrita=True, tamano=11)
+        self._y -= self.INTERLINEA * 1.5
+
+    def cerrar_pagina(self):
+        if self._lineas:
+            self.pdf.agregar_pagina(b'\n'.join(self._lineas))
+            self._lineas = []
+
+
+def iter_pdf(secciones: Iterable[SeccionReporte], titulo: str = 'Reporte') -> Iterator[bytes]:
+    """
+    Genera un PDF con una tabla por sección, página por página.
+
+    Cada página se entrega apenas se completa; el encabezado de la tabla se
+    repite en cada página. No requiere dependencias: usa las fuentes estándar
+    del formato PDF.
+    """
+    pdf = _PDFStream()
+    paginador = _PaginadorPDF(pdf, titulo)
+    pdf.iniciar()
+
+    ancho_util = pdf.ANCHO - 2 * pdf.MARGEN
+    for seccion in secciones:
+        columnas = [str(columna) for columna in seccion.columnas] or ['']
+        anchos = [ancho_util / len(columnas)] * len(columnas)
+
+        paginador.titulo_seccion(seccion.titulo)
+        paginador.linea(columnas, anchos, negrita=True)
+        for fila in seccion.filas:
+            paginador.linea([_texto(valor) for valor in fila], anchos, encabezado=columnas)
+            datos = pdf.drain()
+            if datos:
+                yield datos
+
+    if not paginador.numero:
+        paginador.titulo_seccion('Sin datos')
+    paginador.cerrar_pagina()
+    pdf.finalizar()
+    yield pdf.drain()
+
+
+# ----------------------------------------------------------------------
+# Reportes exportables
+# ----------------------------------------------------------------------
+
+class ReporteExportService:
+    """Arma las secciones de los reportes y las entrega a los renderizadores"""
+
+    FORMATOS = {
+        'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', iter_xlsx),
+        'pdf': ('application/pdf', iter_pdf)
+    }
+
+    def __init__(self, db_session=None):
+        from .reporte_service import ReporteService
+
+        self.db = db_session
+        self.reportes = ReporteService(db_session)
+
+    def secciones_analisis_fallas(self, start_date: str, end_date: str) -> Iterator[SeccionReporte]:
+        """
+        Secciones del análisis de fallas. Cada sección se calcula recién
+        cuando el renderizador la pide, y el detalle se lee por lotes.
+        """
+        resumen = self.reportes._analyze_failures_period(start_date, end_date)
+        metricas = self.reportes._calculate_failure_metrics(start_date, end_date)
+        filas_resumen = [
+            ('Período', f'{start_date} a {end_date}'),
+            ('Total de fallas', resumen.get('total_fallas', 0)),
+            ('Fallas resueltas', resumen.get('fallas_resueltas', 0)),
+            ('Fallas abiertas', resumen.get('fallas_abiertas', 0)),
+            ('Tasa de resolución (%)', resumen.get('tasa_resolucion', 0)),
+        ]
+        filas_resumen.extend((f'Severidad {severidad}', cantidad)
+                             for severidad, cantidad in resumen.get('por_severidad', {}).items())
+        filas_resumen.extend((clave.replace('_', ' ').capitalize(), valor) for clave, valor in metricas.items())
+        yield SeccionReporte('Resumen', ('Indicador', 'Valor'), filas_resumen)
+
+        yield SeccionReporte(
+            'Por cámara',
+            ('Cámara', 'Tipo', 'Ubicación', 'Total', 'Resueltas', 'Severidad alta', 'Resolución (%)'),
+            ((fila['camara'], fila['tipo'], fila['ubicacion'], fila['total_fallas'], fila['resueltas'],
+              fila['severidad_alta'], fila['tasa_resolucion'])
+             for fila in self.reportes._analyze_failures_by_camera(start_date, end_date))
+        )
+
+        temporal = self.reportes._analyze_failures_temporal(start_date, end_date)
+        dias = ('Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado')
+        yield SeccionReporte('Por día de la semana', ('Día', 'Fallas'),
+                             ((dias[dia], cantidad) for dia, cantidad in temporal.get('por_dia_semana', {}).items()))
+        yield SeccionReporte('Por hora', ('Hora', 'Fallas'),
+                             ((f'{hora:02d}:00', cantidad) for hora, cantidad in temporal.get('por_hora', {}).items()))
+
+        yield SeccionReporte(
+            'Detalle de fallas',
+            ('ID', 'Fecha reporte', 'Título', 'Severidad', 'Estado', 'Cámara', 'Ubicación',
+             'Reportado por', 'Fecha resolución', 'Horas resolución'),
+            (tuple(fila) for fila in self.reportes.iter_failures_detail(start_date, end_date))
+        )
+
+    def exportar_analisis_fallas(self, start_date: str, end_date: str, formato: str):
+        """
+        Retorna (mimetype, nombre de archivo, generador de bytes) del análisis
+        de fallas en el formato pedido (xlsx o pdf)
+        """
+        if formato not in self.FORMATOS:
+            raise ValueError(f'Formato no soportado: {formato}')
+
+        mimetype, renderizador = self.FORMATOS[formato]
+        secciones = self.secciones_analisis_fallas(start_date, end_date)
+        if formato == 'pdf':
+            contenido = renderizador(secciones, titulo=f'Análisis de fallas {start_date} a {end_date}')
+        else:
+            contenido = renderizador(secciones)
+
+        nombre = f"analisis_fallas_{start_date}_{end_date}.{formato}"
+        return mimetype, nombre, contenido
@@ -0,0 +1,294 @@
+# services/reporte_programado_service.py
+"""
+Reportes programados
+Precalcula los reportes estándar (diario, semanal, mensual) al cerrar cada
+período y los guarda como snapshots comprimidos. El último reporte se sirve
+desde el snapshot y "qué cambió" se obtiene comparando dos snapshots
+consecutivos, sin volver a consultar el historial.
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from models.reporte_snapshot import ReporteSnapshot, PeriodicidadReporte
+
+logger = logging.getLogger(__name__)
+
+# Reportes que se precalculan en cada período. Solo reportes calculados sobre el
+# período: el dashboard refleja el estado al momento de generarlo y guardado
+# como un período pasado mostraría datos de otra fecha.
+TIPOS_REPORTE = ('fallas',)
+
+# Claves que cambian en cada generación y no aportan a las diferencias
+CLAVES_IGNORADAS = {'timestamp', 'metadata', 'periodo'}
+
+
+def periodo_cerrado(periodicidad: str, ahora: datetime = None) -> Tuple[datetime, datetime]:
+    """
+    Último período completo antes de `ahora` como rango [inicio, fin).
+    Semanas de lunes a lunes; meses calendario.
+    """
+    ahora = ahora or datetime.now()
+    hoy = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if periodicidad == PeriodicidadReporte.DIARIO:
+        return hoy - timedelta(days=1), hoy
+    if periodicidad == PeriodicidadReporte.SEMANAL:
+        fin = hoy - timedelta(days=hoy.weekday())
+        return fin - timedelta(days=7), fin
+    if periodicidad == PeriodicidadReporte.MENSUAL:
+        fin = hoy.replace(day=1)
+        return (fin - timedelta(days=1)).replace(day=1), fin
+    raise ValueError(f'Periodicidad no soportada: {periodicidad}')
+
+
+def _es_numero(valor) -> bool:
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def _ids_unicos(elementos: List[Any]) -> bool:
+    """Todos los elementos son dicts con un 'id' que no se repite en la lista"""
+    if not all(isinstance(elemento, dict) and elemento.get('id') is not None for elemento in elementos):
+        return False
+    ids = [elemento['id'] for elemento in elementos]
+    return len(ids) == len(set(ids))
+
+
+def _firma(elemento: Any) -> str:
+    """Representación canónica de un elemento para compararlo por valor"""
+    if isinstance(elemento, dict):
+        elemento = {clave: valor for clave, valor in elemento.items() if clave not in CLAVES_IGNORADAS}
+    return json.dumps(elemento, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def _restar(elementos: List[Any], otros: List[Any]) -> List[Any]:
+    """Elementos de `elementos` que no están en `otros`, respetando repeticiones"""
+    disponibles = Counter(_firma(otro) for otro in otros)
+    sobrantes = []
+    for elemento in elementos:
+        firma = _firma(elemento)
+        if disponibles[firma]:
+            disponibles[firma] -= 1
+        else:
+            sobrantes.append(elemento)
+    return sobrantes
+
+
+def comparar_reportes(anterior: Any, actual: Any, ruta: str = '') -> List[Dict[str, Any]]:
+    """
+    Diferencias entre dos reportes.
+
+    Retorna una lista de cambios con la ruta del valor (p. ej.
+    'resumen_fallas.total_fallas'). Los valores numéricos incluyen delta.
+    Las listas de registros con 'id' único se emparejan por id; el resto se
+    comparan como multiconjuntos (un elemento modificado aparece como quitado y
+    agregado), porque campos como 'tipo' o 'camara' pueden repetirse.
+    """
+    cambios = []
+
+    if isinstance(anterior, dict) and isinstance(actual, dict):
+        for clave in sorted(set(anterior) | set(actual), key=str):
+            if clave in CLAVES_IGNORADAS:
+                continue
+            cambios.extend(comparar_reportes(
+                anterior.get(clave), actual.get(clave), f'{ruta}.{clave}' if ruta else str(clave)
+            ))
+        return cambios
+
+    if isinstance(anterior, list) and isinstance(actual, list):
+        if _ids_unicos(anterior) and _ids_unicos(actual):
+            previos = {elemento['id']: elemento for elemento in anterior}
+            nuevos = {elemento['id']: elemento for elemento in actual}
+            agregados = [nuevos[k] for k in nuevos if k not in previos]
+            quitados = [previos[k] for k in previos if k not in nuevos]
+            comunes = sorted(previos.keys() & nuevos.keys(), key=str)
+        elif all(isinstance(elemento, dict) for elemento in anterior + actual):
+            agregados, quitados, comunes = _restar(actual, anterior), _restar(anterior, actual), []
+        else:
+            if anterior != actual:
+                cambios.append({'ruta': ruta, 'anterior': anterior, 'actual': actual})
+            return cambios
+
+        if agregados or quitados:
+            cambios.append({'ruta': ruta, 'agregados': agregados, 'quitados': quitados})
+        for identidad in comunes:
+            cambios.extend(comparar_reportes(previos[identidad], nuevos[identidad], f'{ruta}[{identidad}]'))
+        return cambios
+
+    if anterior == actual:
+        return cambios
+
+    cambio = {'ruta': ruta, 'anterior': anterior, 'actual': actual}
+    if _es_numero(anterior) and _es_numero(actual):
+        cambio['delta'] = round(actual - anterior, 2)
+        if anterior:
+            cambio['variacion_pct'] = round((actual - anterior) / abs(anterior) * 100, 2)
+    cambios.append(cambio)
+    return cambios
+
+
+class ReporteProgramadoService:
+    """Genera, consulta y compara snapshots de reportes programados"""
+
+    def __init__(self, db_session=None):
+        self.db = db_session
+
+    def _generar_datos(self, tipo: str, inicio: datetime, fin: datetime) -> Dict[str, Any]:
+        from .reporte_service import ReporteService
+
+        servicio = ReporteService(self.db)
+        # La fecha final del análisis es inclusiva
+        resultado = servicio.generate_failure_analysis_report(
+            inicio.date().isoformat(), (fin - timedelta(days=1)).date().isoformat()
+        )
+
+        if not resultado.get('success'):
+            raise RuntimeError(resultado.get('error', 'Error generando reporte'))
+        return resultado['report']
+
+    def generar(self, tipo: str, periodicidad: str, ahora: datetime = None,
+                forzar: bool = False) -> Optional[ReporteSnapshot]:
+        """
+        Genera el snapshot del último período cerrado.
+
+        Retorna None si ya existía (otro proceso pudo haberlo generado) y no se
+        pidió `forzar`; con `forzar` se reemplaza el contenido existente.
+        """
+        if tipo not in TIPOS_REPORTE:
+            raise ValueError(f'Tipo de reporte no soportado para snapshots por período: {tipo}')
+        inicio, fin = periodo_cerrado(periodicidad, ahora)
+
+        snapshot = self.db.query(ReporteSnapshot).filter_by(
+            tipo=tipo, periodicidad=periodicidad, periodo_inicio=inicio
+        ).first()
+        if snapshot is not None and not forzar:
+            return None
+
+        comienzo = time.perf_counter()
+        datos = self._generar_datos(tipo, inicio, fin)
+
+        if snapshot is None:
+            snapshot = ReporteSnapshot(tipo=tipo, periodicidad=periodicidad,
+                                       periodo_inicio=inicio, periodo_fin=fin)
+            self.db.add(snapshot)
+        snapshot.datos = datos
+        snapshot.duracion_ms = round((time.perf_counter() - comienzo) * 1000, 2)
+        snapshot.generado_en = datetime.utcnow()
+
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Otro proceso guardó el mismo período entre la consulta y el commit
+            self.db.rollback()
+            return None
+
+        logger.info(f"📊 Snapshot {tipo}/{periodicidad} {inicio:%Y-%m-%d}: "
+                    f"{snapshot.tamano_json} → {len(snapshot.contenido)} bytes")
+        return snapshot
+
+    def generar_pendientes(self, ahora: datetime = None,
+                           periodicidades: Tuple[str, ...] = PeriodicidadReporte.TODAS) -> int:
+        """
+        Genera los snapshots del último período cerrado que aún no existen.
+        Es idempotente: puede ejecutarse desde cron o en cada ciclo del programador.
+        """
+        generados = 0
+        for periodicidad in periodicidades:
+            for tipo in TIPOS_REPORTE:
+                try:
+                    if self.generar(tipo, periodicidad, ahora) is not None:
+                        generados += 1
+                except Exception as e:
+                    logger.error(f"Error generando snapshot {tipo}/{periodicidad}: {e}")
+                    self.db.rollback()
+        return generados
+
+    def listar(self, tipo: str = None, periodicidad: str = None, limit: int = 30) -> List[Dict[str, Any]]:
+        """Snapshots disponibles, más recientes primero (sin el contenido)"""
+        query = self.db.query(ReporteSnapshot)
+        if tipo:
+            query = query.filter(ReporteSnapshot.tipo == tipo)
+        if periodicidad:
+            query = query.filter(ReporteSnapshot.periodicidad == periodicidad)
+        snapshots = query.order_by(ReporteSnapshot.periodo_inicio.desc()).limit(limit).all()
+        return [snapshot.to_dict(incluir_datos=False) for snapshot in snapshots]
+
+    def ultimos(self, tipo: str, periodicidad: str, cantidad: int = 1) -> List[ReporteSnapshot]:
+        """Los `cantidad` snapshots más recientes de un tipo y periodicidad"""
+        return self.db.query(ReporteSnapshot).filter(
+            ReporteSnapshot.tipo == tipo,
+            ReporteSnapshot.periodicidad == periodicidad
+        ).order_by(ReporteSnapshot.periodo_inicio.desc()).limit(cantidad).all()
+
+    def ultimo(self, tipo: str, periodicidad: str) -> Optional[ReporteSnapshot]:
+        snapshots = self.ultimos(tipo, periodicidad)
+        return snapshots[0] if snapshots else None
+
+    def diferencias(self, tipo: str, periodicidad: str) -> Optional[Dict[str, Any]]:
+        """
+        Cambios entre los dos últimos snapshots ("qué cambió esta semana").
+        Retorna None si todavía no hay dos períodos guardados.
+        """
+        snapshots = self.ultimos(tipo, periodicidad, cantidad=2)
+        if len(snapshots) < 2:
+            return None
+
+        actual, anterior = snapshots
+        return {
+            'tipo': tipo,
+            'periodicidad': periodicidad,
+            'anterior': anterior.to_dict(incluir_datos=False),
+            'actual': actual.to_dict(incluir_datos=False),
+            'cambios': comparar_reportes(anterior.datos, actual.datos)
+        }
+
+
+class ProgramadorReportes:
+    """
+    Programador en proceso: revisa periódicamente si cerró un período y genera
+    los snapshots que falten. Alternativa a ejecutar `flask generar-reportes`
+    desde cron; con varios procesos la restricción única evita duplicados.
+    """
+
+    def __init__(self, app, intervalo: float = 300.0):
+        self.app = app
+        self.intervalo = intervalo
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def run(self):
+        from models import db
+
+        logger.info("🗓️ Programador de reportes iniciado")
+        with self.app.app_context():
+            while not self._detener.is_set():
+                try:
+                    generados = ReporteProgramadoService(db.session).generar_pendientes()
+                    if generados:
+                        logger.info(f"🗓️ Snapshots de reportes generados: {generados}")
+                except Exception as e:
+                    logger.error(f"Error en programador de reportes: {e}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                self._detener.wait(self.intervalo)
+        logger.info("🗓️ Programador de reportes detenido")
+
+    def start(self) -> threading.Thread:
+        """Inicia el programador en un hilo daemon"""
+        self._hilo = threading.Thread(target=self.run, name='programador-reportes', daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def stop(self, timeout: float = None):
+        """Detiene el programador al terminar el ciclo en curso"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
@@ -0,0 +1,440 @@
+# services/salud_flota_service.py
+"""
+Salud de la flota de equipos
+Calcula en una sola pasada, con NumPy, el puntaje de salud (0-100) de todas las
+UPS, NVR, switches, fuentes de poder y gabinetes: carga las columnas que usa
+get_system_health_score de cada modelo con una consulta por tabla (y una
+agregada para cámaras y puertos) en lugar de evaluar equipo por equipo con sus
+relaciones. Los puntajes quedan en caché hasta que se confirma un cambio de
+estado y responden los peores N equipos y los agregados por ubicación.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from .cadena_energia_service import _activos, _columna
+from .falla_rollup_service import _modelos_equipo
+
+logger = logging.getLogger(__name__)
+
+TIPOS_SALUD = ('ups', 'nvr', 'switch', 'fuente_poder', 'gabinete')
+ESTADO_ACTIVO = 'activo'
+
+# Puntajes bajo este umbral cuentan como críticos en los agregados
+UMBRAL_CRITICO = 50
+
+Clave = Tuple[str, int]
+
+
+def _texto(valor) -> str:
+    return str(getattr(valor, 'value', valor) or '').strip().lower()
+
+
+def _segundos(momento) -> float:
+    if momento is None:
+        return np.nan
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return momento.timestamp()
+
+
+def _arreglo(filas: List[Dict[str, Any]], campo: str, dtype=float, defecto=0.0) -> np.ndarray:
+    return np.array([defecto if fila.get(campo) is None else fila.get(campo) for fila in filas], dtype=dtype)
+
+
+def _tramos(valores: np.ndarray, tramos: List[Tuple[float, float]]) -> np.ndarray:
+    """Penalización del primer umbral superado (valor > umbral), de mayor a menor umbral"""
+    return np.select([valores > umbral for umbral, _ in tramos], [p for _, p in tramos], 0.0)
+
+
+def _no_activo(filas: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([_texto(fila.get('estado')) != ESTADO_ACTIVO for fila in filas], dtype=bool)
+
+
+def _consultar(session, tabla, columnas: Dict[str, Any], *condiciones) -> List[Dict[str, Any]]:
+    """Filas activas de la tabla con las columnas existentes (las ausentes quedan en None)"""
+    existentes = [c.label(n) for n, c in columnas.items() if c is not None]
+    consulta = select(tabla.c.id, *existentes).where(*_activos(tabla), *condiciones).order_by(tabla.c.id)
+    return [dict(fila) for fila in session.execute(consulta).mappings()]
+
+
+def _en_linea(tabla, filas: List[Dict[str, Any]], ahora: float) -> np.ndarray:
+    """
+    Versión vectorizada de EquipmentBase.is_online: último heartbeat entre la
+    columna guardada y el mapa en memoria del ingestor, dentro de la ventana
+    """
+    from .heartbeat_service import ingestor_heartbeats
+
+    memoria = ingestor_heartbeats.ultimos_vistos(tabla.name)
+    guardado = np.array([_segundos(fila.get('heartbeat')) for fila in filas], dtype=float)
+    en_memoria = np.array([_segundos(memoria.get(fila['id'])) for fila in filas], dtype=float)
+    ultimo = np.fmax(guardado, en_memoria)
+    return np.nan_to_num(ahora - ultimo, nan=np.inf) < ingestor_heartbeats.ventana
+
+
+def _vencido(filas: List[Dict[str, Any]], campo: str, ahora: float) -> np.ndarray:
+    fechas = np.array([_segundos(fila.get(campo)) for fila in filas], dtype=float)
+    return np.nan_to_num(fechas, nan=np.inf) <= ahora
+
+
+def _penalizaciones_ups(session, tabla, ahora: float):
+    filas = _consultar(session, tabla, {
+        'ubicacion_id': _columna(tabla, 'ubicacion_id'),
+        'estado': _columna(tabla, 'status', 'estado'),
+        'heartbeat': _columna(tabla, 'last_heartbeat', 'ultima_conexion'),
+        'bateria': _columna(tabla, 'battery_health_percentage'),
+        'nivel_carga': _columna(tabla, 'load_status'),
+        'proxima_prueba': _columna(tabla, 'next_battery_test')
+    })
+    bateria = _arreglo(filas, 'bateria', defecto=100.0)
+    nivel = np.array([_texto(fila.get('nivel_carga')) for fila in filas], dtype=object)
+    return filas, {
+        'bateria': np.where(bateria < 50, 40.0, np.where(bateria < 75, 20.0, 0.0)),
+        'carga': np.where(nivel == 'critical', 30.0, np.where(nivel == 'warning', 15.0, 0.0)),
+        'prueba_bateria_vencida': _vencido(filas, 'proxima_prueba', ahora) * 10.0,
+        'estado': _no_activo(filas) * 10.0,
+        'sin_heartbeat': ~_en_linea(tabla, filas, ahora) * 5.0
+    }
+
+
+def _penalizaciones_nvr(session, tabla, ahora: float):
+    filas = _consultar(session, tabla, {
+        'ubicacion_id': _columna(tabla, 'ubicacion_id'),
+        'estado': _columna(tabla, 'status', 'estado'),
+        'heartbeat': _columna(tabla, 'last_heartbeat', 'ultima_conexion'),
+        'capacidad': _columna(tabla, 'storage_capacity'),
+        'usado': _columna(tabla, 'storage_used')
+    })
+    capacidad, usado = _arreglo(filas, 'capacidad'), _arreglo(filas, 'usado')
+    uso = np.divide(usado * 100, capacidad, out=np.zeros_like(usado), where=capacidad > 0)
+
+    # Cámaras desconectadas como en NVR.get_cameras_status_summary: ni activas
+    # en línea, ni en mantenimiento, ni en falla
+    camaras = _modelos_equipo()['camara'].__table__
+    posicion = {fila['id']: i for i, fila in enumerate(filas)}
+    filas_camaras = _consultar(session, camaras, {
+        'nvr_id': camaras.c.nvr_id,
+        'estado': _columna(camaras, 'status', 'estado'),
+        'heartbeat': _columna(camaras, 'last_heartbeat', 'ultima_conexion')
+    }, camaras.c.nvr_id.isnot(None))
+    filas_camaras = [fila for fila in filas_camaras if fila['nvr_id'] in posicion]
+    desconectadas = np.zeros(len(filas))
+    if filas_camaras:
+        estado = np.array([_texto(fila.get('estado')) for fila in filas_camaras], dtype=object)
+        en_linea = (estado == ESTADO_ACTIVO) & _en_linea(camaras, filas_camaras, ahora)
+        otras = ~en_linea & ~np.isin(estado, ['mantenimiento', 'falla', 'fallando'])
+        desconectadas = np.bincount([posicion[fila['nvr_id']] for fila in filas_camaras],
+                                    weights=otras, minlength=len(filas))
+
+    return filas, {
+        'almacenamiento': _tramos(uso, [(90, 30.0), (80, 15.0)]),
+        'camaras_desconectadas': desconectadas * 10.0,
+        'estado': _no_activo(filas) * 10.0,
+        'sin_heartbeat': ~_en_linea(tabla, filas, ahora) * 5.0
+    }
+
+
+def _penalizaciones_switch(session, tabla, ahora: float):
+    from models.switch import SwitchPort, PortStatus, PortType
+
+    filas = _consultar(session, tabla, {
+        'ubicacion_id': _columna(tabla, 'ubicacion_id'),
+        'estado': _columna(tabla, 'status', 'estado'),
+        'puertos_totales': _columna(tabla, 'total_ports')
+    })
+
+    # Puertos en error, caídos y ocupados (no SwitchPort.is_available) por switch
+    puertos = SwitchPort.__table__
+    disponible = ((puertos.c.status == PortStatus.DOWN) & puertos.c.connected_equipment_id.is_(None)
+                  & puertos.c.port_type.in_([PortType.ETHERNET, PortType.GIGABIT]))
+    conteos = {
+        switch_id: (error or 0, caidos or 0, ocupados or 0)
+        for switch_id, error, caidos, ocupados in session.execute(
+            select(puertos.c.switch_id,
+                   func.sum(case((puertos.c.status == PortStatus.ERROR, 1), else_=0)),
+                   func.sum(case((puertos.c.status == PortStatus.DOWN, 1), else_=0)),
+                   func.sum(case((disponible, 0), else_=1)))
+            .group_by(puertos.c.switch_id)
+        )
+    }
+    error, caidos, ocupados = (
+        np.array([conteos.get(fila['id'], (0, 0, 0))[k] for fila in filas], dtype=float) for k in range(3)
+    )
+    totales = _arreglo(filas, 'puertos_totales')
+    utilizacion = np.divide(ocupados * 100, totales, out=np.zeros_like(ocupados), where=totales > 0)
+
+    return filas, {
+        'puertos_error': error * 15.0,
+        'puertos_caidos': caidos * 5.0,
+        'utilizacion': _tramos(utilizacion, [(90, 20.0), (80, 10.0)]),
+        'estado': _no_activo(filas) * 10.0
+    }
+
+
+def _penalizaciones_fuente(session, tabla, ahora: float):
+    filas = _consultar(session, tabla, {
+        'ubicacion_id': _columna(tabla, 'ubicacion_id'),
+        'estado': _columna(tabla, 'status', 'estado'),
+        'estado_psu': _columna(tabla, 'psu_status'),
+        'temperatura': _columna(tabla, 'temperature_celsius'),
+        'carga': _columna(tabla, 'load_percentage'),
+        'proximo_mantenimiento': _columna(tabla, 'next_maintenance')
+    })
+    estado_psu = np.array([_texto(fila.get('estado_psu')) for fila in filas], dtype=object)
+    return filas, {
+        'estado_psu': np.where(estado_psu == 'error', 40.0, np.where(estado_psu == 'warning', 20.0, 0.0)),
+        'temperatura': _tramos(_arreglo(filas, 'temperatura'), [(80, 30.0), (70, 15.0)]),
+        'carga': _tramos(_arreglo(filas, 'carga'), [(95, 30.0), (85, 15.0)]),
+        'mantenimiento_vencido': _vencido(filas, 'proximo_mantenimiento', ahora) * 10.0,
+        'estado': _no_activo(filas) * 10.0
+    }
+
+
+def _penalizaciones_gabinete(session, tabla, ahora: float):
+    from models.ocupacion_gabinete import OcupacionGabinete
+
+    filas = _consultar(session, tabla, {
+        'ubicacion_id': _columna(tabla, 'ubicacion_id'),
+        'estado': _columna(tabla, 'status', 'estado'),
+        'utilizacion': _columna(tabla, 'capacity_utilization')
+    })
+
+    # La ocupación del índice de gabinetes está al día con el equipamiento;
+    # capacity_utilization solo se recalcula al editar el gabinete
+    indice = OcupacionGabinete.__table__
+    ocupacion = {
+        gabinete_id: ocupadas * 100 / totales
+        for gabinete_id, ocupadas, totales in session.execute(
+            select(indice.c.gabinete_id, indice.c.unidades_ocupadas, indice.c.unidades_totales)
+            .where(indice.c.unidades_totales > 0)
+        )
+    }
+    utilizacion = np.array([ocupacion.get(fila['id'], fila.get('utilizacion') or 0.0) for fila in filas], dtype=float)
+
+    return filas, {
+        'ocupacion': _tramos(utilizacion, [(95, 30.0), (85, 15.0)]),
+        'estado': _no_activo(filas) * 10.0
+    }
+
+
+PENALIZACIONES = {
+    'ups': _penalizaciones_ups,
+    'nvr': _penalizaciones_nvr,
+    'switch': _penalizaciones_switch,
+    'fuente_poder': _penalizaciones_fuente,
+    'gabinete': _penalizaciones_gabinete
+}
+
+
+class SaludFlota:
+    """
+    Instantánea de los puntajes de salud en arreglos paralelos por equipo,
+    agrupados por tipo en el orden de TIPOS_SALUD.
+    """
+
+    def __init__(self, tipos: List[str], ids, ubicaciones, puntajes, penalizaciones: Dict[str, Dict[str, np.ndarray]],
+                 inicios: Dict[str, int]):
+        self.tipos = tipos
+        self.ids = ids
+        self.ubicaciones = ubicaciones
+        self.puntajes = puntajes
+        self.penalizaciones = penalizaciones
+        self.inicios = inicios
+        self.indice = {(tipo, int(equipo_id)): i for i, (tipo, equipo_id) in enumerate(zip(tipos, ids))}
+        self.creado = time.monotonic()
+
+    def motivos(self, i: int) -> Dict[str, int]:
+        """Penalizaciones distintas de cero del equipo en la posición i"""
+        tipo = self.tipos[i]
+        posicion = i - self.inicios[tipo]
+        return {motivo: int(valores[posicion]) for motivo, valores in self.penalizaciones[tipo].items()
+                if valores[posicion] > 0}
+
+    def mascara(self, tipo: Optional[str] = None, ubicacion_id: Optional[int] = None) -> np.ndarray:
+        mascara = np.ones(len(self.ids), dtype=bool)
+        if tipo:
+            mascara &= np.array(self.tipos, dtype=object) == tipo
+        if ubicacion_id is not None:
+            mascara &= self.ubicaciones == ubicacion_id
+        return mascara
+
+
+def construir_salud(session) -> SaludFlota:
+    """Carga cada tipo de equipo con una consulta por tabla y calcula todos los puntajes"""
+    modelos = _modelos_equipo()
+    ahora = datetime.now(timezone.utc).timestamp()
+
+    tipos, ids, ubicaciones, puntajes = [], [], [], []
+    penalizaciones, inicios = {}, {}
+    for tipo in TIPOS_SALUD:
+        filas, componentes = PENALIZACIONES[tipo](session, modelos[tipo].__table__, ahora)
+        inicios[tipo] = len(tipos)
+        penalizaciones[tipo] = componentes
+        total = np.sum(list(componentes.values()), axis=0) if filas else np.zeros(0)
+        puntajes.append(np.clip(100 - total, 0, 100).astype(np.int64))
+        tipos += [tipo] * len(filas)
+        ids += [fila['id'] for fila in filas]
+        ubicaciones += [fila.get('ubicacion_id') or 0 for fila in filas]
+
+    return SaludFlota(tipos, np.array(ids, dtype=np.int64), np.array(ubicaciones, dtype=np.int64),
+                      np.concatenate(puntajes), penalizaciones, inicios)
+
+
+def _resumen_puntajes(puntajes: np.ndarray) -> Dict[str, Any]:
+    if not len(puntajes):
+        return {'equipos': 0, 'promedio': None, 'minimo': None, 'criticos': 0}
+    return {
+        'equipos': int(len(puntajes)),
+        'promedio': round(float(puntajes.mean()), 1),
+        'minimo': int(puntajes.min()),
+        'criticos': int((puntajes < UMBRAL_CRITICO).sum())
+    }
+
+
+class MotorSaludFlota:
+    """
+    Puntajes de salud de la flota en caché.
+
+    Se recalculan al confirmar cambios en equipos, cámaras o puertos de este
+    proceso; `ttl` acota cuánto duran los que dependen del tiempo (heartbeats,
+    pruebas y mantenimientos vencidos) o de cambios en otros procesos.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._salud: Optional[SaludFlota] = None
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def salud(self, session=None) -> SaludFlota:
+        # Las consultas se hacen fuera del lock (ver PlanificadorEnergia.grafo)
+        with self._lock:
+            if self._salud is not None and time.monotonic() - self._salud.creado < self.ttl:
+                return self._salud
+            generacion = self._generacion
+        if session is None:
+            from models import db
+            session = db.session
+        inicio = time.perf_counter()
+        salud = construir_salud(session)
+        logger.info(f"Salud de la flota calculada: {len(salud.ids)} equipos "
+                    f"en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        with self._lock:
+            # Un invalidar() durante el cálculo gana: el resultado se entrega sin guardarlo
+            if self._generacion == generacion:
+                self._salud = salud
+        return salud
+
+    def invalidar(self):
+        with self._lock:
+            self._generacion += 1
+            self._salud = None
+
+    def puntaje(self, tipo: str, equipo_id: int, session=None) -> Optional[int]:
+        """Puntaje de un equipo (None si no está activo o el tipo no tiene puntaje)"""
+        salud = self.salud(session)
+        i = salud.indice.get((tipo, int(equipo_id)))
+        return None if i is None else int(salud.puntajes[i])
+
+    def peores(self, limite: int = 10, tipo: Optional[str] = None, ubicacion_id: Optional[int] = None,
+               session=None) -> List[Dict[str, Any]]:
+        """Los `limite` equipos con menor puntaje, con las penalizaciones que lo explican"""
+        from .nombres_equipo_service import resolutor_equipos
+
+        if limite <= 0:
+            return []
+        salud = self.salud(session)
+        candidatos = np.flatnonzero(salud.mascara(tipo, ubicacion_id))
+        if len(candidatos) > limite:
+            candidatos = candidatos[np.argpartition(salud.puntajes[candidatos], limite - 1)[:limite]]
+        candidatos = candidatos[np.lexsort((candidatos, salud.puntajes[candidatos]))]
+
+        claves = [(salud.tipos[i], int(salud.ids[i])) for i in candidatos]
+        nombres = resolutor_equipos.resolver(claves)
+        return [{
+            'tipo': clave[0],
+            'id': clave[1],
+            'nombre': (nombres.get(clave) or {}).get('nombre', ''),
+            'ubicacion_id': int(salud.ubicaciones[i]) or None,
+            'puntaje': int(salud.puntajes[i]),
+            'motivos': salud.motivos(i)
+        } for clave, i in zip(claves, candidatos)]
+
+    def por_ubicacion(self, tipo: Optional[str] = None, session=None) -> List[Dict[str, Any]]:
+        """Equipos, puntaje promedio y mínimo y críticos por ubicación, de peor a mejor promedio"""
+        from models import Ubicacion, db
+
+        session = session or db.session
+        salud = self.salud(session)
+        mascara = salud.mascara(tipo)
+        ubicaciones, inversa = np.unique(salud.ubicaciones[mascara], return_inverse=True)
+        puntajes = salud.puntajes[mascara]
+        if not len(ubicaciones):
+            return []
+
+        equipos = np.bincount(inversa, minlength=len(ubicaciones))
+        promedio = np.bincount(inversa, weights=puntajes, minlength=len(ubicaciones)) / equipos
+        minimo = np.full(len(ubicaciones), 100, dtype=np.int64)
+        np.minimum.at(minimo, inversa, puntajes)
+        criticos = np.bincount(inversa, weights=puntajes < UMBRAL_CRITICO, minlength=len(ubicaciones))
+
+        nombres = dict(session.execute(
+            select(Ubicacion.id, Ubicacion.nombre).where(Ubicacion.id.in_([int(u) for u in ubicaciones if u]))
+        ).all())
+        resultado = [{
+            'ubicacion_id': int(ubicacion) or None,
+            'nombre': nombres.get(int(ubicacion), 'Sin ubicación' if not ubicacion else ''),
+            'equipos': int(equipos[k]),
+            'promedio': round(float(promedio[k]), 1),
+            'minimo': int(minimo[k]),
+            'criticos': int(criticos[k])
+        } for k, ubicacion in enumerate(ubicaciones)]
+        resultado.sort(key=lambda u: (u['promedio'], u['minimo']))
+        return resultado
+
+    def resumen(self, session=None) -> Dict[str, Any]:
+        """Puntaje de la flota completa y de cada tipo de equipo"""
+        salud = self.salud(session)
+        return {
+            'flota': _resumen_puntajes(salud.puntajes),
+            'por_tipo': {tipo: _resumen_puntajes(salud.puntajes[salud.mascara(tipo)]) for tipo in TIPOS_SALUD},
+            'umbral_critico': UMBRAL_CRITICO
+        }
+
+
+motor_salud_flota = MotorSaludFlota()
+
+
+def _on_cambio(mapper, connection, objeto):
+    object_session(objeto).info['salud_flota_modificada'] = True
+
+
+def _on_commit(session):
+    if session.info.pop('salud_flota_modificada', None):
+        motor_salud_flota.invalidar()
+
+
+def _on_rollback(session):
+    session.info.pop('salud_flota_modificada', None)
+
+
+def registrar_listeners():
+    """Recalcula los puntajes al crear, modificar o eliminar equipos, cámaras, puertos o equipamiento de gabinetes"""
+    from models.switch import SwitchPort
+    from models.gabinete import GabineteEquipment
+
+    modelos = set(_modelos_equipo().values()) | {SwitchPort, GabineteEquipment}
+    listeners = [(Session, 'after_commit', _on_commit), (Session, 'after_rollback', _on_rollback)]
+    for modelo in modelos:
+        listeners += [(modelo, nombre, _on_cambio) for nombre in ('after_insert', 'after_update', 'after_delete')]
+
+    for objetivo, nombre, funcion in listeners:
+        if not event.contains(objetivo, nombre, funcion):
+            event.listen(objetivo, nombre, funcion)
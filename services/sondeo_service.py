@@ -0,0 +1,375 @@
+# services/sondeo_service.py
+"""
+Sondeo activo de alcanzabilidad de equipos
+Prueba concurrentemente con asyncio (conexión TCP, o eco ICMP donde el sistema
+lo permite) la IP y el puerto de cada equipo del inventario, con un límite de
+concurrencia por subred, mide la latencia y entrega los resultados al detector
+de transiciones, que actualiza el estado y el historial solo en los cambios
+confirmados
+"""
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import literal, select
+
+from .falla_rollup_service import _modelos_equipo
+from .transiciones_service import (
+    ATRIBUTOS_ESTADO, DetectorTransiciones, aplicar_transiciones, detector_transiciones, notificar_caidas
+)
+
+logger = logging.getLogger(__name__)
+
+# Tipos de equipo sondeados (claves de historial_estado_equipo)
+TIPOS_EQUIPO = ('camara', 'nvr', 'switch', 'ups', 'fuente_poder', 'gabinete')
+
+# Columnas según el esquema de cada tipo de equipo
+ATRIBUTOS_IP = ('ip_address', 'ip')
+ATRIBUTOS_PUERTO = ('puerto', 'web_port', 'monitoring_port', 'port')
+
+PUERTO_POR_DEFECTO = 80
+
+METODOS = ('auto', 'tcp', 'icmp')
+
+# Último resultado de sondeo por equipo en este proceso
+_ultimos: Dict[tuple, Dict[str, Any]] = {}
+_ultimos_lock = threading.Lock()
+
+
+def _resultado(resultado: str, latencia_ms: float = None, error: str = None, metodo: str = 'tcp') -> Dict[str, Any]:
+    return {
+        'alcanzable': resultado == 'exito',
+        'resultado': resultado,  # exito, rechazado, timeout, error
+        'latencia_ms': round(latencia_ms, 2) if latencia_ms is not None else None,
+        'error': error,
+        'metodo': metodo
+    }
+
+
+async def sondear_tcp(ip: str, puerto: int, timeout: float) -> Dict[str, Any]:
+    """Abre y cierra una conexión TCP; la latencia es el tiempo del handshake"""
+    inicio = time.perf_counter()
+    try:
+        _, escritor = await asyncio.wait_for(asyncio.open_connection(ip, puerto), timeout)
+    except asyncio.TimeoutError:
+        return _resultado('timeout', error=f'Sin respuesta en {timeout:g} s')
+    except ConnectionRefusedError:
+        return _resultado('rechazado', (time.perf_counter() - inicio) * 1000, f'Puerto {puerto} cerrado')
+    except OSError as e:
+        return _resultado('error', error=str(e))
+
+    latencia = (time.perf_counter() - inicio) * 1000
+    escritor.close()
+    try:
+        await escritor.wait_closed()
+    except OSError:
+        pass
+    return _resultado('exito', latencia)
+
+
+def icmp_permitido() -> bool:
+    """Si el sistema permite sockets ICMP sin privilegios (net.ipv4.ping_group_range)"""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def _checksum(datos: bytes) -> int:
+    if len(datos) % 2:
+        datos += b'\0'
+    suma = sum(struct.unpack(f'!{len(datos) // 2}H', datos))
+    suma = (suma >> 16) + (suma & 0xFFFF)
+    suma += suma >> 16
+    return ~suma & 0xFFFF
+
+
+async def sondear_icmp(ip: str, timeout: float, secuencia: int = 1) -> Dict[str, Any]:
+    """Eco ICMP con un socket datagrama sin privilegios (solo IPv4)"""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    sock.setblocking(False)
+    try:
+        carga = b'ufro-sondeo'
+        cabecera = struct.pack('!BBHHH', 8, 0, 0, 0, secuencia)
+        paquete = struct.pack('!BBHHH', 8, 0, _checksum(cabecera + carga), 0, secuencia) + carga
+
+        inicio = time.perf_counter()
+        limite = inicio + timeout
+        await loop.sock_connect(sock, (ip, 0))
+        await loop.sock_sendall(sock, paquete)
+        while True:
+            restante = limite - time.perf_counter()
+            if restante <= 0:
+                return _resultado('timeout', error=f'Sin respuesta en {timeout:g} s', metodo='icmp')
+            respuesta = await asyncio.wait_for(loop.sock_recv(sock, 1024), restante)
+            # El kernel asigna el identificador; basta con el tipo (0: echo reply) y la secuencia
+            if len(respuesta) >= 8 and respuesta[0] == 0 and struct.unpack('!H', respuesta[6:8])[0] == secuencia:
+                return _resultado('exito', (time.perf_counter() - inicio) * 1000, metodo='icmp')
+    except asyncio.TimeoutError:
+        return _resultado('timeout', error=f'Sin respuesta en {timeout:g} s', metodo='icmp')
+    except OSError as e:
+        return _resultado('error', error=str(e), metodo='icmp')
+    finally:
+        sock.close()
+
+
+class Sondeador:
+    """
+    Sondeo concurrente de una lista de objetivos {ip, puerto, ...}.
+
+    Un semáforo global acota los sockets abiertos y uno por subred (prefijo
+    /24 por defecto) evita saturar un mismo segmento. Con `metodo='auto'` se
+    usa TCP si el equipo tiene puerto y eco ICMP si no lo tiene y el sistema lo
+    permite (si no, TCP al puerto por defecto).
+    """
+
+    def __init__(self, timeout: float = 1.0, concurrencia: int = 512, concurrencia_subred: int = 64,
+                 prefijo_subred: int = 24, metodo: str = 'auto'):
+        if metodo not in METODOS:
+            raise ValueError(f"Método inválido: {metodo}. Use {', '.join(METODOS)}")
+        self.timeout = timeout
+        self.concurrencia = concurrencia
+        self.concurrencia_subred = concurrencia_subred
+        self.prefijo_subred = prefijo_subred
+        self.metodo = metodo
+        self._icmp = metodo != 'tcp' and icmp_permitido()
+
+    def _subred(self, ip: str) -> str:
+        try:
+            direccion = ipaddress.ip_address(ip)
+        except ValueError:
+            return ip
+        prefijo = self.prefijo_subred if direccion.version == 4 else 64
+        return str(ipaddress.ip_network(f'{ip}/{prefijo}', strict=False))
+
+    async def _sondear_uno(self, objetivo: Dict[str, Any], global_, subredes) -> Dict[str, Any]:
+        ip, puerto = objetivo['ip'], objetivo.get('puerto')
+        usar_icmp = self._icmp and (self.metodo == 'icmp' or not puerto) and ':' not in ip
+        async with global_, subredes[self._subred(ip)]:
+            if usar_icmp:
+                resultado = await sondear_icmp(ip, self.timeout)
+            else:
+                resultado = await sondear_tcp(ip, puerto or PUERTO_POR_DEFECTO, self.timeout)
+        return {**objetivo, **resultado}
+
+    async def sondear(self, objetivos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resultados en el mismo orden que los objetivos"""
+        global_ = asyncio.Semaphore(self.concurrencia)
+        subredes = defaultdict(lambda: asyncio.Semaphore(self.concurrencia_subred))
+        return await asyncio.gather(*(self._sondear_uno(o, global_, subredes) for o in objetivos))
+
+    def sondear_todos(self, objetivos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Versión síncrona de sondear (crea su propio event loop)"""
+        return asyncio.run(self.sondear(objetivos))
+
+    @classmethod
+    def desde_entorno(cls, **kwargs):
+        """Parámetros desde SONDEO_TIMEOUT, SONDEO_CONCURRENCIA, SONDEO_CONCURRENCIA_SUBRED y SONDEO_METODO"""
+        parametros = {
+            'timeout': float(os.environ.get('SONDEO_TIMEOUT', 1.0)),
+            'concurrencia': int(os.environ.get('SONDEO_CONCURRENCIA', 512)),
+            'concurrencia_subred': int(os.environ.get('SONDEO_CONCURRENCIA_SUBRED', 64)),
+            'metodo': os.environ.get('SONDEO_METODO', 'auto')
+        }
+        parametros.update(kwargs)
+        return cls(**parametros)
+
+
+def _primera(tabla, atributos):
+    return next((tabla.c[nombre] for nombre in atributos if nombre in tabla.c), None)
+
+
+class SondeoService:
+    """Sondeo del inventario y registro de los cambios de estado confirmados"""
+
+    def __init__(self, db_session=None, sondeador: Sondeador = None, detector: DetectorTransiciones = None):
+        self.db = db_session
+        self.sondeador = sondeador or Sondeador.desde_entorno()
+        self.detector = detector or detector_transiciones
+
+    @staticmethod
+    def _columnas(equipo_tipo: str):
+        """(tabla, ip, puerto, estado) del tipo, o None si no tiene IP o estado"""
+        tabla = _modelos_equipo()[equipo_tipo].__table__
+        ip, estado = _primera(tabla, ATRIBUTOS_IP), _primera(tabla, ATRIBUTOS_ESTADO)
+        if ip is None or estado is None:
+            return None
+        return tabla, ip, _primera(tabla, ATRIBUTOS_PUERTO), estado
+
+    def objetivos(self, equipo_tipo: str = None, equipo_id: int = None) -> List[Dict[str, Any]]:
+        """Equipos activos con IP: una consulta por tipo"""
+        tipos = (equipo_tipo,) if equipo_tipo else TIPOS_EQUIPO
+        objetivos = []
+        for tipo in tipos:
+            if tipo not in TIPOS_EQUIPO:
+                raise ValueError(f"Tipo de equipo inválido: {tipo}")
+            columnas = self._columnas(tipo)
+            if columnas is None:
+                continue
+            tabla, ip, puerto, estado = columnas
+
+            query = select(tabla.c.id, ip, puerto if puerto is not None else literal(None), estado).where(
+                ip.isnot(None), ip != ''
+            )
+            if 'activo' in tabla.c:
+                query = query.where(tabla.c.activo == True)  # noqa: E712
+            if 'deleted' in tabla.c:
+                query = query.where(tabla.c.deleted == False)  # noqa: E712
+            if equipo_id is not None:
+                query = query.where(tabla.c.id == equipo_id)
+
+            for fila in self.db.execute(query):
+                objetivos.append({
+                    'equipo_tipo': tipo,
+                    'equipo_id': fila[0],
+                    'ip': fila[1].strip(),
+                    'puerto': fila[2],
+                    'estado': getattr(fila[3], 'value', fila[3])
+                })
+        return objetivos
+
+    def _registrar(self, resultados: List[Dict[str, Any]], simular: bool = False):
+        """
+        Pasa un sondeo por el detector y escribe las transiciones confirmadas;
+        FIA y notificaciones solo para las caídas efectivamente aplicadas
+        """
+        transiciones = self.detector.observar(resultados, simular=simular)
+        if simular:
+            return transiciones, None
+        aplicadas = aplicar_transiciones(self.db, transiciones)
+        return aplicadas, notificar_caidas(self.db, aplicadas)
+
+    @staticmethod
+    def _recordar(resultados: List[Dict[str, Any]]):
+        momento = datetime.utcnow().isoformat()
+        with _ultimos_lock:
+            for resultado in resultados:
+                _ultimos[(resultado['equipo_tipo'], resultado['equipo_id'])] = {**resultado, 'timestamp': momento}
+
+    @staticmethod
+    def ultimo(equipo_tipo: str, equipo_id: int) -> Optional[Dict[str, Any]]:
+        """Último resultado de sondeo del equipo en este proceso"""
+        with _ultimos_lock:
+            return _ultimos.get((equipo_tipo, equipo_id))
+
+    def sondear(self, equipo_tipo: str = None, simular: bool = False) -> Dict[str, Any]:
+        """
+        Sondea todo el inventario (o un tipo) y aplica los cambios de estado
+        confirmados.
+
+        Args:
+            equipo_tipo: Tipo de equipo (None: todos)
+            simular: Solo informa los cambios, sin escribirlos ni contarlos
+        """
+        objetivos = self.objetivos(equipo_tipo)
+        inicio = time.monotonic()
+        resultados = self.sondeador.sondear_todos(objetivos)
+        duracion = time.monotonic() - inicio
+        self._recordar(resultados)
+
+        transiciones, notificaciones = self._registrar(resultados, simular)
+        cambios = [
+            {'equipo_tipo': t['equipo_tipo'], 'equipo_id': t['equipo_id'],
+             'estado_anterior': t['estado_anterior'], 'estado_nuevo': t['estado_nuevo']}
+            for t in transiciones
+        ]
+
+        latencias = sorted(r['latencia_ms'] for r in resultados if r['alcanzable'])
+        return {
+            'total': len(resultados),
+            'alcanzables': len(latencias),
+            'no_alcanzables': len(resultados) - len(latencias),
+            'latencia_mediana_ms': latencias[len(latencias) // 2] if latencias else None,
+            'duracion_s': round(duracion, 2),
+            'simulado': simular,
+            'cambios': cambios,
+            'notificaciones': notificaciones
+        }
+
+    def probar(self, ip: str, puerto: int = None) -> Dict[str, Any]:
+        """
+        Sondea una dirección solo para informar: no pasa por el detector ni
+        escribe estados (pruebas manuales de equipos fuera del inventario sondeado)
+        """
+        resultado = self.sondeador.sondear_todos([{'ip': ip.strip(), 'puerto': puerto}])[0]
+        resultado['timestamp'] = datetime.utcnow().isoformat()
+        return resultado
+
+    def sondear_equipo(self, equipo_tipo: str, equipo_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Sondea un equipo; su estado cambia cuando el detector confirma la
+        transición (fallos o éxitos consecutivos suficientes).
+
+        Returns:
+            Dict con el resultado y 'estado' final, o None si el equipo no
+            existe, no está activo o no tiene IP
+        """
+        objetivos = self.objetivos(equipo_tipo, equipo_id)
+        if not objetivos:
+            return None
+        resultado = self.sondeador.sondear_todos(objetivos)[0]
+        self._recordar([resultado])
+        aplicadas, _ = self._registrar([resultado])
+        if aplicadas:
+            resultado['estado'] = aplicadas[0]['estado_nuevo']
+        resultado.update(self.detector.contadores(equipo_tipo, equipo_id))
+        resultado['timestamp'] = datetime.utcnow().isoformat()
+        return resultado
+
+
+class SondeoWorker:
+    """
+    Sondeo periódico del inventario.
+    Se ejecuta con `flask sondear-equipos --continuo` o en un hilo con start().
+    """
+
+    def __init__(self, app, intervalo: float = 60.0, equipo_tipo: str = None):
+        self.app = app
+        self.intervalo = intervalo
+        self.equipo_tipo = equipo_tipo
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def run(self):
+        from models import db
+
+        logger.info("📡 Sondeo de equipos iniciado")
+        sondeador = Sondeador.desde_entorno()
+        with self.app.app_context():
+            while not self._detener.is_set():
+                try:
+                    resumen = SondeoService(db.session, sondeador).sondear(self.equipo_tipo)
+                    logger.info(
+                        f"📡 Sondeo: {resumen['alcanzables']}/{resumen['total']} alcanzables, "
+                        f"{len(resumen['cambios'])} cambios, {resumen['duracion_s']} s"
+                    )
+                except Exception as e:
+                    logger.error(f"Error en sondeo de equipos: {e}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                self._detener.wait(self.intervalo)
+        logger.info("📡 Sondeo de equipos detenido")
+
+    def start(self) -> threading.Thread:
+        """Inicia el worker en un hilo daemon"""
+        self._hilo = threading.Thread(target=self.run, name='sondeo-worker', daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def stop(self, timeout: float = None):
+        """Detiene el worker al terminar el sondeo en curso"""
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout)
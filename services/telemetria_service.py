@@ -0,0 +1,424 @@
+# services/telemetria_service.py
+"""
+Servicio de series de tiempo de telemetría
+Registra muestras crudas solo por inserción, las compacta en bloques columnares
+(arreglos de NumPy) a 1 minuto, 1 hora y 1 día por serie, aplica la retención
+de cada resolución y responde consultas por rango leyendo solo los bloques de
+la resolución adecuada
+"""
+
+import logging
+import math
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, select, tuple_
+
+from models.telemetria import ResolucionTelemetria, TelemetriaBloque, TelemetriaMuestra
+
+logger = logging.getLogger(__name__)
+
+TIPOS_EQUIPO = ('camara', 'nvr', 'switch', 'ups', 'fuente', 'fuente_poder', 'gabinete')
+
+PATRON_METRICA = re.compile(r'^[a-z][a-z0-9_]{0,49}$')
+
+# Días que se conservan las muestras crudas y cada resolución (None: sin límite)
+RETENCION_DIAS = {'crudo': 7, ResolucionTelemetria.MINUTO: 14, ResolucionTelemetria.HORA: 400,
+                  ResolucionTelemetria.DIA: None}
+
+# Muestras con fecha futura más allá de este margen se rechazan
+MARGEN_RELOJ = timedelta(minutes=5)
+
+LOTE_COMPACTACION = 50000
+LOTE = 500
+
+EPOCA = datetime(1970, 1, 1)
+
+# (segundos absolutos o desplazamientos, conteos, sumas, mínimos, máximos)
+Puntos = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _segundos(momento: datetime) -> int:
+    return int((momento - EPOCA).total_seconds())
+
+
+def _fecha(segundos: int) -> datetime:
+    return EPOCA + timedelta(seconds=int(segundos))
+
+
+def fusionar(*partes: Puntos) -> Puntos:
+    """
+    Une puntos de igual resolución: los que caen en el mismo instante suman
+    conteos y sumas y combinan mínimos y máximos
+    """
+    tiempos = np.concatenate([p[0] for p in partes]).astype(np.int64)
+    unicos, inverso = np.unique(tiempos, return_inverse=True)
+    n = len(unicos)
+
+    conteos = np.bincount(inverso, weights=np.concatenate([p[1] for p in partes]), minlength=n)
+    sumas = np.bincount(inverso, weights=np.concatenate([p[2] for p in partes]), minlength=n)
+    minimos = np.full(n, np.inf)
+    np.minimum.at(minimos, inverso, np.concatenate([p[3] for p in partes]))
+    maximos = np.full(n, -np.inf)
+    np.maximum.at(maximos, inverso, np.concatenate([p[4] for p in partes]))
+    return unicos, conteos.astype(np.uint32), sumas, minimos, maximos
+
+
+def _codificar(puntos: Puntos) -> Dict[str, Any]:
+    desplazamientos, conteos, sumas, minimos, maximos = puntos
+    return {
+        'puntos': len(desplazamientos),
+        'desplazamientos': desplazamientos.astype(np.uint32).tobytes(),
+        'conteos': conteos.astype(np.uint32).tobytes(),
+        'sumas': sumas.astype(np.float64).tobytes(),
+        'minimos': minimos.astype(np.float64).tobytes(),
+        'maximos': maximos.astype(np.float64).tobytes()
+    }
+
+
+def _decodificar(fila) -> Puntos:
+    return (
+        np.frombuffer(fila.desplazamientos, dtype=np.uint32).astype(np.int64),
+        np.frombuffer(fila.conteos, dtype=np.uint32),
+        np.frombuffer(fila.sumas, dtype=np.float64),
+        np.frombuffer(fila.minimos, dtype=np.float64),
+        np.frombuffer(fila.maximos, dtype=np.float64)
+    )
+
+
+class TelemetriaService:
+    """Registro, compactación, retención y consulta de telemetría"""
+
+    def __init__(self, db_session=None, retencion_dias: Dict[str, Optional[int]] = None):
+        self.db = db_session
+        self.retencion_dias = {**RETENCION_DIAS, **(retencion_dias or {})}
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def registrar(self, muestras: Iterable[Dict[str, Any]], commit: bool = True) -> Dict[str, Any]:
+        """
+        Inserta muestras {tipo, id, metrica, valor, timestamp opcional (ISO 8601)}
+        con un solo INSERT por lotes.
+
+        Returns:
+            Dict: registradas, rechazadas y el detalle de los rechazos
+        """
+        ahora = datetime.utcnow()
+        filas, rechazos = [], []
+        for indice, muestra in enumerate(muestras):
+            try:
+                tipo = str(muestra.get('tipo', '')).lower()
+                if tipo not in TIPOS_EQUIPO:
+                    raise ValueError(f"tipo de equipo no soportado: {tipo}")
+                metrica = str(muestra.get('metrica', ''))
+                if not PATRON_METRICA.match(metrica):
+                    raise ValueError(f"métrica inválida: {metrica}")
+                valor = float(muestra['valor'])
+                if not math.isfinite(valor):
+                    raise ValueError('valor no finito')
+                momento = muestra.get('timestamp') or ahora
+                if isinstance(momento, str):
+                    momento = datetime.fromisoformat(momento.replace('Z', '+00:00'))
+                if momento.tzinfo is not None:
+                    momento = (momento - momento.utcoffset()).replace(tzinfo=None)
+                if momento > ahora + MARGEN_RELOJ:
+                    raise ValueError('timestamp en el futuro')
+                filas.append({
+                    'equipo_tipo': tipo,
+                    'equipo_id': int(muestra['id']),
+                    'metrica': metrica,
+                    'momento': momento,
+                    'valor': valor
+                })
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                rechazos.append({'indice': indice, 'error': str(e)})
+
+        for inicio in range(0, len(filas), LOTE):
+            self.db.execute(TelemetriaMuestra.__table__.insert(), filas[inicio:inicio + LOTE])
+        if commit:
+            self.db.commit()
+        return {'registradas': len(filas), 'rechazadas': len(rechazos), 'errores': rechazos[:50]}
+
+    def registrar_valores(self, equipo_tipo: str, equipo_id: int, valores: Dict[str, Any],
+                          momento: datetime = None, commit: bool = True) -> int:
+        """Registra las métricas informadas de un equipo (omite las None)"""
+        muestras = [
+            {'tipo': equipo_tipo, 'id': equipo_id, 'metrica': metrica, 'valor': valor, 'timestamp': momento}
+            for metrica, valor in valores.items() if valor is not None
+        ]
+        if not muestras:
+            return 0
+        return self.registrar(muestras, commit=commit)['registradas']
+
+    # ------------------------------------------------------------------
+    # Compactación
+    # ------------------------------------------------------------------
+
+    def _bloques_existentes(self, resolucion: str, claves: List[tuple]) -> Dict[tuple, Any]:
+        """Bloques ya guardados para (tipo, id, metrica, inicio), con IN por lotes"""
+        T = TelemetriaBloque
+        existentes = {}
+        for inicio in range(0, len(claves), LOTE):
+            lote = claves[inicio:inicio + LOTE]
+            for fila in self.db.execute(
+                select(T.id, T.equipo_tipo, T.equipo_id, T.metrica, T.inicio, T.desplazamientos,
+                       T.conteos, T.sumas, T.minimos, T.maximos)
+                .where(T.resolucion == resolucion,
+                       tuple_(T.equipo_tipo, T.equipo_id, T.metrica, T.inicio).in_(lote))
+            ):
+                existentes[(fila.equipo_tipo, fila.equipo_id, fila.metrica, fila.inicio)] = fila
+        return existentes
+
+    def _compactar_resolucion(self, muestras, resolucion: str) -> int:
+        """Fusiona las muestras en los bloques de una resolución; devuelve los bloques escritos"""
+        paso = ResolucionTelemetria.SEGUNDOS[resolucion]
+        tramo = paso * ResolucionTelemetria.PUNTOS_POR_BLOQUE[resolucion]
+
+        puntos = muestras.assign(instante=muestras['segundos'] // paso * paso).groupby(
+            ['equipo_tipo', 'equipo_id', 'metrica', 'instante'], sort=True
+        )['valor'].agg(['count', 'sum', 'min', 'max']).reset_index()
+        puntos['bloque'] = puntos['instante'] // tramo * tramo
+
+        grupos = {
+            (tipo, int(equipo_id), metrica, _fecha(bloque)): grupo
+            for (tipo, equipo_id, metrica, bloque), grupo
+            in puntos.groupby(['equipo_tipo', 'equipo_id', 'metrica', 'bloque'], sort=False)
+        }
+        existentes = self._bloques_existentes(resolucion, list(grupos))
+
+        ahora = datetime.utcnow()
+        nuevos, actualizados = [], []
+        for clave, grupo in grupos.items():
+            inicio = clave[3]
+            datos = (
+                grupo['instante'].to_numpy(np.int64) - _segundos(inicio),
+                grupo['count'].to_numpy(np.float64),
+                grupo['sum'].to_numpy(np.float64),
+                grupo['min'].to_numpy(np.float64),
+                grupo['max'].to_numpy(np.float64)
+            )
+            existente = existentes.get(clave)
+            if existente is not None:
+                datos = fusionar(_decodificar(existente), datos)
+                actualizados.append({'b_id': existente.id, 'updated_at': ahora, **_codificar(datos)})
+            else:
+                nuevos.append({
+                    'equipo_tipo': clave[0], 'equipo_id': clave[1], 'metrica': clave[2],
+                    'resolucion': resolucion, 'inicio': inicio, 'fin': inicio + timedelta(seconds=tramo),
+                    'updated_at': ahora, **_codificar(fusionar(datos))
+                })
+
+        tabla = TelemetriaBloque.__table__
+        if actualizados:
+            columnas = ('puntos', 'desplazamientos', 'conteos', 'sumas', 'minimos', 'maximos', 'updated_at')
+            sentencia = tabla.update().where(tabla.c.id == bindparam('b_id')).values(
+                {columna: bindparam(columna) for columna in columnas}
+            )
+            for inicio in range(0, len(actualizados), LOTE):
+                self.db.execute(sentencia, actualizados[inicio:inicio + LOTE])
+        for inicio in range(0, len(nuevos), LOTE):
+            self.db.execute(tabla.insert(), nuevos[inicio:inicio + LOTE])
+        return len(nuevos) + len(actualizados)
+
+    def compactar(self, limite: int = LOTE_COMPACTACION) -> int:
+        """
+        Compacta las muestras pendientes (hasta `limite`) en los bloques de
+        todas las resoluciones y las marca como compactadas, en una sola
+        transacción. Se marcan fila por fila y no con un id máximo: una muestra
+        de id menor confirmada después (otra transacción más lenta) sigue
+        pendiente y entra en el ciclo siguiente. Debe ejecutarse un único
+        compactador a la vez.
+
+        Returns:
+            int: Muestras compactadas
+        """
+        import pandas as pd
+
+        M = TelemetriaMuestra
+        filas = self.db.execute(
+            select(M.id, M.equipo_tipo, M.equipo_id, M.metrica, M.momento, M.valor)
+            .where(M.compactada == False).order_by(M.id).limit(limite)  # noqa: E712
+        ).all()
+        if not filas:
+            self.db.rollback()
+            return 0
+
+        muestras = pd.DataFrame(filas, columns=['id', 'equipo_tipo', 'equipo_id', 'metrica', 'momento', 'valor'])
+        muestras['segundos'] = (pd.to_datetime(muestras['momento']) - pd.Timestamp(EPOCA)) // pd.Timedelta(seconds=1)
+
+        bloques = sum(self._compactar_resolucion(muestras, resolucion) for resolucion in ResolucionTelemetria.TODAS)
+        tabla, ids = M.__table__, [fila.id for fila in filas]
+        for inicio in range(0, len(ids), LOTE):
+            self.db.execute(tabla.update().where(tabla.c.id.in_(ids[inicio:inicio + LOTE])).values(compactada=True))
+        self.db.commit()
+
+        logger.debug(f"Telemetría compactada: {len(filas)} muestras en {bloques} bloques")
+        return len(filas)
+
+    def compactar_todo(self) -> int:
+        """Compacta por lotes hasta que no quedan muestras pendientes"""
+        total = 0
+        while True:
+            compactadas = self.compactar()
+            total += compactadas
+            if compactadas < LOTE_COMPACTACION:
+                return total
+
+    def purgar(self, ahora: datetime = None) -> Dict[str, int]:
+        """Elimina las muestras crudas ya compactadas y los bloques fuera de retención"""
+        ahora = ahora or datetime.utcnow()
+        eliminados = {}
+
+        dias = self.retencion_dias.get('crudo')
+        if dias is not None:
+            eliminados['crudo'] = self.db.execute(
+                TelemetriaMuestra.__table__.delete().where(
+                    TelemetriaMuestra.momento < ahora - timedelta(days=dias),
+                    TelemetriaMuestra.compactada == True  # noqa: E712
+                )
+            ).rowcount
+
+        for resolucion in ResolucionTelemetria.TODAS:
+            dias = self.retencion_dias.get(resolucion)
+            if dias is None:
+                continue
+            eliminados[resolucion] = self.db.execute(
+                TelemetriaBloque.__table__.delete().where(
+                    TelemetriaBloque.resolucion == resolucion,
+                    TelemetriaBloque.fin < ahora - timedelta(days=dias)
+                )
+            ).rowcount
+
+        self.db.commit()
+        return eliminados
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def _elegir_resolucion(self, desde: datetime, hasta: datetime, max_puntos: int) -> str:
+        """La resolución más fina que no supera max_puntos y conserva el rango pedido"""
+        segundos = (hasta - desde).total_seconds()
+        for resolucion in ResolucionTelemetria.TODAS:
+            dias = self.retencion_dias.get(resolucion)
+            if dias is not None and desde < datetime.utcnow() - timedelta(days=dias):
+                continue
+            if segundos / ResolucionTelemetria.SEGUNDOS[resolucion] <= max_puntos:
+                return resolucion
+        return ResolucionTelemetria.DIA
+
+    def serie(self, equipo_tipo: str, equipo_id: int, metrica: str, desde: datetime = None,
+              hasta: datetime = None, max_puntos: int = 500, resolucion: str = None) -> Dict[str, Any]:
+        """
+        Serie de una métrica en [desde, hasta) lista para Chart.js: etiquetas y
+        arreglos de promedio, mínimo, máximo y muestras por punto. Las muestras
+        aún no compactadas (último ciclo del compactador) no se incluyen.
+        """
+        hasta = hasta or datetime.utcnow()
+        desde = desde or hasta - timedelta(days=1)
+        if desde >= hasta:
+            raise ValueError("La fecha desde debe ser anterior a hasta")
+        if resolucion is None:
+            resolucion = self._elegir_resolucion(desde, hasta, max_puntos)
+        elif resolucion not in ResolucionTelemetria.TODAS:
+            raise ValueError(f"Resolución inválida: {resolucion}. Use {', '.join(ResolucionTelemetria.TODAS)}")
+
+        T = TelemetriaBloque
+        bloques = self.db.execute(
+            select(T.inicio, T.desplazamientos, T.conteos, T.sumas, T.minimos, T.maximos).where(
+                T.equipo_tipo == equipo_tipo, T.equipo_id == equipo_id, T.metrica == metrica,
+                T.resolucion == resolucion, T.inicio < hasta, T.fin > desde
+            ).order_by(T.inicio)
+        ).all()
+
+        if bloques:
+            partes = []
+            for bloque in bloques:
+                desplazamientos, *resto = _decodificar(bloque)
+                partes.append((desplazamientos + _segundos(bloque.inicio), *resto))
+            instantes, conteos, sumas, minimos, maximos = (np.concatenate(arreglos) for arreglos in zip(*partes))
+            dentro = (instantes >= _segundos(desde)) & (instantes < _segundos(hasta))
+            instantes, conteos, sumas = instantes[dentro], conteos[dentro], sumas[dentro]
+            minimos, maximos = minimos[dentro], maximos[dentro]
+        else:
+            instantes = conteos = sumas = minimos = maximos = np.array([])
+
+        promedios = np.divide(sumas, conteos, out=np.zeros(len(sumas)), where=conteos > 0)
+        return {
+            'equipo_tipo': equipo_tipo,
+            'equipo_id': equipo_id,
+            'metrica': metrica,
+            'resolucion': resolucion,
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'labels': [_fecha(s).isoformat() for s in instantes],
+            'promedio': np.round(promedios, 3).tolist(),
+            'minimo': np.round(minimos, 3).tolist(),
+            'maximo': np.round(maximos, 3).tolist(),
+            'muestras': conteos.astype(int).tolist()
+        }
+
+    def metricas(self, equipo_tipo: str, equipo_id: int) -> List[str]:
+        """Métricas con datos compactados del equipo"""
+        T = TelemetriaBloque
+        return [fila[0] for fila in self.db.execute(
+            select(T.metrica).where(
+                T.equipo_tipo == equipo_tipo, T.equipo_id == equipo_id, T.resolucion == ResolucionTelemetria.DIA
+            ).distinct().order_by(T.metrica)
+        )]
+
+
+class CompactadorTelemetria:
+    """
+    Compactación y retención periódicas.
+    Se ejecuta con `flask telemetria-worker` o en un hilo con start().
+    """
+
+    def __init__(self, app, intervalo: float = 60.0, intervalo_purga: float = 3600.0):
+        self.app = app
+        self.intervalo = intervalo
+        self.intervalo_purga = intervalo_purga
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def run(self):
+        import time
+        from models import db
+
+        logger.info("📈 Compactador de telemetría iniciado")
+        proxima_purga = time.monotonic()
+        with self.app.app_context():
+            while not self._detener.is_set():
+                try:
+                    servicio = TelemetriaService(db.session)
+                    compactadas = servicio.compactar_todo()
+                    if compactadas:
+                        logger.info(f"📈 Muestras de telemetría compactadas: {compactadas}")
+                    if time.monotonic() >= proxima_purga:
+                        eliminados = servicio.purgar()
+                        logger.info(f"📈 Retención de telemetría aplicada: {eliminados}")
+                        proxima_purga = time.monotonic() + self.intervalo_purga
+                except Exception as e:
+                    logger.error(f"Error en compactador de telemetría: {e}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                self._detener.wait(self.intervalo)
+        logger.info("📈 Compactador de telemetría detenido")
+
+    def start(self) -> threading.Thread:
+        """Inicia el compactador en un hilo daemon"""
+        self._hilo = threading.Thread(target=self.run, name='compactador-telemetria', daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def stop(self, timeout: float = None):
+        """Detiene el compactador al terminar el ciclo en curso"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
@@ -0,0 +1,91 @@
+"""
+Pruebas del árbol de alimentación y de las simulaciones de carga.
+"""
+
+import numpy as np
+import pytest
+
+from services import nombres_equipo_service
+from services.cadena_energia_service import GrafoEnergia, PlanificadorEnergia, autonomia_estimada
+
+
+def _grafo(padre=(-1, 0, 1, 2, 2)):
+    """UPS 1 → fuente 1 (80 %) → switch 1 (PoE 60 W, 20 W propios) → cámaras 1 y 2"""
+    nan = np.nan
+    return GrafoEnergia(
+        nodos=[('ups', 1), ('fuente_poder', 1), ('switch', 1), ('camara', 1), ('camara', 2)],
+        padre=np.array(padre, dtype=np.int64),
+        propio=np.array([0, 0, 20, 0, 0], dtype=float),
+        declarado=np.array([0, 0, 0, 15, 15], dtype=float),
+        eficiencia=np.array([1, 0.8, 1, 1, 1]),
+        por_poe=np.array([False, False, False, True, True]),
+        capacidad=np.array([100, 200, nan, nan, nan]),
+        capacidad_poe=np.array([nan, nan, 60, nan, nan]),
+        autonomia_nominal=np.array([30, 0, 0, 0, 0], dtype=float),
+        gabinetes={7: [(2, True)]}
+    )
+
+
+@pytest.fixture
+def planificador(monkeypatch):
+    monkeypatch.setattr(nombres_equipo_service.resolutor_equipos, 'resolver', lambda pares: {})
+    planificador = PlanificadorEnergia()
+    planificador._grafo = _grafo()
+    return planificador
+
+
+def test_cargas_por_niveles_con_eficiencia():
+    grafo = _grafo()
+    cargas = grafo.cargas()
+    assert cargas['poe'][2] == 30
+    assert cargas['salida'].tolist()[:3] == [62.5, 50, 50]
+
+    estado = grafo.estado_ups(cargas['salida'])
+    assert estado['porcentaje_carga'].tolist() == [62.5]
+    assert estado['autonomia_minutos'].tolist() == [35]
+
+
+def test_autonomia_estimada_sin_datos_o_sobrecarga():
+    nominal = np.array([30, 30, 0, 30])
+    assert autonomia_estimada(nominal, np.array([100, 120, 50, np.nan])).tolist() == [30, 0, 0, 0]
+
+
+def test_ciclo_se_corta():
+    grafo = _grafo(padre=(-1, 2, 1, 2, 2))
+    assert grafo.padre[1] == -1 or grafo.padre[2] == -1
+    assert sum(len(nivel) for nivel in grafo.niveles) == 5
+
+
+def test_simular_camaras_en_gabinete(planificador):
+    resultado = planificador.simular([{'gabinete_id': 7, 'camaras': 2}])
+
+    [cambio] = resultado['cambios']
+    assert [(p['tipo'], p['carga_despues_watts']) for p in cambio['ruta']] == [
+        ('switch', 60.0), ('fuente_poder', 80.0), ('ups', 100.0)
+    ]
+    [ups] = resultado['ups_afectadas']
+    assert (ups['autonomia_antes_minutos'], ups['autonomia_despues_minutos']) == (35, 30)
+    assert 'switch 1 quedaría al 100.0 % de su capacidad' in resultado['advertencias']
+
+    with pytest.raises(ValueError):
+        planificador.simular([{'gabinete_id': 99}])
+    with pytest.raises(ValueError):
+        planificador.simular([{'tipo': 'switch', 'id': 1, 'watts': -5}])
+
+
+def test_grafo_se_construye_sin_retener_el_lock(monkeypatch):
+    planificador = PlanificadorEnergia()
+
+    def construir(session):
+        assert not planificador._lock.locked()
+        # Un cambio confirmado durante la construcción deja la caché vacía
+        planificador.invalidar()
+        return _grafo()
+
+    monkeypatch.setattr('services.cadena_energia_service.construir_grafo', construir)
+    assert len(planificador.grafo(session=object()).nodos) == 5
+    assert planificador._grafo is None
+
+    monkeypatch.setattr('services.cadena_energia_service.construir_grafo', lambda session: _grafo())
+    grafo = planificador.grafo(session=object())
+    assert planificador.grafo(session=object()) is grafo
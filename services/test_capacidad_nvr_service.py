@@ -0,0 +1,60 @@
+"""
+Pruebas de la capacidad de NVRs y de la ubicación de cámaras nuevas.
+"""
+
+import pytest
+
+from services.capacidad_nvr_service import (
+    CapacidadNvrService, GB_DIA_POR_KBPS, bitrate_kbps, fraccion_grabacion, megapixeles
+)
+
+
+def _nvr(nvr_id, canales, camaras, capacidad, usado, gb_dia):
+    return {'nvr_id': nvr_id, 'nombre': f'NVR {nvr_id}', 'ubicacion_id': None, 'estado': 'activo',
+            'canales_totales': canales, 'capacidad_gb': capacidad, 'usado_gb': usado, 'codec': None,
+            'calidad': None, 'fraccion_grabacion': 1.0, 'camaras': camaras, 'camaras_grabando': camaras,
+            'canales_configurados': camaras, 'bitrate_kbps': gb_dia / GB_DIA_POR_KBPS}
+
+
+@pytest.fixture
+def capacidad(sesion, monkeypatch):
+    nvrs = {1: _nvr(1, 4, 3, 1000, 800, 54.0), 2: _nvr(2, 2, 0, 10000, 0, 0.0)}
+    monkeypatch.setattr(CapacidadNvrService, '_capacidades', lambda self: {i: dict(n) for i, n in nvrs.items()})
+    monkeypatch.setattr(CapacidadNvrService, '_canales_libres',
+                        lambda self, ids, totales: {i: list(range(1, totales[i] + 1)) for i in ids})
+    return CapacidadNvrService(sesion)
+
+
+def test_bitrate_y_horario():
+    assert megapixeles('1920x1080') == pytest.approx(2.0736)
+    assert megapixeles('4MP') == 4.0 and megapixeles('rara') is None
+    assert bitrate_kbps() == pytest.approx(4140)
+    assert bitrate_kbps('1080p', fps=15, codec='H.265') == pytest.approx(4140 / 2 * 0.55)
+    assert bitrate_kbps(calidad='high') == pytest.approx(8000)
+
+    assert fraccion_grabacion(None) == 1.0
+    assert fraccion_grabacion('{"horas_diarias": 12}', 'movimiento') == pytest.approx(0.15)
+    assert fraccion_grabacion({'lunes': [['22:00', '06:00']]}) == pytest.approx(8 / 168)
+    assert fraccion_grabacion('no es json') == 1.0
+
+
+def test_resumen_ordena_por_dias_hasta_lleno(capacidad):
+    resumen = capacidad.resumen()
+    assert [n['nvr_id'] for n in resumen['nvrs']] == [1, 2]
+    primero = resumen['nvrs'][0]
+    assert (primero['canales_libres'], primero['consumo_gb_dia'], primero['dias_hasta_lleno']) == (1, 54.0, 3.7)
+    assert resumen['nvrs'][1]['dias_hasta_lleno'] is None
+    assert resumen['criticos'] == [1]
+
+
+def test_recomendar_respeta_retencion_y_canales(capacidad):
+    resultado = capacidad.recomendar(3, retencion_minima_dias=30)
+
+    # El NVR 1 tiene canal libre pero bajaría de 30 días de retención
+    assert [(a['nvr_id'], a['canal']) for a in resultado['asignaciones']] == [(2, 1), (2, 2)]
+    assert len(resultado['sin_asignar']) == 1
+    [usado] = resultado['nvrs']
+    assert usado['retencion_dias_despues'] == pytest.approx(10000 / (2 * 44.712), abs=0.1)
+
+    with pytest.raises(ValueError):
+        capacidad.recomendar([{'fps': 0}])
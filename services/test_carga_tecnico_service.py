@@ -0,0 +1,69 @@
+"""
+Pruebas de los contadores de carga de trabajo por técnico.
+"""
+
+import pytest
+
+from models import Falla, Mantenimiento, EquipoTecnico, CargaTecnico
+from services.carga_tecnico_service import CargaTecnicoService, registrar_listeners, CONTADORES
+
+
+def _falla(**campos):
+    """Falla con los campos obligatorios del modelo completados"""
+    return Falla(titulo='Falla de prueba', descripcion='Prueba', tipo=campos['equipo_type'], creado_por_id=1, **campos)
+
+
+@pytest.fixture
+def carga(sesion):
+    registrar_listeners()
+    sesion.add_all([EquipoTecnico(id=1, nombre='Ana', apellido='Soto'), EquipoTecnico(id=2, nombre='Luis', apellido='Mora')])
+    sesion.commit()
+    return CargaTecnicoService(sesion)
+
+
+def _contadores(sesion):
+    return {
+        fila.tecnico_id: {nombre: getattr(fila, nombre) for nombre in CONTADORES}
+        for fila in sesion.query(CargaTecnico)
+    }
+
+
+def test_asignar_resolver_y_reasignar(sesion, carga):
+    falla = _falla(equipo_type='camara', equipo_id=1, estado='abierta', assigned_to=1)
+    sesion.add_all([falla, Mantenimiento(tipo='preventivo', estado='programado', technician_id=1)])
+    sesion.commit()
+
+    fila = sesion.query(CargaTecnico).filter_by(tecnico_id=1).one()
+    assert (fila.fallas_activas, fila.mantenimientos_activos, fila.asignaciones_activas) == (1, 1, 2)
+
+    # Tras el commit los atributos están expirados: se resta igual la contribución anterior
+    falla.estado = 'resuelta'
+    falla.actual_resolution_time = 3.5
+    sesion.commit()
+    fila = sesion.query(CargaTecnico).filter_by(tecnico_id=1).one()
+    assert (fila.fallas_activas, fila.fallas_resueltas, fila.asignaciones_activas) == (0, 1, 1)
+    assert (fila.horas_resolucion_total, fila.resoluciones_medidas) == (3.5, 1)
+
+    falla.assigned_to = 2
+    sesion.commit()
+    contadores = _contadores(sesion)
+    assert contadores[1]['fallas_total'] == 0
+    assert contadores[2]['fallas_resueltas'] == 1
+
+
+def test_reconstruir_coincide_con_lo_incremental(sesion, carga):
+    sesion.add_all([
+        _falla(equipo_type='camara', equipo_id=1, estado='abierta', assigned_to=1),
+        _falla(equipo_type='camara', equipo_id=2, estado='en_proceso', assigned_to=1),
+        _falla(equipo_type='nvr', equipo_id=1, estado='resuelta', assigned_to=2, actual_resolution_time=2.0),
+        _falla(equipo_type='nvr', equipo_id=2, estado='abierta'),
+        Mantenimiento(tipo='preventivo', estado='completado', technician_id=2),
+        Mantenimiento(tipo='correctivo', estado='en_progreso', technician_id=2),
+    ])
+    sesion.commit()
+
+    incremental = _contadores(sesion)
+    assert carga.reconstruir() == 2
+    assert _contadores(sesion) == incremental
+    assert incremental[1]['asignaciones_activas'] == 2
+    assert incremental[2]['mantenimientos_completados'] == 1
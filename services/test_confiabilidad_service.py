@@ -0,0 +1,101 @@
+"""
+Pruebas de los totales incrementales de MTTR/MTBF por equipo.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from models import Falla, Camara, HistorialEstadoEquipo, ConfiabilidadEquipo
+from services.confiabilidad_service import ConfiabilidadService, registrar_listeners, calcular_metricas
+
+
+def _falla(**campos):
+    """Falla con los campos obligatorios del modelo completados"""
+    return Falla(titulo='Falla de prueba', descripcion='Prueba', tipo=campos['equipo_type'], creado_por_id=1, **campos)
+
+
+@pytest.fixture
+def confiabilidad(sesion):
+    registrar_listeners()
+    sesion.add_all([
+        Camara(id=1, codigo='CAM-1', nombre='Acceso', marca='Hikvision', modelo='DS-2CD'),
+        Camara(id=2, codigo='CAM-2', nombre='Casino', marca='Hikvision', modelo='DS-2CD'),
+    ])
+    sesion.commit()
+    return ConfiabilidadService(sesion)
+
+
+def _cambio(sesion, equipo_id, estado, fecha):
+    sesion.add(HistorialEstadoEquipo(equipo_tipo='camara', equipo_id=equipo_id, estado_nuevo=estado,
+                                     fecha_cambio=fecha))
+    sesion.commit()
+
+
+def _totales(sesion):
+    return {
+        (f.equipo_tipo, f.equipo_id): (f.fallas_total, f.fallas_resueltas, round(f.horas_reparacion_total, 4),
+                                       round(f.horas_fuera_servicio, 4), f.fuera_servicio_desde,
+                                       f.inicio_observacion, f.ultima_falla, f.marca, f.modelo)
+        for f in sesion.query(ConfiabilidadEquipo)
+    }
+
+
+def test_fallas_y_caidas_actualizan_los_totales(sesion, confiabilidad):
+    falla = _falla(equipo_type='camara', equipo_id=1, fecha_reporte=datetime(2025, 1, 1, 8))
+    sesion.add(falla)
+    sesion.commit()
+    _cambio(sesion, 1, 'fallando', datetime(2025, 1, 1, 8))
+    _cambio(sesion, 1, 'activo', datetime(2025, 1, 1, 12))
+
+    falla.fecha_resolucion = datetime(2025, 1, 1, 14)
+    sesion.commit()
+
+    fila = sesion.query(ConfiabilidadEquipo).one()
+    assert (fila.fallas_total, fila.fallas_resueltas, fila.horas_reparacion_total) == (1, 1, 6.0)
+    assert fila.horas_fuera_servicio == pytest.approx(4.0)
+    assert fila.fuera_servicio_desde is None
+    assert (fila.marca, fila.modelo) == ('Hikvision', 'DS-2CD')
+
+    metricas = confiabilidad.equipo('camara', 1)
+    assert metricas['mttr_horas'] == 6.0 and metricas['fallas_total'] == 1
+
+    sesion.delete(falla)
+    sesion.commit()
+    assert sesion.query(ConfiabilidadEquipo).one().fallas_total == 0
+
+
+def test_reconstruir_coincide_con_lo_incremental(sesion, confiabilidad):
+    for equipo_id, dia, horas in [(1, 1, 2), (1, 5, None), (2, 3, 10)]:
+        resolucion = datetime(2025, 1, dia, 8 + horas) if horas is not None else None
+        sesion.add(_falla(equipo_type='camara', equipo_id=equipo_id, fecha_reporte=datetime(2025, 1, dia, 8),
+                         fecha_resolucion=resolucion))
+        sesion.commit()
+    _cambio(sesion, 1, 'fallando', datetime(2025, 1, 1, 8))
+    _cambio(sesion, 1, 'activo', datetime(2025, 1, 1, 10))
+    _cambio(sesion, 2, 'fallando', datetime(2025, 1, 3, 8))
+
+    incremental = _totales(sesion)
+    assert confiabilidad.reconstruir() == 2
+    assert _totales(sesion) == incremental
+
+
+def test_ranking_de_modelos_suma_los_equipos(sesion, confiabilidad):
+    for equipo_id in (1, 1, 2):
+        sesion.add(_falla(equipo_type='camara', equipo_id=equipo_id, fecha_reporte=datetime(2025, 1, 1),
+                         fecha_resolucion=datetime(2025, 1, 1, 3)))
+    sesion.commit()
+
+    [modelo] = confiabilidad.ranking_modelos(orden='mttr')
+    assert (modelo['marca'], modelo['equipos'], modelo['fallas_total'], modelo['mttr_horas']) == \
+        ('Hikvision', 2, 3, 3.0)
+    assert [e['equipo_id'] for e in confiabilidad.ranking_equipos(orden='fallas')] == [1, 2]
+
+    with pytest.raises(ValueError):
+        confiabilidad.ranking_equipos(orden='alfabetico')
+
+
+def test_calcular_metricas():
+    metricas = calcular_metricas(4, 2, 10.0, 20.0, 100.0)
+    assert (metricas['mttr_horas'], metricas['mtbf_horas'], metricas['disponibilidad']) == (5.0, 20.0, 80.0)
+    assert calcular_metricas(0, 0, 0.0, 0.0, 0.0)['mtbf_horas'] is None
@@ -0,0 +1,61 @@
+"""
+Pruebas de las expresiones analíticas portables (SQLite y PostgreSQL).
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, select
+from sqlalchemy.dialects import postgresql
+
+from services.consultas_analiticas import truncar_fecha, parte_fecha, horas_entre
+
+
+metadata = MetaData()
+muestras = Table(
+    'muestras', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('inicio', DateTime), Column('fin', DateTime)
+)
+
+
+def _compilar(expr):
+    return str(expr.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def test_postgresql_usa_funciones_nativas():
+    assert _compilar(truncar_fecha(muestras.c.inicio, 'month')) == "date_trunc('month', muestras.inicio)"
+    assert _compilar(parte_fecha(muestras.c.inicio, 'dow')) == \
+        'CAST(EXTRACT(dow FROM muestras.inicio) AS INTEGER)'
+    assert 'EXTRACT(EPOCH FROM (muestras.fin - muestras.inicio))' in \
+        _compilar(horas_entre(muestras.c.fin, muestras.c.inicio))
+
+
+def test_sqlite_calcula_los_mismos_valores():
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as conexion:
+        # 2025-03-09 es domingo
+        conexion.execute(muestras.insert(), [
+            {'id': 1, 'inicio': datetime(2025, 3, 9, 22, 45), 'fin': datetime(2025, 3, 10, 1, 15)},
+        ])
+        fila = conexion.execute(select(
+            truncar_fecha(muestras.c.inicio, 'hour').label('hora'),
+            truncar_fecha(muestras.c.inicio, 'day').label('dia'),
+            truncar_fecha(muestras.c.inicio, 'month').label('mes'),
+            parte_fecha(muestras.c.inicio, 'dow').label('dow'),
+            parte_fecha(muestras.c.inicio, 'hour').label('hora_del_dia'),
+            horas_entre(muestras.c.fin, muestras.c.inicio).label('horas')
+        )).one()
+
+    assert fila.hora == datetime(2025, 3, 9, 22)
+    assert fila.dia == datetime(2025, 3, 9)
+    assert fila.mes == datetime(2025, 3, 1)
+    assert (fila.dow, fila.hora_del_dia) == (0, 22)
+    assert round(fila.horas, 4) == 2.5
+    engine.dispose()
+
+
+def test_unidad_no_soportada():
+    with pytest.raises(ValueError):
+        truncar_fecha(muestras.c.inicio, 'week')
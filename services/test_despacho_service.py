@@ -0,0 +1,86 @@
+"""
+Pruebas del despacho automático de fallas a técnicos.
+"""
+
+import pytest
+
+from models import Falla
+from services.despacho_service import DespachoService
+
+
+def _falla(**campos):
+    """Falla con los campos obligatorios del modelo completados"""
+    return Falla(titulo='Falla de prueba', descripcion='Prueba', tipo=campos['equipo_type'], creado_por_id=1, **campos)
+
+
+class _Tecnico:
+    """Técnico mínimo con la interfaz que usa el cálculo de costos"""
+
+    def __init__(self, id, habilidades):
+        self.id = id
+        self.habilidades = habilidades
+        self.ubicacion_asignada = None
+
+    def get_specialties(self):
+        return []
+
+    def has_skill(self, habilidad):
+        return habilidad in self.habilidades
+
+    def get_skill_level(self, habilidad):
+        return self.habilidades.get(habilidad)
+
+    def get_nombre_completo(self):
+        return f'Técnico {self.id}'
+
+
+@pytest.fixture
+def despacho(sesion, monkeypatch):
+    tecnicos = [(_Tecnico(10, {'camara': 5}), 0), (_Tecnico(20, {'nvr': 5}), 0)]
+    monkeypatch.setattr(DespachoService, '_tecnicos', lambda self: tecnicos)
+    monkeypatch.setattr(DespachoService, '_catalogo', lambda self: ({}, {}))
+    return DespachoService(sesion)
+
+
+def test_solo_se_despachan_fallas_pendientes_sin_tecnico(sesion, despacho):
+    fallas = [
+        _falla(equipo_type='camara', equipo_id=1, estado='abierta'),
+        _falla(equipo_type='nvr', equipo_id=1, estado='reportada'),
+        _falla(equipo_type='camara', equipo_id=2, estado='abierta', assigned_to=99),
+        _falla(equipo_type='camara', equipo_id=3, estado='resuelta'),
+        _falla(equipo_type='camara', equipo_id=4, estado='abierta', deleted=True),
+    ]
+    sesion.add_all(fallas)
+    sesion.commit()
+    ids = [f.id for f in fallas]
+
+    # Aunque se pidan explícitamente, las asignadas, resueltas o eliminadas no entran al plan
+    plan = despacho.despachar(falla_ids=ids)
+    assert {a['falla_id']: a['tecnico_id'] for a in plan['asignaciones']} == {ids[0]: 10, ids[1]: 20}
+    assert plan['omitidas'] == []
+
+    sesion.expire_all()
+    assert [f.assigned_to for f in sesion.query(Falla).order_by(Falla.id)] == [10, 20, 99, None, None]
+
+
+def test_fallas_tomadas_durante_el_plan_se_omiten(sesion, despacho, monkeypatch):
+    falla = _falla(equipo_type='camara', equipo_id=1, estado='abierta')
+    otra = _falla(equipo_type='nvr', equipo_id=1, estado='abierta')
+    sesion.add_all([falla, otra])
+    sesion.commit()
+
+    planificar = DespachoService.planificar
+
+    def planificar_y_asignar(self, *args, **kwargs):
+        # Otro usuario asigna la falla entre el cálculo del plan y la escritura
+        plan = planificar(self, *args, **kwargs)
+        sesion.query(Falla).filter_by(id=falla.id).update({'assigned_to': 99})
+        return plan
+
+    monkeypatch.setattr(DespachoService, 'planificar', planificar_y_asignar)
+    plan = despacho.despachar()
+
+    assert plan['omitidas'] == [falla.id]
+    assert [a['falla_id'] for a in plan['asignaciones']] == [otra.id]
+    sesion.expire_all()
+    assert (falla.assigned_to, otra.assigned_to) == (99, 20)
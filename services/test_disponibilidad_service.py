@@ -0,0 +1,79 @@
+"""
+Pruebas de la disponibilidad por intervalos del historial de estados.
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from models import Camara, Switch, Ubicacion, HistorialEstadoEquipo, DisponibilidadDiaria
+from services.disponibilidad_service import DisponibilidadService, registrar_listeners, segundos_por_dia
+
+
+@pytest.fixture
+def disponibilidad(sesion):
+    registrar_listeners()
+    sesion.add_all([
+        Ubicacion(id=1, nombre='Biblioteca', tipo='edificio', edificio='Central', created_by_user_id=1),
+        Camara(id=1, codigo='CAM-1', nombre='Acceso', ubicacion_id=1, created_at=datetime(2025, 1, 1)),
+        Camara(id=2, codigo='CAM-2', nombre='Sala', ubicacion_id=1, created_at=datetime(2025, 1, 2)),
+        Switch(id=1, name='Core', created_at=datetime(2025, 1, 1)),
+    ])
+    sesion.commit()
+    return DisponibilidadService(sesion)
+
+
+def _cambio(sesion, tipo, equipo_id, anterior, nuevo, fecha):
+    sesion.add(HistorialEstadoEquipo(equipo_tipo=tipo, equipo_id=equipo_id, estado_anterior=anterior,
+                                     estado_nuevo=nuevo, fecha_cambio=fecha))
+    sesion.commit()
+
+
+def test_segundos_por_dia_reparte_intervalos():
+    fecha = lambda *args: np.datetime64(datetime(*args), 's')  # noqa: E731
+    segundos = segundos_por_dia(
+        np.array([0, 1]),
+        np.array([fecha(2025, 1, 1, 18), fecha(2024, 12, 31)]),
+        np.array([fecha(2025, 1, 2, 6), fecha(2025, 1, 1, 1)]),
+        np.datetime64('2025-01-01'), 2, 3
+    )
+    assert segundos.tolist() == [[6 * 3600, 6 * 3600, 0], [3600, 0, 0]]
+
+
+def test_caida_y_cache_diaria(sesion, disponibilidad):
+    _cambio(sesion, 'camara', 1, 'activo', 'fallando', datetime(2025, 1, 2, 12))
+    _cambio(sesion, 'camara', 1, 'fallando', 'activo', datetime(2025, 1, 3))
+
+    desde, hasta = date(2025, 1, 1), date(2025, 1, 3)
+    resultado = disponibilidad.equipo('camara', 1, desde, hasta)
+    assert resultado['horas_observadas'] == 72 and resultado['horas_fuera_servicio'] == 12
+    assert [dia['horas_fuera_servicio'] for dia in resultado['serie']] == [0, 12, 0]
+    assert sesion.query(DisponibilidadDiaria).count() == 3
+
+    # Los días cerrados ya están en caché
+    campus = disponibilidad.disponibilidad('campus', desde, hasta)
+    assert campus['metadata']['equipos_recalculados'] == 2  # la cámara 2 y el switch
+    campus = disponibilidad.disponibilidad('campus', desde, hasta)
+    assert campus['metadata']['equipos_recalculados'] == 0
+    # 3 días de cámara 1 y switch, 2 días de cámara 2
+    assert campus['grupos'][0]['horas_observadas'] == 8 * 24
+
+    # Un cambio retroactivo invalida desde su fecha
+    _cambio(sesion, 'camara', 1, 'activo', 'fallando', datetime(2025, 1, 1, 23))
+    resultado = disponibilidad.equipo('camara', 1, desde, hasta)
+    assert resultado['horas_fuera_servicio'] == 1 + 24
+
+
+def test_agregacion_por_nivel_ordena_de_peor_a_mejor(sesion, disponibilidad):
+    _cambio(sesion, 'switch', 1, 'activo', 'fallando', datetime(2025, 1, 1, 12))
+
+    por_tipo = disponibilidad.disponibilidad('tipo', date(2025, 1, 1), date(2025, 1, 1), objetivo=99.0)
+    assert [(g['equipo_tipo'], g['disponibilidad'], g['cumple_sla']) for g in por_tipo['grupos']] == [
+        ('switch', 50.0, False), ('camara', 100.0, True)
+    ]
+    assert disponibilidad.disponibilidad('edificio', date(2025, 1, 1), date(2025, 1, 1))['grupos'][0]['edificio'] == \
+        'Central'
+
+    with pytest.raises(ValueError):
+        disponibilidad.disponibilidad('planeta')
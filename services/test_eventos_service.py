@@ -0,0 +1,86 @@
+"""
+Pruebas del cursor de eventos y del modo de entrega (stream o polling).
+"""
+
+from datetime import datetime, timedelta
+
+from models.evento_sistema import EventoSistema
+from services.eventos_service import (
+    EventBroker, leer_eventos, formatear_sse, cursor_desde_id_sse, modo_eventos
+)
+
+
+def _evento(sesion, evento_id, segundos_atras=0):
+    sesion.add(EventoSistema(id=evento_id, tipo='falla_creada', datos={'id': evento_id},
+                             created_at=datetime.utcnow() - timedelta(seconds=segundos_atras)))
+    sesion.commit()
+
+
+def test_cursor_espera_ids_confirmados_fuera_de_orden(sesion):
+    _evento(sesion, 1)
+    _evento(sesion, 3)
+
+    nuevos, cursor = leer_eventos(sesion, 0)
+    assert [e.id for e in nuevos] == [1, 3]
+    assert cursor == 1
+
+    # El 2 confirma después del 3: no se pierde
+    _evento(sesion, 2)
+    nuevos, cursor = leer_eventos(sesion, cursor)
+    assert [e.id for e in nuevos] == [2, 3]
+    assert cursor == 3
+
+
+def test_hueco_vencido_no_detiene_el_cursor(sesion):
+    # El 2 nunca aparece (transacción revertida)
+    _evento(sesion, 1, segundos_atras=120)
+    _evento(sesion, 3, segundos_atras=60)
+    _evento(sesion, 5)
+
+    nuevos, cursor = leer_eventos(sesion, 0, espera_huecos=30)
+    assert [e.id for e in nuevos] == [1, 3, 5]
+    assert cursor == 3
+
+
+def test_relay_reparte_cada_evento_una_vez(sesion, monkeypatch):
+    broker = EventBroker(tamano_buffer=10)
+    broker._buffer_desde = 0
+    repartidos = []
+    monkeypatch.setattr(broker, '_repartir', repartidos.append)
+
+    _evento(sesion, 1)
+    _evento(sesion, 3)
+    broker._leer_nuevos()
+    _evento(sesion, 2)
+    broker._leer_nuevos()
+    broker._leer_nuevos()
+
+    assert [e['id'] for e in repartidos] == [1, 3, 2]
+    assert [e['cursor'] for e in repartidos] == [1, 1, 3]
+    assert broker._cursor == 3 and broker._entregados == {}
+
+
+def test_reconexion_reenvia_desde_el_cursor():
+    broker = EventBroker(tamano_buffer=3)
+    broker._buffer_desde = 0
+    for evento_id, cursor in [(1, 1), (3, 1), (2, 3)]:
+        broker._repartir({'id': evento_id, 'tipo': 'falla_creada', 'datos': {}, 'cursor': cursor})
+
+    # El cliente recibió el 3 con cursor 1: se le reenvían 3 y 2, descarta el 3
+    assert formatear_sse(broker._buffer[1]).startswith('id: 1:3\n')
+    assert cursor_desde_id_sse('1:3') == 1
+    assert [e['id'] for e in broker.eventos_desde(1)] == [3, 2]
+
+    broker._repartir({'id': 4, 'tipo': 'falla_creada', 'datos': {}, 'cursor': 4})
+    assert broker._buffer_desde == 1
+    assert broker.eventos_desde(0) is None
+
+
+def test_modo_polling_con_workers_sync(monkeypatch):
+    monkeypatch.delenv('EVENTOS_MODO', raising=False)
+    assert modo_eventos({'SERVER_SOFTWARE': 'Werkzeug/3.0'}) == 'sse'
+    # Sin gevent aplicado, gunicorn usa workers sync
+    assert modo_eventos({'SERVER_SOFTWARE': 'gunicorn/21.2.0'}) == 'polling'
+
+    monkeypatch.setenv('EVENTOS_MODO', 'sse')
+    assert modo_eventos({'SERVER_SOFTWARE': 'gunicorn/21.2.0'}) == 'sse'
@@ -0,0 +1,74 @@
+"""
+Pruebas de los rollups de fallas mantenidos por listeners.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from models import Falla, Camara, FallaRollup
+from models.falla_rollup import GranularidadRollup
+from services.falla_rollup_service import FallaRollupService, registrar_listeners, granularidad_para
+
+
+def _falla(**campos):
+    """Falla con los campos obligatorios del modelo completados"""
+    return Falla(titulo='Falla de prueba', descripcion='Prueba', tipo=campos['equipo_type'], creado_por_id=1, **campos)
+
+
+@pytest.fixture
+def rollups(sesion):
+    registrar_listeners()
+    sesion.add(Camara(id=1, codigo='CAM-1', nombre='Acceso', ubicacion_id=7))
+    sesion.commit()
+    return FallaRollupService(sesion)
+
+
+def _filas(sesion, granularidad=GranularidadRollup.DIA):
+    return sorted(
+        (f.bucket, f.estado, f.ubicacion_id, f.cantidad, f.resueltas)
+        for f in sesion.query(FallaRollup).filter_by(granularidad=granularidad)
+    )
+
+
+def test_crear_resolver_y_eliminar_falla(sesion, rollups):
+    falla = _falla(equipo_type='camara', equipo_id=1, severidad='alta', estado='reportada',
+                  fecha_reporte=datetime(2025, 3, 10, 8, 30))
+    sesion.add(falla)
+    sesion.commit()
+
+    dia = datetime(2025, 3, 10)
+    assert _filas(sesion) == [(dia, 'reportada', 7, 1, 0)]
+    assert sesion.query(FallaRollup).count() == 3
+
+    # Asignar atributos expirados tras el commit también resta la contribución anterior
+    falla.estado = 'cerrada'
+    falla.fecha_resolucion = datetime(2025, 3, 10, 14, 30)
+    sesion.commit()
+    assert _filas(sesion) == [(dia, 'cerrada', 7, 1, 1)]
+
+    mes = rollups.agregar(datetime(2025, 3, 1), datetime(2025, 4, 1), agrupar_por=['severidad'])
+    assert [(f.severidad, f.cantidad, f.horas_resolucion_total) for f in mes] == [('alta', 1, 6.0)]
+
+    sesion.delete(falla)
+    sesion.commit()
+    assert sesion.query(FallaRollup).count() == 0
+
+
+def test_reconstruir_coincide_con_lo_incremental(sesion, rollups):
+    for hora, estado in [(8, 'reportada'), (9, 'reportada'), (23, 'en_proceso')]:
+        sesion.add(_falla(equipo_type='camara', equipo_id=1, severidad='media', estado=estado,
+                         fecha_reporte=datetime(2025, 3, 10, hora)))
+    sesion.add(_falla(equipo_type='nvr', equipo_id=99, severidad='baja', estado='cerrada',
+                     fecha_reporte=datetime(2025, 4, 2, 10), fecha_resolucion=datetime(2025, 4, 2, 12)))
+    sesion.commit()
+
+    incremental = {g: _filas(sesion, g) for g in GranularidadRollup.TODAS}
+    assert rollups.reconstruir() == sum(len(filas) for filas in incremental.values())
+    assert {g: _filas(sesion, g) for g in GranularidadRollup.TODAS} == incremental
+
+
+def test_granularidad_para_rango():
+    assert granularidad_para(datetime(2025, 1, 1), datetime(2025, 4, 1)) == GranularidadRollup.MES
+    assert granularidad_para(datetime(2025, 1, 3), datetime(2025, 1, 10)) == GranularidadRollup.DIA
+    assert granularidad_para(datetime(2025, 1, 3, 6), datetime(2025, 1, 3, 9)) == GranularidadRollup.HORA
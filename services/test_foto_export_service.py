@@ -0,0 +1,90 @@
+"""
+Pruebas de la exportación de fotografías en ZIP.
+"""
+
+import io
+import zipfile
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+
+from models import Fotografia
+from models.fotografia import migrar_columnas_documento
+from services.foto_export_service import FotoExportService
+
+
+def _foto(sesion, carpeta, foto_id, equipo=('camara', 1), falla_id=None, mantenimiento_id=None):
+    archivo = carpeta / f'foto_{foto_id}.jpg'
+    archivo.write_bytes(b'\xff\xd8' + bytes([foto_id]) * 64)
+    foto = Fotografia(
+        id=foto_id, equipo_type=equipo[0], equipo_id=equipo[1], falla_id=falla_id,
+        mantenimiento_id=mantenimiento_id, filename=archivo.name, filepath=str(archivo),
+        status='procesada', created_by_user_id=1, uploaded_at=datetime(2025, 1, foto_id)
+    )
+    sesion.add(foto)
+    return foto
+
+
+def _contenido(service, **filtros):
+    datos = b''.join(service.exportar(**filtros))
+    with zipfile.ZipFile(io.BytesIO(datos)) as zf:
+        return sorted(n for n in zf.namelist() if n != 'manifiesto.csv'), zf.read('manifiesto.csv')
+
+
+def test_filtro_por_falla_exporta_solo_sus_fotos(sesion, tmp_path):
+    """Otras fotos del mismo equipo no entran al filtrar por falla"""
+    _foto(sesion, tmp_path, 1, falla_id=10)
+    _foto(sesion, tmp_path, 2, falla_id=11)
+    _foto(sesion, tmp_path, 3)
+    _foto(sesion, tmp_path, 4, equipo=('nvr', 2), mantenimiento_id=20)
+    sesion.commit()
+
+    service = FotoExportService(sesion)
+    nombres, _ = _contenido(service, falla_ids=[10])
+    assert nombres == ['camara_1/1_foto_1.jpg']
+
+    nombres, _ = _contenido(service, falla_ids=[10], mantenimiento_ids=[20])
+    assert nombres == ['camara_1/1_foto_1.jpg', 'nvr_2/4_foto_4.jpg']
+
+    nombres, _ = _contenido(service, equipos=[('camara', 1)])
+    assert len(nombres) == 3
+
+
+def test_falla_sin_fotos_genera_solo_manifiesto(sesion, tmp_path):
+    _foto(sesion, tmp_path, 1)
+    sesion.commit()
+
+    nombres, manifiesto = _contenido(FotoExportService(sesion), falla_ids=[99])
+    assert nombres == []
+    assert manifiesto.decode().strip().splitlines() == ['id,equipo_tipo,equipo_id,fecha,archivo,estado']
+
+
+def test_jpeg_sin_recomprimir_y_archivo_faltante_en_manifiesto(sesion, tmp_path):
+    _foto(sesion, tmp_path, 1)
+    faltante = _foto(sesion, tmp_path, 2)
+    faltante.filepath = str(tmp_path / 'no_existe.jpg')
+    sesion.commit()
+
+    datos = b''.join(FotoExportService(sesion, chunk_size=16).exportar(equipos=[('camara', 1)]))
+    with zipfile.ZipFile(io.BytesIO(datos)) as zf:
+        assert zf.getinfo('camara_1/1_foto_1.jpg').compress_type == zipfile.ZIP_STORED
+        manifiesto = zf.read('manifiesto.csv').decode()
+    assert 'no_encontrado' in manifiesto
+
+
+def test_migracion_agrega_columnas_a_tabla_existente(tmp_path):
+    """Una tabla fotografias anterior recibe falla_id y mantenimiento_id una sola vez"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'anterior.db'}")
+    with engine.begin() as conexion:
+        conexion.execute(text('CREATE TABLE fotografias (id INTEGER PRIMARY KEY, filename VARCHAR(255))'))
+        conexion.execute(text("INSERT INTO fotografias (id, filename) VALUES (1, 'vieja.jpg')"))
+
+    assert migrar_columnas_documento(engine) == ['falla_id', 'mantenimiento_id']
+    assert migrar_columnas_documento(engine) == []
+
+    inspector = inspect(engine)
+    assert {'falla_id', 'mantenimiento_id'} <= {c['name'] for c in inspector.get_columns('fotografias')}
+    assert {'ix_fotografias_falla_id', 'ix_fotografias_mantenimiento_id'} <= \
+        {i['name'] for i in inspector.get_indexes('fotografias')}
+    with engine.connect() as conexion:
+        assert conexion.execute(text('SELECT falla_id FROM fotografias')).scalar() is None
@@ -0,0 +1,76 @@
+"""
+Pruebas de la ingesta por lotes de heartbeats y su sincronización entre procesos.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models import Camara
+from services.heartbeat_service import IngestorHeartbeats, MARGEN_RELOJ
+
+
+@pytest.fixture
+def camaras(sesion):
+    sesion.add_all([Camara(id=i, codigo=f'CAM-{i}', nombre=f'Cámara {i}') for i in (1, 2, 3)])
+    sesion.commit()
+
+
+def _heartbeat(ingestor, equipo_id, momento):
+    return ingestor.registrar_lote([{'tipo': 'camara', 'id': equipo_id, 'timestamp': momento.isoformat()}])
+
+
+def _heartbeat_guardado(sesion, equipo_id):
+    return sesion.get(Camara, equipo_id).ultima_conexion
+
+
+def test_flush_por_lotes_no_retrocede(sesion, camaras):
+    ingestor = IngestorHeartbeats()
+    ahora = datetime.now(timezone.utc)
+
+    resultado = ingestor.registrar_lote([
+        {'tipo': 'camara', 'id': 1, 'timestamp': ahora.isoformat()},
+        {'tipo': 'camara', 'id': 1, 'timestamp': (ahora - timedelta(minutes=1)).isoformat()},
+        {'tipo': 'planeta', 'id': 1},
+        {'tipo': 'camara', 'id': 2, 'timestamp': (ahora + 2 * MARGEN_RELOJ).isoformat()},
+    ])
+    assert (resultado['aceptados'], resultado['rechazados']) == (2, 2)
+    assert ingestor.flush(sesion) == 1
+
+    # Un heartbeat atrasado no pisa la fecha guardada
+    _heartbeat(ingestor, 1, ahora - timedelta(minutes=2))
+    ingestor.flush(sesion)
+    sesion.expire_all()
+    assert _heartbeat_guardado(sesion, 1) == ahora.replace(tzinfo=None)
+    assert ingestor.en_linea('camara', 1) and not ingestor.en_linea('camara', 2)
+
+
+def test_equipo_adelantado_no_oculta_a_los_demas(sesion, camaras):
+    escritor, lector = IngestorHeartbeats(), IngestorHeartbeats()
+    ahora = datetime.now(timezone.utc)
+
+    _heartbeat(escritor, 1, ahora + MARGEN_RELOJ - timedelta(seconds=10))
+    escritor.flush(sesion)
+    lector.sincronizar(sesion)
+    assert lector.en_linea('camara', 1)
+
+    _heartbeat(escritor, 2, ahora)
+    escritor.flush(sesion)
+    lector.sincronizar(sesion)
+    assert lector.en_linea('camara', 2)
+
+
+def test_flush_confirmado_fuera_de_orden(sesion, camaras):
+    worker_a, worker_b, lector = IngestorHeartbeats(), IngestorHeartbeats(), IngestorHeartbeats()
+    ahora = datetime.now(timezone.utc)
+
+    # B recibe antes pero confirma después de que el lector ya leyó lo de A
+    _heartbeat(worker_b, 3, ahora - timedelta(seconds=4))
+    _heartbeat(worker_a, 1, ahora)
+    worker_a.flush(sesion)
+    lector.sincronizar(sesion)
+    worker_b.flush(sesion)
+    lector.sincronizar(sesion)
+
+    assert lector.ultimo_visto('camara', 3) == ahora - timedelta(seconds=4)
+    assert lector.ultimo_visto('camara', 1) == ahora
@@ -0,0 +1,64 @@
+"""
+Pruebas de los perfiles del pool de conexiones.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services.motor_db_service import PERFILES, PoolInstrumentado, opciones_motor, perfil_db
+
+POSTGRES = 'postgresql://u:p@db/camaras'
+
+
+@pytest.fixture(autouse=True)
+def entorno(monkeypatch):
+    for variable in ('DB_PERFIL', 'RAILWAY_ENVIRONMENT', 'HEROKU', 'WEB_CONCURRENCY', 'DB_MAX_CONEXIONES',
+                     'DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE'):
+        monkeypatch.delenv(variable, raising=False)
+    return monkeypatch
+
+
+def test_perfil_segun_url_y_entorno(entorno):
+    assert perfil_db('sqlite:///camaras.db') == 'sqlite'
+    assert perfil_db(POSTGRES) == 'gevent'
+    entorno.setenv('RAILWAY_ENVIRONMENT', 'production')
+    assert perfil_db(POSTGRES) == 'sync'
+    entorno.setenv('DB_PERFIL', 'Gevent')
+    assert perfil_db(POSTGRES) == 'gevent'
+
+
+def test_gevent_reparte_el_presupuesto_entre_workers(entorno):
+    entorno.setenv('WEB_CONCURRENCY', '4')
+    opciones = opciones_motor(POSTGRES)
+    assert (opciones['pool_size'], opciones['max_overflow']) == (10, 10)
+    assert opciones['poolclass'] is PoolInstrumentado
+    assert PERFILES['gevent']['pool_size'] is None
+
+    entorno.setenv('DB_POOL_SIZE', '3')
+    entorno.setenv('DB_POOL_TIMEOUT', '2.5')
+    opciones = opciones_motor(POSTGRES)
+    assert (opciones['pool_size'], opciones['pool_timeout']) == (3, 2.5)
+
+
+def test_sqlite_sin_pool_instrumentado():
+    opciones = opciones_motor('sqlite:///camaras.db')
+    assert 'poolclass' not in opciones
+    opciones['connect_args']['timeout'] = 1
+    assert PERFILES['sqlite']['connect_args']['timeout'] == 15
+
+
+def test_se_carga_sin_el_paquete_services():
+    # app.py lo carga por ruta antes de importar modelos y servicios
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'motor_db_service.py')
+    codigo = (
+        'import importlib.util, sys\n'
+        f'spec = importlib.util.spec_from_file_location("services.motor_db_service", {ruta!r})\n'
+        'modulo = importlib.util.module_from_spec(spec)\n'
+        'spec.loader.exec_module(modulo)\n'
+        'print(modulo.perfil_db("sqlite://"), "services" in sys.modules, "models" in sys.modules)\n'
+    )
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    assert salida.stdout.split() == ['sqlite', 'False', 'False']
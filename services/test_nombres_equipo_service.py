@@ -0,0 +1,88 @@
+"""
+Pruebas de la resolución en lote de nombres de equipos y su caché.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Camara, Fuente, FuentePoder, NVR, Ubicacion
+from services.nombres_equipo_service import resolutor_equipos, registrar_listeners
+
+
+@pytest.fixture
+def equipos(sesion):
+    registrar_listeners()
+    resolutor_equipos.invalidar()
+    sesion.add_all([
+        Ubicacion(id=1, nombre='Biblioteca', tipo='edificio', edificio='Central', created_by_user_id=1),
+        Camara(id=1, codigo='CAM-1', nombre='Acceso', ubicacion_id=1, marca='Hikvision', modelo='DS-2CD'),
+        Camara(id=2, codigo='CAM-2', nombre='Sala', ubicacion_id=1),
+        NVR(id=1, name='Grabador'),
+        NVR(id=2, name='Retirado', deleted=True),
+    ])
+    sesion.commit()
+    yield
+    resolutor_equipos.invalidar()
+
+
+@pytest.fixture
+def consultas(app):
+    contador = []
+
+    def contar(*args):
+        contador.append(1)
+
+    event.listen(db.engine, 'before_cursor_execute', contar)
+    yield contador
+    event.remove(db.engine, 'before_cursor_execute', contar)
+
+
+def test_una_consulta_por_tipo_y_luego_cache(equipos, consultas):
+    pares = [('camara', 1), ('camara', 2), ('nvr', 1), ('nvr', 2), ('nvr', 9), ('planeta', 1), ('camara', None)]
+    datos = resolutor_equipos.resolver(pares)
+    assert len(consultas) == 2
+
+    assert datos[('camara', 1)] == {'id': 1, 'nombre': 'Acceso', 'ubicacion': 'Biblioteca',
+                                    'marca': 'Hikvision', 'modelo': 'DS-2CD', 'tipo': 'camara'}
+    assert datos[('nvr', 2)] is None and datos[('nvr', 9)] is None
+    assert ('planeta', 1) not in datos
+
+    assert resolutor_equipos.nombre('nvr', 1) == 'Grabador'
+    assert resolutor_equipos.nombre('nvr', 2, solo_activos=False) == 'Retirado'
+    assert len(consultas) == 3
+
+
+def test_renombrar_invalida_al_confirmar(sesion, equipos):
+    assert resolutor_equipos.nombre('camara', 1) == 'Acceso'
+
+    camara = sesion.get(Camara, 1)
+    camara.nombre = 'Acceso norte'
+    sesion.flush()
+    # Sin commit la caché no cambia
+    assert resolutor_equipos.nombre('camara', 1) == 'Acceso'
+    sesion.commit()
+    assert resolutor_equipos.nombre('camara', 1) == 'Acceso norte'
+
+    sesion.get(Ubicacion, 1).nombre = 'Biblioteca central'
+    sesion.commit()
+    assert resolutor_equipos.resolver([('camara', 2)])[('camara', 2)]['ubicacion'] == 'Biblioteca central'
+
+    sesion.delete(sesion.get(Camara, 2))
+    sesion.commit()
+    assert resolutor_equipos.nombre('camara', 2) == ''
+
+
+def test_mapa_propio_resuelve_fuente_sin_mezclar_cache(sesion, equipos):
+    """Las rutas de mantenimientos mapean 'fuente' a Fuente (tabla fuentes), no a FuentePoder"""
+    sesion.add_all([Fuente(id=1, nombre='Fuente rack A'), FuentePoder(id=1, name='PSU patio')])
+    sesion.commit()
+    mapa_rutas = {'camara': Camara, 'fuente': Fuente}
+
+    assert resolutor_equipos.nombre('fuente', 1, modelos=mapa_rutas) == 'Fuente rack A'
+    assert resolutor_equipos.nombre('fuente', 1) == 'PSU patio'
+    assert resolutor_equipos.resolver([('fuente', 1)], modelos=mapa_rutas)[('fuente', 1)]['tipo'] == 'fuente'
+
+    sesion.get(Fuente, 1).nombre = 'Fuente rack B'
+    sesion.commit()
+    assert resolutor_equipos.nombre('fuente', 1, modelos=mapa_rutas) == 'Fuente rack B'
+    assert resolutor_equipos.nombre('fuente', 1) == 'PSU patio'
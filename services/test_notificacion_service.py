@@ -0,0 +1,250 @@
+"""
+Pruebas de las notificaciones encoladas y de su envío con un SMTP simulado.
+"""
+
+import pytest
+
+from models import Usuario, Notificacion, NotificacionContador, NotificacionCola
+from models.notificacion_cola import EstadoNotificacionCola
+from services.cola_notificaciones import ColaNotificaciones, SMTPConnectionPool
+from services.notificacion_service import NotificacionService
+
+
+class SMTPSimulado:
+    """Reemplazo de smtplib.SMTP que guarda los mensajes en memoria"""
+
+    instancias = []
+
+    def __init__(self, host, port, timeout=None):
+        self.enviados = []
+        self.cerrado = False
+        SMTPSimulado.instancias.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.quit()
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, from_email, to_emails, mensaje):
+        if any(destino.startswith('rebota') for destino in to_emails):
+            raise OSError('buzón inexistente')
+        self.enviados.append((tuple(to_emails), mensaje))
+
+    def quit(self):
+        self.cerrado = True
+
+
+@pytest.fixture
+def usuarios(sesion):
+    sesion.add_all([
+        Usuario(id=1, username='admin', email='admin@ufro.cl', password_hash='x', full_name='Admin',
+                role='administrador', is_active=True),
+        Usuario(id=2, username='tecnico', email='rebota@ufro.cl', password_hash='x', full_name='Técnico',
+                role='tecnico', is_active=True),
+        Usuario(id=3, username='visita', email='visita@ufro.cl', password_hash='x', full_name='Visita',
+                role='visualizador', is_active=True),
+        Usuario(id=4, username='baja', email='baja@ufro.cl', password_hash='x', full_name='Baja',
+                role='tecnico', is_active=False),
+    ])
+    sesion.commit()
+
+
+@pytest.fixture
+def smtp():
+    SMTPSimulado.instancias = []
+    return SMTPConnectionPool('smtp.prueba', 587, user='u', password='p', smtp_factory=SMTPSimulado)
+
+
+def test_falla_se_encola_y_el_worker_la_envia(sesion, usuarios, smtp):
+    service = NotificacionService(sesion, use_queue=True)
+    service.digest_window = 0
+
+    resultado = service.notify_failure({'titulo': 'Cámara sin video', 'severidad': 'alta'})
+
+    assert resultado['success']
+    assert [r['user_id'] for r in resultado['results']] == [1, 2]
+    assert all(r['queued'] and r['success'] for r in resultado['results'])
+    assert sesion.query(NotificacionCola).count() == 2
+    assert sesion.get(NotificacionContador, 1).no_leidas == 1
+
+    cola = ColaNotificaciones(sesion, smtp_pool=smtp, backoff_base=1)
+    assert cola.procesar_lote() == {'procesados': 2, 'enviados': 1, 'fallidos': 1}
+
+    # Una sola sesión SMTP para todo el lote
+    assert len(SMTPSimulado.instancias) == 1
+    assert SMTPSimulado.instancias[0].enviados[0][0] == ('admin@ufro.cl',)
+
+    fallido = sesion.query(NotificacionCola).filter(
+        NotificacionCola.estado == EstadoNotificacionCola.PENDIENTE
+    ).one()
+    assert fallido.intentos == 1 and 'buzón inexistente' in fallido.ultimo_error
+
+
+def test_error_en_notificacion_interna_no_descarta_lo_encolado(sesion, usuarios, monkeypatch):
+    service = NotificacionService(sesion, use_queue=True)
+    service.digest_window = 0
+    ajustar = service._ajustar_no_leidas
+
+    def ajustar_fallando(user_id, delta):
+        if user_id == 2:
+            raise RuntimeError('contador bloqueado')
+        ajustar(user_id, delta)
+
+    monkeypatch.setattr(service, '_ajustar_no_leidas', ajustar_fallando)
+    resultado = service.notify_failure({'titulo': 'Switch caído', 'severidad': 'media'})
+    sesion.expire_all()
+
+    por_usuario = {r['user_id']: r for r in resultado['results']}
+    assert por_usuario[1]['success'] and not por_usuario[2]['success']
+    assert sesion.query(NotificacionCola).count() == 2
+    assert [n.user_id for n in sesion.query(Notificacion).all()] == [1]
+    assert sesion.get(NotificacionContador, 1).no_leidas == 1
+
+
+def test_mantenimiento_notifica_usuarios_indicados(sesion, usuarios):
+    service = NotificacionService(sesion, use_queue=True)
+
+    resultado = service.notify_maintenance({'tipo': 'Preventivo'}, users_to_notify=[1, 3, 99])
+    assert [r['user_id'] for r in resultado['results']] == [1, 3]
+
+    resultado = service.notify_maintenance({'tipo': 'Preventivo'})
+    assert [r['user_id'] for r in resultado['results']] == [1, 2, 3]
+    assert sesion.get(NotificacionContador, 1).no_leidas == 2
+
+
+def test_envio_directo_registra_en_log(sesion, usuarios, monkeypatch):
+    monkeypatch.setattr('services.notificacion_service.smtplib.SMTP', SMTPSimulado)
+    service = NotificacionService(sesion, use_queue=False)
+    service.smtp_user, service.smtp_password = 'u', 'p'
+
+    assert service.send_email(['admin@ufro.cl'], 'Prueba', 'cuerpo')['success']
+    assert not service.send_email(['rebota@ufro.cl'], 'Prueba', 'cuerpo')['success']
+
+    stats = service.get_notification_statistics()
+    assert stats['por_tipo'] == {'email': 2}
+    assert stats['por_estado'] == {'enviado': 1, 'error': 1}
+
+
+def test_impacto_genera_un_resumen_y_una_notificacion_por_usuario(sesion, usuarios):
+    service = NotificacionService(sesion, use_queue=True)
+    impacto = [
+        {'tipo': 'switch', 'id': 5, 'motivo_impacto': 'Falla Inicial'},
+        {'tipo': 'camara', 'id': 11, 'motivo_impacto': 'Sin enlace'},
+        {'tipo': 'camara', 'id': 12, 'motivo_impacto': 'Sin enlace'},
+    ]
+
+    resultado = service.notify_impact(impacto, {'titulo': 'Switch 5 sin conexión', 'severidad': 'alta'})
+
+    assert resultado['causa_raiz'] == 'switch:5' and resultado['equipos_afectados'] == 3
+    assert [n.user_id for n in sesion.query(Notificacion).order_by(Notificacion.user_id)] == [1, 2]
+    resumenes = sesion.query(NotificacionCola).order_by(NotificacionCola.id).all()
+    assert [len(r.items) for r in resumenes] == [3, 3]
+    assert resumenes[0].clave_agrupacion == 'failure:admin@ufro.cl:switch:5'
+
+    # Una segunda falla con la misma causa raíz se suma al resumen abierto
+    service.notify_failure({'titulo': 'Switch 5 reiniciado', 'causa_raiz': {'tipo': 'switch', 'id': 5}})
+    sesion.expire_all()
+    assert [len(r.items) for r in sesion.query(NotificacionCola).order_by(NotificacionCola.id)] == [4, 4]
+
+
+def test_resumen_abierto_concurrente_se_reutiliza(tmp_path, smtp):
+    """Quien pierde la carrera del INSERT se suma al resumen que abrió el otro proceso"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'cola.db'}")
+    NotificacionCola.__table__.create(engine)
+    sesion_a, sesion_b = Session(engine), Session(engine)
+
+    def renderizar(items):
+        return f'{len(items)} fallas', 'texto', None
+
+    def renderizar_con_carrera(items):
+        # Entre la consulta y el INSERT de A, B abre el resumen de la misma clave
+        if sesion_b.query(NotificacionCola).count() == 0:
+            ColaNotificaciones(sesion_b, smtp_pool=smtp).encolar_agrupado(
+                ['admin@ufro.cl'], 'failure:admin', [{'titulo': 'B'}], 60, renderizar)
+        return renderizar(items)
+
+    ColaNotificaciones(sesion_a, smtp_pool=smtp).encolar_agrupado(
+        ['admin@ufro.cl'], 'failure:admin', [{'titulo': 'A'}], 60, renderizar_con_carrera)
+
+    resumen = Session(engine).query(NotificacionCola).one()
+    assert [item['titulo'] for item in resumen.items] == ['B', 'A']
+    assert resumen.asunto == '2 fallas'
+    engine.dispose()
+
+
+def test_resumen_rival_tomado_por_el_worker_abre_uno_nuevo(sesion, smtp):
+    """Si tras perder la carrera del INSERT el resumen rival ya no está abierto, se vuelve a abrir"""
+    from datetime import datetime
+    from sqlalchemy import event
+
+    rivales = []
+
+    @event.listens_for(sesion, 'before_flush')
+    def abrir_rival(session, contexto, instancias):
+        # El rival se inserta dentro del savepoint del INSERT y desaparece con su
+        # rollback, como si el worker lo hubiera tomado antes de volver a leer
+        if not rivales:
+            rivales.append(session.connection().execute(NotificacionCola.__table__.insert(), {
+                'destinatarios': ['admin@ufro.cl'], 'asunto': 'rival', 'cuerpo_texto': 'texto',
+                'clave_agrupacion': 'failure:admin', 'estado': EstadoNotificacionCola.PENDIENTE,
+                'intentos': 0, 'max_intentos': 5, 'proximo_intento': datetime.utcnow(), 'deleted': False
+            }))
+
+    try:
+        resumen = ColaNotificaciones(sesion, smtp_pool=smtp).encolar_agrupado(
+            ['admin@ufro.cl'], 'failure:admin', [{'titulo': 'A'}], 60,
+            lambda items: (f'{len(items)} fallas', 'texto', None))
+    finally:
+        event.remove(sesion, 'before_flush', abrir_rival)
+
+    assert rivales
+    [guardado] = sesion.query(NotificacionCola).all()
+    assert guardado.id == resumen.id and guardado.items == [{'titulo': 'A'}]
+
+
+def test_bandeja_y_contador_de_no_leidas(sesion, usuarios):
+    service = NotificacionService(sesion, use_queue=True)
+    for numero in range(3):
+        assert service.send_system_notification(1, f'Aviso {numero}', 'mensaje')
+
+    bandeja = service.get_user_notifications(1)
+    assert [n['titulo'] for n in bandeja] == ['Aviso 2', 'Aviso 1', 'Aviso 0']
+    assert service.get_unread_count(1) == 3
+    assert service.get_unread_count(2) == 0
+
+    # Marcar dos veces la misma notificación descuenta una sola vez
+    assert service.mark_notifications_read(1, [bandeja[0]['id']]) == 1
+    assert service.mark_notifications_read(1, [bandeja[0]['id']]) == 0
+    assert service.mark_notifications_read(1, []) == 0
+    assert service.get_unread_count(1) == 2
+    assert len(service.get_user_notifications(1, solo_no_leidas=True)) == 2
+
+    # Otro usuario no puede marcar notificaciones ajenas
+    assert service.mark_notifications_read(2, [bandeja[1]['id']]) == 0
+
+    assert service.mark_notifications_read(1) == 2
+    assert service.get_unread_count(1) == 0
+
+
+def test_reconstruir_contadores(sesion, usuarios):
+    service = NotificacionService(sesion, use_queue=True)
+    service.send_system_notification(1, 'Aviso', 'mensaje')
+    service.send_system_notification(2, 'Aviso', 'mensaje')
+    service.send_system_notification(2, 'Aviso', 'mensaje')
+
+    # Desajuste manual del contador
+    sesion.get(NotificacionContador, 2).no_leidas = 40
+    sesion.commit()
+
+    assert service.rebuild_unread_counters() == 2
+    assert (service.get_unread_count(1), service.get_unread_count(2)) == (1, 2)
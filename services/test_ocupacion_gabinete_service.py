@@ -0,0 +1,41 @@
+"""
+Pruebas del mantenimiento del índice de ocupación de gabinetes.
+"""
+
+from models import OcupacionGabinete
+from services import ocupacion_gabinete_service
+from services.ocupacion_gabinete_service import actualizar_indice
+
+
+def _fila(gabinete_id, libres):
+    return {'gabinete_id': gabinete_id, 'ubicacion_id': None, 'activo': True, 'unidades_totales': 42,
+            'unidades_ocupadas': 42 - libres, 'unidades_libres': libres, 'mayor_tramo_libre': libres,
+            'tramos_libres': [[1, libres]], 'peso_maximo_kg': None}
+
+
+def test_actualiza_en_su_lugar_y_tolera_fila_concurrente(sesion, monkeypatch):
+    calculadas = {1: _fila(1, 10), 2: _fila(2, 20)}
+    concurrentes = []
+
+    def filas_indice(connection, gabinete_ids):
+        # Otra transacción puede crear la fila después de consultar las existentes
+        for gabinete_id in concurrentes:
+            connection.execute(OcupacionGabinete.__table__.insert(), _fila(gabinete_id, 0))
+        return [calculadas[i] for i in gabinete_ids if i in calculadas]
+
+    monkeypatch.setattr(ocupacion_gabinete_service, '_filas_indice', filas_indice)
+
+    assert actualizar_indice(sesion.connection(), [1, 2]) == 2
+    sesion.commit()
+    id_original = sesion.query(OcupacionGabinete).filter_by(gabinete_id=1).one().id
+
+    calculadas[1] = _fila(1, 4)
+    del calculadas[2]
+    calculadas[3] = _fila(3, 30)
+    concurrentes.append(3)
+    actualizar_indice(sesion.connection(), [1, 2, 3])
+    sesion.commit()
+
+    filas = {f.gabinete_id: f for f in sesion.query(OcupacionGabinete)}
+    assert {i: f.unidades_libres for i, f in filas.items()} == {1: 4, 3: 30}
+    assert filas[1].id == id_original and filas[3].tramos_libres == [[1, 30]]
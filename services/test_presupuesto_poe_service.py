@@ -0,0 +1,58 @@
+"""
+Pruebas del mantenimiento del índice de presupuesto PoE por switch.
+"""
+
+import pytest
+
+from models import PresupuestoPoeSwitch
+from services import presupuesto_poe_service
+from services.presupuesto_poe_service import actualizar_indice
+
+
+def _fila(switch_id, disponible):
+    return {'switch_id': switch_id, 'ubicacion_id': None, 'activo': True, 'presupuesto_watts': 100.0,
+            'consumo_watts': 100.0 - disponible, 'disponible_watts': disponible, 'watts_maximo_puerto': 15.4,
+            'puertos_poe_libres': 1, 'puertos_libres': [1]}
+
+
+@pytest.fixture
+def calculadas(monkeypatch):
+    """Filas que devolvería el cálculo desde switches y puertos, por switch"""
+    filas = {}
+    monkeypatch.setattr(presupuesto_poe_service, '_filas_indice',
+                        lambda connection, switch_ids: [filas[i] for i in switch_ids if i in filas])
+    return filas
+
+
+def _indice(sesion):
+    return {f.switch_id: f.disponible_watts for f in sesion.query(PresupuestoPoeSwitch)}
+
+
+def test_actualiza_inserta_y_quita(sesion, calculadas):
+    calculadas.update({1: _fila(1, 40.0), 2: _fila(2, 70.0)})
+    assert actualizar_indice(sesion.connection(), [1, 2, None]) == 2
+    sesion.commit()
+    ids = {f.switch_id: f.id for f in sesion.query(PresupuestoPoeSwitch)}
+
+    # El switch 2 se eliminó: su fila sale; la del 1 se actualiza en su lugar
+    calculadas[1] = _fila(1, 25.0)
+    del calculadas[2]
+    actualizar_indice(sesion.connection(), [1, 2])
+    sesion.commit()
+    assert _indice(sesion) == {1: 25.0}
+    assert sesion.query(PresupuestoPoeSwitch).one().id == ids[1]
+
+
+def test_fila_creada_por_otra_transaccion(sesion, calculadas, monkeypatch):
+    calculadas[3] = _fila(3, 10.0)
+    calcular = presupuesto_poe_service._filas_indice
+
+    def con_insercion_concurrente(connection, switch_ids):
+        # Otra transacción crea la fila después de que se consultaron las existentes
+        connection.execute(PresupuestoPoeSwitch.__table__.insert(), _fila(3, 99.0))
+        return calcular(connection, switch_ids)
+
+    monkeypatch.setattr(presupuesto_poe_service, '_filas_indice', con_insercion_concurrente)
+    assert actualizar_indice(sesion.connection(), [3]) == 1
+    sesion.commit()
+    assert _indice(sesion) == {3: 10.0}
@@ -0,0 +1,54 @@
+"""
+Pruebas de los renderizadores XLSX y PDF en streaming.
+"""
+
+import io
+import re
+from datetime import datetime
+
+import openpyxl
+
+from services.reporte_exportacion import SeccionReporte, iter_xlsx, iter_pdf
+
+
+def _secciones(consumidas):
+    def detalle():
+        for numero in range(1, 1201):
+            consumidas.append(numero)
+            yield numero, datetime(2025, 1, 1, 8, 30), f'Falla <{numero}> & "x"', 2.5
+    yield SeccionReporte('Resumen', ('Indicador', 'Valor'), [('Total', 1200), ('Sin valor', None)])
+    yield SeccionReporte('Detalle de fallas', ('ID', 'Fecha', 'Título', 'Horas'), detalle())
+
+
+def test_xlsx_se_entrega_por_bloques_y_openpyxl_lo_lee():
+    consumidas = []
+    partes = iter_xlsx(_secciones(consumidas))
+
+    # Los primeros bytes salen antes de recorrer todo el detalle
+    primera = next(partes)
+    assert primera.startswith(b'PK') and len(consumidas) < 1200
+
+    contenido = primera + b''.join(partes)
+    libro = openpyxl.load_workbook(io.BytesIO(contenido), read_only=True)
+    assert libro.sheetnames == ['Resumen', 'Detalle de fallas']
+
+    filas = list(libro['Detalle de fallas'].iter_rows(values_only=True))
+    assert filas[0] == ('ID', 'Fecha', 'Título', 'Horas')
+    assert len(filas) == 1201
+    assert filas[1] == (1, datetime(2025, 1, 1, 8, 30), 'Falla <1> & "x"', 2.5)
+    sin_valor = list(libro['Resumen'].iter_rows(values_only=True))[2]
+    assert sin_valor[0] == 'Sin valor' and not any(sin_valor[1:])
+
+
+def test_pdf_tiene_xref_valida():
+    contenido = b''.join(iter_pdf(_secciones([]), titulo='Análisis de fallas'))
+
+    assert contenido.startswith(b'%PDF-') and contenido.rstrip().endswith(b'%%EOF')
+    inicio_xref = int(re.search(rb'startxref\s+(\d+)', contenido).group(1))
+    assert contenido[inicio_xref:].startswith(b'xref')
+
+    # Cada desplazamiento de la tabla apunta al objeto que declara
+    entradas = re.findall(rb'(\d{10}) 00000 n', contenido[inicio_xref:])
+    for numero, desplazamiento in enumerate(entradas, start=1):
+        assert contenido[int(desplazamiento):].startswith(f'{numero} 0 obj'.encode())
+    assert contenido.count(b'/Type /Page ') + contenido.count(b'/Type /Page\n') >= 2
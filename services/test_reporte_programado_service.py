@@ -0,0 +1,78 @@
+"""
+Pruebas de los snapshots de reportes programados y de su comparación.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from models.reporte_snapshot import ReporteSnapshot, PeriodicidadReporte
+from services.reporte_programado_service import ReporteProgramadoService, comparar_reportes, periodo_cerrado
+from services.reporte_service import ReporteService
+
+
+def test_elementos_con_campos_repetidos_no_se_fusionan():
+    anterior = {'alertas': [
+        {'tipo': 'critical', 'titulo': 'Cámara desconectada', 'descripcion': 'Acceso'},
+        {'tipo': 'critical', 'titulo': 'Cámara desconectada', 'descripcion': 'Biblioteca'},
+    ]}
+    actual = {'alertas': [
+        {'tipo': 'critical', 'titulo': 'Cámara desconectada', 'descripcion': 'Biblioteca'},
+        {'tipo': 'critical', 'titulo': 'Cámara desconectada', 'descripcion': 'Casino'},
+        {'tipo': 'critical', 'titulo': 'Cámara desconectada', 'descripcion': 'Casino'},
+    ]}
+
+    [cambio] = comparar_reportes(anterior, actual)
+    assert cambio['ruta'] == 'alertas'
+    assert [a['descripcion'] for a in cambio['agregados']] == ['Casino', 'Casino']
+    assert [q['descripcion'] for q in cambio['quitados']] == ['Acceso']
+
+
+def test_elementos_con_id_se_emparejan_por_id():
+    anterior = {'fallas': [{'id': 1, 'estado': 'abierta'}, {'id': 2, 'estado': 'abierta'}]}
+    actual = {'fallas': [{'id': 2, 'estado': 'cerrada'}, {'id': 3, 'estado': 'abierta'}]}
+
+    cambios = comparar_reportes(anterior, actual)
+    assert cambios[0] == {'ruta': 'fallas', 'agregados': [{'id': 3, 'estado': 'abierta'}],
+                          'quitados': [{'id': 1, 'estado': 'abierta'}]}
+    assert cambios[1] == {'ruta': 'fallas[2].estado', 'anterior': 'abierta', 'actual': 'cerrada'}
+
+
+def test_numeros_incluyen_delta():
+    [cambio] = comparar_reportes({'resumen': {'total': 8, 'timestamp': 'a'}},
+                                 {'resumen': {'total': 10, 'timestamp': 'b'}})
+    assert (cambio['ruta'], cambio['delta'], cambio['variacion_pct']) == ('resumen.total', 2, 25.0)
+
+
+def test_snapshots_por_periodo_y_diferencias(sesion, monkeypatch):
+    periodos = []
+
+    def analisis(self, start_date, end_date):
+        periodos.append((start_date, end_date))
+        return {'success': True, 'report': {'resumen_fallas': {'total_fallas': len(periodos) * 4}}}
+
+    monkeypatch.setattr(ReporteService, 'generate_failure_analysis_report', analisis)
+    service = ReporteProgramadoService(sesion)
+
+    assert service.generar('fallas', PeriodicidadReporte.SEMANAL, ahora=datetime(2025, 3, 12, 1))
+    assert service.generar('fallas', PeriodicidadReporte.SEMANAL, ahora=datetime(2025, 3, 19, 1))
+    # Ya generado: no se recalcula
+    assert service.generar('fallas', PeriodicidadReporte.SEMANAL, ahora=datetime(2025, 3, 19, 2)) is None
+
+    assert periodos == [('2025-03-03', '2025-03-09'), ('2025-03-10', '2025-03-16')]
+    assert sesion.query(ReporteSnapshot).count() == 2
+
+    diferencias = service.diferencias('fallas', PeriodicidadReporte.SEMANAL)
+    assert diferencias['cambios'] == [{'ruta': 'resumen_fallas.total_fallas', 'anterior': 4, 'actual': 8,
+                                       'delta': 4, 'variacion_pct': 100.0}]
+
+
+def test_dashboard_no_se_guarda_como_periodo(sesion):
+    with pytest.raises(ValueError):
+        ReporteProgramadoService(sesion).generar('dashboard', PeriodicidadReporte.DIARIO)
+
+
+def test_periodo_cerrado():
+    ahora = datetime(2025, 3, 12, 15)
+    assert periodo_cerrado(PeriodicidadReporte.DIARIO, ahora) == (datetime(2025, 3, 11), datetime(2025, 3, 12))
+    assert periodo_cerrado(PeriodicidadReporte.MENSUAL, ahora) == (datetime(2025, 2, 1), datetime(2025, 3, 1))
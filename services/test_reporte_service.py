@@ -0,0 +1,58 @@
+"""
+Pruebas de la ejecución de las secciones del reporte de dashboard.
+"""
+
+import time
+
+import pytest
+
+from services.reporte_service import ReporteService, SECCIONES_DASHBOARD
+
+
+@pytest.fixture
+def secciones(monkeypatch):
+    """Reemplaza cada sección por una lectura trivial de la sesión que la ejecuta"""
+    from sqlalchemy import text
+
+    for nombre, metodo in SECCIONES_DASHBOARD:
+        monkeypatch.setattr(ReporteService, metodo,
+                            lambda self, nombre=nombre: {nombre: self.db.execute(text('SELECT 1')).scalar()})
+    return monkeypatch
+
+
+def test_paralelo_entrega_lo_mismo_que_secuencial(sesion, secciones):
+    service = ReporteService(sesion)
+
+    secuencial = service.generate_dashboard_report(paralelo=False)
+    paralelo = service.generate_dashboard_report(paralelo=True, timeout_seccion=5)
+
+    assert secuencial['success'] and paralelo['success']
+    for nombre, _ in SECCIONES_DASHBOARD:
+        assert paralelo['report'][nombre] == secuencial['report'][nombre] == {nombre: 1}
+    assert paralelo['metadata']['modo'] == 'paralelo'
+    assert paralelo['metadata']['secciones_incompletas'] == {}
+
+
+def test_seccion_lenta_o_con_error_deja_reporte_parcial(sesion, secciones):
+    def lenta(self):
+        time.sleep(1)
+        return {'tarde': True}
+
+    def con_error(self):
+        raise RuntimeError('tabla bloqueada')
+
+    secciones.setattr(ReporteService, '_get_trends', lenta)
+    secciones.setattr(ReporteService, '_get_alerts', con_error)
+
+    inicio = time.perf_counter()
+    resultado = ReporteService(sesion).generate_dashboard_report(paralelo=True, timeout_seccion=0.3)
+    assert time.perf_counter() - inicio < 1
+
+    assert resultado['success']
+    assert resultado['report']['tendencias'] is None
+    assert resultado['report']['alertas'] is None
+    assert resultado['report']['resumen_ejecutivo'] == {'resumen_ejecutivo': 1}
+    assert resultado['metadata']['secciones_incompletas'] == {
+        'tendencias': 'timeout',
+        'alertas': 'error: tabla bloqueada'
+    }
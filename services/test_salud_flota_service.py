@@ -0,0 +1,84 @@
+"""
+Pruebas de los puntajes de salud de la flota y sus agregados.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from models import UPS, Ubicacion
+from services import nombres_equipo_service
+from services.salud_flota_service import MotorSaludFlota, SaludFlota, _penalizaciones_ups
+
+
+def _salud():
+    return SaludFlota(
+        tipos=['ups', 'ups', 'switch'],
+        ids=np.array([1, 2, 1]),
+        ubicaciones=np.array([1, 1, 0]),
+        puntajes=np.array([90, 40, 70]),
+        penalizaciones={'ups': {'bateria': np.array([10.0, 60.0])}, 'switch': {'estado': np.array([30.0])}},
+        inicios={'ups': 0, 'switch': 2}
+    )
+
+
+@pytest.fixture
+def motor(sesion, monkeypatch):
+    monkeypatch.setattr(nombres_equipo_service.resolutor_equipos, 'resolver', lambda claves: {})
+    sesion.add(Ubicacion(id=1, nombre='Biblioteca', tipo='edificio', created_by_user_id=1))
+    sesion.commit()
+    motor = MotorSaludFlota()
+    motor._salud = _salud()
+    return motor
+
+
+def test_peores_con_motivos(motor):
+    peores = motor.peores(2)
+    assert [(p['tipo'], p['id'], p['puntaje']) for p in peores] == [('ups', 2, 40), ('switch', 1, 70)]
+    assert peores[0]['motivos'] == {'bateria': 60}
+    assert peores[1]['ubicacion_id'] is None
+
+    assert [p['id'] for p in motor.peores(5, tipo='ups')] == [2, 1]
+    assert motor.peores(0) == []
+    assert motor.puntaje('ups', 1) == 90 and motor.puntaje('nvr', 1) is None
+
+
+def test_agregados_por_ubicacion_y_tipo(sesion, motor):
+    ubicaciones = motor.por_ubicacion(session=sesion)
+    assert [(u['nombre'], u['equipos'], u['promedio'], u['minimo'], u['criticos']) for u in ubicaciones] == [
+        ('Biblioteca', 2, 65.0, 40, 1), ('Sin ubicación', 1, 70.0, 70, 0)
+    ]
+
+    resumen = motor.resumen()
+    assert resumen['flota'] == {'equipos': 3, 'promedio': 66.7, 'minimo': 40, 'criticos': 1}
+    assert resumen['por_tipo']['nvr']['equipos'] == 0
+
+
+def test_penalizaciones_de_ups(sesion):
+    sesion.add_all([UPS(id=1, name='UPS 1', status='activo', last_heartbeat=datetime.utcnow()),
+                    UPS(id=2, name='UPS 2', status='mantenimiento')])
+    sesion.commit()
+
+    filas, componentes = _penalizaciones_ups(sesion, UPS.__table__, datetime.utcnow().timestamp())
+    assert [fila['id'] for fila in filas] == [1, 2]
+    assert componentes['estado'].tolist() == [0.0, 10.0]
+    assert componentes['sin_heartbeat'].tolist() == [0.0, 5.0]
+    assert componentes['bateria'].tolist() == [0.0, 0.0]
+
+
+def test_salud_se_calcula_sin_retener_el_lock(monkeypatch):
+    motor = MotorSaludFlota()
+    calculos = []
+
+    def construir(session):
+        assert not motor._lock.locked()
+        calculos.append(session)
+        return _salud()
+
+    monkeypatch.setattr('services.salud_flota_service.construir_salud', construir)
+    salud = motor.salud(session=object())
+    assert motor.salud(session=object()) is salud and len(calculos) == 1
+
+    motor.invalidar()
+    assert motor.salud(session=object()) is not salud and len(calculos) == 2
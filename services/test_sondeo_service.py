@@ -0,0 +1,114 @@
+"""
+Pruebas del sondeo de equipos con un sondeador de reemplazo y del sondeador
+real contra servidores TCP locales.
+"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from models import Camara, HistorialEstadoEquipo
+from services.sondeo_service import Sondeador, SondeoService
+from services.transiciones_service import DetectorTransiciones
+
+
+class _Sondeador:
+    """Responde con el resultado fijado por IP, sin abrir sockets"""
+
+    def __init__(self):
+        self.alcanzables = {}
+
+    def sondear_todos(self, objetivos):
+        return [{**o, 'alcanzable': self.alcanzables.get(o['ip'], False), 'resultado': 'timeout',
+                 'latencia_ms': None, 'error': 'Sin respuesta', 'metodo': 'tcp'} for o in objetivos]
+
+
+@pytest.fixture
+def sondeador(sesion):
+    sesion.add_all([
+        Camara(id=1, codigo='CAM-1', nombre='Acceso', estado='activo', ip_address='10.0.0.1'),
+        Camara(id=2, codigo='CAM-2', nombre='Sin IP', estado='activo'),
+    ])
+    sesion.commit()
+    return _Sondeador()
+
+
+def test_probar_solo_informa(sesion, sondeador):
+    detector = DetectorTransiciones(fallos_para_caida=1)
+    servicio = SondeoService(sesion, sondeador, detector)
+
+    resultado = servicio.probar(' 10.0.0.1 ', 554)
+    assert resultado['alcanzable'] is False and resultado['ip'] == '10.0.0.1'
+
+    # Ni estado, ni historial, ni contadores de histéresis
+    sesion.expire_all()
+    assert sesion.get(Camara, 1).estado == 'activo'
+    assert sesion.query(HistorialEstadoEquipo).count() == 0
+    assert detector.contadores('camara', 1) == {'fallos_consecutivos': 0, 'exitos_consecutivos': 0}
+
+
+def test_sondear_equipo_aplica_histeresis(sesion, sondeador, monkeypatch):
+    monkeypatch.setattr('services.sondeo_service.notificar_caidas', lambda session, aplicadas: None)
+    servicio = SondeoService(sesion, sondeador, DetectorTransiciones(fallos_para_caida=2, exitos_para_recuperacion=1))
+
+    assert servicio.sondear_equipo('camara', 2) is None
+    assert servicio.sondear_equipo('camara', 1)['estado'] == 'activo'
+    assert sesion.query(HistorialEstadoEquipo).count() == 0
+
+    resultado = servicio.sondear_equipo('camara', 1)
+    assert (resultado['estado'], resultado['fallos_consecutivos']) == ('fallando', 2)
+    [cambio] = sesion.query(HistorialEstadoEquipo).all()
+    assert (cambio.estado_anterior, cambio.estado_nuevo) == ('activo', 'fallando')
+
+    sondeador.alcanzables['10.0.0.1'] = True
+    assert servicio.sondear_equipo('camara', 1)['estado'] == 'activo'
+    assert sesion.query(HistorialEstadoEquipo).count() == 2
+
+
+def _puerto_cerrado():
+    """Puerto de 127.0.0.1 recién liberado, sin nadie escuchando"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def _contra_servidores(sondeador, objetivos_por_puerto):
+    """Sondea con servidores asyncio en 127.0.0.1; `objetivos_por_puerto(abierto, cerrado)` arma la lista"""
+    async def atender(lector, escritor):
+        escritor.close()
+
+    servidor = await asyncio.start_server(atender, '127.0.0.1', 0, backlog=1024)
+    abierto = servidor.sockets[0].getsockname()[1]
+    async with servidor:
+        objetivos = objetivos_por_puerto(abierto, _puerto_cerrado())
+        inicio = time.perf_counter()
+        resultados = await sondeador.sondear(objetivos)
+        return resultados, time.perf_counter() - inicio
+
+
+def test_sondeador_real_puertos_abierto_y_cerrado():
+    sondeador = Sondeador(timeout=2.0, metodo='tcp')
+    resultados, _ = asyncio.run(_contra_servidores(sondeador, lambda abierto, cerrado: [
+        {'equipo_tipo': 'camara', 'equipo_id': 1, 'ip': '127.0.0.1', 'puerto': abierto},
+        {'equipo_tipo': 'camara', 'equipo_id': 2, 'ip': '127.0.0.1', 'puerto': cerrado},
+    ]))
+
+    abierto, cerrado = resultados
+    assert (abierto['equipo_id'], abierto['alcanzable'], abierto['resultado']) == (1, True, 'exito')
+    assert abierto['latencia_ms'] is not None and abierto['error'] is None
+    assert (cerrado['equipo_id'], cerrado['alcanzable'], cerrado['resultado']) == (2, False, 'rechazado')
+
+
+def test_sondeador_real_barre_3000_equipos_en_menos_de_10_s():
+    sondeador = Sondeador(timeout=2.0, metodo='tcp')
+    resultados, duracion = asyncio.run(_contra_servidores(sondeador, lambda abierto, cerrado: [
+        {'equipo_tipo': 'camara', 'equipo_id': i, 'ip': '127.0.0.1', 'puerto': abierto if i % 3 else cerrado}
+        for i in range(3000)
+    ]))
+
+    assert len(resultados) == 3000 and duracion < 10
+    assert [r['equipo_id'] for r in resultados] == list(range(3000))
+    assert sum(r['alcanzable'] for r in resultados) == 2000
+    assert {r['resultado'] for r in resultados if not r['alcanzable']} == {'rechazado'}
@@ -0,0 +1,68 @@
+"""
+Pruebas de la compactación de telemetría en bloques y su retención.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.telemetria import ResolucionTelemetria, TelemetriaMuestra
+from services.telemetria_service import TelemetriaService
+
+
+@pytest.fixture
+def telemetria(sesion):
+    return TelemetriaService(sesion)
+
+
+def _muestra(momento, valor, equipo_id=1):
+    return {'tipo': 'ups', 'id': equipo_id, 'metrica': 'temperatura', 'valor': valor, 'timestamp': momento}
+
+
+def test_compactar_agrega_por_resolucion(telemetria):
+    base = datetime(2025, 1, 1, 8)
+    resultado = telemetria.registrar([
+        _muestra(base, 20.0), _muestra(base + timedelta(seconds=30), 30.0),
+        _muestra(base + timedelta(minutes=1), 40.0),
+        {'tipo': 'planeta', 'id': 1, 'metrica': 'temperatura', 'valor': 1},
+        _muestra(base, float('nan')),
+    ])
+    assert (resultado['registradas'], resultado['rechazadas']) == (3, 2)
+    assert telemetria.compactar() == 3
+    assert telemetria.compactar() == 0
+
+    minutos = telemetria.serie('ups', 1, 'temperatura', base, base + timedelta(hours=1),
+                               resolucion=ResolucionTelemetria.MINUTO)
+    assert (minutos['promedio'], minutos['minimo'], minutos['maximo'], minutos['muestras']) == \
+        ([25.0, 40.0], [20.0, 40.0], [30.0, 40.0], [2, 1])
+
+    # Una muestra atrasada se fusiona en el bloque existente sin perder el promedio
+    telemetria.registrar([_muestra(base + timedelta(seconds=10), 40.0)])
+    telemetria.compactar()
+    horas = telemetria.serie('ups', 1, 'temperatura', base, base + timedelta(hours=1),
+                             resolucion=ResolucionTelemetria.HORA)
+    assert (horas['promedio'], horas['muestras']) == ([32.5], [4])
+
+
+def test_muestra_confirmada_tarde_no_se_salta_ni_se_purga(sesion, telemetria):
+    base = datetime(2025, 1, 1, 8)
+
+    def insertar(muestra_id, valor):
+        sesion.add(TelemetriaMuestra(id=muestra_id, equipo_tipo='ups', equipo_id=1, metrica='temperatura',
+                                     momento=base, valor=valor))
+        sesion.commit()
+
+    insertar(10, 10.0)
+    assert telemetria.compactar() == 1
+    # Una transacción más lenta confirma una muestra de id menor después del ciclo
+    insertar(5, 20.0)
+    assert telemetria.compactar() == 1
+    serie = telemetria.serie('ups', 1, 'temperatura', base, base + timedelta(minutes=1),
+                             resolucion=ResolucionTelemetria.MINUTO)
+    assert serie['muestras'] == [2]
+
+    # La purga solo quita muestras ya compactadas
+    insertar(7, 30.0)
+    eliminados = telemetria.purgar(ahora=base + timedelta(days=30))
+    assert eliminados['crudo'] == 2
+    assert [m.id for m in sesion.query(TelemetriaMuestra)] == [7]
@@ -0,0 +1,85 @@
+"""
+Pruebas de la histéresis de estados y de la escritura de transiciones por lotes.
+"""
+
+import pytest
+
+from models import Camara, Switch, HistorialEstadoEquipo
+from services import transiciones_service
+from services.transiciones_service import DetectorTransiciones, aplicar_transiciones, notificar_caidas
+
+
+def _sondeo(equipo_id, alcanzable, estado='activo', tipo='camara'):
+    return {'equipo_tipo': tipo, 'equipo_id': equipo_id, 'estado': estado, 'alcanzable': alcanzable}
+
+
+def test_caida_y_recuperacion_requieren_resultados_consecutivos():
+    detector = DetectorTransiciones(fallos_para_caida=3, exitos_para_recuperacion=2)
+
+    assert detector.observar([_sondeo(1, False)]) == []
+    assert detector.observar([_sondeo(1, True)]) == []  # un éxito reinicia la cuenta
+    assert detector.observar([_sondeo(1, False)]) == []
+    assert detector.observar([_sondeo(1, False)]) == []
+    # simular no avanza los contadores
+    assert len(detector.observar([_sondeo(1, False)], simular=True)) == 1
+    assert detector.contadores('camara', 1)['fallos_consecutivos'] == 2
+
+    [caida] = detector.observar([_sondeo(1, False)])
+    assert (caida['estado_anterior'], caida['estado_nuevo'], caida['consecutivos']) == ('activo', 'fallando', 3)
+
+    assert detector.observar([_sondeo(1, True, 'fallando')]) == []
+    [recuperacion] = detector.observar([_sondeo(1, True, 'fallando')])
+    assert recuperacion['estado_nuevo'] == 'activo'
+
+    # Mantenimiento y otros estados manuales no se tocan
+    for _ in range(5):
+        assert detector.observar([_sondeo(2, False, 'mantenimiento')]) == []
+
+    with pytest.raises(ValueError):
+        DetectorTransiciones(fallos_para_caida=0)
+
+
+def test_aplicar_respeta_cambios_manuales_concurrentes(sesion):
+    sesion.add_all([Camara(id=1, codigo='CAM-1', nombre='Acceso', estado='activo'),
+                    Camara(id=2, codigo='CAM-2', nombre='Sala', estado='activo'),
+                    Switch(id=1, name='Core', status='activo')])
+    sesion.commit()
+    # Alguien pasó la cámara 2 a mantenimiento después del sondeo
+    sesion.get(Camara, 2).estado = 'mantenimiento'
+    sesion.commit()
+
+    transiciones = [
+        {**_sondeo(equipo_id, False, tipo=tipo), 'estado_anterior': 'activo', 'estado_nuevo': 'fallando',
+         'consecutivos': 3, 'error': 'Sin respuesta'}
+        for tipo, equipo_id in (('camara', 1), ('camara', 2), ('switch', 1))
+    ]
+    aplicadas = aplicar_transiciones(sesion, transiciones)
+
+    assert sorted((t['equipo_tipo'], t['equipo_id']) for t in aplicadas) == [('camara', 1), ('switch', 1)]
+    sesion.expire_all()
+    assert [c.estado for c in sesion.query(Camara).order_by(Camara.id)] == ['fallando', 'mantenimiento']
+    historial = sesion.query(HistorialEstadoEquipo).all()
+    assert len(historial) == 2 and all(h.metadata_adicional['consecutivos'] == 3 for h in historial)
+
+
+def test_caidas_cubiertas_por_otra_se_notifican_con_su_causa(sesion, monkeypatch):
+    impactos = {
+        ('switch', 1): [{'tipo': 'switch', 'id': 1}, {'tipo': 'camara', 'id': 1}, {'tipo': 'camara', 'id': 2}],
+        ('camara', 3): [{'tipo': 'camara', 'id': 3}],
+    }
+    monkeypatch.setattr(transiciones_service, '_impacto', lambda session, tipo, equipo_id: impactos[(tipo, equipo_id)])
+
+    class Notificador:
+        def __init__(self):
+            self.enviados = []
+
+        def notify_impact(self, impacto, datos):
+            self.enviados.append(datos['causa_raiz'])
+
+    notificador = Notificador()
+    caidas = [{**_sondeo(equipo_id, False, tipo=tipo), 'estado_nuevo': 'fallando', 'consecutivos': 3}
+              for tipo, equipo_id in (('camara', 1), ('camara', 3), ('switch', 1), ('camara', 2))]
+
+    resumen = notificar_caidas(sesion, caidas, notificador)
+    assert resumen == {'causas_raiz': 2, 'equipos_afectados': 4}
+    assert notificador.enviados == [{'tipo': 'switch', 'id': 1}, {'tipo': 'camara', 'id': 3}]
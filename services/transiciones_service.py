@@ -0,0 +1,236 @@
+# services/transiciones_service.py
+"""
+Detección de transiciones de estado en línea / caído
+Aplica histéresis a los resultados de sondeo (N fallos consecutivos antes de
+marcar un equipo como caído, M éxitos antes de recuperarlo), escribe las
+transiciones confirmadas de un sondeo en un solo lote y solo entonces ejecuta
+el análisis de impacto (FIA) y las notificaciones, de modo que un segmento
+inestable no se convierta en miles de escrituras y alertas
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+from sqlalchemy import and_
+
+from .confiabilidad_service import ESTADOS_FUERA_SERVICIO
+from .falla_rollup_service import _modelos_equipo
+
+logger = logging.getLogger(__name__)
+
+# Solo se alterna entre estos estados; mantenimiento, inactivo o dado de baja no se tocan
+ESTADO_EN_LINEA = 'activo'
+ESTADO_CAIDO = ESTADOS_FUERA_SERVICIO[0]
+
+# Columna de estado según el esquema de cada tipo de equipo
+ATRIBUTOS_ESTADO = ('estado', 'status')
+
+# Orden en que se buscan causas raíz entre las caídas de un mismo sondeo
+# (una UPS caída explica los switches y cámaras que alimenta, y no al revés)
+PRIORIDAD_CAUSA = ('ups', 'fuente_poder', 'switch', 'nvr', 'gabinete', 'camara')
+
+Clave = Tuple[str, int]
+
+
+def columna_estado(equipo_tipo: str):
+    """(tabla, columna de estado) del tipo de equipo, o None si no tiene estado"""
+    tabla = _modelos_equipo()[equipo_tipo].__table__
+    columna = next((tabla.c[nombre] for nombre in ATRIBUTOS_ESTADO if nombre in tabla.c), None)
+    return (tabla, columna) if columna is not None else None
+
+
+class DetectorTransiciones:
+    """
+    Contadores de fallos y éxitos consecutivos por equipo.
+
+    Los contadores viven en la memoria del proceso que sondea (el worker de
+    `flask sondear-equipos --continuo`); al reiniciarlo, un equipo necesita de
+    nuevo N fallos seguidos para marcarse como caído.
+    """
+
+    def __init__(self, fallos_para_caida: int = 3, exitos_para_recuperacion: int = 2):
+        if fallos_para_caida < 1 or exitos_para_recuperacion < 1:
+            raise ValueError("Los umbrales de histéresis deben ser al menos 1")
+        self.fallos_para_caida = fallos_para_caida
+        self.exitos_para_recuperacion = exitos_para_recuperacion
+        self._contadores: Dict[Clave, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_entorno(cls):
+        """Umbrales desde SONDEO_FALLOS_CAIDA y SONDEO_EXITOS_RECUPERACION"""
+        return cls(
+            fallos_para_caida=int(os.environ.get('SONDEO_FALLOS_CAIDA', 3)),
+            exitos_para_recuperacion=int(os.environ.get('SONDEO_EXITOS_RECUPERACION', 2))
+        )
+
+    def observar(self, resultados: List[Dict[str, Any]], simular: bool = False) -> List[Dict[str, Any]]:
+        """
+        Registra un sondeo y devuelve las transiciones confirmadas (a lo sumo una
+        por equipo). Cada resultado trae equipo_tipo, equipo_id, estado y alcanzable.
+
+        Args:
+            simular: Calcula las transiciones sin actualizar los contadores
+        """
+        transiciones = []
+        with self._lock:
+            for resultado in resultados:
+                clave = (resultado['equipo_tipo'], resultado['equipo_id'])
+                fallos, exitos = self._contadores.get(clave, (0, 0))
+                if resultado['alcanzable']:
+                    fallos, exitos = 0, exitos + 1
+                else:
+                    fallos, exitos = fallos + 1, 0
+                if not simular:
+                    self._contadores[clave] = (fallos, exitos)
+
+                nuevo = None
+                if resultado['estado'] == ESTADO_EN_LINEA and fallos >= self.fallos_para_caida:
+                    nuevo = ESTADO_CAIDO
+                elif resultado['estado'] == ESTADO_CAIDO and exitos >= self.exitos_para_recuperacion:
+                    nuevo = ESTADO_EN_LINEA
+                if nuevo is not None:
+                    transiciones.append({
+                        **resultado,
+                        'estado_anterior': resultado['estado'],
+                        'estado_nuevo': nuevo,
+                        'consecutivos': fallos or exitos
+                    })
+        return transiciones
+
+    def contadores(self, equipo_tipo: str, equipo_id: int) -> Dict[str, int]:
+        """Fallos y éxitos consecutivos del equipo en este proceso"""
+        fallos, exitos = self._contadores.get((equipo_tipo, equipo_id), (0, 0))
+        return {'fallos_consecutivos': fallos, 'exitos_consecutivos': exitos}
+
+    def olvidar(self, equipo_tipo: str = None, equipo_id: int = None):
+        """Reinicia los contadores de un equipo, o de todos"""
+        with self._lock:
+            if equipo_tipo is None:
+                self._contadores.clear()
+            else:
+                self._contadores.pop((equipo_tipo, equipo_id), None)
+
+
+detector_transiciones = DetectorTransiciones.desde_entorno()
+
+
+def aplicar_transiciones(session, transiciones: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Escribe las transiciones confirmadas de un sondeo: un UPDATE por tabla y
+    estado de destino (que exige el estado leído, para no pisar un cambio
+    manual concurrente), las filas de historial en un solo INSERT por lotes y
+    un único commit.
+
+    Returns:
+        Las transiciones efectivamente aplicadas
+    """
+    from models import HistorialEstadoEquipo
+
+    if not transiciones:
+        return []
+
+    grupos: Dict[tuple, List[Dict[str, Any]]] = {}
+    for transicion in transiciones:
+        clave = (transicion['equipo_tipo'], transicion['estado_anterior'], transicion['estado_nuevo'])
+        grupos.setdefault(clave, []).append(transicion)
+
+    devuelve_filas = getattr(session.get_bind().dialect, 'update_returning', False)
+    aplicadas = []
+    for (equipo_tipo, anterior, nuevo), grupo in grupos.items():
+        destino = columna_estado(equipo_tipo)
+        if destino is None:
+            continue
+        tabla, estado = destino
+        ids = [t['equipo_id'] for t in grupo]
+        sentencia = tabla.update().where(and_(tabla.c.id.in_(ids), estado == anterior)).values({estado.name: nuevo})
+        if devuelve_filas:
+            actualizados = {fila[0] for fila in session.execute(sentencia.returning(tabla.c.id))}
+        else:
+            session.execute(sentencia)
+            actualizados = set(ids)
+        aplicadas.extend(t for t in grupo if t['equipo_id'] in actualizados)
+
+    ahora = datetime.utcnow()
+    # Una sola descarga de la sesión: el ORM agrupa los INSERT y los listeners
+    # de historial (disponibilidad, eventos) se ejecutan para cada fila
+    session.add_all([
+        HistorialEstadoEquipo(
+            equipo_tipo=t['equipo_tipo'],
+            equipo_id=t['equipo_id'],
+            estado_anterior=t['estado_anterior'],
+            estado_nuevo=t['estado_nuevo'],
+            fecha_cambio=ahora,
+            motivo=(
+                f"Sondeo de alcanzabilidad: {'equipo responde' if t['alcanzable'] else (t.get('error') or t.get('resultado'))} "
+                f"({t['consecutivos']} sondeos consecutivos)"
+            ),
+            metadata_adicional={
+                'ip': t.get('ip'),
+                'puerto': t.get('puerto'),
+                'metodo': t.get('metodo'),
+                'resultado': t.get('resultado'),
+                'latencia_ms': t.get('latencia_ms'),
+                'consecutivos': t['consecutivos']
+            }
+        )
+        for t in aplicadas
+    ])
+    session.commit()
+    return aplicadas
+
+
+def _impacto(session, equipo_tipo: str, equipo_id: int) -> List[Dict[str, Any]]:
+    """Equipos afectados según FIA (solo el origen si el análisis no está disponible)"""
+    origen = [{'id': equipo_id, 'tipo': equipo_tipo, 'motivo_impacto': 'Falla Inicial'}]
+    try:
+        from models.fia_logic import analizar_impacto
+        return analizar_impacto(equipo_tipo, equipo_id, session) or origen
+    except Exception as e:
+        logger.warning(f"FIA no disponible para {equipo_tipo} {equipo_id}: {e}")
+        return origen
+
+
+def notificar_caidas(session, transiciones: List[Dict[str, Any]], notificador=None) -> Dict[str, Any]:
+    """
+    Ejecuta FIA y notifica las caídas confirmadas. Las caídas que ya están en el
+    impacto de otra caída del mismo sondeo no se notifican por separado: quedan
+    en el resumen de su causa raíz.
+    """
+    caidas = [t for t in transiciones if t['estado_nuevo'] == ESTADO_CAIDO]
+    if not caidas:
+        return {'causas_raiz': 0, 'equipos_afectados': 0}
+
+    if notificador is None:
+        from .notificacion_service import NotificacionService
+        notificador = NotificacionService(session)
+
+    prioridad = {tipo: indice for indice, tipo in enumerate(PRIORIDAD_CAUSA)}
+    caidas.sort(key=lambda t: (prioridad.get(t['equipo_tipo'], len(prioridad)), t['equipo_id']))
+
+    cubiertos, causas, afectados = set(), 0, 0
+    for caida in caidas:
+        clave = (caida['equipo_tipo'], caida['equipo_id'])
+        if clave in cubiertos:
+            continue
+        impacto = _impacto(session, *clave)
+        cubiertos.update((a.get('tipo'), a.get('id')) for a in impacto)
+        causas += 1
+        afectados += len(impacto)
+        try:
+            notificador.notify_impact(impacto, {
+                'titulo': f"{caida['equipo_tipo'].capitalize()} {caida['equipo_id']} sin conexión",
+                'descripcion': caida.get('error') or f"Sin respuesta en {caida['consecutivos']} sondeos consecutivos",
+                'severidad': 'alta',
+                'camara': f"{caida['equipo_tipo']} {caida['equipo_id']}",
+                'reportado_por': 'Sondeo automático',
+                'causa_raiz': {'tipo': caida['equipo_tipo'], 'id': caida['equipo_id']}
+            })
+        except Exception as e:
+            logger.error(f"Error notificando caída de {caida['equipo_tipo']} {caida['equipo_id']}: {e}")
+            session.rollback()
+
+    return {'causas_raiz': causas, 'equipos_afectados': afectados}
@@ -111,12 +111,95 @@
         });
     }
     
+    // Aplica un delta recibido por SistemaEventos sin volver a pedir todos los datos
+    function applyDelta(chart, label, delta) {
+        if (!chart) return;
+        
+        const labels = chart.data.labels;
+        const data = chart.data.datasets[0].data;
+        let index = labels.indexOf(label);
+        
+        if (index === -1) {
+            if (delta <= 0) return;
+            labels.push(label);
+            data.push(0);
+            index = labels.length - 1;
+        }
+        
+        data[index] = Math.max(0, data[index] + delta);
+        chart.update('none');
+    }
+    
+    // Función helper para crear gráfico de una serie de telemetría (/telemetria/...):
+    // promedio por punto con banda de mínimo y máximo
+    function createTelemetryChart(canvasId, serie, label = 'Promedio') {
+        const ctx = document.getElementById(canvasId);
+        if (!ctx) return null;
+        
+        const labels = serie.labels.map(l => new Date(l + 'Z').toLocaleString());
+        
+        return new Chart(ctx, {
+            type: 'line',
+            data: {
+                labels: labels,
+                datasets: [{
+                    label: 'Máximo',
+                    data: serie.maximo,
+                    borderWidth: 0,
+                    pointRadius: 0,
+                    backgroundColor: COLORS.primary + '22',
+                    fill: '+1'
+                }, {
+                    label: 'Mínimo',
+                    data: serie.minimo,
+                    borderWidth: 0,
+                    pointRadius: 0,
+                    fill: false
+                }, {
+                    label: label,
+                    data: serie.promedio,
+                    borderColor: COLORS.primary,
+                    pointRadius: 0,
+                    tension: 0.2,
+                    fill: false
+                }]
+            },
+            options: {
+                responsive: true,
+                animation: false,
+                interaction: {
+                    mode: 'index',
+                    intersect: false
+                },
+                plugins: {
+                    legend: {
+                        display: false
+                    }
+                }
+            }
+        });
+    }
+    
+    // Carga una serie de telemetría y la dibuja (reemplaza el gráfico anterior si se entrega)
+    async function loadTelemetry(canvasId, tipo, id, metrica, params = {}, chart = null) {
+        const query = new URLSearchParams(params).toString();
+        const response = await fetch(`/telemetria/${tipo}/${id}/${metrica}${query ? '?' + query : ''}`);
+        if (!response.ok) throw new Error(`Error ${response.status} cargando telemetría`);
+        
+        const serie = await response.json();
+        if (chart) chart.destroy();
+        return createTelemetryChart(canvasId, serie, metrica);
+    }
+    
     // Exportar funciones
     window.ChartUtils = {
         colors: COLORS,
         createDoughnutChart: createDoughnutChart,
         createBarChart: createBarChart,
-        createLineChart: createLineChart
+        createLineChart: createLineChart,
+        createTelemetryChart: createTelemetryChart,
+        loadTelemetry: loadTelemetry,
+        applyDelta: applyDelta
     };
     
 })();
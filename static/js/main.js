@@ -41,3 +41,94 @@
     });
     
 })();
+
+// Canal de eventos en tiempo real (SSE)
+// Reemplaza el polling de /stats y /alerts: el servidor envía solo los cambios.
+// Con workers sync el servidor no mantiene streams y se consulta /eventos/recientes
+(function() {
+    'use strict';
+    
+    const TIPOS = ['falla_creada', 'falla_actualizada', 'estado_equipo', 'mantenimiento_vencido', 'resync'];
+    const INTERVALO_POLLING = 5000;
+    const MAX_APLICADOS = 2000;
+    let fuente = null;
+    let temporizador = null;
+    
+    // Un evento puede llegar más de una vez (reconexión, cursor rezagado): aplicar cada id una sola vez
+    const aplicados = new Set();
+    
+    function despachar(tipo, datos, id) {
+        if (id) {
+            if (aplicados.has(id)) return;
+            aplicados.add(id);
+            if (aplicados.size > MAX_APLICADOS) {
+                aplicados.delete(aplicados.values().next().value);
+            }
+        }
+        document.dispatchEvent(new CustomEvent('sistema:' + tipo, { detail: datos }));
+    }
+    
+    function conectar(url) {
+        if (fuente || !window.EventSource || !url) return;
+        
+        // EventSource reconecta solo y envía Last-Event-ID ("cursor:id") para recuperar lo perdido
+        fuente = new EventSource(url);
+        TIPOS.forEach(tipo => {
+            fuente.addEventListener(tipo, event => {
+                let datos = {};
+                try {
+                    datos = JSON.parse(event.data);
+                } catch (e) {
+                    return;
+                }
+                despachar(tipo, datos, (event.lastEventId || '').split(':')[1]);
+            });
+        });
+    }
+    
+    function sondear(url) {
+        if (temporizador || !url) return;
+        let cursor = null;
+        
+        function ciclo() {
+            const consulta = cursor === null ? url : url + '?cursor=' + cursor;
+            fetch(consulta, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+                .then(respuesta => respuesta.ok ? respuesta.json() : null)
+                .then(datos => {
+                    if (!datos) return;
+                    datos.eventos.forEach(evento => despachar(evento.tipo, evento.datos, String(evento.id)));
+                    cursor = datos.cursor;
+                })
+                .catch(() => {})
+                .then(() => {
+                    if (temporizador) temporizador = setTimeout(ciclo, INTERVALO_POLLING);
+                });
+        }
+        
+        temporizador = setTimeout(ciclo, 0);
+    }
+    
+    function on(tipo, callback) {
+        document.addEventListener('sistema:' + tipo, event => callback(event.detail));
+    }
+    
+    window.SistemaEventos = {
+        conectar: conectar,
+        sondear: sondear,
+        on: on,
+        desconectar: function() {
+            if (fuente) {
+                fuente.close();
+                fuente = null;
+            }
+            if (temporizador) {
+                clearTimeout(temporizador);
+                temporizador = null;
+            }
+        }
+    };
+    
+    conectar(document.body.dataset.eventosStream);
+    sondear(document.body.dataset.eventosPolling);
+    
+})();